@@ -1,7 +1,12 @@
 import os, subprocess, re, sys
-from tenacity import retry, stop_after_attempt, wait_exponential
+from utils.llm_client import chat_messages, get_shared_client
+from utils.review_shards import pack_diff
+from utils.token_budget import prompt_budget
 
 ALLOWED = (".ts", ".tsx", ".js", ".jsx", ".json")
+# プロンプトに載せる diff のトークン上限（応答の max_tokens=1200 分はモデルのコンテキストから別に確保）
+DIFF_TOKENS = 3000
+MAX_COMPLETION_TOKENS = 1200
 
 def getenv_float(name: str, default: float) -> float:
     """Parse float env var safely, handling whitespace/empty and fallback to default if invalid."""
@@ -43,7 +48,6 @@ def filter_diff(diff: str) -> str:
         if line.startswith("diff --git"):
             m = re.search(r" b/(.+)$", line)
             current = m.group(1) if m else None
-            continue
         if current and current.endswith(ALLOWED):
             keep.append(line)
     return "\n".join(keep)
@@ -71,22 +75,17 @@ def build_prompt(diff_excerpt: str) -> str:
 {diff_excerpt}
 """
 
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(min=1, max=8))
 def call_openai(prompt: str) -> str:
-    from openai import OpenAI
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    # クライアントはプロセスで共有。429 / 5xx / 接続エラーの再試行（Retry-After 優先）もクライアントだけが行う
+    client = get_shared_client(api_key=os.getenv("OPENAI_API_KEY"))
     model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
     temperature = getenv_float("LLM_TEMPERATURE", 0.2)
-    resp = client.chat.completions.create(
+    return client.chat_sync(
+        chat_messages("You are a meticulous senior code reviewer for a medical care app.", prompt),
         model=model,
         temperature=temperature,
-        messages=[
-            {"role":"system","content":"You are a meticulous senior code reviewer for a medical care app."},
-            {"role":"user","content": prompt}
-        ],
-        max_tokens=1200
+        max_tokens=MAX_COMPLETION_TOKENS,
     )
-    return resp.choices[0].message.content.strip()
 
 def main():
     raw = git_diff()
@@ -94,7 +93,9 @@ def main():
     if not focused.strip():
         print("【AIレビュー】対象ファイルなし（*.ts,*.tsx,*.js,*.jsx,*.json）")
         return
-    prompt = build_prompt(focused[:12000])
+    model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+    budget = prompt_budget(model, int(getenv_float("AI_REVIEW_DIFF_TOKENS", DIFF_TOKENS)), reserve=MAX_COMPLETION_TOKENS)
+    prompt = build_prompt(pack_diff(focused, budget, model))
     try:
         report = call_openai(prompt)
         print(report)
@@ -5,6 +5,10 @@
 AutoGen-like multi-role review (Planner / Reviewer / TestDesigner)
 - PR差分を取得（PR時は GITHUB_BASE_REF/GITHUB_HEAD_REF、ローカルは HEAD~1...HEAD）
 - 3ロールを順に呼び分け（OpenAI API で疑似マルチエージェント）
+- 大きな差分はファイル/ハンク単位のシャードに分けて Planner/Reviewer を並行実行し、指摘をマージ
+  （AI_REVIEW_SHARDING=auto|on|off、AI_REVIEW_SHARD_TOKENS でシャードあたりのトークン予算）
+- Reviewer/TestDesigner はストリーミングで受け、JSON を逐次パースして指摘を届いた順にログへ出す（AI_REVIEW_STREAM=0 で無効）
+- diff はトークン数で予算管理（AI_REVIEW_DIFF_TOKENS。tiktoken が無ければ概算）
 - 収束結果を ai_review.json（構造化）と ai_review.md（要約）に出力
 - 例外/キー未設定時はソフトにフォールバックして exit 0（CIを落とさない）
 
@@ -15,14 +19,19 @@ TODO: 実装エージェント・ドキュメントエージェントを呼び
       - 既存の Planner/Reviewer/TestDesigner との統合を検討
 """
 
+import asyncio
 import json
 import os
-import re
+import shlex
 import subprocess
 import sys
 from datetime import datetime
 from textwrap import dedent
 
+from utils.json_stream import JsonStreamScanner, extract_json
+from utils.review_shards import merge_reviews, pack_diff, shard_diff
+from utils.token_budget import count_tokens, make_counter, prompt_budget
+
 # ---- Config ---------------------------------------------------------------
 
 def getenv_float(name: str, default: float) -> float:
@@ -55,6 +64,15 @@ MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 TEMP = getenv_float("LLM_TEMPERATURE", 0.2)
 SEED = getenv_int("LLM_SEED", 123)
 API_KEY = os.getenv("OPENAI_API_KEY")
+# 差分の分割レビュー: auto（DIFF_TOKENS を超える差分だけ分割）| on | off
+SHARDING = (os.getenv("AI_REVIEW_SHARDING") or "auto").strip().lower()
+# 1 プロンプトに載せる diff のトークン上限（モデルのコンテキスト長から応答分を引いた値で頭打ち）
+COMPLETION_RESERVE = 4096
+DIFF_TOKENS = prompt_budget(MODEL, getenv_int("AI_REVIEW_DIFF_TOKENS", 10000), reserve=COMPLETION_RESERVE)
+SHARD_TOKENS = prompt_budget(MODEL, getenv_int("AI_REVIEW_SHARD_TOKENS", 6000), reserve=COMPLETION_RESERVE)
+
+# Reviewer / TestDesigner の応答をストリーミングで受け、指摘が届いた順に CI ログへ出す
+STREAM = os.getenv("AI_REVIEW_STREAM", "1").strip().lower() not in ("0", "false", "no", "off")
 
 AI_JSON_PATH = "ai_review.json"
 AI_MD_PATH = "ai_review.md"
@@ -62,35 +80,85 @@ REPORT_PATH = "agent_report.txt"  # 既存CIのtee対象。なくてもOK
 
 # ---- OpenAI Client --------------------------------------------------------
 
+# 共有の非同期クライアント（keep-alive の接続プール + 同時数セマフォ）。接続確立はプロセスで 1 回
 try:
-    from openai import OpenAI
-    _has_openai = True
+    from utils.llm_client import chat_messages, get_shared_client
+    _has_client = True
 except Exception:
-    _has_openai = False
+    _has_client = False
+
+def _dry_run_text(system: str, user: str) -> str:
+    # オフライン/キーなしでもCIを落とさないための代替出力
+    return dedent(f"""
+    [DRY-RUN: No OpenAI] System={system[:80]}...
+    --- REQ ---
+    {user[:1200]}
+    --- NOTE ---
+    OPENAI_API_KEY が未設定、または LLM クライアントを読み込めません。
+    """).strip()
+
+def _chat_kwargs() -> dict:
+    return {"model": MODEL, "temperature": TEMP, "seed": SEED}
 
 def oai_chat(system: str, user: str) -> str:
     """Call OpenAI Chat Completions with safe defaults."""
-    if not _has_openai or not API_KEY:
-        # オフライン/キーなしでもCIを落とさないための代替出力
-        return dedent(f"""
-        [DRY-RUN: No OpenAI] System={system[:80]}...
-        --- REQ ---
-        {user[:1200]}
-        --- NOTE ---
-        OPENAI_API_KEY が未設定、または openai SDK が未インストールです。
-        """).strip()
-
-    client = OpenAI(api_key=API_KEY)
-    resp = client.chat.completions.create(
-        model=MODEL,
-        temperature=TEMP,
-        seed=SEED,
-        messages=[
-            {"role": "system", "content": system},
-            {"role": "user", "content": user}
-        ]
-    )
-    return resp.choices[0].message.content.strip()
+    if not _has_client or not API_KEY:
+        return _dry_run_text(system, user)
+    return get_shared_client(api_key=API_KEY).chat_sync(chat_messages(system, user), **_chat_kwargs())
+
+async def oai_chat_async(system: str, user: str) -> str:
+    """oai_chat の非同期版（シャードの並行レビュー用）"""
+    if not _has_client or not API_KEY:
+        return _dry_run_text(system, user)
+    return await get_shared_client(api_key=API_KEY).chat(chat_messages(system, user), **_chat_kwargs())
+
+def _log_item(label: str, key: str, item: dict) -> None:
+    """ストリーミング中に完成した指摘/テストを ai_review.md と同じ書式で即座に出す"""
+    if key == "findings":
+        lines = finding_markdown(item)
+    elif key == "tests":
+        lines = [test_markdown(item)]
+    else:
+        return
+    prefix = f"[{label}] " if label else ""
+    print(prefix + ("\n" + prefix).join(lines), flush=True)
+
+async def oai_chat_json_async(system: str, user: str, label: str = "") -> dict:
+    """
+    JSON を返すロールの呼び出し。ストリーミング時は最上位オブジェクトが閉じた時点で確定し、
+    それより前に閉じた findings / tests の要素はその場でログに出す。
+    """
+    if not STREAM or not _has_client or not API_KEY:
+        return extract_json(await oai_chat_async(system, user))
+    scanner = JsonStreamScanner(on_item=lambda key, item: _log_item(label, key, item))
+    client = get_shared_client(api_key=API_KEY)
+    # 閉じた後も最後まで読み切る（応答キャッシュは全文で保存される）
+    async for delta in client.stream_chat(chat_messages(system, user), **_chat_kwargs()):
+        scanner.feed(delta)
+    return scanner.result or extract_json(scanner.text)
+
+def oai_chat_json(system: str, user: str, label: str = "") -> dict:
+    if not STREAM or not _has_client or not API_KEY:
+        return extract_json(oai_chat(system, user))
+    return get_shared_client(api_key=API_KEY).run_sync(oai_chat_json_async(system, user, label))
+
+def llm_cache_stats() -> dict:
+    """応答キャッシュのヒット/ミス（ai_review.json に記録する）"""
+    cache = get_shared_client(api_key=API_KEY).cache if _has_client and API_KEY else None
+    if cache is None:
+        return {"enabled": False}
+    cache.save()
+    return {"enabled": True, **cache.stats.as_dict()}
+
+def run_concurrently(coros: list) -> list:
+    """コルーチンを並行実行し、入力順で結果（失敗は例外オブジェクト）を返す"""
+    if _has_client and API_KEY:
+        return get_shared_client(api_key=API_KEY).gather_sync(coros, return_exceptions=True)
+
+    async def _gather() -> list:
+        return list(await asyncio.gather(*coros, return_exceptions=True))
+
+    return asyncio.run(_gather())
 
 # ---- Git diff -------------------------------------------------------------
 
@@ -98,7 +166,12 @@ def _run(cmd: str) -> tuple[str, int]:
     p = subprocess.run(cmd, shell=True, text=True, capture_output=True)
     return (p.stdout if p.returncode == 0 else p.stderr), p.returncode
 
-def get_unified_diff() -> str:
+def get_unified_diff(base_ref: str = "") -> str:
+    """PR の unified diff を取得。base_ref 指定時は base_ref...HEAD（失敗時は空文字）"""
+    if base_ref:
+        out, rc = _run(f"git diff --unified=0 --no-color {shlex.quote(base_ref)}...HEAD")
+        return out if rc == 0 else ""
+
     base = os.getenv("GITHUB_BASE_REF", "").strip()
     head = os.getenv("GITHUB_HEAD_REF", "").strip()
 
@@ -111,13 +184,6 @@ def get_unified_diff() -> str:
     out, _ = _run("git diff --unified=0 --no-color HEAD~1...HEAD")
     return out
 
-def trim(text: str, limit: int = 40000) -> str:
-    if len(text) <= limit:
-        return text
-    head = text[: int(limit * 0.8)]
-    tail = text[-int(limit * 0.2):]
-    return head + "\n...\n" + tail
-
 # ---- Prompts --------------------------------------------------------------
 
 PLANNER_SYS = dedent("""
@@ -186,31 +252,24 @@ JSON 以外は出力しないこと。
 
 # ---- JSON helpers ---------------------------------------------------------
 
-def extract_json(text: str) -> dict:
-    """
-    LLM出力から最初のJSONオブジェクトを抽出してdict化。
-    \`\`\`json ... ``` や前後のテキストが混ざっていても頑張って拾う。
-    """
-    if not text:
-        return {}
-    # フェンス内
-    m = re.search(r"```json\s*(\{.*?\})\s*```", text, flags=re.S)
-    if m:
-        text = m.group(1)
-    else:
-        # フェンスなし → 最初の { ... } を貪欲すぎない形で
-        m2 = re.search(r"(\{.*\})", text, flags=re.S)
-        if m2:
-            text = m2.group(1)
-    try:
-        return json.loads(text)
-    except Exception:
-        return {}
-
 def write_file(path: str, content: str):
     with open(path, "w", encoding="utf-8") as f:
         f.write(content)
 
+def finding_markdown(it: dict, index: int = 0) -> list:
+    number = f"{index}. " if index else ""
+    lines = [
+        f"### {number}{it.get('title','(no title)')}  _({it.get('severity','n/a')})_",
+        f"- file: `{it.get('file','')}` lines: {it.get('lines','')}",
+        f"- details: {str(it.get('details','')).strip()}",
+    ]
+    if it.get("fix"):
+        lines.append(f"- fix: {str(it['fix']).strip()}")
+    return lines
+
+def test_markdown(t: dict) -> str:
+    return f"- **{t.get('name','(no name)')}**: {t.get('purpose','')}"
+
 def to_markdown(payload: dict) -> str:
     if not payload:
         return "_no ai_review.json generated_\n"
@@ -224,73 +283,102 @@ def to_markdown(payload: dict) -> str:
     if findings := payload.get("findings"):
         lines.append("## Top Findings")
         for i, it in enumerate(findings[:3], 1):
-            lines.append(f"### {i}. {it.get('title','(no title)')}  _({it.get('severity','n/a')})_")
-            lines.append(f"- file: `{it.get('file','')}` lines: {it.get('lines','')}")
-            lines.append(f"- details: {it.get('details','').strip()}")
-            if it.get("fix"):
-                lines.append(f"- fix: {it['fix'].strip()}")
+            lines.extend(finding_markdown(it, i))
             lines.append("")
     if tests := payload.get("tests"):
         lines.append("## Suggested Tests")
         for t in tests[:3]:
-            lines.append(f"- **{t.get('name','(no name)')}**: {t.get('purpose','')}")
+            lines.append(test_markdown(t))
         lines.append("")
     return "\n".join(lines).strip() + "\n"
 
-# ---- Main -----------------------------------------------------------------
-
-def main() -> int:
-    diff = get_unified_diff().strip()
-    if not diff:
-        # 差分なしでもJSONを出す（CIとSlackを安定させる）
-        empty_payload = {
-            "summary": "差分が見つからなかったため、レビュー対象はありませんでした。",
-            "overall_severity": "nit",
-            "findings": [],
-            "tests": [],
-            "ci_notes": ["差分なしのためスキップ"],
-            "slack_summary": "差分なし：レビュー対象なし。"
-        }
-        write_file(AI_JSON_PATH, json.dumps(empty_payload, ensure_ascii=False, indent=2))
-        write_file(AI_MD_PATH, to_markdown(empty_payload))
-        print("No diff detected. Wrote ai_review.json/ai_review.md")
-        return 0
-
-    diff_for_model = trim(diff, 40000)
+# ---- Review flow ----------------------------------------------------------
 
-    # ---- Planner
-    planner_user = dedent(f"""
+def planner_prompt(diff_text: str) -> str:
+    return dedent(f"""
     以下は PR の unified diff です。論点の"地図"を作ってください。
     \`\`\`diff
-    {diff_for_model}
+    {diff_text}
     \`\`\`
     """).strip()
-    planner_map = oai_chat(PLANNER_SYS, planner_user)
 
-    # ---- Reviewer
-    reviewer_user = dedent(f"""
+def reviewer_prompt(planner_map: str, diff_text: str) -> str:
+    return dedent(f"""
     これは Planner の論点です：
     ---
     {planner_map}
     ---
     同じ差分を参照して、指定スキーマどおり **JSONのみ** を出力してください。
     \`\`\`diff
-    {diff_for_model}
+    {diff_text}
     \`\`\`
     """).strip()
-    reviewer_out = oai_chat(REVIEWER_SYS, reviewer_user)
-    reviewer_json = extract_json(reviewer_out)
 
-    # ---- TestDesigner
-    test_user = dedent(f"""
+def test_prompt(reviewer_json: dict) -> str:
+    return dedent(f"""
     これは Reviewer の出力(JSON想定)です：
     ---
     {json.dumps(reviewer_json, ensure_ascii=False, indent=2)}
     ---
     指定スキーマどおり **JSONのみ** を出力してください。
     """).strip()
-    test_out = oai_chat(TEST_SYS, test_user)
-    test_json = extract_json(test_out)
+
+async def review_shard(shard: dict) -> dict:
+    """1 シャード分の Planner → Reviewer（シャード内では順序依存）"""
+    planner_map = await oai_chat_async(PLANNER_SYS, planner_prompt(shard["diff"]))
+    return await oai_chat_json_async(REVIEWER_SYS, reviewer_prompt(planner_map, shard["diff"]), f"shard {shard['index']}")
+
+def review_sharded(diff: str) -> tuple[dict, list]:
+    """
+    差分をファイル/ハンク単位のシャードに分けて並行レビューし、結果をマージ
+    戻り値: (マージ済み Reviewer JSON, ai_review.json に載せるシャード一覧)
+    """
+    shards = shard_diff(diff, SHARD_TOKENS, count_tokens=make_counter(MODEL))
+    results = run_concurrently([review_shard(shard) for shard in shards])
+    reviews, meta = [], []
+    for shard, result in zip(shards, results):
+        failed = isinstance(result, BaseException)
+        reviews.append({} if failed else result)
+        meta.append({
+            "index": shard["index"],
+            "files": shard["files"],
+            "tokens": shard["tokens"],
+            "truncated": shard["truncated"],
+            "status": f"error: {type(result).__name__}: {result}"[:200] if failed else "ok",
+        })
+    return merge_reviews(reviews, shards), meta
+
+# ---- Main -----------------------------------------------------------------
+
+def main() -> int:
+    diff = get_unified_diff().strip()
+    if not diff:
+        # 差分なしでもJSONを出す（CIとSlackを安定させる）
+        empty_payload = {
+            "summary": "差分が見つからなかったため、レビュー対象はありませんでした。",
+            "overall_severity": "nit",
+            "findings": [],
+            "tests": [],
+            "ci_notes": ["差分なしのためスキップ"],
+            "slack_summary": "差分なし：レビュー対象なし。"
+        }
+        write_file(AI_JSON_PATH, json.dumps(empty_payload, ensure_ascii=False, indent=2))
+        write_file(AI_MD_PATH, to_markdown(empty_payload))
+        print("No diff detected. Wrote ai_review.json/ai_review.md")
+        return 0
+
+    if SHARDING == "on" or (SHARDING == "auto" and count_tokens(diff, MODEL) > DIFF_TOKENS):
+        # ---- Planner/Reviewer をシャードごとに並行実行（大きな PR でも中間を切り捨てない）
+        reviewer_json, shards = review_sharded(diff)
+    else:
+        # ---- Planner → Reviewer
+        diff_for_model = pack_diff(diff, DIFF_TOKENS, MODEL)
+        planner_map = oai_chat(PLANNER_SYS, planner_prompt(diff_for_model))
+        reviewer_json = oai_chat_json(REVIEWER_SYS, reviewer_prompt(planner_map, diff_for_model), "Reviewer")
+        shards = []
+
+    # ---- TestDesigner（マージ済みの指摘に対して 1 回）
+    test_json = oai_chat_json(TEST_SYS, test_prompt(reviewer_json), "TestDesigner")
 
     # ---- Merge
     payload = {
@@ -301,6 +389,12 @@ def main() -> int:
         "ci_notes": test_json.get("ci_notes", []),
         "slack_summary": test_json.get("slack_summary", "AIレビューを実施しました。詳細はPRを参照してください。")
     }
+    payload["llm_cache"] = llm_cache_stats()
+    if shards:
+        payload["shards"] = shards
+        failed = [s["index"] for s in shards if s["status"] != "ok"]
+        if failed:
+            payload["ci_notes"] = list(payload["ci_notes"]) + [f"{len(failed)}/{len(shards)} シャードのレビューに失敗: {failed}"]
 
     write_file(AI_JSON_PATH, json.dumps(payload, ensure_ascii=False, indent=2))
     write_file(AI_MD_PATH, to_markdown(payload))
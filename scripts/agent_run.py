@@ -3,7 +3,8 @@
 """
 簡易マルチエージェント・オーケストレーター（最小実装）
 - .ai/agents_config.yaml を読み込み
-- Implementation → Review → Test → Doc の順で擬似実行
+- workflow.sequence / workflow.depends_on の依存グラフに沿って Implementation / Review / Test / Doc を擬似実行
+  （依存が揃ったステージは --jobs 並列、ステージ出力は入力ダイジェストでメモ化）
 - 成果物を artifacts/agent_reports/<timestamp>/ に保存
 - 引数: --topic / --path / --outdir / --verbose （--pr は将来用）
 
@@ -17,7 +18,6 @@ import glob
 import json
 import os
 import sys
-import time
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
@@ -112,128 +112,308 @@ def build_agents(cfg: Dict[str, Any]) -> Agents:
         i18n_reviewer=sp("i18n_reviewer", i18n) if i18n else None,
     )
 
-# 擬似LLM呼び出し（実運用時は httpx/openai/autogen 等に差し替え）
-class TooManyRequests(Exception):
-    pass
+# LLM 呼び出し（OPENAI_API_KEY があれば共有クライアント、無ければ擬似応答）
+try:
+    from utils.llm_client import LLMError, chat_messages, get_shared_client
+except Exception:
+    get_shared_client = None
+
+    class LLMError(Exception):
+        pass
 
-def llm_call(prompt: str, *, retry: int = 3, backoff: float = 1.0) -> str:
-    """HTTP 429 リトライを考慮したダミーLLM呼び出し。
-    現状はローカルで固定文面を返すため、例外は発生しない実装。
+# run_pipeline のプロンプトに載せる参照ファイル抜粋のトークン予算（1 ファイルあたり / 全体）
+EXCERPT_TOKENS = 80
+CONTEXT_TOKENS = 1500
+LLM_SYSTEM_PROMPT = "You are a pragmatic senior engineer working on a Next.js medical care app."
+
+
+def llm_call(prompt: str, *, spec: Optional[AgentSpec] = None, raise_on_error: bool = False) -> str:
+    """LLM 呼び出し。
+    再試行は共有クライアントだけが行う（429 / 5xx / 接続エラーを Retry-After を守って数回。他の 4xx は即失敗）。
+    レート制限は agents_config.yaml の rate_limits に従ってクライアントが送信前に待つ。
+    OPENAI_API_KEY 未設定（または utils.llm_client が読めない）ときはプロンプトをそのまま返す擬似実行。
+    spec を渡すとそのエージェントの model / temperature を使う。
+    raise_on_error=True なら失敗メッセージを返さずに例外を送出する（失敗を出力としてメモ化しないため）。
     """
-    for i in range(retry):
-        try:
-            # ここで実際の API 呼び出しに差し替え可能
-            return prompt.strip()[:1000]
-        except TooManyRequests:
-            time.sleep(backoff * (2 ** i))
-    # 失敗時でもユーザ向けのメッセージで返す
-    return "LLM呼び出しに失敗しました（429過多）。時間をおいて再実行してください。"
+    if get_shared_client is None or not os.getenv("OPENAI_API_KEY"):
+        return prompt.strip()[:1000]
+    client = get_shared_client()
+    options: Dict[str, Any] = {"model": spec.model, "temperature": spec.temperature} if spec else {}
+    try:
+        return client.chat_sync(chat_messages(LLM_SYSTEM_PROMPT, prompt), **options)
+    except LLMError as e:
+        if raise_on_error:
+            raise
+        # 失敗時でもユーザ向けのメッセージで返す
+        return f"LLM呼び出しに失敗しました: {e}"
 
 # 各エージェントのアウトプットを合成
 
-def run_db_modeler(agents: Agents, verbose: bool = False) -> str:
-    """データベースモデル解析エージェントの実行"""
+def run_db_modeler(
+    agents: Agents,
+    verbose: bool = False,
+    max_file_bytes: Optional[int] = None,
+    jsonl_path: Optional[Path] = None,
+    markdown: bool = True,
+    use_cache: bool = True,
+    jobs: int = 1,
+    graph_dir: Optional[Path] = None,
+    schema_drift: bool = False,
+) -> Optional[str]:
+    """データベースモデル解析エージェントの実行
+    - max_file_bytes: これより大きいスキーマ/エンティティはパースせずレポートに記録（None: 既定値）
+    - use_cache: SQL マイグレーション再生結果 / TypeORM エンティティ解析結果のキャッシュ
+    - jobs: TypeORM エンティティ解析の並列プロセス数
+    - jsonl_path 指定時はスキーマ / エンティティごとのレコードを解析が終わり次第 JSON Lines に書き出す（集計は最後の行）。markdown=False なら Markdown は作らず None を返す
+    - schema_drift: schemas/*.ts と SQL カラムのずれも調べる（トピックに drift を含むとき）
+    - graph_dir 指定時はリレーショングラフを db-relations.dot / db-relations.json として書き出す
+    """
     try:
-        # db_model_utils をインポート
-        sys.path.insert(0, str(SCRIPT_DIR / "utils"))
-        from db_model_utils import detect_database_infrastructure, generate_db_analysis_report
+        # db_model_utils をインポート（utils 内の相対 import を解決するためパッケージ経由）
+        from utils.db_model_utils import DbReportBuilder, iter_db_scan_records
+        from utils.io import write_jsonl, write_text
+        from utils.relation_graph import RelationGraph
         
         if verbose:
             print("[db_modeler] Analyzing database infrastructure...")
         
-        detection_result = detect_database_infrastructure()
-        report = generate_db_analysis_report(detection_result)
+        options: Dict[str, Any] = {}
+        if max_file_bytes is not None:
+            options["max_file_bytes"] = max_file_bytes
+        # スキーマ / エンティティの解析が終わるたびに JSONL へ書き、Markdown は同じレコード列から組み立てる
+        builder = DbReportBuilder()
+        records = builder.passthrough(iter_db_scan_records(
+            use_cache=use_cache, jobs=jobs, schema_drift=schema_drift, **options
+        ))
+        if jsonl_path is not None:
+            count = write_jsonl(jsonl_path, records)
+            if verbose:
+                print(f"[db_modeler] Wrote {count} records to {jsonl_path}")
+        else:
+            for _ in records:
+                pass
+        report = builder.render() if markdown else None
+        
+        summary = builder.summary or {}
+        counts = builder.counts
+        if graph_dir is not None and summary.get("relation_graph"):
+            graph = RelationGraph.from_dict(builder.relation_graph_data())
+            write_text(graph_dir / "db-relations.dot", graph.to_dot())
+            write_text(graph_dir / "db-relations.json", graph.to_json())
         
         if verbose:
-            print(f"[db_modeler] Found Prisma: {detection_result['has_prisma']}, TypeORM: {detection_result['has_typeorm']}")
+            print(f"[db_modeler] Found Prisma: {summary.get('has_prisma')}, TypeORM: {summary.get('has_typeorm')}")
+            if summary.get("typeorm_cache_stats"):
+                print(f"[db_modeler] Entity cache: {summary['typeorm_cache_stats']}")
+            if summary.get("has_sql_migrations"):
+                print(f"[db_modeler] SQL migrations: {len(summary['sql_migrations_applied'])} applied, "
+                      f"{len(summary['sql_migrations_replayed'])} replayed, {counts.get('sql_table', 0)} tables")
+            if summary.get("index_coverage"):
+                print(f"[db_modeler] Index coverage: {counts.get('index_query', 0)} queries, "
+                      f"{counts.get('index_missing', 0)} missing, {counts.get('index_redundant', 0)} redundant")
+            if summary.get("schema_drift"):
+                print(f"[db_modeler] Schema drift: {counts.get('schema_drift', 0)} pairs, "
+                      f"{sum(builder.drift_severities.values())} findings, "
+                      f"cache {summary['schema_drift']['cache_stats']}")
+            if summary.get("rls_policies"):
+                print(f"[db_modeler] RLS policies: {summary['rls_policies']['policies']} analyzed, "
+                      f"{counts.get('rls_finding', 0)} findings, {counts.get('rls_unindexed', 0)} unindexed predicates")
+            if summary.get("relation_graph"):
+                print(f"[db_modeler] Relation graph: {counts.get('relation_edge', 0)} relations, "
+                      f"{counts.get('relation_cycle', 0)} cycles, "
+                      f"{counts.get('unindexed_foreign_key', 0)} unindexed foreign keys")
         
         return report
     except Exception as e:
         return f"# Database Model Analysis Report\n\n**Error:** {type(e).__name__}: {e}\n\nPlease ensure db_model_utils.py is available."
 
 
-def run_i18n_reviewer(agents: Agents, verbose: bool = False) -> str:
-    """国際化レビューエージェントの実行"""
+def run_i18n_reviewer(
+    agents: Agents,
+    verbose: bool = False,
+    jobs: int = 1,
+    use_cache: bool = True,
+    base_ref: str = "",
+    full: bool = False,
+    max_file_bytes: Optional[int] = None,
+    jsonl_path: Optional[Path] = None,
+    markdown: bool = True,
+) -> Optional[str]:
+    """国際化レビューエージェントの実行
+    - jobs: 抽出の並列プロセス数, use_cache: 抽出結果キャッシュ
+    - base_ref 指定時は base_ref...HEAD の変更行のみをスキャン（full=True で全体スキャン）
+    - max_file_bytes: これより大きいファイルはスキャンせずレポートに記録（None: 既定値）
+    - jsonl_path 指定時はファイルごとの検出を抽出が終わり次第 JSON Lines に書き出す（集計は最後の行）。markdown=False なら Markdown は作らず None を返す
+    """
     try:
-        # i18n_utils をインポート
-        sys.path.insert(0, str(SCRIPT_DIR / "utils"))
-        from i18n_utils import detect_i18n_infrastructure, generate_i18n_analysis_report
+        # i18n_utils をインポート（utils 内の相対 import を解決するためパッケージ経由）
+        from utils.i18n_utils import I18nReportBuilder, iter_i18n_scan_records
+        from utils.io import write_jsonl
+        
+        changed_lines = None
+        if base_ref and not full:
+            from agent_review_autogen import get_unified_diff
+            from utils.diff_scope import parse_changed_lines
+            
+            diff = get_unified_diff(base_ref)
+            if diff.strip():
+                changed_lines = parse_changed_lines(diff)
+            elif verbose:
+                print(f"[i18n_reviewer] Could not get diff against {base_ref}; falling back to full scan")
         
         if verbose:
-            print("[i18n_reviewer] Analyzing i18n infrastructure and hardcoded texts...")
+            mode = "full" if changed_lines is None else f"diff vs {base_ref} ({len(changed_lines)} files)"
+            print(f"[i18n_reviewer] Analyzing i18n infrastructure and hardcoded texts... (jobs={jobs}, scope={mode})")
         
-        detection_result = detect_i18n_infrastructure()
-        report = generate_i18n_analysis_report(detection_result)
+        options: Dict[str, Any] = {}
+        if max_file_bytes is not None:
+            options["max_file_bytes"] = max_file_bytes
+        # ファイルの抽出が終わるたびに JSONL へ書き、Markdown は同じレコード列から組み立てる
+        builder = I18nReportBuilder()
+        records = builder.passthrough(iter_i18n_scan_records(
+            jobs=jobs, use_cache=use_cache, changed_lines=changed_lines, **options
+        ))
+        if jsonl_path is not None:
+            count = write_jsonl(jsonl_path, records)
+            if verbose:
+                print(f"[i18n_reviewer] Wrote {count} records to {jsonl_path}")
+        else:
+            for _ in records:
+                pass
+        report = builder.render() if markdown else None
         
         if verbose:
-            total_texts = sum(len(texts) for texts in detection_result['hardcoded_texts'].values())
-            print(f"[i18n_reviewer] Found {total_texts} hardcoded Japanese strings in {len(detection_result['hardcoded_texts'])} files")
+            summary = builder.summary or {}
+            print(f"[i18n_reviewer] Found {summary.get('hardcoded_strings', 0)} hardcoded Japanese strings in {summary.get('files_with_hardcoded_text', 0)} files")
+            if summary.get("cache_stats"):
+                print(f"[i18n_reviewer] Scan cache: {summary['cache_stats']}")
+            if builder.skipped_count:
+                print(f"[i18n_reviewer] Skipped {builder.skipped_count} file(s) (size limit / unreadable)")
         
         return report
     except Exception as e:
         return f"# i18n Analysis Report\n\n**Error:** {type(e).__name__}: {e}\n\nPlease ensure i18n_utils.py is available."
 
 
-def run_pipeline(agents: Agents, topic: str, files: List[Tuple[str, str]], verbose: bool = False) -> Dict[str, str]:
-    """Implementation→Review→Test→Doc の順で擬似生成を行い、各レポート文字列を返す。"""
+# 標準パイプラインの各ステージ: (出力ファイル, Agents の属性, プロンプトのテンプレート)
+# テンプレートの {implementation_agent} などは依存ステージの出力に置き換わる（依存に無ければ空）
+PIPELINE_STAGES: Dict[str, Tuple[str, str, str]] = {
+    "implementation_agent": ("implementation.md", "implementation", """
+[Implementation Agent]
+タスク: {topic}
+参照ファイル:
+{ctx}
+要求: 変更方針、影響範囲、最小パッチの案を簡潔に（3-7項目）。
+"""),
+    "review_agent": ("review.md", "review", """
+[Review Agent]
+対象: Implementationの案
+観点: 正確性/セキュリティ/パフォーマンス/アクセシビリティ/一貫性
+出力: 指摘リスト（severity付与）と簡易パッチ案の要点
+---
+{implementation_agent}
+"""),
+    "test_agent": ("test-plan.md", "test", """
+[Test Agent]
+目的: バグ再発防止の最小テスト設計（Vitest/RTL想定）
+出力: テスト項目（3-5件）と擬似コード断片
+---
+{review_agent}
+"""),
+    "doc_agent": ("doc.md", "doc", """
+[Doc Agent]
+利用者向けの変更概要と使い方（セットアップ/操作手順/注意点）を簡潔に記述
+---
+{implementation_agent}
+{test_agent}
+"""),
+}
+
+
+class _Blank(dict):
+    def __missing__(self, key: str) -> str:
+        return ""
+
+
+def run_pipeline(
+    agents: Agents,
+    topic: str,
+    files: List[Tuple[str, str]],
+    verbose: bool = False,
+    cfg: Optional[Dict[str, Any]] = None,
+    jobs: int = 1,
+    use_cache: bool = True,
+) -> Dict[str, str]:
+    """workflow の依存グラフに沿って各ステージを擬似生成し、各レポート文字列を返す。
+    - 依存が揃ったステージは jobs 並列で同時に実行
+    - use_cache: ステージ出力を入力ダイジェストでメモ化（.cache/agents/pipeline-stages.json）
+    """
+    from utils.stage_graph import PIPELINE_MEMO_PATH, load_stage_graph, run_stage_graph
+    from utils.llm_cache import ResponseCache
+    from utils.token_budget import pack_items, truncate_to_tokens
+
+    # 参照ファイルの抜粋はトークン数で予算管理（先に並ぶファイルほど優先）
+    model = agents.implementation.model
     file_summaries = []
-    for fp, content in files[:10]:
-        trimmed = content[:400].replace("\n", " ")
-        file_summaries.append(f"- {fp}: {trimmed[:200]}{'...' if len(trimmed)>200 else ''}")
-
-    ctx = "\n".join(file_summaries) if file_summaries else "(no files matched)"
-
-    impl_prompt = f"""
-    [Implementation Agent]
-    タスク: {topic}
-    参照ファイル:
-    {ctx}
-    要求: 変更方針、影響範囲、最小パッチの案を簡潔に（3-7項目）。
-    """.strip()
-    implementation_md = llm_call(impl_prompt)
-
-    rev_prompt = f"""
-    [Review Agent]
-    対象: Implementationの案
-    観点: 正確性/セキュリティ/パフォーマンス/アクセシビリティ/一貫性
-    出力: 指摘リスト（severity付与）と簡易パッチ案の要点
-    ---
-    {implementation_md}
-    """.strip()
-    review_md = llm_call(rev_prompt)
-
-    test_prompt = f"""
-    [Test Agent]
-    目的: バグ再発防止の最小テスト設計（Vitest/RTL想定）
-    出力: テスト項目（3-5件）と擬似コード断片
-    ---
-    {review_md}
-    """.strip()
-    test_plan_md = llm_call(test_prompt)
-
-    doc_prompt = f"""
-    [Doc Agent]
-    利用者向けの変更概要と使い方（セットアップ/操作手順/注意点）を簡潔に記述
-    ---
-    {implementation_md}
-    {test_plan_md}
-    """.strip()
-    doc_md = llm_call(doc_prompt)
-
-    summary = "\n".join([
+    for rank, (fp, content) in enumerate(files):
+        excerpt = truncate_to_tokens(" ".join(content.split()), EXCERPT_TOKENS, model, mark="...")
+        file_summaries.append({"text": f"- {fp}: {excerpt}", "priority": -rank})
+    packed = pack_items(file_summaries, CONTEXT_TOKENS, model)
+
+    ctx = packed["text"] if file_summaries else "(no files matched)"
+
+    graph = load_stage_graph(cfg or {})
+    unknown = [name for name in graph if name not in PIPELINE_STAGES]
+    graph = {name: [d for d in deps if d in PIPELINE_STAGES] for name, deps in graph.items() if name in PIPELINE_STAGES}
+
+    def render(name: str, inputs: Dict[str, str]) -> str:
+        return PIPELINE_STAGES[name][2].format_map(_Blank(topic=topic, ctx=ctx, **inputs)).strip()
+
+    def spec_of(name: str) -> AgentSpec:
+        return getattr(agents, PIPELINE_STAGES[name][1])
+
+    def run_stage(name: str, inputs: Dict[str, str]) -> str:
+        # 失敗は例外のまま返し、ステージを error（下流は skipped）にする。失敗文をメモ化・下流に渡さない
+        return llm_call(render(name, inputs), spec=spec_of(name), raise_on_error=True)
+
+    # テンプレート・タスク・参照ファイル・モデル設定が同じで上流出力も同じならメモを使う
+    # （擬似実行の出力を実 API 実行で使い回さないよう、呼び出し先もキーに含める）
+    llm_target = os.getenv("OPENAI_BASE_URL", "openai") if get_shared_client is not None and os.getenv("OPENAI_API_KEY") else "dry-run"
+    stage_keys = {
+        name: json.dumps([PIPELINE_STAGES[name][2], topic, ctx, spec_of(name).model, spec_of(name).temperature, llm_target],
+                         ensure_ascii=False)
+        for name in graph
+    }
+    memo = ResponseCache.load(PIPELINE_MEMO_PATH, max_entries=200) if use_cache else None
+    result = run_stage_graph(graph, run_stage, stage_keys=stage_keys, jobs=jobs, memo=memo)
+    if memo is not None:
+        memo.save()
+
+    summary_lines = [
         "# Agent Run Summary",
         f"- topic: {topic}",
         f"- files: {len(files)} matched",
-        "- sequence: Implementation → Review → Test → Doc",
-    ])
-
-    return {
-        "implementation.md": implementation_md,
-        "review.md": review_md,
-        "test-plan.md": test_plan_md,
-        "doc.md": doc_md,
-        "summary.md": summary,
-    }
+        f"- stages: {' → '.join(result['order'])} (wall {result['wall_seconds']:.2f}s, jobs={jobs})",
+    ]
+    if unknown:
+        summary_lines.append(f"- ignored stages (no prompt defined): {', '.join(unknown)}")
+    cache = get_shared_client().cache if get_shared_client is not None and os.getenv("OPENAI_API_KEY") else None
+    if cache is not None:
+        stats = cache.stats.as_dict()
+        summary_lines.append(f"- llm cache: {stats['hits']} hits / {stats['misses']} misses")
+        if verbose:
+            print(f"[run_pipeline] LLM response cache: {stats}")
+    summary_lines += ["", "## Stages", "", "| stage | depends on | status | time (s) |", "|---|---|---|---|"]
+    for stage in result["stages"]:
+        status = stage["status"] + (f" ({stage['error']})" if stage.get("error") else "")
+        summary_lines.append(f"| {stage['name']} | {', '.join(stage['deps']) or '-'} | {status} | {stage['seconds']:.2f} |")
+        if verbose:
+            print(f"[run_pipeline] {stage['name']}: {status} {stage['seconds']:.2f}s")
+    summary = "\n".join(summary_lines)
+
+    reports = {PIPELINE_STAGES[name][0]: output for name, output in result["outputs"].items()}
+    reports["summary.md"] = summary
+    return reports
 
 # ------------- CLI ------------------------------------------
 
@@ -246,6 +426,18 @@ def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     p.add_argument("--outdir", type=str, default="",
                    help="成果物の出力先（デフォルト: artifacts/agent_reports/<ts>）")
     p.add_argument("--verbose", action="store_true", help="詳細ログ")
+    p.add_argument("--jobs", type=int, default=1,
+                   help="i18n スキャン / TypeORM エンティティ解析の並列プロセス数、標準パイプラインの同時実行ステージ数（1: 逐次, 0: CPU数）")
+    p.add_argument("--no-cache", action="store_true",
+                   help="解析結果キャッシュ（.cache/agents: i18n 抽出 / SQL マイグレーション再生 / TypeORM エンティティ / パイプラインのステージ出力）を使わない")
+    p.add_argument("--base-ref", type=str, default="",
+                   help="i18n スキャンを <base-ref>...HEAD の変更行に限定（例: origin/main）")
+    p.add_argument("--full", action="store_true",
+                   help="--base-ref 指定時でもプロジェクト全体をスキャン")
+    p.add_argument("--max-file-kb", type=int, default=None,
+                   help="これより大きいソース/スキーマはスキャンせずレポートに記録（既定: 2048, 0: 無制限）")
+    p.add_argument("--format", choices=("md", "jsonl", "both"), default="md",
+                   help="db/i18n 解析の出力形式（jsonl: 全件を 1 行 1 レコードで *-findings.jsonl に出力）")
     p.add_argument("--pr", type=int, default=None, help="将来用: PR番号（未使用）")
     return p.parse_args(argv)
 
@@ -267,14 +459,22 @@ def main(argv: Optional[List[str]] = None) -> int:
         outdir = make_report_dir(base)
         
         outputs: Dict[str, str] = {}
+        max_file_bytes = args.max_file_kb * 1024 if args.max_file_kb is not None else None
+        want_markdown = args.format in ("md", "both")
+        want_jsonl = args.format in ("jsonl", "both")
         
         # db-modeler専用実行
-        if "db-model" in topic_lower or "database" in topic_lower or "schema" in topic_lower:
+        if "db-model" in topic_lower or "database" in topic_lower or "schema" in topic_lower or "drift" in topic_lower:
             if args.verbose:
                 print("[agent_run] Detected database modeling request")
             if agents.db_modeler:
-                report = run_db_modeler(agents, verbose=args.verbose)
-                outputs["db-analysis.md"] = report
+                report = run_db_modeler(agents, verbose=args.verbose, max_file_bytes=max_file_bytes,
+                                        use_cache=not args.no_cache, jobs=args.jobs, graph_dir=outdir,
+                                        schema_drift="drift" in topic_lower,
+                                        jsonl_path=outdir / "db-findings.jsonl" if want_jsonl else None,
+                                        markdown=want_markdown)
+                if report is not None:
+                    outputs["db-analysis.md"] = report
                 outputs["summary.md"] = f"# Agent Run Summary\n\n- topic: {args.topic}\n- agent: db_modeler\n- timestamp: {datetime.utcnow().isoformat()}"
             else:
                 print("[WARNING] db_modeler not configured in agents_config.yaml")
@@ -285,14 +485,20 @@ def main(argv: Optional[List[str]] = None) -> int:
             if args.verbose:
                 print("[agent_run] Detected i18n review request")
             if agents.i18n_reviewer:
-                report = run_i18n_reviewer(agents, verbose=args.verbose)
-                outputs["i18n-analysis.md"] = report
+                report = run_i18n_reviewer(agents, verbose=args.verbose, jobs=args.jobs,
+                                           use_cache=not args.no_cache,
+                                           base_ref=args.base_ref, full=args.full,
+                                           max_file_bytes=max_file_bytes,
+                                           jsonl_path=outdir / "i18n-findings.jsonl" if want_jsonl else None,
+                                           markdown=want_markdown)
+                if report is not None:
+                    outputs["i18n-analysis.md"] = report
                 outputs["summary.md"] = f"# Agent Run Summary\n\n- topic: {args.topic}\n- agent: i18n_reviewer\n- timestamp: {datetime.utcnow().isoformat()}"
             else:
                 print("[WARNING] i18n_reviewer not configured in agents_config.yaml")
                 return 1
         
-        # 通常のパイプライン実行 (Implementation → Review → Test → Doc)
+        # 通常のパイプライン実行（workflow の依存グラフ: 既定は Implementation → Review → Test → Doc）
         else:
             if args.verbose:
                 print("[agent_run] Running standard pipeline")
@@ -303,7 +509,8 @@ def main(argv: Optional[List[str]] = None) -> int:
                 files = read_files_by_glob(args.path, limit=50)
 
             # 実行
-            outputs = run_pipeline(agents, args.topic or "(no topic)", files, verbose=args.verbose)
+            outputs = run_pipeline(agents, args.topic or "(no topic)", files, verbose=args.verbose,
+                                   cfg=cfg, jobs=args.jobs, use_cache=not args.no_cache)
 
         # 保存
         for name, content in outputs.items():
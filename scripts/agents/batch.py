@@ -0,0 +1,137 @@
+"""
+dispatcher のバッチモード（python -m scripts.agents.dispatcher --batch tasks.jsonl --jobs 4）
+- 入力は 1 行 1 件の AgentTask（task, payload, constraints）。空行は飛ばし、index は空行を除いた 0 始まりの通し番号
+- "task" の無い行は --task で指定したエージェントの payload として扱う（requests.jsonl のような記録をそのまま流せる）
+- 同時に走らせるのは jobs 件まで（スレッドかプロセス）。各ワーカーは結果をパイプで返す
+- constraints.timeout_seconds（または timeout、無ければ --timeout）を過ぎたタスクは ok=false の結果にする
+  プロセスなら kill、スレッドは止められないので待たずに見捨てる（daemon なので終了は妨げない）
+- 結果は完了順に 1 行ずつ {"index", "task", "seconds", ("id"), **AgentResult}
+"""
+import json
+import multiprocessing
+import threading
+import time
+from collections import deque
+from multiprocessing.connection import Connection, wait
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .dispatcher import error_result, preload_agents, run_task
+
+EXECUTORS = ("thread", "process")
+
+
+def read_tasks(lines: Iterable[str], default_task: str = "") -> List[Dict[str, Any]]:
+    """JSONL を AgentTask の一覧にする（読めない行は "error" を持つ要素になり、実行せずに失敗として返す）"""
+    tasks = []
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            tasks.append({"error": f"invalid JSON: {e}"})
+            continue
+        if isinstance(record, dict) and "task" not in record and default_task:
+            record = {"task": default_task, "payload": record, "constraints": {}}
+        tasks.append(record)
+    return tasks
+
+
+def task_timeout(task: Any, default: Optional[float] = None) -> Optional[float]:
+    constraints = task.get("constraints") if isinstance(task, dict) else None
+    if isinstance(constraints, dict):
+        for key in ("timeout_seconds", "timeout"):
+            value = constraints.get(key)
+            if isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0:
+                return float(value)
+    return default if default and default > 0 else None
+
+
+def _execute(task: Any, conn: Connection) -> None:
+    try:
+        result = run_task(task)
+    except Exception as e:
+        result = error_result(f"{type(e).__name__}: {e}")
+    try:
+        conn.send(result)
+    except (BrokenPipeError, OSError):
+        # 時間切れで親が受け取りをやめた
+        pass
+    finally:
+        conn.close()
+
+
+def run_batch(
+    tasks: List[Any],
+    jobs: int = 4,
+    executor: str = "thread",
+    default_timeout: Optional[float] = None,
+) -> Iterator[Dict[str, Any]]:
+    """タスクを最大 jobs 件ずつ並行に実行し、終わった順に結果を返す"""
+    if executor not in EXECUTORS:
+        raise ValueError(f"executor must be one of {EXECUTORS}")
+    jobs = max(1, jobs)
+    if executor == "process":
+        # fork なら子プロセスは import 済みのエージェントを引き継ぐ
+        preload_agents()
+    pending: Deque[Tuple[int, Any]] = deque(enumerate(tasks))
+    # 受信側のパイプ -> (index, task, 開始時刻, 期限, ワーカー)
+    running: Dict[Connection, Tuple[int, Any, float, Optional[float], Any]] = {}
+
+    def record(index: int, task: Any, started: float, result: Dict[str, Any]) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"index": index, "task": task.get("task") if isinstance(task, dict) else None,
+                               "seconds": round(time.perf_counter() - started, 4)}
+        if isinstance(task, dict) and "id" in task:
+            out["id"] = task["id"]
+        out.update(result)
+        return out
+
+    try:
+        while pending or running:
+            while pending and len(running) < jobs:
+                index, task = pending.popleft()
+                started = time.perf_counter()
+                if isinstance(task, dict) and "error" in task and "task" not in task:
+                    yield record(index, task, started, error_result(task["error"]))
+                    continue
+                reader, writer = multiprocessing.Pipe(duplex=False)
+                if executor == "process":
+                    worker: Any = multiprocessing.Process(target=_execute, args=(task, writer), daemon=True)
+                else:
+                    worker = threading.Thread(target=_execute, args=(task, writer), daemon=True)
+                worker.start()
+                if executor == "process":
+                    # 子プロセス側の送信端だけを残す（子が死んだら EOF になるように）
+                    writer.close()
+                limit = task_timeout(task, default_timeout)
+                running[reader] = (index, task, started, started + limit if limit else None, worker)
+            if not running:
+                continue
+            deadlines = [entry[3] for entry in running.values() if entry[3] is not None]
+            remaining = max(0.0, min(deadlines) - time.perf_counter()) if deadlines else None
+            for reader in wait(list(running), timeout=remaining):
+                index, task, started, _, worker = running.pop(reader)
+                try:
+                    result = reader.recv()
+                except (EOFError, OSError):
+                    code = getattr(worker, "exitcode", None)
+                    result = error_result(f"worker exited without a result (exit code {code})")
+                reader.close()
+                if executor == "process":
+                    worker.join()
+                yield record(index, task, started, result)
+            now = time.perf_counter()
+            for reader in [r for r, entry in running.items() if entry[3] is not None and entry[3] <= now]:
+                index, task, started, deadline, worker = running.pop(reader)
+                if executor == "process":
+                    worker.kill()
+                    worker.join()
+                reader.close()
+                yield record(index, task, started, error_result(f"timeout after {deadline - started:g}s"))
+    finally:
+        # 呼び出し側が途中でやめたときも子プロセスを残さない
+        for reader, (_, _, _, _, worker) in running.items():
+            if executor == "process":
+                worker.kill()
+                worker.join()
+            reader.close()
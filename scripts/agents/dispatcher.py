@@ -1,22 +1,94 @@
 import importlib
 import json
 import argparse
+import sys
+from typing import Any, Callable, Dict
 from .registry import AGENTS
 from .validate import ensure_valid
 
+# task -> 読み込み済みのエージェント関数（常駐モードでは 2 回目以降 import しない）
+_LOADED: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {}
+
 def load_agent(task: str):
+    if task in _LOADED:
+        return _LOADED[task]
     if task not in AGENTS:
         raise ValueError(f"Unknown task: {task}")
     module_path, func_name = AGENTS[task].split(":")
     module = importlib.import_module(module_path)
-    return getattr(module, func_name)
+    _LOADED[task] = getattr(module, func_name)
+    return _LOADED[task]
+
+def preload_agents() -> Dict[str, str]:
+    """レジストリの全エージェントを import しておく。読み込めなかった task -> エラー文"""
+    failed = {}
+    for task in AGENTS:
+        try:
+            load_agent(task)
+        except Exception as e:
+            failed[task] = f"{type(e).__name__}: {e}"
+    return failed
+
+def run_task(task: Dict[str, Any]) -> Dict[str, Any]:
+    """AgentTask（task, payload, constraints）を実行し、検証済みの AgentResult を返す"""
+    if not isinstance(task, dict) or not isinstance(task.get("task"), str):
+        raise ValueError("task must be an object with a string 'task'")
+    payload = task.get("payload") or {}
+    if not isinstance(payload, dict):
+        raise ValueError("payload must be an object")
+    return ensure_valid(load_agent(task["task"])(payload))
+
+def error_result(message: str) -> Dict[str, Any]:
+    return {"ok": False, "summary": message, "artifacts": [], "next_actions": []}
 
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument("--task", required=True)
+    parser.add_argument("--task")
     parser.add_argument("--payload", default="{}")
+    parser.add_argument("--serve", action="store_true",
+                        help="stay resident: read NDJSON AgentTasks on stdin, write one AgentResult line each")
+    parser.add_argument("--socket", default="",
+                        help="with --serve, listen on this Unix socket path instead of stdin/stdout")
+    parser.add_argument("--batch", default="",
+                        help="run every AgentTask in this JSONL file ('-' for stdin); lines without 'task' use --task")
+    parser.add_argument("--jobs", type=int, default=4, help="with --batch, tasks to run at once")
+    parser.add_argument("--executor", choices=["thread", "process"], default="thread",
+                        help="with --batch, run tasks in threads or in processes (timeouts kill processes)")
+    parser.add_argument("--timeout", type=float, default=0,
+                        help="with --batch, seconds per task unless constraints.timeout_seconds is set (0 = none)")
+    parser.add_argument("--output", default="", help="with --batch, write result JSONL here instead of stdout")
     args = parser.parse_args()
 
+    if args.batch:
+        from .batch import read_tasks, run_batch
+        if args.batch == "-":
+            tasks = read_tasks(sys.stdin, args.task or "")
+        else:
+            with open(args.batch, encoding="utf-8") as f:
+                tasks = read_tasks(f, args.task or "")
+        out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+        ok = 0
+        try:
+            for result in run_batch(tasks, args.jobs, args.executor, args.timeout):
+                ok += result["ok"] is True
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                out.flush()
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        print(f"[dispatcher] batch: {ok}/{len(tasks)} ok", file=sys.stderr)
+        return
+
+    if args.serve:
+        from .serve import serve_stream, serve_unix
+        if args.socket:
+            serve_unix(args.socket)
+        else:
+            serve_stream()
+        return
+    if not args.task:
+        parser.error("--task is required (or use --serve)")
+
     agent_fn = load_agent(args.task)
     payload = json.loads(args.payload or "{}")
     result = agent_fn(payload)
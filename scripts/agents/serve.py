@@ -0,0 +1,97 @@
+"""
+dispatcher の常駐モード（python -m scripts.agents.dispatcher --serve [--socket PATH]）
+- 起動時にレジストリの全エージェントを import し、以後はプロセス内で呼ぶだけ（インタプリタ起動と import は 1 回）
+- 入力は 1 行 1 件の AgentTask（JSON）。任意の "id" はそのまま結果に付けて返す
+- 出力は 1 行 1 件の検証済み AgentResult。壊れた行・未知の task・エージェントの例外も ok=false の結果として返す
+- stdin/stdout（EOF で終了）か Unix ソケット（接続ごとにスレッド、1 接続の中は届いた順に処理）
+"""
+import contextlib
+import json
+import os
+import signal
+import socketserver
+import sys
+from typing import IO, Any, Dict, Optional
+
+from .dispatcher import error_result, preload_agents, run_task
+
+
+def handle_line(line: str) -> Optional[Dict[str, Any]]:
+    """1 行の AgentTask を処理して結果を返す（空行は None）"""
+    if not line.strip():
+        return None
+    try:
+        task = json.loads(line)
+    except ValueError as e:
+        return error_result(f"invalid JSON: {e}")
+    try:
+        result = run_task(task)
+    except Exception as e:
+        result = error_result(f"{type(e).__name__}: {e}")
+    if isinstance(task, dict) and "id" in task:
+        result = {"id": task["id"], **result}
+    return result
+
+
+def _dumps(result: Dict[str, Any]) -> str:
+    return json.dumps(result, ensure_ascii=False) + "\n"
+
+
+def serve_stream(infile: Optional[IO[str]] = None, outfile: Optional[IO[str]] = None) -> int:
+    """infile の各行を処理して outfile に書く（EOF で終了）。処理した件数を返す"""
+    infile = infile or sys.stdin
+    outfile = outfile or sys.stdout
+    for task, error in preload_agents().items():
+        print(f"[dispatcher] failed to preload {task}: {error}", file=sys.stderr)
+    count = 0
+    for line in infile:
+        # エージェントの print が結果の行に混ざらないよう stderr に逃がす
+        with contextlib.redirect_stdout(sys.stderr):
+            result = handle_line(line)
+        if result is None:
+            continue
+        outfile.write(_dumps(result))
+        outfile.flush()
+        count += 1
+    return count
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        for raw in self.rfile:
+            result = handle_line(raw.decode("utf-8", "replace"))
+            if result is None:
+                continue
+            try:
+                self.wfile.write(_dumps(result).encode("utf-8"))
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                return
+
+
+class _Server(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+def _interrupt(signum: int, frame: Any) -> None:
+    raise KeyboardInterrupt
+
+
+def serve_unix(path: str) -> None:
+    """Unix ソケットで待ち受ける（Ctrl-C / SIGTERM まで）"""
+    for task, error in preload_agents().items():
+        print(f"[dispatcher] failed to preload {task}: {error}", file=sys.stderr)
+    if os.path.exists(path):
+        # 前回のプロセスが残したソケットファイル
+        os.unlink(path)
+    # SIGTERM でもソケットファイルを片付けて終わる
+    signal.signal(signal.SIGTERM, _interrupt)
+    with _Server(path, _Handler) as server:
+        print(f"[dispatcher] listening on {path}", file=sys.stderr, flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(path)
@@ -0,0 +1,50 @@
+from pathlib import Path
+
+from scripts.utils.batch_runner import iter_batched, run_batched
+from scripts.utils.scan_cache import ScanCache
+
+
+def line_count(path: Path) -> int:
+    return len(path.read_text(encoding="utf-8").splitlines())
+
+
+def test_run_batched_keeps_input_order_and_reuses_cache(tmp_path):
+    paths = []
+    for i in range(7):
+        path = tmp_path / f"f{i}.txt"
+        path.write_text("x\n" * i, encoding="utf-8")
+        paths.append(path)
+
+    assert run_batched(paths, line_count, jobs=1) == list(range(7))
+    assert run_batched(paths, line_count, jobs=2) == list(range(7))
+
+    cache = ScanCache.load(tmp_path / "cache.json", "v1")
+    assert run_batched(paths, line_count, jobs=2, cache=cache) == list(range(7))
+    assert cache.stats.misses == 7
+    paths[3].write_text("x\n" * 10, encoding="utf-8")
+    assert run_batched(paths, line_count, jobs=2, cache=cache, keys=[p.name for p in paths])[3] == 10
+    # 前回は keys を変えたので全件ミス。同じ keys なら全件ヒット
+    assert run_batched(paths, line_count, cache=cache, keys=[p.name for p in paths]) == [0, 1, 2, 10, 4, 5, 6]
+    assert cache.stats.hits == 7
+
+
+def test_iter_batched_yields_each_result_before_the_rest_are_parsed(tmp_path):
+    paths = []
+    for i in range(4):
+        path = tmp_path / f"f{i}.txt"
+        path.write_text("x\n" * i, encoding="utf-8")
+        paths.append(path)
+    cache = ScanCache.load(tmp_path / "cache.json", "v1")
+    run_batched(paths[:2], line_count, cache=cache)
+
+    seen = []
+
+    def worker(path):
+        seen.append(path.name)
+        return line_count(path)
+
+    results = iter_batched(paths, worker, cache=cache)
+    # 先頭 2 件はキャッシュから、3 件目は 3 件目だけを解析した時点で返る
+    assert [next(results), next(results)] == [0, 1] and seen == []
+    assert next(results) == 2 and seen == ["f2.txt"]
+    assert list(results) == [3] and seen == ["f2.txt", "f3.txt"]
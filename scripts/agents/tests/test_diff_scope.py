@@ -0,0 +1,51 @@
+from scripts.utils.diff_scope import parse_changed_lines
+from scripts.utils.i18n_utils import scan_changed_files_for_japanese_texts
+
+DIFF = """\
+diff --git a/app/page.tsx b/app/page.tsx
+index 1111111..2222222 100644
+--- a/app/page.tsx
++++ b/app/page.tsx
+@@ -2 +2,2 @@ export default function Page() {
+-  alert("old")
++  alert("保存しました")
++  alert("削除しました")
+@@ -10,3 +11,0 @@
+-  gone()
+diff --git a/app/removed.tsx b/app/removed.tsx
+deleted file mode 100644
+--- a/app/removed.tsx
++++ /dev/null
+@@ -1 +0,0 @@
+-alert("消えた")
+"""
+
+
+def test_parse_changed_lines_tracks_new_side_only():
+    assert parse_changed_lines(DIFF) == {"app/page.tsx": {2, 3}}
+
+
+def test_scan_is_limited_to_changed_lines(tmp_path):
+    (tmp_path / "app").mkdir()
+    (tmp_path / "app" / "page.tsx").write_text(
+        'alert("未変更の行")\nalert("保存しました")\nalert("削除しました")\nalert("これも未変更")\n',
+        encoding="utf-8",
+    )
+    (tmp_path / "app" / "other.tsx").write_text('alert("差分外のファイル")\n', encoding="utf-8")
+
+    result = scan_changed_files_for_japanese_texts(parse_changed_lines(DIFF), root=tmp_path)
+
+    assert list(result) == ["app/page.tsx"]
+    assert [item["text"] for item in result["app/page.tsx"]] == ["保存しました", "削除しました"]
+
+
+def test_multiline_literal_matches_when_a_later_line_changes(tmp_path):
+    # テンプレートリテラルの 2 行目だけが変わっても、開始行（1 行目）で報告される検出を残す
+    (tmp_path / "app").mkdir()
+    (tmp_path / "app" / "page.tsx").write_text(
+        "const msg = `ご確認\n保存しました\n`\nalert(\"未変更\")\n", encoding="utf-8",
+    )
+
+    result = scan_changed_files_for_japanese_texts({"app/page.tsx": {2}}, root=tmp_path)
+
+    assert [(item["line"], item["end_line"]) for item in result["app/page.tsx"]] == [(1, 3)]
@@ -0,0 +1,53 @@
+import json
+import multiprocessing
+import time
+
+import pytest
+
+from scripts.agents import dispatcher
+from scripts.agents.batch import read_tasks, run_batch, task_timeout
+
+
+def slow_agent(payload):
+    time.sleep(payload.get("sleep", 0))
+    return {"ok": True, "summary": f"slept {payload.get('sleep', 0)}"}
+
+
+@pytest.fixture(autouse=True)
+def register_slow_agent(monkeypatch):
+    monkeypatch.setitem(dispatcher._LOADED, "slow", slow_agent)
+
+
+def test_read_tasks_wraps_records_without_task_and_keeps_bad_lines():
+    lines = ['{"task": "slow", "payload": {}}', "", "oops", '{"request_id": "r1", "title": "t"}']
+    tasks = read_tasks(lines, default_task="db_modeling")
+    assert [t.get("task") for t in tasks] == ["slow", None, "db_modeling"]
+    assert tasks[1]["error"].startswith("invalid JSON")
+    assert tasks[2]["payload"] == {"request_id": "r1", "title": "t"}
+    assert task_timeout({"constraints": {"timeout_seconds": 2}}) == 2.0
+    assert task_timeout({"constraints": {"timeout": 1}}, default=5) == 1.0
+    assert task_timeout({"constraints": {}}, default=5) == 5.0
+    assert task_timeout({}) is None
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_run_batch_completion_order_index_and_timeouts(executor):
+    if executor == "process" and multiprocessing.get_start_method() != "fork":
+        pytest.skip("process executor test relies on fork inheriting the test agent")
+    tasks = [
+        {"id": "slow", "task": "slow", "payload": {"sleep": 0.3}},
+        {"id": "fast", "task": "slow", "payload": {"sleep": 0.0}},
+        {"id": "hung", "task": "slow", "payload": {"sleep": 5}, "constraints": {"timeout_seconds": 0.2}},
+        {"id": "bad", "task": "unknown"},
+    ]
+    started = time.perf_counter()
+    results = list(run_batch(tasks, jobs=3, executor=executor))
+    assert time.perf_counter() - started < 2
+    assert [r["id"] for r in results] == ["fast", "bad", "hung", "slow"]
+    by_id = {r["id"]: r for r in results}
+    assert [by_id[k]["index"] for k in ("slow", "fast", "hung", "bad")] == [0, 1, 2, 3]
+    assert by_id["slow"]["ok"] and by_id["fast"]["ok"]
+    assert not by_id["hung"]["ok"] and by_id["hung"]["summary"] == "timeout after 0.2s"
+    assert "Unknown task" in by_id["bad"]["summary"]
+    assert all(r["artifacts"] == [] and r["next_actions"] == [] for r in results)
+    json.dumps(results)
@@ -0,0 +1,57 @@
+import io
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from scripts.agents import dispatcher
+from scripts.agents.serve import serve_stream
+
+ROOT = Path(__file__).resolve().parents[3]
+
+
+def test_serve_stream_answers_each_line_and_reports_errors(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    lines = [
+        json.dumps({"id": 1, "task": "db_modeling", "payload": {}}),
+        "",
+        "not json",
+        json.dumps({"id": "x", "task": "unknown"}),
+        json.dumps({"task": "i18n_review", "payload": [1]}),
+        json.dumps({"id": 2, "task": "env_hardening", "constraints": {}}),
+    ]
+    out = io.StringIO()
+    assert serve_stream(io.StringIO("\n".join(lines) + "\n"), out) == 5
+    results = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [r.get("id") for r in results] == [1, None, "x", None, 2]
+    assert [r["ok"] for r in results] == [True, False, False, False, False]
+    assert "Unknown task" in results[2]["summary"]
+    assert all(r["artifacts"] == [] and r["next_actions"] == [] for r in results)
+    # 常駐中は 2 回目以降 import し直さない
+    assert set(dispatcher._LOADED) == {"db_modeling", "i18n_review", "env_hardening"}
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="Unix sockets only")
+def test_serve_unix_socket(tmp_path):
+    path = str(tmp_path / "d.sock")
+    proc = subprocess.Popen([sys.executable, "-m", "scripts.agents.dispatcher", "--serve", "--socket", path],
+                            cwd=ROOT, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.time() + 10
+        while not os.path.exists(path):
+            assert proc.poll() is None and time.time() < deadline
+            time.sleep(0.01)
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(path)
+            sock.sendall(b'{"id": 7, "task": "db_modeling"}\n{"id": 8, "task": "db_modeling"}\n')
+            reader = sock.makefile("r", encoding="utf-8")
+            assert [json.loads(reader.readline())["id"] for _ in range(2)] == [7, 8]
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+    assert not os.path.exists(path)
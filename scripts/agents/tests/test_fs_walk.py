@@ -0,0 +1,35 @@
+from pathlib import Path
+
+from scripts.utils.fs_walk import walk_files
+from scripts.utils.i18n_utils import scan_project_for_japanese_texts
+from scripts.utils.db_model_utils import find_prisma_schemas, find_typeorm_entities
+
+
+def _touch(root: Path, rel: str, content: str = "") -> None:
+    p = root / rel
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(content, encoding="utf-8")
+
+
+def test_walk_prunes_excluded_dirs_and_matches_suffixes(tmp_path):
+    _touch(tmp_path, "app/page.tsx")
+    _touch(tmp_path, "lib/util.ts")
+    _touch(tmp_path, "lib/readme.md")
+    _touch(tmp_path, "node_modules/pkg/index.js")
+    _touch(tmp_path, "app/.next/chunk.js")
+
+    found = [p.relative_to(tmp_path).as_posix() for p in walk_files(tmp_path, suffixes=(".ts", ".tsx", ".js"))]
+    assert found == ["app/page.tsx", "lib/util.ts"]
+
+
+def test_scan_and_db_finders_share_walker(tmp_path):
+    _touch(tmp_path, "app/page.tsx", 'alert("保存しました")\n')
+    _touch(tmp_path, "node_modules/pkg/index.js", 'alert("除外されるべき")\n')
+    _touch(tmp_path, "prisma/schema.prisma")
+    _touch(tmp_path, "node_modules/pkg/prisma/schema.prisma")
+    _touch(tmp_path, "src/user.entity.ts")
+
+    texts = scan_project_for_japanese_texts(tmp_path)
+    assert list(texts) == [str(Path("app/page.tsx"))]
+    assert find_prisma_schemas(tmp_path) == [tmp_path / "prisma" / "schema.prisma"]
+    assert find_typeorm_entities(tmp_path) == [tmp_path / "src" / "user.entity.ts"]
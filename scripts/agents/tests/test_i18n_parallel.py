@@ -0,0 +1,23 @@
+from pathlib import Path
+
+from scripts.utils.i18n_utils import scan_project_for_japanese_texts
+
+
+def _write_tree(root: Path, files: int) -> None:
+    for i in range(files):
+        p = root / f"dir{i % 4}" / f"page{i}.tsx"
+        p.parent.mkdir(parents=True, exist_ok=True)
+        body = [f'const title{j} = "見出し{i}-{j}"' for j in range(i % 5)]
+        body.append(f"export const n{i} = {i}")
+        p.write_text("\n".join(body) + "\n", encoding="utf-8")
+
+
+def test_parallel_scan_matches_serial(tmp_path):
+    _write_tree(tmp_path, 40)
+
+    serial = scan_project_for_japanese_texts(tmp_path, jobs=1)
+    parallel = scan_project_for_japanese_texts(tmp_path, jobs=3)
+
+    assert serial
+    # 内容だけでなくキー順序まで一致すること
+    assert list(parallel.items()) == list(serial.items())
@@ -0,0 +1,91 @@
+from scripts.utils.index_coverage import analyze_index_coverage, extract_queries, find_redundant_indexes
+from scripts.utils.sql_migrations import apply_migration, empty_schema
+
+
+MIGRATION = """
+    CREATE TABLE case_records (
+      id uuid PRIMARY KEY,
+      service_id uuid NOT NULL,
+      care_receiver_id uuid NOT NULL,
+      record_date date NOT NULL,
+      created_at timestamptz DEFAULT now(),
+      version int NOT NULL DEFAULT 1,
+      code text UNIQUE
+    );
+    CREATE INDEX case_records_service_care_created_idx
+      ON public.case_records (service_id, care_receiver_id, created_at DESC);
+    CREATE INDEX idx_case_records_service ON case_records (service_id);
+    CREATE INDEX idx_case_records_code ON case_records (code);
+"""
+
+ROUTE = """
+export async function GET() {
+  // .from("ignored").eq("x", 1)
+  let query = supabaseAdmin!
+    .from("case_records")
+    .select("id, record_date", { count: "exact" })
+    .eq("service_id", serviceId)
+    .eq("care_receiver_id", careReceiverId)
+    .order("record_date", { ascending: false })
+    .order("id", { ascending: false })
+
+  if (dateFrom) {
+    query = query.gte("record_date", dateFrom)
+  }
+  const { data } = await query
+  return data
+}
+
+export async function PATCH() {
+  let updateQuery = supabaseAdmin.from("case_records").update(row).eq("id", id)
+  if (version != null) {
+    updateQuery = updateQuery.eq("version", version)
+  }
+  await supabaseAdmin.from("audit_logs").insert([entry])
+}
+"""
+
+
+def _schema():
+    schema = empty_schema()
+    apply_migration(schema, MIGRATION, "001.sql")
+    return schema
+
+
+def test_extracts_chain_and_conditional_filters():
+    listing, update, audit = extract_queries(ROUTE, "route.ts")
+
+    assert (listing["table"], listing["line"], listing["operation"]) == ("case_records", 5, "select")
+    assert listing["filters"]["eq"] == ["service_id", "care_receiver_id"]
+    assert [o["column"] for o in listing["filters"]["order"]] == ["record_date", "id"]
+    assert listing["filters"]["order"][0]["ascending"] is False
+    assert listing["optional_filters"]["range"] == ["record_date"]
+
+    assert update["operation"] == "update"
+    assert update["filters"]["eq"] == ["id"]
+    assert update["optional_filters"]["eq"] == ["version"]
+    assert (audit["table"], audit["operation"], audit["filters"]["eq"]) == ("audit_logs", "insert", [])
+
+
+def test_reports_missing_composite_and_unique_lookups_as_covered():
+    result = analyze_index_coverage(_schema(), extract_queries(ROUTE, "route.ts"))
+    listing, update = result["queries"]
+
+    assert [c["status"] for c in listing["coverage"]] == ["partial", "partial"]
+    assert [c["status"] for c in update["coverage"]] == ["covered", "covered"]
+    assert update["coverage"][1]["index"] == "case_records_pkey"
+
+    (missing,) = result["missing"]
+    assert missing["columns"] == ["service_id", "care_receiver_id", "record_date", "id"]
+    assert missing["evidence"] == ["route.ts:5"]
+    assert missing["statement"].startswith("CREATE INDEX IF NOT EXISTS idx_case_records_service_id_")
+    # insert だけのクエリは判定対象外
+    assert "audit_logs" not in result["unknown_tables"]
+
+
+def test_redundant_prefix_and_constraint_duplicates():
+    redundant = {r["index"]: (r["reason"], r["covered_by"]) for r in find_redundant_indexes(_schema())}
+    assert redundant == {
+        "idx_case_records_service": ("prefix", "case_records_service_care_created_idx"),
+        "idx_case_records_code": ("duplicate", "case_records_code_key"),
+    }
@@ -0,0 +1,35 @@
+import json
+
+from scripts.utils.json_stream import JsonStreamScanner, extract_json
+
+
+REVIEW = {
+    "summary": 'brace { in "text" \\ ok',
+    "overall_severity": "major",
+    "findings": [
+        {"title": "a", "patch": "@@ -1 +1 @@\n- if (x) {\n+ if (x && y) {"},
+        {"title": "b", "nested": {"list": [{"deep": 1}]}},
+    ],
+    "ci_notes": ["x"],
+}
+
+
+def test_scanner_finds_object_and_items_across_any_chunking():
+    text = "Here is the review:\n```json\n" + json.dumps(REVIEW, ensure_ascii=False) + "\n```\n{\"later\": 1}"
+    for size in (1, 2, 7, len(text)):
+        items = []
+        scanner = JsonStreamScanner(on_item=lambda key, item: items.append((key, item["title"])))
+        results = [scanner.feed(text[i:i + size]) for i in range(0, len(text), size)]
+        assert scanner.result == REVIEW
+        # 閉じた直後の断片で確定し、以降も同じ値を返す
+        first = next(i for i, r in enumerate(results) if r is not None)
+        assert (first + 1) * size >= text.index("\n```\n{")
+        assert all(r == REVIEW for r in results[first:])
+        assert items == [("findings", "a"), ("findings", "b")]
+
+
+def test_extract_json_skips_invalid_candidates():
+    assert extract_json("use {curly} braces, then {\"ok\": true}") == {"ok": True}
+    assert extract_json("no json here") == {}
+    assert extract_json("") == {}
+    assert extract_json('{"unterminated": [1, 2') == {}
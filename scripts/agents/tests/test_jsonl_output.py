@@ -0,0 +1,118 @@
+import json
+
+from scripts.utils import db_model_utils, i18n_utils, typeorm_entities
+from scripts.utils.i18n_utils import iter_i18n_records, scan_project_for_japanese_texts, suggest_translation_keys
+from scripts.utils.db_model_utils import iter_db_records
+from scripts.utils.io import write_jsonl
+
+
+def test_i18n_records_are_complete_and_round_trip(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    # Markdown レポートが切り詰める件数（上位 10 ファイル / 30 提案）を超える量
+    for i in range(12):
+        body = "".join(f'alert("メッセージ{i}-{j}")\n' for j in range(3))
+        (src / f"page{i:02d}.tsx").write_text(body, encoding="utf-8")
+    texts = scan_project_for_japanese_texts(src)
+    result = {
+        "has_locales": False,
+        "locales_dir": None,
+        "locale_files": {},
+        "hardcoded_texts": texts,
+        "translation_suggestions": suggest_translation_keys(texts),
+        "skipped_files": [{"path": "dist/bundle.js", "size": 9_000_000, "reason": "too_large"}],
+    }
+
+    out = tmp_path / "out" / "i18n-findings.jsonl"
+    count = write_jsonl(out, iter_i18n_records(result))
+    records = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+
+    assert count == len(records) == 36 + 36 + 1 + 1
+    # 集計は件数が確定してから出すので最後
+    assert records[-1]["type"] == "i18n_summary"
+    assert records[-1]["hardcoded_strings"] == 36
+    first = records[0]
+    assert (first["type"], first["file"], first["line"], first["text"]) == ("hardcoded_text", "page00.tsx", 1, "メッセージ0-0")
+    assert records[-2] == {"type": "skipped_file", "path": "dist/bundle.js", "size": 9_000_000, "reason": "too_large"}
+
+
+def test_i18n_scan_records_stream_per_file_and_build_the_same_report(tmp_path, monkeypatch):
+    for i in range(3):
+        (tmp_path / f"page{i}.tsx").write_text(f'alert("保存しました")\nalert("画面{i}")\n', encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    extracted = []
+    extract = i18n_utils.extract_hardcoded_japanese_texts
+
+    def spy(path):
+        extracted.append(path.name)
+        return extract(path)
+
+    monkeypatch.setattr(i18n_utils, "extract_hardcoded_japanese_texts", spy)
+
+    records = i18n_utils.iter_i18n_scan_records(use_cache=False)
+    # 1 ファイル目のレコードは 2 ファイル目を読む前に出てくる
+    first = next(records)
+    assert first["file"] == "page0.tsx" and extracted == ["page0.tsx"]
+
+    builder = i18n_utils.I18nReportBuilder()
+    builder.add(first)
+    rest = list(builder.passthrough(records))
+    assert [r["type"] for r in rest] == ["hardcoded_text"] * 5 + ["translation_suggestion"] * 4 + ["i18n_summary"]
+
+    detection = i18n_utils.detect_i18n_infrastructure(use_cache=False)
+    assert builder.render() == i18n_utils.generate_i18n_analysis_report(detection)
+
+
+def test_db_records_summary_last():
+    result = {
+        "has_prisma": True,
+        "has_typeorm": False,
+        "prisma_schemas": ["prisma/schema.prisma"],
+        "typeorm_entities": [],
+        "parsed_prisma": [{"path": "prisma/schema.prisma", "data": {
+            "datasource": None, "generator": None,
+            "models": [{"name": "User", "fields": [], "relations": []}],
+        }}],
+        "parsed_typeorm": [],
+    }
+    records = list(iter_db_records(result))
+    assert [r["type"] for r in records] == ["prisma_schema", "prisma_model", "db_summary"]
+    assert records[-1]["prisma_schemas"] == ["prisma/schema.prisma"]
+
+
+ENTITY = """@Entity("{table}")
+export class {name} {{
+  @PrimaryGeneratedColumn("uuid")
+  id: string;
+}}
+"""
+
+
+def test_db_scan_records_stream_per_entity_and_build_the_same_report(tmp_path, monkeypatch):
+    (tmp_path / "src").mkdir()
+    for name, table in (("Note", "notes"), ("User", "users")):
+        (tmp_path / "src" / f"{table}.entity.ts").write_text(ENTITY.format(name=name, table=table), encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    parsed = []
+    parse = typeorm_entities.parse_typeorm_entity
+
+    def spy(path):
+        parsed.append(path.name)
+        return parse(path)
+
+    monkeypatch.setattr(typeorm_entities, "parse_typeorm_entity", spy)
+
+    records = db_model_utils.iter_db_scan_records(use_cache=False)
+    # 1 つ目のエンティティのレコードは 2 つ目を解析する前に出てくる
+    first = next(records)
+    assert (first["type"], first["name"]) == ("typeorm_entity", "Note") and parsed == ["notes.entity.ts"]
+
+    builder = db_model_utils.DbReportBuilder()
+    builder.add(first)
+    rest = list(builder.passthrough(records))
+    assert rest[0]["name"] == "User" and rest[-1]["type"] == "db_summary"
+
+    detection = db_model_utils.detect_database_infrastructure(use_cache=False)
+    assert builder.render() == db_model_utils.generate_db_analysis_report(detection)
+    graph = detection["relation_graph"]["graph"]
+    assert builder.relation_graph_data() == {"nodes": graph["nodes"], "edges": graph["edges"]}
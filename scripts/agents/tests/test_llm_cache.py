@@ -0,0 +1,61 @@
+import json
+
+from scripts.bench.fake_openai import FakeOpenAIServer
+from scripts.utils.llm_cache import LLM_CACHE_VERSION, ResponseCache, response_key
+from scripts.utils.llm_client import LLMClient, chat_messages
+
+
+def _payload(user="diff", **overrides):
+    payload = {"model": "m", "temperature": 0.2, "seed": 123, "messages": chat_messages("sys", user)}
+    payload.update(overrides)
+    return payload
+
+
+def test_response_key_covers_generation_parameters():
+    base = response_key(_payload())
+    assert base == response_key(_payload())
+    assert base != response_key(_payload(user="other diff"))
+    assert base != response_key(_payload(seed=124))
+    assert base != response_key(_payload(temperature=0.0))
+    assert base != response_key(_payload(model="m2"))
+    assert base != response_key(_payload(max_tokens=1200))
+    assert base != response_key({**_payload(), "messages": chat_messages("other sys", "diff")})
+
+
+def test_lru_eviction_ttl_and_persistence(tmp_path, monkeypatch):
+    path = tmp_path / "llm.json"
+    cache = ResponseCache.load(path, max_entries=2, ttl=60)
+    cache.put("a", "A", elapsed=1.5)
+    cache.put("b", "B")
+    assert cache.get("a") == "A"          # a を最近使った側へ
+    cache.put("c", "C")                   # 最も古い b が追い出される
+    assert cache.get("b") is None
+    assert list(cache.entries) == ["a", "c"]
+    cache.save()
+
+    reloaded = ResponseCache.load(path, max_entries=2, ttl=60)
+    assert reloaded.get("a") == "A" and reloaded.get("c") == "C"
+    assert reloaded.stats.as_dict()["saved_seconds"] == 1.5
+
+    clock = [reloaded.entries["a"]["created"] + 61]
+    monkeypatch.setattr("scripts.utils.llm_cache.time.time", lambda: clock[0])
+    assert reloaded.get("a") is None
+    assert reloaded.stats.as_dict()["expired"] == 1
+    reloaded.save()
+    assert json.loads(path.read_text(encoding="utf-8")) == {"version": LLM_CACHE_VERSION, "entries": {}}
+
+
+def test_client_serves_repeated_calls_from_cache(tmp_path):
+    with FakeOpenAIServer() as server:
+        cache = ResponseCache.load(tmp_path / "llm.json")
+        client = LLMClient(base_url=server.base_url, api_key="t", transport="stdlib", cache=cache)
+        try:
+            first = client.chat_sync(chat_messages("s", "same"), model="m", seed=1)
+            assert client.chat_sync(chat_messages("s", "same"), model="m", seed=1) == first
+            client.chat_sync(chat_messages("s", "same"), model="m", seed=2)
+        finally:
+            client.close()
+        assert server.stats["requests"] == 2
+        assert (cache.stats.hits, cache.stats.misses) == (1, 2)
+        # close() で書き出され、次のプロセスでもヒットする
+        assert len(ResponseCache.load(tmp_path / "llm.json").entries) == 2
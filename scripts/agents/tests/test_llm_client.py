@@ -0,0 +1,84 @@
+import pytest
+
+from scripts.bench.fake_openai import FakeOpenAIServer
+from scripts.utils.llm_client import LLMClient, LLMError, RateLimitError, chat_messages
+
+
+def test_stdlib_transport_reuses_connection_and_bounds_concurrency():
+    with FakeOpenAIServer(latency=0.05) as server:
+        client = LLMClient(base_url=server.base_url, api_key="test", max_concurrency=2, transport="stdlib")
+        try:
+            first = client.chat_sync(chat_messages("sys", "hello"), model="m1", temperature=0.0, seed=1)
+            second = client.chat_sync(chat_messages("sys", "again"), model="m1")
+            assert first == "[fake:m1] hello"
+            assert second == "[fake:m1] again"
+            assert server.stats["connections"] == 1
+            assert server.requests[0]["seed"] == 1 and server.requests[0]["temperature"] == 0.0
+            assert server.requests[0]["messages"][0] == {"role": "system", "content": "sys"}
+
+            results = client.gather_sync([client.chat(chat_messages("s", f"u{i}"), model="m") for i in range(6)])
+            assert results == [f"[fake:m] u{i}" for i in range(6)]
+            assert server.stats["max_in_flight"] == 2
+            assert server.stats["connections"] <= 2
+        finally:
+            client.close()
+
+
+def test_retries_429_and_5xx_then_gives_up():
+    with FakeOpenAIServer(errors=[429, 500], retry_after=0) as server:
+        client = LLMClient(base_url=server.base_url, api_key="test", retries=2, backoff=0.01, transport="stdlib")
+        try:
+            assert client.chat_sync(chat_messages("s", "ok")).endswith("ok")
+            assert client.stats == {"requests": 3, "retries": 2, "errors": 0, "rate_limited": 1}
+
+            server.push_errors([429, 429, 429])
+            with pytest.raises(RateLimitError) as exc:
+                client.chat_sync(chat_messages("s", "ng"))
+            assert exc.value.status == 429 and exc.value.retry_after == 0
+
+            server.push_errors([400])
+            with pytest.raises(LLMError) as exc:
+                client.chat_sync(chat_messages("s", "bad"))
+            assert exc.value.status == 400
+            assert client.stats["errors"] == 2
+        finally:
+            client.close()
+
+
+def test_httpx_transport_against_fake_server():
+    pytest.importorskip("httpx")
+    with FakeOpenAIServer() as server:
+        client = LLMClient(base_url=server.base_url, api_key="test", max_concurrency=3, transport="httpx")
+        try:
+            results = client.gather_sync([client.chat(chat_messages("s", f"u{i}"), model="m") for i in range(5)])
+            assert results == [f"[fake:m] u{i}" for i in range(5)]
+            assert server.stats["connections"] <= 3
+        finally:
+            client.close()
+
+
+def test_stream_chat_yields_deltas_and_retries_before_first_delta(tmp_path):
+    from scripts.utils.llm_cache import ResponseCache
+
+    with FakeOpenAIServer(errors=[503], retry_after=0, stream_chunk=4) as server:
+        cache = ResponseCache.load(tmp_path / "llm.json")
+        client = LLMClient(base_url=server.base_url, api_key="test", transport="stdlib", cache=cache)
+
+        async def collect(text):
+            return [delta async for delta in client.stream_chat(chat_messages("s", text), model="m")]
+
+        try:
+            deltas = client.run_sync(collect("streamed"))
+            assert "".join(deltas) == "[fake:m] streamed"
+            assert len(deltas) > 1
+            assert server.requests[-1]["stream"] is True
+            assert client.stats["retries"] == 1
+            # 読み切った応答はキャッシュされ、非ストリーミングの chat とも共有される
+            assert client.run_sync(collect("streamed")) == ["[fake:m] streamed"]
+            assert client.chat_sync(chat_messages("s", "streamed"), model="m") == "[fake:m] streamed"
+            assert server.stats["requests"] == 2
+            # keep-alive の接続は使い回される
+            client.run_sync(collect("again"))
+            assert server.stats["connections"] == 1
+        finally:
+            client.close()
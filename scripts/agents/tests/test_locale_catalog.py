@@ -0,0 +1,43 @@
+import json
+from pathlib import Path
+
+from scripts.utils.i18n_utils import find_locale_files, suggest_translation_keys
+from scripts.utils.locale_catalog import LocaleCatalog, find_key_references
+
+
+def _write_json(path: Path, data) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+
+def _catalog(tmp_path: Path) -> LocaleCatalog:
+    locales = tmp_path / "locales"
+    _write_json(locales / "ja" / "common.json", {"app.title": "重心ケア", "actions": {"save": "保存", "add": "追加"}})
+    _write_json(locales / "ja" / "forms.json", {"name": "氏名"})
+    _write_json(locales / "en" / "common.json", {"app.title": "Care", "actions": {"save": "Save"}})
+    (locales / "en" / "broken.json").write_text("{", encoding="utf-8")
+    return LocaleCatalog.load(locales, find_locale_files(locales))
+
+
+def test_catalog_flattens_namespaces_and_reports_missing(tmp_path):
+    catalog = _catalog(tmp_path)
+
+    assert catalog.messages["ja"]["actions.save"] == "保存"
+    assert catalog.keys_for_value("氏名") == ["forms:name"]
+    assert catalog.missing_keys() == {"en": ["actions.add", "forms:name"]}
+    assert [e["path"].endswith("broken.json") for e in catalog.errors] == [True]
+
+
+def test_unused_keys_and_existing_key_suggestions(tmp_path):
+    catalog = _catalog(tmp_path)
+    src = tmp_path / "page.tsx"
+    src.write_text("const k = 'actions.save'\nt(\"app.title\")\nconst other = 'not.a.key'\n", encoding="utf-8")
+
+    used = find_key_references([src], catalog.all_keys)
+    assert used == {"actions.save", "app.title"}
+    assert catalog.unused_keys(used) == ["actions.add", "forms:name"]
+
+    texts = {"page.tsx": [{"line": 1, "text": "保存", "context": ""}, {"line": 2, "text": "記録", "context": ""}]}
+    suggestions = suggest_translation_keys(texts, catalog=catalog)
+    assert (suggestions[0]["key"], suggestions[0]["existing"]) == ("actions.save", True)
+    assert suggestions[1]["existing"] is False
@@ -0,0 +1,89 @@
+from scripts.utils.db_model_utils import parse_prisma_schema
+from scripts.utils.prisma_schema import parse_prisma_text, relation_info
+
+
+SCHEMA = '''
+datasource db {
+  provider = "postgresql"
+  url      = env("DATABASE_URL")
+}
+
+/// 利用者
+model User {
+  id    String   @id @default(dbgenerated("gen_random_uuid()")) @db.Uuid
+  meta  Json     @default("{}")
+  role  Role     @default(USER)
+  posts Post[]
+  home  Address?
+
+  @@index([role, id(sort: Desc)], map: "user_role_idx")
+}
+
+model Post {
+  id       Int    @id @default(autoincrement())
+  author   User   @relation("UserPosts", fields: [authorId], references: [id], onDelete: Cascade)
+  authorId String // 外部キー
+  @@unique([authorId,
+            id])
+}
+
+enum Role {
+  USER
+  ADMIN @map("admin")
+}
+
+type Address {
+  street String
+}
+
+view PostCount {
+  authorId String @unique
+  total    Int
+}
+'''
+
+
+def test_blocks_after_braces_in_strings_and_block_attributes_are_kept():
+    ast = parse_prisma_text(SCHEMA)
+    assert ast["errors"] == []
+    user, post = ast["models"]
+    assert user["documentation"] == "利用者"
+    assert [f["name"] for f in user["fields"]] == ["id", "meta", "role", "posts", "home"]
+    assert user["fields"][1]["raw_attributes"] == '@default("{}")'
+    (index,) = user["attributes"]
+    assert index["name"] == "index"
+    assert index["raw"] == '@@index([role, id(sort: Desc)], map: "user_role_idx")'
+    assert post["attributes"][0]["args"][0]["value"] == [{"ref": "authorId"}, {"ref": "id"}]
+    assert [e["name"] for e in ast["enums"]] == ["Role"]
+    assert [v["name"] for v in ast["enums"][0]["values"]] == ["USER", "ADMIN"]
+    assert [t["name"] for t in ast["types"]] == ["Address"]
+    assert [v["name"] for v in ast["views"]] == ["PostCount"]
+
+
+def test_field_kinds_use_declared_types_not_capitalisation():
+    ast = parse_prisma_text(SCHEMA)
+    kinds = {f["name"]: f["kind"] for f in ast["models"][0]["fields"]}
+    assert kinds == {"id": "scalar", "meta": "scalar", "role": "enum", "posts": "relation", "home": "composite"}
+
+    author = ast["models"][1]["fields"][1]
+    assert relation_info(author) == {
+        "name": "UserPosts", "fields": ["authorId"], "references": ["id"], "on_delete": "Cascade", "on_update": None,
+    }
+
+
+def test_syntax_errors_are_reported_and_parsing_continues():
+    ast = parse_prisma_text("model A {\n  id Int @id(\n}\nmodel B {\n  id Int @id\n}\nbogus X\n")
+    assert [m["name"] for m in ast["models"]] == ["A", "B"]
+    assert [f["name"] for f in ast["models"][1]["fields"]] == ["id"]
+    assert len(ast["errors"]) == 2
+
+
+def test_summary_splits_scalars_and_relations(tmp_path):
+    path = tmp_path / "schema.prisma"
+    path.write_text(SCHEMA, encoding="utf-8")
+    data = parse_prisma_schema(path)
+    assert data["datasource"] == {"provider": "postgresql", "url": 'env("DATABASE_URL")'}
+    user = data["models"][0]
+    assert [f["name"] for f in user["fields"]] == ["id", "meta", "role", "home"]
+    assert [(r["name"], r["type"], r["is_array"]) for r in user["relations"]] == [("posts", "Post", True)]
+    assert data["enums"] == [{"name": "Role", "values": ["USER", "ADMIN"]}]
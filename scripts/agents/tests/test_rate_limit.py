@@ -0,0 +1,102 @@
+import asyncio
+import random
+
+from scripts.bench.fake_openai import FakeOpenAIServer
+from scripts.utils.llm_client import LLMClient, chat_messages
+from scripts.utils.rate_limit import ModelRateLimiter, RateLimiterRegistry, TokenBucket, backoff_delay
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_backoff_delay_honors_retry_after_and_caps_jitter():
+    rng = random.Random(0)
+    for attempt in range(8):
+        delay = backoff_delay(attempt, base=1.0, cap=8.0, rng=rng)
+        assert 0.0 <= delay <= min(8.0, 2 ** attempt)
+    for _ in range(20):
+        assert 5.0 <= backoff_delay(3, retry_after=5.0, rng=rng) <= 5.5
+    assert backoff_delay(0, retry_after=0.0, rng=rng) == 0.0
+
+
+def test_bucket_allows_burst_then_waits_and_borrows_for_large_amounts():
+    clock = FakeClock()
+    bucket = TokenBucket(capacity=10, rate=5, clock=clock)
+    assert bucket.wait_time(10) == 0
+    bucket.take(10)
+    assert bucket.wait_time(1) == 0.2
+    # 容量を超える量は満タンで通し、借りの分だけ次が待つ
+    clock.now += 2
+    assert bucket.wait_time(30) == 0
+    bucket.take(30)
+    assert bucket.wait_time(1) == 4.2
+    bucket.pause(10)
+    clock.now += 5
+    assert bucket.wait_time(1) == 5
+
+
+def test_registry_uses_longest_prefix_and_settles_usage():
+    clock = FakeClock()
+    registry = RateLimiterRegistry({
+        "default": {"requests_per_minute": 60},
+        "gpt-4o": {"requests_per_minute": 600, "tokens_per_minute": 6000},
+        "gpt-4o-mini": {"tokens_per_minute": 60000, "burst_seconds": 2},
+    }, clock=clock)
+    assert registry.limiter_for("gpt-4o-2024-08-06").requests.rate == 10
+    mini = registry.limiter_for("gpt-4o-mini")
+    assert mini.requests is None and mini.tokens.capacity == 2000
+    assert registry.limiter_for("other").tokens is None
+    assert registry.limiter_for("gpt-4o") is registry.limiter_for("gpt-4o")
+    assert RateLimiterRegistry.from_config({}) is None
+
+    limiter = ModelRateLimiter(tokens_per_minute=6000, clock=clock)
+    assert asyncio.run(limiter.acquire(100)) == 0
+    limiter.settle(100, 40)
+    assert limiter.tokens.tokens == 60
+
+
+def test_client_limiter_avoids_server_429s():
+    # サーバは 0.5 秒に 3 件まで。クライアントは 4 件/秒 + 1 件のバーストで送る
+    limits = RateLimiterRegistry({"default": {"requests_per_minute": 240, "burst_seconds": 0.25}})
+    with FakeOpenAIServer(rate_limit=(3, 0.5)) as server:
+        client = LLMClient(base_url=server.base_url, api_key="test", max_concurrency=4, transport="stdlib",
+                           retries=5, backoff=0.01, rate_limits=limits)
+        try:
+            results = client.gather_sync([client.chat(chat_messages("s", f"u{i}"), model="m") for i in range(6)])
+            assert results == [f"[fake:m] u{i}" for i in range(6)]
+            assert server.stats["rate_limited"] == 0
+            assert client.stats["retries"] == 0
+        finally:
+            client.close()
+
+    # 制限なしでは 429（retry-after-ms 付き）を受けて待ち、最終的には全件成功する
+    with FakeOpenAIServer(rate_limit=(3, 0.5)) as server:
+        client = LLMClient(base_url=server.base_url, api_key="test", max_concurrency=4, transport="stdlib",
+                           retries=5, backoff=0.01)
+        try:
+            results = client.gather_sync([client.chat(chat_messages("s", f"u{i}"), model="m") for i in range(6)])
+            assert len(results) == 6
+            assert server.stats["rate_limited"] >= 1
+            assert client.stats["rate_limited"] == server.stats["rate_limited"]
+        finally:
+            client.close()
+
+
+def test_client_refunds_estimate_before_retrying():
+    # 429 で失敗した 2 回分の見積もり（max_tokens 込みで 1000 超）は戻り、成功した応答の usage だけが残る
+    limits = RateLimiterRegistry({"default": {"tokens_per_minute": 600000}}, clock=FakeClock())
+    with FakeOpenAIServer(errors=[429, 429], retry_after=0) as server:
+        client = LLMClient(base_url=server.base_url, api_key="test", transport="stdlib",
+                           retries=2, backoff=0.01, rate_limits=limits)
+        try:
+            client.chat_sync(chat_messages("s", "hello"), model="m", max_tokens=1000)
+            assert client.stats["rate_limited"] == 2
+            bucket = limits.limiter_for("m").tokens
+            assert 0 < bucket.capacity - bucket.tokens < 100
+        finally:
+            client.close()
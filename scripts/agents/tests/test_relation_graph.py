@@ -0,0 +1,121 @@
+import json
+
+from scripts.utils.db_model_utils import _prisma_model_summary
+from scripts.utils.prisma_schema import parse_prisma_text
+from scripts.utils.relation_graph import (
+    RelationGraph,
+    analyze_relation_graph,
+    build_relation_graph,
+    find_cycles,
+)
+from scripts.utils.sql_migrations import apply_migration, empty_schema
+from scripts.utils.typeorm_entities import parse_typeorm_source
+
+
+MIGRATION = """
+    CREATE TABLE facilities (id uuid PRIMARY KEY, parent_id uuid REFERENCES facilities(id));
+    CREATE TABLE staff (id uuid PRIMARY KEY, facility_id uuid REFERENCES facilities(id));
+    CREATE TABLE care_receivers (
+      id uuid PRIMARY KEY,
+      facility_id uuid NOT NULL REFERENCES facilities(id) ON DELETE CASCADE,
+      primary_staff_id uuid REFERENCES staff(id)
+    );
+    ALTER TABLE staff ADD COLUMN lead_receiver_id uuid REFERENCES care_receivers(id);
+    CREATE INDEX idx_care_receivers_facility ON care_receivers (facility_id, id);
+    CREATE INDEX idx_staff_lead ON staff (lead_receiver_id) WHERE lead_receiver_id IS NOT NULL;
+"""
+
+PRISMA = """
+model User {
+  id      Int     @id
+  posts   Post[]
+  profile Profile?
+  groups  Group[]
+}
+model Profile {
+  id     Int  @id
+  userId Int  @unique
+  user   User @relation(fields: [userId], references: [id])
+}
+model Post {
+  id       Int  @id
+  authorId Int
+  author   User @relation(fields: [authorId], references: [id], onDelete: Cascade)
+}
+model Group {
+  id      Int    @id
+  members User[]
+  @@map("groups")
+}
+"""
+
+ENTITY = """
+@Entity()
+@Index(["owner", "createdAt"])
+export class Note {
+  @PrimaryGeneratedColumn() id: number;
+  @ManyToOne(() => User) owner: User;
+  @ManyToOne(() => Folder, { onDelete: "CASCADE" })
+  @JoinColumn({ name: "folder_id" })
+  folder: Folder;
+}
+"""
+
+
+def _sql_graph():
+    schema = empty_schema()
+    apply_migration(schema, MIGRATION, "0001.sql")
+    return build_relation_graph(sql_schema=schema)
+
+
+def test_sql_edges_cycles_and_unindexed_foreign_keys():
+    graph = _sql_graph()
+    assert graph.successors("care_receivers") == ["facilities", "staff"]
+    assert sorted(graph.predecessors("facilities")) == ["care_receivers", "facilities", "staff"]
+
+    result = analyze_relation_graph(graph, fan_out_threshold=2)
+    # staff -> care_receivers -> staff は循環、facilities の parent_id は自己参照として別扱い
+    assert result["cycles"] == [["care_receivers", "staff"]]
+    assert result["self_references"] == [{"model": "facilities", "edge": "facilities_parent_id_fkey", "columns": ["parent_id"]}]
+    assert result["high_fan_out"][0]["model"] == "facilities"
+    # 部分インデックスは裏付けにならない。facility_id は複合インデックスの先頭なので OK
+    unindexed = {(item["model"], tuple(item["columns"])) for item in result["unindexed_foreign_keys"]}
+    assert unindexed == {
+        ("facilities", ("parent_id",)),
+        ("staff", ("facility_id",)),
+        ("staff", ("lead_receiver_id",)),
+        ("care_receivers", ("primary_staff_id",)),
+    }
+
+
+def test_prisma_and_typeorm_relations():
+    ast = parse_prisma_text(PRISMA)
+    parsed_prisma = [{"path": "schema.prisma", "data": {"models": [_prisma_model_summary(m) for m in ast["models"]]}}]
+    parsed_typeorm = [{"path": "note.entity.ts", "data": parse_typeorm_source(ENTITY)[0]}]
+    graph = build_relation_graph(parsed_prisma, parsed_typeorm)
+    edges = {edge["name"]: edge for edge in graph.edges}
+
+    assert edges["Profile.user"]["kind"] == "one_to_one" and edges["Profile.user"]["indexed"]
+    assert edges["Post.author"]["kind"] == "many_to_one" and edges["Post.author"]["indexed"] is False
+    assert edges["Post.author"]["on_delete"] == "Cascade"
+    # 暗黙の多対多は 1 本だけ
+    assert [e["kind"] for e in graph.edges if {e["from"], e["to"]} == {"User", "Group"}] == ["many_to_many"]
+    assert graph.nodes["Group"]["table"] == "groups"
+
+    # @Index(["owner", ...]) はリレーションのプロパティ名で裏付ける
+    assert edges["Note.owner"]["columns"] == ["ownerId"] and edges["Note.owner"]["indexed"]
+    assert edges["Note.folder"]["columns"] == ["folder_id"] and edges["Note.folder"]["indexed"] is False
+    assert graph.nodes["Folder"]["sources"] == ["external"]
+
+
+def test_exports_round_trip():
+    graph = _sql_graph()
+    data = json.loads(graph.to_json())
+    assert data["adjacency"]["staff"] == ["care_receivers", "facilities"]
+    restored = RelationGraph.from_dict(data)
+    assert find_cycles(restored) == find_cycles(graph)
+
+    dot = graph.to_dot()
+    assert dot.startswith('digraph "relations" {')
+    assert '"staff" -> "care_receivers" [label="lead_receiver_id", color=red, style=dashed];' in dot
+    assert '"care_receivers" -> "facilities" [label="facility_id"];' in dot
@@ -0,0 +1,76 @@
+from scripts.utils.review_shards import merge_reviews, shard_diff, split_file_diffs
+
+
+def _file_diff(path: str, hunks: int, body_lines: int = 3) -> str:
+    out = [f"diff --git a/{path} b/{path}", "index 111..222 100644", f"--- a/{path}", f"+++ b/{path}"]
+    for h in range(hunks):
+        out.append(f"@@ -{h * 10 + 1},0 +{h * 10 + 1},{body_lines} @@")
+        out.extend(f"+const v{h}_{i} = {i}" for i in range(body_lines))
+    return "\n".join(out) + "\n"
+
+
+def count_lines(text: str) -> int:
+    return len(text.splitlines())
+
+
+def test_shard_diff_packs_files_and_splits_large_files_by_hunk():
+    diff = (
+        "warning: preamble\n"
+        + _file_diff("a.ts", 1)
+        + _file_diff("b.ts", 1)
+        + _file_diff("big.tsx", 4)
+        + "diff --git a/old.ts b/old.ts\ndeleted file mode 100644\n--- a/old.ts\n+++ /dev/null\n@@ -1 +0,0 @@\n-x\n"
+    )
+    files = split_file_diffs(diff)
+    assert [f["path"] for f in files] == ["a.ts", "b.ts", "big.tsx", "old.ts"]
+    assert len(files[2]["hunks"]) == 4
+
+    # 1 ファイル 8 行 / ハンク 4 行。予算 16 行: a+b で 1 シャード、big はヘッダ 4 行 + 3 ハンクと残り 1 ハンクに分かれる
+    shards = shard_diff(diff, max_tokens=16, count_tokens=count_lines)
+    assert [s["files"] for s in shards] == [["a.ts", "b.ts"], ["big.tsx"], ["big.tsx", "old.ts"]]
+    assert all(s["tokens"] <= 16 for s in shards)
+    assert all(s["diff"].startswith("diff --git") for s in shards)
+    # 全ハンクがどこかのシャードに入る（切り捨て無し）
+    joined = "".join(s["diff"] for s in shards)
+    assert all(f"+const v{h}_2 = 2" in joined for h in range(4))
+    assert not any(s["truncated"] for s in shards)
+
+    huge = shard_diff(_file_diff("huge.ts", 1, body_lines=50), max_tokens=20, count_tokens=count_lines)
+    assert len(huge) == 1 and huge[0]["truncated"]
+    assert huge[0]["diff"].endswith("... (hunk truncated)\n")
+
+
+def test_merge_reviews_dedupes_and_reduces_severity():
+    shards = [{"files": ["a.ts"]}, {"files": ["b.ts", "c.ts"]}]
+    reviews = [
+        {
+            "summary": "a の修正",
+            "overall_severity": "minor",
+            "findings": [
+                {"title": "Missing  null check", "lines": "3-4", "severity": "minor"},
+                {"file": "a.ts", "title": "naming", "lines": "9", "severity": "NIT"},
+            ],
+        },
+        {
+            "summary": "b と c",
+            "overall_severity": "nit",
+            "findings": [
+                {"file": "a.ts", "title": "missing null check", "lines": "3-4", "severity": "major", "fix": "guard"},
+                {"title": "unknown file", "severity": "weird"},
+            ],
+        },
+        {},
+    ]
+    merged = merge_reviews(reviews, shards)
+    assert merged["overall_severity"] == "major"
+    assert merged["summary"] == "- a の修正\n- b と c"
+    titles = [(f.get("file", ""), f["title"], f["severity"]) for f in merged["findings"]]
+    assert titles == [
+        ("a.ts", "missing null check", "major"),
+        ("", "unknown file", "minor"),
+        ("a.ts", "naming", "nit"),
+    ]
+    assert merged["findings"][0]["fix"] == "guard"
+
+    assert merge_reviews([{}, {"summary": "only"}])["overall_severity"] == "minor"
+    assert merge_reviews([{"overall_severity": "nit", "findings": []}])["overall_severity"] == "nit"
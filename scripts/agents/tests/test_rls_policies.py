@@ -0,0 +1,61 @@
+from scripts.utils.rls_policies import analyze_rls_policies
+from scripts.utils.sql_migrations import apply_migration, empty_schema
+
+
+MIGRATION = """
+    CREATE TABLE facilities (id uuid PRIMARY KEY);
+    CREATE TABLE members (id uuid PRIMARY KEY, user_id uuid, facility_id uuid, role text);
+    CREATE TABLE notes (
+      id uuid PRIMARY KEY,
+      owner_id uuid NOT NULL,
+      facility_id uuid NOT NULL,
+      body text
+    );
+    CREATE INDEX idx_members_facility ON members (facility_id);
+    ALTER TABLE notes ENABLE ROW LEVEL SECURITY;
+
+    CREATE POLICY notes_own ON notes FOR SELECT TO authenticated
+      USING (owner_id = auth.uid());
+    CREATE POLICY notes_own_cached ON notes FOR SELECT TO authenticated
+      USING (owner_id = (select auth.uid()));
+    CREATE POLICY notes_facility ON public.notes FOR ALL TO authenticated
+      USING (EXISTS (SELECT 1 FROM public.members m WHERE m.facility_id = notes.facility_id AND m.user_id = auth.uid()))
+      WITH CHECK (facility_id IN (SELECT facility_id FROM members WHERE user_id = (SELECT auth.uid())));
+    CREATE POLICY notes_helper ON notes FOR UPDATE
+      USING (public.can_edit(id, 'notes'));
+    CREATE POLICY notes_external ON notes FOR DELETE TO authenticated
+      USING (EXISTS (SELECT 1 FROM public.users WHERE id = (select auth.uid()) AND role = 'admin'));
+    CREATE POLICY deny_anon ON notes FOR ALL TO anon USING (false) WITH CHECK (false);
+"""
+
+
+def _analysis():
+    schema = empty_schema()
+    apply_migration(schema, MIGRATION, "0001.sql")
+    return analyze_rls_policies(schema)
+
+
+def test_flags_unwrapped_calls_correlated_subqueries_and_per_row_functions():
+    result = _analysis()
+    found = {(f["policy"], f["clause"], f["kind"]) for f in result["findings"]}
+    assert found == {
+        ("notes_own", "using", "unwrapped_function"),
+        ("notes_facility", "using", "correlated_subquery"),
+        ("notes_facility", "using", "unwrapped_function"),
+        ("notes_helper", "using", "per_row_function"),
+    }
+    # 定数のポリシー（deny_anon）は解析対象にしない
+    assert {p["name"]: list(p["clauses"]) for p in result["policies"]}["deny_anon"] == []
+    correlated = next(f for f in result["findings"] if f["kind"] == "correlated_subquery")
+    assert "notes.facility_id" in correlated["detail"]
+
+
+def test_unindexed_predicates_and_permissive_overlaps():
+    result = _analysis()
+    unindexed = {(item["table"], tuple(item["columns"])) for item in result["unindexed"]}
+    # members は facility_id のインデックスで引けるが、user_id だけの絞り込みは引けない。
+    # マイグレーション外の users は判定しない
+    assert unindexed == {("notes", ("owner_id",)), ("members", ("user_id",))}
+    overlaps = {(o["role"], o["command"]): o["policies"] for o in result["multiple_permissive"]}
+    assert overlaps[("authenticated", "SELECT")] == ["notes_own", "notes_own_cached", "notes_facility"]
+    assert ("anon", "SELECT") not in overlaps
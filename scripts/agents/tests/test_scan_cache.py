@@ -0,0 +1,45 @@
+from scripts.utils.i18n_utils import generate_i18n_analysis_report, load_i18n_scan_cache, scan_project_for_japanese_texts
+from scripts.utils.scan_cache import ScanCache
+
+
+def test_unchanged_files_are_served_from_cache(tmp_path):
+    src = tmp_path / "src"
+    (src / "app").mkdir(parents=True)
+    (src / "app" / "a.tsx").write_text('alert("保存しました")\n', encoding="utf-8")
+    (src / "app" / "b.tsx").write_text('alert("削除しました")\n', encoding="utf-8")
+    cache_path = tmp_path / "cache.json"
+
+    cold = load_i18n_scan_cache(cache_path)
+    first = scan_project_for_japanese_texts(src, cache=cold)
+    cold.save()
+    assert (cold.stats.hits, cold.stats.misses) == (0, 2)
+
+    (src / "app" / "b.tsx").write_text('alert("更新しました")\n', encoding="utf-8")
+    warm = load_i18n_scan_cache(cache_path)
+    second = scan_project_for_japanese_texts(src, cache=warm)
+    assert (warm.stats.hits, warm.stats.misses) == (1, 1)
+    assert second["app/a.tsx"] == first["app/a.tsx"]
+    assert second["app/b.tsx"][0]["text"] == "更新しました"
+
+
+def test_version_change_invalidates_entries(tmp_path):
+    target = tmp_path / "a.ts"
+    target.write_text("x", encoding="utf-8")
+    cache = ScanCache.load(tmp_path / "cache.json", version="v1")
+    cache.put("a.ts", target, ["value"])
+    cache.save()
+
+    assert ScanCache.load(tmp_path / "cache.json", version="v1").get("a.ts", target) == ["value"]
+    assert ScanCache.load(tmp_path / "cache.json", version="v2").get("a.ts", target) is None
+
+
+def test_i18n_report_shows_cache_stats_on_clean_run():
+    report = generate_i18n_analysis_report({
+        "has_locales": False,
+        "locales_dir": None,
+        "locale_files": {},
+        "hardcoded_texts": {},
+        "translation_suggestions": [],
+        "cache_stats": {"hits": 12, "misses": 0, "saved_seconds": 0.5, "spent_seconds": 0.0},
+    })
+    assert "**Scan cache:** 12 hits / 0 misses, ~0.50s saved" in report
@@ -0,0 +1,98 @@
+from scripts.utils.schema_drift import detect_schema_drift, parse_zod_schemas
+from scripts.utils.sql_migrations import apply_migration, empty_schema
+
+
+SCHEMA_TS = """
+import { z } from "zod"
+
+export const PriorityEnum = z.enum(["high", "low"]).default("low");
+
+const Vitals = z.object({
+  heartRate: z.number().int().optional(), // bpm
+  "body-temp": z.number(),
+})
+
+export const EntrySchema = z.object({
+  id: z.string().cuid(),
+  userId: z.string().optional(), // 作成者
+  serviceId: z.string(),
+  date: z.string(),
+  title: z.string().max(200),
+  score: z.number(),
+  priority: PriorityEnum,
+  vitals: Vitals.optional(),
+})
+"""
+
+MIGRATION = """
+    CREATE TABLE case_records (
+      id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+      user_id text NOT NULL,
+      service_id text,
+      record_date date NOT NULL,
+      title varchar(100) NOT NULL,
+      score int NOT NULL,
+      facility_id uuid NOT NULL,
+      record_data jsonb NOT NULL DEFAULT '{}'::jsonb
+    );
+"""
+
+
+def _schema():
+    schema = empty_schema()
+    apply_migration(schema, MIGRATION, "0001.sql")
+    return schema
+
+
+def test_parse_zod_schemas_resolves_references_and_modifiers():
+    schemas = parse_zod_schemas(SCHEMA_TS)
+    assert [name for name, s in schemas.items() if s["root"]] == ["EntrySchema"]
+    fields = schemas["EntrySchema"]["fields"]
+    assert list(fields) == ["id", "userId", "serviceId", "date", "title", "score", "priority", "vitals"]
+    assert fields["id"]["format"] == "cuid"
+    assert fields["userId"]["optional"] is True
+    assert fields["title"]["max_length"] == 200
+    assert fields["priority"]["type"] == "enum" and fields["priority"]["has_default"] is True
+    assert fields["vitals"]["type"] == "object" and fields["vitals"]["optional"] is True
+    assert list(fields["vitals"]["fields"]) == ["heartRate", "body-temp"]
+
+
+def test_detect_drift_and_rediff_only_changed_pairs(tmp_path):
+    schema_dir = tmp_path / "schemas"
+    schema_dir.mkdir()
+    (schema_dir / "entry.ts").write_text(SCHEMA_TS, encoding="utf-8")
+    (schema_dir / "other.ts").write_text('export const Other = z.object({ id: z.string().uuid() })\n', encoding="utf-8")
+    cache_path = tmp_path / "drift.json"
+    schema = _schema()
+
+    result = detect_schema_drift(schema, schema_dir=schema_dir, cache_path=cache_path)
+    entry = next(p for p in result["pairs"] if p["schema"] == "EntrySchema")
+    found = {(d["kind"], d["severity"], d["field"] or d["column"]) for d in entry["drift"]}
+    assert found == {
+        ("format", "error", "id"),
+        ("nullability", "error", "userId"),
+        ("nullability", "warning", "serviceId"),
+        ("length", "warning", "title"),
+        ("type", "warning", "score"),
+        ("unset_column", "info", "facility_id"),
+    }
+    assert {"field": "date", "column": "record_date"} in entry["matched"]
+    assert entry["json_fields"] == ["priority", "vitals"]
+    other = next(p for p in result["pairs"] if p["schema"] == "Other")
+    assert [d["kind"] for d in other["drift"]] == ["unset_column"] * 5
+    assert result["cache_stats"]["misses"] == 2
+
+    # 変更なし → 全てキャッシュ。スキーマファイル 1 つだけ変える → その組だけ比較し直す
+    again = detect_schema_drift(schema, schema_dir=schema_dir, cache_path=cache_path)
+    assert again["pairs"] == result["pairs"]
+    assert again["cache_stats"]["hits"] == 2
+    (schema_dir / "other.ts").write_text('export const Other = z.object({ id: z.string() })\n', encoding="utf-8")
+    changed = detect_schema_drift(schema, schema_dir=schema_dir, cache_path=cache_path)
+    assert (changed["cache_stats"]["hits"], changed["cache_stats"]["misses"]) == (1, 1)
+
+    # テーブル定義が変わると全ての組を比較し直す
+    apply_migration(schema, "ALTER TABLE case_records ALTER COLUMN user_id DROP NOT NULL;", "0002.sql")
+    altered = detect_schema_drift(schema, schema_dir=schema_dir, cache_path=cache_path)
+    assert altered["cache_stats"]["misses"] == 2
+    entry = next(p for p in altered["pairs"] if p["schema"] == "EntrySchema")
+    assert ("nullability", "error", "userId") not in {(d["kind"], d["severity"], d["field"]) for d in entry["drift"]}
@@ -0,0 +1,61 @@
+from scripts.utils import source_reader
+from scripts.utils.source_reader import CJK_BYTES_PATTERN, SourcePolicy, iter_source_lines
+from scripts.utils.i18n_utils import extract_hardcoded_japanese_texts, scan_project_for_japanese_texts
+from scripts.utils.db_model_utils import parse_prisma_schema
+
+
+SOURCE = 'const a = 1\r\nalert("保存しました")\n// コメント\nconst b = `失敗: ${a}`\n'
+
+
+def test_mmap_path_yields_same_lines_as_small_path(tmp_path, monkeypatch):
+    p = tmp_path / "page.tsx"
+    p.write_bytes(SOURCE.encode("utf-8"))
+
+    small = list(iter_source_lines(p, prefilter=CJK_BYTES_PATTERN))
+    monkeypatch.setattr(source_reader, "MMAP_THRESHOLD", 1)
+    large = list(iter_source_lines(p, prefilter=CJK_BYTES_PATTERN))
+
+    assert small == large
+    assert [line.rstrip("\n") for line in small] == SOURCE.replace("\r\n", "\n").splitlines()
+    assert [item["line"] for item in extract_hardcoded_japanese_texts(p)] == [2, 4]
+
+
+def test_prefilter_skips_files_without_japanese(tmp_path, monkeypatch):
+    p = tmp_path / "plain.ts"
+    p.write_text("export const a = 'hello'\n", encoding="utf-8")
+    monkeypatch.setattr(source_reader, "MMAP_THRESHOLD", 1)
+    assert list(iter_source_lines(p, prefilter=CJK_BYTES_PATTERN)) == []
+
+
+def test_invalid_utf8_does_not_abort_scan(tmp_path):
+    (tmp_path / "legacy.ts").write_bytes('alert("保存")\n'.encode("utf-8") + b'const x = "\xff\xfe"\n')
+    texts = scan_project_for_japanese_texts(tmp_path)
+    assert [item["text"] for item in texts["legacy.ts"]] == ["保存"]
+
+
+def test_oversized_files_are_skipped_and_reported(tmp_path):
+    (tmp_path / "small.tsx").write_text('alert("小さい")\n', encoding="utf-8")
+    (tmp_path / "bundle.js").write_text('alert("大きい")\n' + "x" * 4096, encoding="utf-8")
+
+    policy = SourcePolicy(max_bytes=1024)
+    texts = scan_project_for_japanese_texts(tmp_path, policy=policy)
+
+    assert list(texts) == ["small.tsx"]
+    assert [(s["path"], s["reason"]) for s in policy.skipped] == [("bundle.js", "too_large")]
+
+
+def test_prisma_blocks_parsed_line_by_line(tmp_path):
+    schema = tmp_path / "schema.prisma"
+    schema.write_text(
+        'datasource db {\n  provider = "postgresql"\n  url = env("DATABASE_URL")\n}\n'
+        'generator client { provider = "prisma-client-js" }\n'
+        'model User {\n  id Int @id\n  // memo\n  name String?\n  posts Post[]\n}\n',
+        encoding="utf-8",
+    )
+    data = parse_prisma_schema(schema)
+    assert data["datasource"] == {"provider": "postgresql", "url": 'env("DATABASE_URL")'}
+    assert data["generator"] == {"provider": "prisma-client-js"}
+    (user,) = data["models"]
+    assert user["name"] == "User"
+    assert [f["name"] for f in user["fields"]] == ["id", "name"]
+    assert [r["name"] for r in user["relations"]] == ["posts"]
@@ -0,0 +1,94 @@
+from scripts.utils.sql_migrations import apply_migration, empty_schema, replay_migrations, split_sql_statements
+
+
+def test_split_respects_comments_strings_and_dollar_quotes():
+    sql = (
+        "-- a; comment\n"
+        "CREATE TABLE t (note text DEFAULT 'x;y');\n"
+        "CREATE FUNCTION f() RETURNS trigger AS $$ BEGIN NEW.a = 1; RETURN NEW; END; $$ LANGUAGE plpgsql;\n"
+        "/* block; */ DROP TABLE t"
+    )
+    stmts = split_sql_statements(sql)
+    assert len(stmts) == 3
+    assert stmts[0] == "CREATE TABLE t (note text DEFAULT 'x;y')"
+    assert stmts[1].startswith("CREATE FUNCTION f()") and stmts[1].endswith("LANGUAGE plpgsql")
+    assert stmts[2] == "DROP TABLE t"
+
+
+def test_replay_handles_alter_rename_do_blocks_and_policies():
+    schema = empty_schema()
+    apply_migration(schema, """
+        CREATE TABLE IF NOT EXISTS case_records (
+          id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+          user_id text NOT NULL,
+          payload jsonb NOT NULL DEFAULT '{}'::jsonb,
+          UNIQUE(user_id, id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_user ON case_records(user_id, id DESC);
+        CREATE POLICY "Own rows" ON case_records FOR SELECT TO authenticated
+          USING (auth.uid()::text = user_id);
+    """, "001.sql")
+    apply_migration(schema, """
+        DO $$ BEGIN
+          IF EXISTS (SELECT 1 FROM information_schema.columns WHERE column_name = 'payload') THEN
+            ALTER TABLE public.case_records RENAME COLUMN payload TO record_data;
+          END IF;
+        END $$;
+        ALTER TABLE public.case_records
+          ADD COLUMN IF NOT EXISTS facility_id uuid REFERENCES public.facilities(id),
+          ALTER COLUMN user_id DROP NOT NULL;
+        ALTER TABLE public.case_records ENABLE ROW LEVEL SECURITY;
+        DROP POLICY IF EXISTS "Own rows" ON public.case_records;
+        CREATE POLICY case_records_select ON public.case_records FOR SELECT
+          USING (facility_id = public.get_current_facility_id());
+    """, "002.sql")
+
+    table = schema["tables"]["case_records"]
+    assert list(table["columns"]) == ["id", "user_id", "record_data", "facility_id"]
+    assert table["columns"]["user_id"]["nullable"] is True
+    assert table["columns"]["record_data"]["default"] == "'{}'::jsonb"
+    assert table["foreign_keys"][0]["ref_table"] == "facilities"
+    assert table["rls_enabled"] is True
+    assert list(table["policies"]) == ["case_records_select"]
+    assert table["policies"]["case_records_select"]["using"] == "facility_id = public.get_current_facility_id()"
+    assert schema["indexes"]["idx_user"]["columns"] == ["user_id", "id"]
+    # facilities は CREATE されていない → 参照のみ（警告は ALTER/INDEX/POLICY の対象テーブルのみ）
+    assert schema["warnings"] == []
+
+
+def test_table_rename_and_missing_table_warning():
+    schema = empty_schema()
+    apply_migration(schema, """
+        CREATE TABLE public.services (id uuid PRIMARY KEY, slug text UNIQUE NOT NULL);
+        CREATE TABLE staff (id uuid, service_id uuid REFERENCES services(id));
+        ALTER TABLE IF EXISTS public.services RENAME TO facilities;
+        ALTER TABLE public.services ENABLE ROW LEVEL SECURITY;
+    """, "001.sql")
+    assert schema["tables"]["staff"]["foreign_keys"][0]["ref_table"] == "facilities"
+    assert schema["tables"]["services"]["declared"] is False
+    assert "renamed to facilities" in schema["warnings"][0]["message"]
+
+
+def test_incremental_replay_only_applies_new_files(tmp_path):
+    migrations = tmp_path / "migrations"
+    migrations.mkdir()
+    cache = tmp_path / "sql-schema.json"
+    first = migrations / "20260101_create.sql"
+    first.write_text("CREATE TABLE a (id int PRIMARY KEY);", encoding="utf-8")
+
+    result = replay_migrations([first], cache_path=cache)
+    assert result["replayed"] == ["20260101_create.sql"]
+
+    second = migrations / "20260102_alter.sql"
+    second.write_text("ALTER TABLE a ADD COLUMN name text;", encoding="utf-8")
+    result = replay_migrations([first, second], cache_path=cache)
+    assert result["replayed"] == ["20260102_alter.sql"]
+    assert list(result["schema"]["tables"]["a"]["columns"]) == ["id", "name"]
+
+    assert replay_migrations([first, second], cache_path=cache)["replayed"] == []
+
+    # 再生済みファイルが書き換えられたら最初から再生し直す
+    first.write_text("CREATE TABLE a (id bigint PRIMARY KEY);", encoding="utf-8")
+    result = replay_migrations([first, second], cache_path=cache)
+    assert result["replayed"] == ["20260101_create.sql", "20260102_alter.sql"]
+    assert result["schema"]["tables"]["a"]["columns"]["id"]["type"] == "bigint"
@@ -0,0 +1,94 @@
+import threading
+import time
+
+import pytest
+
+from scripts.utils.llm_cache import ResponseCache
+from scripts.utils.stage_graph import load_stage_graph, run_stage_graph, topological_order
+
+
+def test_load_stage_graph_defaults_declared_and_cycles():
+    assert load_stage_graph({}) == {
+        "implementation_agent": [],
+        "review_agent": ["implementation_agent"],
+        "test_agent": ["review_agent"],
+        "doc_agent": ["implementation_agent", "test_agent"],
+    }
+    cfg = {"workflow": {
+        "sequence": ["implementation_agent", "test_agent", "lint_agent", "doc_agent"],
+        "depends_on": {"test_agent": ["implementation_agent"]},
+    }}
+    # review_agent は sequence に無いので依存から外れ、未知の lint_agent は直前のステージに依存
+    assert load_stage_graph(cfg) == {
+        "implementation_agent": [],
+        "test_agent": ["implementation_agent"],
+        "lint_agent": ["test_agent"],
+        "doc_agent": ["implementation_agent", "test_agent"],
+    }
+    with pytest.raises(ValueError):
+        load_stage_graph({"workflow": {"sequence": ["a", "b"], "depends_on": {"a": ["b"], "b": ["a"]}}})
+    assert topological_order({"c": ["a"], "a": [], "b": []}) == ["a", "b", "c"]
+
+
+def test_independent_stages_run_concurrently():
+    graph = {"plan": [], "review": ["plan"], "tests": ["plan"], "doc": ["review", "tests"]}
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def run(name, inputs):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.1)
+        with lock:
+            active[0] -= 1
+        return f"{name}({','.join(inputs[d] for d in sorted(inputs))})"
+
+    result = run_stage_graph(graph, run, jobs=4)
+    assert result["outputs"]["doc"] == "doc(review(plan()),tests(plan()))"
+    assert peak[0] == 2
+    assert result["order"][0] == "plan" and result["order"][-1] == "doc"
+    assert result["wall_seconds"] < 0.38
+    assert all(s["status"] == "ok" and s["seconds"] >= 0.1 for s in result["stages"])
+
+
+def test_memo_reruns_only_changed_stage_and_downstream(tmp_path):
+    graph = {"impl": [], "review": ["impl"], "test": ["review"], "doc": ["impl", "test"]}
+    calls = []
+
+    def run(name, inputs):
+        calls.append(name)
+        return f"{name}:{keys[name]}:" + "|".join(inputs[d] for d in sorted(inputs))
+
+    keys = {"impl": "v1", "review": "v1", "test": "v1", "doc": "v1"}
+    memo = ResponseCache.load(tmp_path / "stages.json")
+    first = run_stage_graph(graph, run, stage_keys=dict(keys), memo=memo)
+    memo.save()
+    assert calls == ["impl", "review", "test", "doc"]
+
+    calls.clear()
+    keys["review"] = "v2"
+    memo = ResponseCache.load(tmp_path / "stages.json")
+    second = run_stage_graph(graph, run, stage_keys=dict(keys), memo=memo)
+    assert calls == ["review", "test", "doc"]
+    assert [s["status"] for s in second["stages"]] == ["cached", "ok", "ok", "ok"]
+    assert second["outputs"]["impl"] == first["outputs"]["impl"]
+
+    def failing(name, inputs):
+        if name == "review":
+            raise RuntimeError("boom")
+        return name
+
+    keys["review"] = "v3"
+    memo = ResponseCache.load(tmp_path / "stages.json")
+    broken = run_stage_graph(graph, failing, stage_keys=dict(keys), jobs=2, memo=memo)
+    assert {s["name"]: s["status"] for s in broken["stages"]} == {
+        "impl": "cached", "review": "error", "test": "skipped", "doc": "skipped",
+    }
+    assert "boom" in broken["stages"][1]["error"]
+    assert "review" not in broken["outputs"]
+
+    # 失敗はメモ化されず、直れば再実行される
+    calls.clear()
+    fixed = run_stage_graph(graph, run, stage_keys=dict(keys), memo=memo)
+    assert calls == ["review", "test", "doc"]
+    assert fixed["outputs"]["review"].startswith("review:v3:")
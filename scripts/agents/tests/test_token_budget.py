@@ -0,0 +1,59 @@
+import pytest
+
+from scripts.utils.review_shards import pack_diff
+from scripts.utils.token_budget import (
+    count_tokens,
+    estimate_tokens,
+    get_encoder,
+    pack_items,
+    prompt_budget,
+    truncate_to_tokens,
+)
+
+
+def test_pack_items_by_priority_keeps_original_order():
+    items = [
+        {"text": "a" * 400, "priority": 0},   # 100 tokens（概算）
+        {"text": "b" * 400, "priority": 2},
+        {"text": "c" * 400, "priority": 1},
+        {"text": "d" * 40, "priority": 1, "after": 0},
+    ]
+    packed = pack_items(items, 230, separator="", min_partial_tokens=20)
+    assert [s["status"] for s in packed["items"]] == ["truncated", "full", "full", "dropped"]
+    assert packed["text"].startswith("a") and packed["text"].index("b" * 400) < packed["text"].index("c" * 400)
+    assert packed["tokens"] <= 230
+
+    assert pack_items(items, 150, separator="")["items"][0]["status"] == "dropped"
+
+
+def test_truncate_and_budget_helpers():
+    text = "日本語のテキスト" * 100
+    cut = truncate_to_tokens(text, 50, mark="...")
+    assert count_tokens(cut) <= 50 and cut.endswith("...")
+    assert truncate_to_tokens("short", 50) == "short"
+    assert estimate_tokens("") == 0
+    assert prompt_budget("gpt-4", 10000, reserve=1200) == 8192 - 1200
+    assert prompt_budget("gpt-4o-mini", 10000, reserve=1200) == 10000
+
+
+def test_pack_diff_keeps_every_file_header_before_later_hunks():
+    def file_diff(path, hunks):
+        head = f"diff --git a/{path} b/{path}\n--- a/{path}\n+++ b/{path}\n"
+        return head + "".join(f"@@ -{h},0 +{h},1 @@\n+{path}-{h} " + "x" * 200 + "\n" for h in range(hunks))
+
+    diff = file_diff("a.ts", 5) + file_diff("b.ts", 5) + file_diff("c.ts", 1)
+    packed = pack_diff(diff, 320)
+    assert count_tokens(packed) <= 320
+    # 全ファイルの先頭ハンクが入り、後続ハンクは残りの予算で浅い順に入る
+    for path in ("a.ts", "b.ts", "c.ts"):
+        assert f"+++ b/{path}\n@@ -0,0 +0,1 @@\n+{path}-0" in packed
+    assert "+a.ts-1" in packed and "+a.ts-4" not in packed
+
+
+def test_tiktoken_encoder_is_cached():
+    pytest.importorskip("tiktoken")
+    encoder = get_encoder("gpt-4o-mini")
+    if encoder is None:
+        pytest.skip("tiktoken BPE file is not available offline")
+    assert get_encoder("gpt-4o-mini") is encoder
+    assert count_tokens("hello world", "gpt-4o-mini") == len(encoder.encode("hello world"))
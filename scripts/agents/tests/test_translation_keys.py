@@ -0,0 +1,61 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from scripts.utils import i18n_utils
+from scripts.utils.i18n_utils import suggest_translation_keys
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+
+TEXTS = {
+    "app/page.tsx": [
+        {"line": 1, "text": "氏名を入力してください", "context": ""},
+        {"line": 2, "text": "保存", "context": ""},
+        {"line": 3, "text": "保存", "context": ""},
+    ],
+    "app/form.tsx": [{"line": 9, "text": "生年月日", "context": ""}],
+}
+
+_SCRIPT = """
+import json
+from scripts.utils.i18n_utils import suggest_translation_keys
+texts = json.loads({payload!r})
+print(json.dumps([s["key"] for s in suggest_translation_keys(texts)]))
+"""
+
+
+def _keys_with_hash_seed(seed: str):
+    env = dict(os.environ, PYTHONHASHSEED=seed, PYTHONPATH=str(REPO_ROOT))
+    script = _SCRIPT.format(payload=json.dumps(TEXTS, ensure_ascii=False))
+    out = subprocess.run([sys.executable, "-c", script], env=env, cwd=REPO_ROOT,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout)
+
+
+def test_keys_are_stable_across_processes():
+    keys = _keys_with_hash_seed("1")
+    assert keys == _keys_with_hash_seed("2") == _keys_with_hash_seed("12345")
+    assert keys == [s["key"] for s in suggest_translation_keys(TEXTS)]
+    assert [k.split(".")[0] for k in keys] == ["errors", "actions", "common"]
+
+
+def test_colliding_digests_get_distinct_keys_regardless_of_order(monkeypatch):
+    # 先頭 12 桁が同じダイジェストを強制して衝突させる（どれも common. に分類される）
+    fake = {
+        "生年月日": "aaaaaaaaaaaa01" + "0" * 18,
+        "ご利用者様": "bbbbbbbbbbbb02" + "0" * 18,
+        "連絡先": "aaaaaaaaaaaa03" + "0" * 18,
+    }
+    monkeypatch.setattr(i18n_utils, "_text_digest", fake.__getitem__)
+    texts = [{"line": n, "text": t, "context": ""} for n, t in enumerate(fake, 1)]
+
+    keys = {s["japanese"]: s["key"] for s in suggest_translation_keys({"a.tsx": texts})}
+    assert keys == {
+        "生年月日": "common.text" + fake["生年月日"],
+        "ご利用者様": "common.textbbbbbbbbbbbb",
+        "連絡先": "common.text" + fake["連絡先"],
+    }
+    reversed_keys = {s["japanese"]: s["key"] for s in suggest_translation_keys({"a.tsx": texts[::-1]})}
+    assert reversed_keys == keys
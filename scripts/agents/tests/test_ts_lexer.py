@@ -0,0 +1,54 @@
+from scripts.utils.i18n_utils import extract_hardcoded_japanese_texts
+from scripts.utils.ts_lexer import JSX_TEXT, STRING, TEMPLATE, tokenize
+
+SOURCE = """\
+// alert("コメント")
+const a = "二重", b = 'シングル'
+const t = `前半 ${n + `内側`} 後半
+二行目`
+const r = /["']/g, d = x / 2 / "割り算"
+export const P = () => (
+  <div title="属性" aria-label={t("キー")}>
+    こんにちは
+    世界
+    <br />
+  </div>
+)
+"""
+
+
+def test_tokenize_yields_literals_templates_and_jsx_text():
+    tokens = [(t.kind, t.value, t.line) for t in tokenize(SOURCE)]
+    assert tokens == [
+        (STRING, "二重", 2),
+        (STRING, "シングル", 2),
+        (TEMPLATE, "前半 ", 3),
+        (TEMPLATE, "内側", 3),
+        (TEMPLATE, " 後半\n二行目", 3),
+        (STRING, "割り算", 5),
+        (STRING, "属性", 7),
+        (STRING, "キー", 7),
+        (JSX_TEXT, "こんにちは\n    世界", 8),
+    ]
+    # 行をまたいだトークンは閉じた行を end_line に持つ
+    ends = {t.value: (t.line, t.end_line) for t in tokenize(SOURCE)}
+    assert ends[" 後半\n二行目"] == (3, 4)
+    assert ends["二重"] == (2, 2)
+
+
+def test_long_minified_line_is_scanned_linearly():
+    line = "var a=" + "+".join(['"x"'] * 20000) + ';var b="終端";'
+    tokens = list(tokenize(line))
+    assert len(tokens) == 20001
+    assert tokens[-1].value == "終端"
+
+
+def test_extract_reports_each_literal_once(tmp_path):
+    path = tmp_path / "page.tsx"
+    path.write_text(SOURCE, encoding="utf-8")
+
+    texts = [(item["line"], item["text"]) for item in extract_hardcoded_japanese_texts(path)]
+
+    assert (1, "コメント") not in texts
+    assert (8, "こんにちは 世界") in texts
+    assert len(texts) == len(set(texts))
@@ -0,0 +1,74 @@
+from scripts.utils.scan_cache import ScanCache
+from scripts.utils.typeorm_entities import parse_typeorm_entities, parse_typeorm_source
+
+
+ENTITY = '''
+import { Column, Entity, JoinColumn, ManyToOne, PrimaryGeneratedColumn } from "typeorm"
+
+/** @Entity() in a comment is ignored */
+@Entity({ name: "case_records" })
+@Index(["serviceId", "recordDate"])
+export class CaseRecord {
+  @PrimaryGeneratedColumn("uuid")
+  id!: string
+
+  @Column({
+    type: "jsonb",
+    default: () => "'{}'::jsonb",
+    transformer: { to: (v: unknown) => JSON.stringify(v), from: (v: string) => v },
+  })
+  recordData: Record<string, unknown>
+
+  @Column("date", { nullable: true }) recordDate?: string | null
+
+  @ManyToOne(() => Service, (service) => service.records, { onDelete: "CASCADE" })
+  @JoinColumn({ name: "service_id" })
+  service: Service
+
+  @BeforeInsert()
+  touch() { this.note = "@Column() x: string" }
+}
+'''
+
+
+def test_multiline_decorators_with_nested_arguments():
+    (entity,) = parse_typeorm_source(ENTITY)
+    assert (entity["name"], entity["table"], entity["is_entity"]) == ("CaseRecord", "case_records", True)
+    assert [(c["name"], c["column_type"], c["nullable"]) for c in entity["columns"]] == [
+        ("id", "uuid", False),
+        ("recordData", "jsonb", False),
+        ("recordDate", "date", True),
+    ]
+    options = entity["columns"][1]["options"]
+    assert options["default"] == "() => \"'{}'::jsonb\""
+    assert set(options["transformer"]) == {"to", "from"}
+    assert entity["columns"][1]["type"] == "Record<string, unknown>"
+
+    (service,) = entity["relations"]
+    assert (service["target"], service["options"], service["join"]["options"]) == (
+        "Service", {"onDelete": "CASCADE"}, {"name": "service_id"},
+    )
+    assert entity["indices"][0]["args"] == ['["serviceId", "recordDate"]']
+
+
+def test_cache_reuses_unchanged_files_and_matches_parallel(tmp_path):
+    paths = []
+    for i in range(3):
+        p = tmp_path / f"e{i}.entity.ts"
+        p.write_text(ENTITY.replace("CaseRecord", f"CaseRecord{i}"), encoding="utf-8")
+        paths.append(p)
+    cache_path = tmp_path / "cache.json"
+
+    cold = ScanCache.load(cache_path, "test")
+    first = parse_typeorm_entities(paths, cache=cold)
+    cold.save()
+    assert (cold.stats.hits, cold.stats.misses) == (0, 3)
+
+    paths[1].write_text(ENTITY.replace("CaseRecord", "Renamed"), encoding="utf-8")
+    warm = ScanCache.load(cache_path, "test")
+    second = parse_typeorm_entities(paths, cache=warm)
+    assert (warm.stats.hits, warm.stats.misses) == (2, 1)
+    assert [e["name"] for e in second] == ["CaseRecord0", "Renamed", "CaseRecord2"]
+    assert second[0] == first[0]
+
+    assert parse_typeorm_entities(paths, jobs=2) == second
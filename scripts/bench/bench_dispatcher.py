@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+dispatcher の呼び出し遅延のベンチマーク（1 件ごとのプロセス起動 vs 常駐モード）
+- per-process: python -m scripts.agents.dispatcher --task ... を 1 件ごとに起動（従来の CI と同じ）
+- serve (stdin): --serve を 1 つ起動し、パイプで 1 行送って 1 行受け取るのを繰り返す
+- serve (socket): --serve --socket で起動し、Unix ソケット越しに同じことをする
+- 1 件あたりの遅延（平均 / p50 / p95）と、常駐プロセスの起動時間を含めた合計時間を表示
+
+実行例:
+    python -m scripts.bench.bench_dispatcher --calls 20
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from scripts.agents.registry import AGENTS
+
+ROOT = Path(__file__).resolve().parents[2]
+DISPATCHER = [sys.executable, "-m", "scripts.agents.dispatcher"]
+
+
+def _tasks(calls: int) -> List[Dict[str, object]]:
+    names = sorted(AGENTS)
+    return [{"id": i, "task": names[i % len(names)], "payload": {}} for i in range(calls)]
+
+
+def _summary(latencies: List[float], total: float) -> Dict[str, float]:
+    ordered = sorted(latencies)
+    return {
+        "mean": statistics.fmean(ordered),
+        "p50": ordered[len(ordered) // 2],
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "total": total,
+    }
+
+
+def bench_per_process(tasks: List[Dict[str, object]]) -> Dict[str, float]:
+    latencies = []
+    t0 = time.perf_counter()
+    for task in tasks:
+        start = time.perf_counter()
+        subprocess.run(DISPATCHER + ["--task", str(task["task"]), "--payload", "{}"],
+                       cwd=ROOT, check=True, capture_output=True)
+        latencies.append(time.perf_counter() - start)
+    return _summary(latencies, time.perf_counter() - t0)
+
+
+def bench_serve_stdin(tasks: List[Dict[str, object]]) -> Dict[str, float]:
+    latencies = []
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(DISPATCHER + ["--serve"], cwd=ROOT, text=True,
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        for task in tasks:
+            start = time.perf_counter()
+            proc.stdin.write(json.dumps(task) + "\n")
+            proc.stdin.flush()
+            result = json.loads(proc.stdout.readline())
+            latencies.append(time.perf_counter() - start)
+            assert result["id"] == task["id"]
+    finally:
+        proc.stdin.close()
+        proc.wait(timeout=10)
+    return _summary(latencies, time.perf_counter() - t0)
+
+
+def bench_serve_socket(tasks: List[Dict[str, object]]) -> Dict[str, float]:
+    latencies = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "dispatcher.sock")
+        t0 = time.perf_counter()
+        proc = subprocess.Popen(DISPATCHER + ["--serve", "--socket", path], cwd=ROOT, stderr=subprocess.DEVNULL)
+        try:
+            while not os.path.exists(path):
+                if proc.poll() is not None:
+                    raise RuntimeError("dispatcher exited before listening")
+                time.sleep(0.005)
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.connect(path)
+                reader = sock.makefile("r", encoding="utf-8")
+                for task in tasks:
+                    start = time.perf_counter()
+                    sock.sendall((json.dumps(task) + "\n").encode("utf-8"))
+                    result = json.loads(reader.readline())
+                    latencies.append(time.perf_counter() - start)
+                    assert result["id"] == task["id"]
+        finally:
+            proc.terminate()
+            proc.wait(timeout=10)
+        return _summary(latencies, time.perf_counter() - t0)
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description="Dispatcher latency: per-process invocation vs resident --serve mode")
+    p.add_argument("--calls", type=int, default=20)
+    args = p.parse_args()
+
+    tasks = _tasks(args.calls)
+    rows = [
+        ("per-process", bench_per_process(tasks)),
+        ("serve (stdin)", bench_serve_stdin(tasks)),
+        ("serve (socket)", bench_serve_socket(tasks)),
+    ]
+    print(f"{args.calls} tasks over {len(AGENTS)} agents")
+    print(f"{'mode':<16}  {'mean (ms)':>9}  {'p50 (ms)':>8}  {'p95 (ms)':>8}  {'total (s)':>9}")
+    for name, row in rows:
+        print(f"{name:<16}  {row['mean'] * 1000:>9.2f}  {row['p50'] * 1000:>8.2f}  {row['p95'] * 1000:>8.2f}  "
+              f"{row['total']:>9.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ファイル走査ベンチマーク
+- 旧実装（拡張子ごとの glob("**/*ext") + 事後フィルタ）と walk_files を比較
+- node_modules の規模を段階的に増やし、走査時間の伸び方を確認する
+
+実行例:
+    python -m scripts.bench.bench_fs_walk --sizes 0 1000 5000 --repeat 3
+"""
+from __future__ import annotations
+
+import argparse
+import glob
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List
+
+from scripts.utils.fs_walk import DEFAULT_EXCLUDE_DIRS, walk_files
+
+EXTENSIONS = [".ts", ".tsx", ".js", ".jsx"]
+
+
+def legacy_scan(root: Path) -> List[Path]:
+    """旧 scan_project_for_japanese_texts と同じ列挙方法"""
+    found = []
+    for ext in EXTENSIONS:
+        for fp in glob.glob(str(root / "**" / f"*{ext}"), recursive=True):
+            path = Path(fp)
+            if any(excluded in path.parts for excluded in DEFAULT_EXCLUDE_DIRS):
+                continue
+            found.append(path)
+    return found
+
+
+def walker_scan(root: Path) -> List[Path]:
+    return list(walk_files(root, suffixes=EXTENSIONS))
+
+
+def build_tree(root: Path, source_files: int, node_module_files: int) -> None:
+    """アプリ側のソースと node_modules 側のファイルを生成"""
+    for i in range(source_files):
+        p = root / "app" / f"feature{i % 20}" / f"page{i}.tsx"
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text("export default function Page() { return null }\n", encoding="utf-8")
+    for i in range(node_module_files):
+        p = root / "node_modules" / f"pkg{i % 100}" / "dist" / f"mod{i}.js"
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text("module.exports = {}\n", encoding="utf-8")
+
+
+def best_of(fn: Callable[[Path], List[Path]], root: Path, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(root)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description="walk_files vs glob benchmark")
+    p.add_argument("--sources", type=int, default=300, help="アプリ側のソースファイル数")
+    p.add_argument("--sizes", type=int, nargs="+", default=[0, 1000, 5000, 20000],
+                   help="node_modules 内のファイル数（複数指定可）")
+    p.add_argument("--repeat", type=int, default=3)
+    args = p.parse_args()
+
+    print(f"{'node_modules':>12}  {'glob x4 (s)':>12}  {'walk_files (s)':>14}  {'speedup':>8}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            build_tree(root, args.sources, size)
+            assert sorted(legacy_scan(root)) == sorted(walker_scan(root))
+            legacy = best_of(legacy_scan, root, args.repeat)
+            walker = best_of(walker_scan, root, args.repeat)
+            print(f"{size:>12}  {legacy:>12.4f}  {walker:>14.4f}  {legacy / walker:>7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+i18n 抽出の並列スキャン・ベンチマーク
+- 逐次 (jobs=1) と並列 (jobs=N) のスループットを比較し、結果の一致も確認する
+- --root 未指定時は日本語リテラルを含む合成ツリーを一時ディレクトリに生成
+
+実行例:
+    python -m scripts.bench.bench_i18n_parallel --files 2000 --jobs 2 4
+    python -m scripts.bench.bench_i18n_parallel --root . --jobs 4
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from scripts.utils.i18n_utils import scan_project_for_japanese_texts
+
+
+def build_tree(root: Path, files: int, lines: int) -> None:
+    for i in range(files):
+        p = root / "app" / f"feature{i % 50}" / f"page{i}.tsx"
+        p.parent.mkdir(parents=True, exist_ok=True)
+        body = []
+        for j in range(lines):
+            if j % 3 == 0:
+                body.append(f'  alert("保存に失敗しました ({i}-{j})")')
+            else:
+                body.append(f"  const value{j} = compute({j}, 'plain ascii')")
+        p.write_text("export function f() {\n" + "\n".join(body) + "\n}\n", encoding="utf-8")
+
+
+def timed(root: Path, jobs: int):
+    t0 = time.perf_counter()
+    result = scan_project_for_japanese_texts(root, jobs=jobs)
+    return time.perf_counter() - t0, result
+
+
+def run(root: Path, jobs_list) -> None:
+    serial_time, serial = timed(root, 1)
+    files = len(list(root.rglob("*.ts*")))
+    print(f"{'jobs':>6}  {'time (s)':>9}  {'files/s':>9}  {'speedup':>8}  identical")
+    print(f"{1:>6}  {serial_time:>9.3f}  {files / serial_time:>9.0f}  {1.0:>7.2f}x  -")
+    for jobs in jobs_list:
+        elapsed, parallel = timed(root, jobs)
+        same = list(parallel.items()) == list(serial.items())
+        print(f"{jobs:>6}  {elapsed:>9.3f}  {files / elapsed:>9.0f}  {serial_time / elapsed:>7.2f}x  {same}")
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description="serial vs parallel i18n scan benchmark")
+    p.add_argument("--root", type=str, default="", help="既存ツリーを計測する場合のルート")
+    p.add_argument("--files", type=int, default=1500)
+    p.add_argument("--lines", type=int, default=200)
+    p.add_argument("--jobs", type=int, nargs="+", default=[2, 4])
+    args = p.parse_args()
+
+    if args.root:
+        run(Path(args.root), args.jobs)
+        return 0
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        build_tree(root, args.files, args.lines)
+        run(root, args.jobs)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共有 LLM クライアントのベンチマーク（ローカルの fake OpenAI サーバに対して計測）
+- 置き換え前相当: 呼び出しごとに新しい接続を張る逐次呼び出し
+- 共有クライアントでの逐次呼び出し（keep-alive で接続を使い回す）
+- 共有クライアントでの並行呼び出し（gather_sync、同時数はセマフォで制限）
+- 各方式の所要時間とサーバ側で数えた TCP 接続数を表示
+
+実行例:
+    python -m scripts.bench.bench_llm_client --calls 40 --latency 0.05 --concurrency 4
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import time
+from typing import Callable, Dict
+from urllib.parse import urlsplit
+
+from scripts.bench.fake_openai import FakeOpenAIServer
+from scripts.utils.llm_client import LLMClient, chat_messages
+
+
+def _fresh_connection_call(base_url: str, index: int) -> str:
+    """openai SDK を毎回作り直していた頃と同じく、呼び出しごとに接続を張る"""
+    parts = urlsplit(base_url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+    try:
+        body = json.dumps({"model": "bench", "messages": chat_messages("bench", f"call {index}")})
+        conn.request("POST", f"{parts.path}/chat/completions", body=body, headers={"Content-Type": "application/json"})
+        return json.loads(conn.getresponse().read())["choices"][0]["message"]["content"]
+    finally:
+        conn.close()
+
+
+def measure(server: FakeOpenAIServer, run: Callable[[], None]) -> Dict[str, float]:
+    before = server.stats["connections"]
+    t0 = time.perf_counter()
+    run()
+    return {"time": time.perf_counter() - t0, "connections": server.stats["connections"] - before}
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description="Shared LLM client benchmark against a local fake OpenAI server")
+    p.add_argument("--calls", type=int, default=40)
+    p.add_argument("--latency", type=float, default=0.05, help="fake server latency per request (s)")
+    p.add_argument("--concurrency", type=int, default=4)
+    p.add_argument("--transport", choices=["httpx", "stdlib"], default=None)
+    args = p.parse_args()
+
+    with FakeOpenAIServer(latency=args.latency) as server:
+        client = LLMClient(base_url=server.base_url, api_key="bench", max_concurrency=args.concurrency,
+                           transport=args.transport)
+        messages = [chat_messages("bench", f"call {i}") for i in range(args.calls)]
+        try:
+            rows = [
+                ("new connection / call", measure(server, lambda: [
+                    _fresh_connection_call(server.base_url, i) for i in range(args.calls)
+                ])),
+                ("shared, sequential", measure(server, lambda: [
+                    client.chat_sync(m, model="bench") for m in messages
+                ])),
+                (f"shared, gather (x{client.max_concurrency})", measure(server, lambda: client.gather_sync(
+                    [client.chat(m, model="bench") for m in messages]
+                ))),
+            ]
+        finally:
+            client.close()
+
+    print(f"{args.calls} calls, server latency {args.latency * 1000:.0f} ms, transport {client.transport_name}")
+    print(f"{'mode':<24}  {'time (s)':>9}  {'calls/s':>8}  connections")
+    for name, row in rows:
+        print(f"{name:<24}  {row['time']:>9.3f}  {args.calls / row['time']:>8.1f}  {row['connections']:>11.0f}")
+    print(f"server max in-flight: {server.stats['max_in_flight']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prisma スキーマパーサ マイクロベンチマーク
+- 数百モデル + enum + @@index / @relation / @default(dbgenerated("{}")) を含むスキーマを生成
+- 旧実装（datasource / generator / model ごとに内容全体を正規表現で走査）と
+  1 回の走査で AST を組み立てる prisma_schema.parse_prisma を比較
+- 旧実装は parse_prisma_schema の置き換え前の処理をそのまま再現
+
+実行例:
+    python -m scripts.bench.bench_prisma_parser --models 500 --fields 12
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+from scripts.utils.prisma_schema import parse_prisma_file
+
+
+def legacy_parse(schema_path: Path) -> Dict[str, Any]:
+    """置き換え前の正規表現による抽出（[^}]+ のため最初の "}" でブロックが切れる）"""
+    content = schema_path.read_text(encoding="utf-8")
+    result: Dict[str, Any] = {"models": [], "datasource": None, "generator": None}
+    datasource_match = re.search(r'datasource\s+\w+\s*\{([^}]+)\}', content, re.DOTALL)
+    if datasource_match:
+        ds_block = datasource_match.group(1)
+        provider_match = re.search(r'provider\s*=\s*"([^"]+)"', ds_block)
+        url_match = re.search(r'url\s*=\s*(.+)', ds_block)
+        result["datasource"] = {
+            "provider": provider_match.group(1) if provider_match else "unknown",
+            "url": url_match.group(1).strip() if url_match else "unknown",
+        }
+    generator_match = re.search(r'generator\s+\w+\s*\{([^}]+)\}', content, re.DOTALL)
+    if generator_match:
+        provider_match = re.search(r'provider\s*=\s*"([^"]+)"', generator_match.group(1))
+        result["generator"] = {"provider": provider_match.group(1) if provider_match else "unknown"}
+    for model_match in re.finditer(r'model\s+(\w+)\s*\{([^}]+)\}', content, re.DOTALL):
+        fields = []
+        relations = []
+        field_lines = [l.strip() for l in model_match.group(2).split('\n') if l.strip() and not l.strip().startswith('//')]
+        for field_line in field_lines:
+            field_match = re.match(r'(\w+)\s+(\w+)(\[\])?\s*(.*)', field_line)
+            if field_match:
+                entry = {"name": field_match.group(1), "type": field_match.group(2)}
+                (relations if field_match.group(2)[0].isupper() else fields).append(entry)
+        result["models"].append({"name": model_match.group(1), "fields": fields, "relations": relations})
+    return result
+
+
+def schema_source(models: int, fields: int) -> str:
+    parts = [
+        'datasource db {\n  provider = "postgresql"\n  url      = env("DATABASE_URL")\n}\n',
+        'generator client {\n  provider = "prisma-client-js"\n}\n',
+        "enum Status {\n  ACTIVE\n  ARCHIVED @map(\"archived\")\n}\n",
+    ]
+    for m in range(models):
+        body = [
+            f"/// Model {m}",
+            f"model Model{m} {{",
+            '  id        String   @id @default(dbgenerated("gen_random_uuid()")) @db.Uuid',
+            '  meta      Json     @default("{}")',
+            "  status    Status   @default(ACTIVE)",
+            "  createdAt DateTime @default(now()) @map(\"created_at\")",
+        ]
+        for f in range(fields):
+            body.append(f"  field{f}    String?  @db.VarChar({32 + f})")
+        if m > 0:
+            body.append("  parentId  String   @db.Uuid")
+            body.append(f"  parent    Model{m - 1} @relation(\"Chain{m}\", fields: [parentId], references: [id], onDelete: Cascade)")
+        if m + 1 < models:
+            body.append(f"  children  Model{m + 1}[] @relation(\"Chain{m + 1}\")")
+        body.append("")
+        body.append("  @@index([status, createdAt(sort: Desc)])")
+        body.append(f'  @@map("model_{m}")')
+        body.append("}")
+        parts.append("\n".join(body) + "\n")
+    return "\n".join(parts)
+
+
+def best_of(fn: Callable[[Path], Dict[str, Any]], path: Path, repeat: int):
+    best = float("inf")
+    result: Dict[str, Any] = {}
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(path)
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description="prisma schema parser micro-benchmark")
+    p.add_argument("--models", type=int, default=500, help="生成するモデル数")
+    p.add_argument("--fields", type=int, default=12, help="モデルごとの追加スカラーフィールド数")
+    p.add_argument("--repeat", type=int, default=3)
+    args = p.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "schema.prisma"
+        path.write_text(schema_source(args.models, args.fields), encoding="utf-8")
+        size_kb = path.stat().st_size / 1024
+
+        legacy_time, legacy = best_of(legacy_parse, path, args.repeat)
+        ast_time, ast = best_of(parse_prisma_file, path, args.repeat)
+
+        legacy_fields = sum(len(m["fields"]) + len(m["relations"]) for m in legacy["models"])
+        legacy_relations = sum(len(m["relations"]) for m in legacy["models"])
+        ast_fields = sum(len(m["fields"]) for m in ast["models"])
+        ast_relations = sum(1 for m in ast["models"] for f in m["fields"] if f["kind"] == "relation")
+        block_attributes = sum(len(m["attributes"]) for m in ast["models"])
+
+        print(f"schema: {args.models} models, {size_kb:,.0f} KB")
+        print(f"{'parser':<8}  {'time (s)':>9}  {'models':>7}  {'fields':>7}  {'relations':>9}  {'enums':>5}  {'@@attrs':>7}")
+        print(f"{'legacy':<8}  {legacy_time:>9.3f}  {len(legacy['models']):>7}  {legacy_fields:>7}  {legacy_relations:>9}  {'-':>5}  {'-':>7}")
+        print(f"{'ast':<8}  {ast_time:>9.3f}  {len(ast['models']):>7}  {ast_fields:>7}  {ast_relations:>9}  "
+              f"{len(ast['enums']):>5}  {block_attributes:>7}")
+        if ast["errors"]:
+            print(f"parse errors: {len(ast['errors'])} (first: {ast['errors'][0]})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+クライアント側レート制限のベンチマーク（429 を返す fake OpenAI サーバに対して計測）
+- サーバは「window 秒に limit 件まで」を超えた分に 429 + Retry-After を返す
+- 制限なし: 並行に投げて 429 を受けたら Retry-After だけ待って再試行
+- 制限あり: RateLimiterRegistry で送信前に待つ（サーバ上限の 8 割の速度 + 2 割のバースト）
+- 各方式の所要時間・サーバが返した 429 の数・クライアントの再試行回数を表示
+- --coarse でサーバは整数秒の Retry-After だけを返す（多くの API と同じ。429 を受けてからでは待ちすぎる）
+
+実行例:
+    python -m scripts.bench.bench_rate_limit --calls 60 --limit 20 --window 1
+    python -m scripts.bench.bench_rate_limit --calls 60 --limit 20 --window 1 --coarse
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Dict, Optional
+
+from scripts.bench.fake_openai import FakeOpenAIServer
+from scripts.utils.llm_client import LLMClient, chat_messages
+from scripts.utils.rate_limit import RateLimiterRegistry
+
+
+def run(args: argparse.Namespace, rate_limits: Optional[RateLimiterRegistry]) -> Dict[str, float]:
+    calls, concurrency = args.calls, args.concurrency
+    with FakeOpenAIServer(rate_limit=(args.limit, args.window), precise_retry_after=not args.coarse) as server:
+        client = LLMClient(base_url=server.base_url, api_key="bench", max_concurrency=concurrency,
+                           retries=20, rate_limits=rate_limits)
+        t0 = time.perf_counter()
+        try:
+            results = client.gather_sync(
+                [client.chat(chat_messages("bench", f"call {i}"), model="bench") for i in range(calls)],
+                return_exceptions=True,
+            )
+        finally:
+            client.close()
+        return {
+            "time": time.perf_counter() - t0,
+            "failed": sum(isinstance(r, Exception) for r in results),
+            "http_429": server.stats["rate_limited"],
+            "retries": client.stats["retries"],
+        }
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description="Client-side rate limiter benchmark against a 429-injecting fake server")
+    p.add_argument("--calls", type=int, default=60)
+    p.add_argument("--limit", type=int, default=20, help="server allows this many requests per window")
+    p.add_argument("--window", type=float, default=1.0, help="server window (s)")
+    p.add_argument("--concurrency", type=int, default=8)
+    p.add_argument("--coarse", action="store_true", help="server sends whole-second Retry-After only")
+    args = p.parse_args()
+
+    # 任意の window 秒で「バースト + 速度 × window」がサーバ上限を超えない設定
+    per_minute = 0.8 * args.limit / args.window * 60
+    limits = {"default": {"requests_per_minute": per_minute, "burst_seconds": args.window / 4}}
+    rows = [
+        ("no limiter (retry on 429)", run(args, None)),
+        ("client rate limiter", run(args, RateLimiterRegistry(limits))),
+    ]
+
+    retry_after = "whole seconds" if args.coarse else "ms"
+    print(f"{args.calls} calls, server limit {args.limit}/{args.window:g}s, concurrency {args.concurrency}, "
+          f"Retry-After in {retry_after}")
+    print(f"{'mode':<26}  {'time (s)':>9}  {'429s':>5}  {'retries':>7}  failed")
+    for name, row in rows:
+        print(f"{name:<26}  {row['time']:>9.3f}  {row['http_429']:>5.0f}  {row['retries']:>7.0f}  {row['failed']:>6.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+字句解析器ベースの抽出 vs 旧正規表現ベースの抽出 マイクロベンチマーク
+- 大きなコンポーネント（多数行）、最小化バンドル風の巨大な 1 行、
+  閉じないバッククォートを含む 1 行（旧正規表現の後戻りが二乗になる）を生成して比較
+- 旧実装は extract_hardcoded_japanese_texts の置き換え前の処理をそのまま再現
+
+実行例:
+    python -m scripts.bench.bench_ts_lexer --lines 20000 --minified-kb 2048
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from scripts.utils.i18n_utils import extract_hardcoded_japanese_texts
+
+_JAPANESE = re.compile(r'[ぁ-んァ-ヶ一-龥]+')
+_LEGACY_PATTERNS = [
+    re.compile(r'["\']([^"\']*[ぁ-んァ-ヶ一-龥][^"\']*)["\']'),
+    re.compile(r'`([^`]*[ぁ-んァ-ヶ一-龥][^`]*)`'),
+]
+
+
+def legacy_extract(file_path: Path) -> List[Dict[str, Any]]:
+    """置き換え前の 1 行ごと正規表現による抽出"""
+    results = []
+    for line_num, line in enumerate(file_path.read_text(encoding="utf-8").split("\n"), start=1):
+        if line.strip().startswith("//") or line.strip().startswith("/*"):
+            continue
+        for pattern in _LEGACY_PATTERNS:
+            for match in pattern.finditer(line):
+                text = match.group(1).strip()
+                if _JAPANESE.search(text):
+                    start = max(0, match.start() - 20)
+                    end = min(len(line), match.end() + 20)
+                    results.append({"line": line_num, "text": text, "context": line[start:end].strip()})
+    return results
+
+
+def component_source(lines: int) -> str:
+    body = []
+    for i in range(lines):
+        kind = i % 4
+        if kind == 0:
+            body.append(f'      <Label htmlFor="f{i}">項目{i}</Label>')
+        elif kind == 1:
+            body.append('      {error && <p className="text-red-500">{`入力エラー ${i}`}</p>}')
+        elif kind == 2:
+            body.append(f"      <Input id=\"f{i}\" placeholder='例: 値を入力' onChange={{(e) => set({i}, e.target.value)}} />")
+        else:
+            body.append(f"      {{/* {i} */}}")
+    return "export function Form() {\n  return (\n    <div>\n" + "\n".join(body) + "\n    </div>\n  )\n}\n"
+
+
+def minified_source(kb: int) -> str:
+    chunk = 'a.push("ok",\'x\',`t${v}`,"保存しました");b=c/2;'
+    return "var a=[];" + chunk * (kb * 1024 // len(chunk.encode("utf-8"))) + "\n"
+
+
+def adversarial_source(kb: int) -> str:
+    """閉じないバッククォートの後に日本語が続く 1 行（旧テンプレート正規表現が二乗時間で後戻りする）"""
+    chunk = '"日本語のラベル",'
+    return "var q='`';var a=[" + chunk * (kb * 1024 // len(chunk.encode("utf-8"))) + "];\n"
+
+
+def best_of(fn: Callable[[Path], List[Dict[str, Any]]], path: Path, repeat: int):
+    best = float("inf")
+    result: List[Dict[str, Any]] = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(path)
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description="lexer vs regex extraction micro-benchmark")
+    p.add_argument("--lines", type=int, default=20000, help="生成するコンポーネントの行数")
+    p.add_argument("--minified-kb", type=int, default=1024, help="最小化 1 行ファイルのサイズ (KB)")
+    p.add_argument("--adversarial-kb", type=int, default=32, help="後戻り誘発 1 行ファイルのサイズ (KB)")
+    p.add_argument("--repeat", type=int, default=3)
+    args = p.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cases = {
+            f"component ({args.lines} lines)": (Path(tmp) / "Form.tsx", component_source(args.lines)),
+            f"minified ({args.minified_kb} KB, 1 line)": (Path(tmp) / "bundle.js", minified_source(args.minified_kb)),
+            f"adversarial ({args.adversarial_kb} KB, 1 line)": (Path(tmp) / "labels.js", adversarial_source(args.adversarial_kb)),
+        }
+        print(f"{'case':<32}  {'regex (s)':>9}  {'lexer (s)':>9}  {'regex hits':>10}  {'lexer hits':>10}")
+        for name, (path, source) in cases.items():
+            path.write_text(source, encoding="utf-8")
+            legacy_time, legacy = best_of(legacy_extract, path, args.repeat)
+            lexer_time, lexed = best_of(extract_hardcoded_japanese_texts, path, args.repeat)
+            print(f"{name:<32}  {legacy_time:>9.3f}  {lexer_time:>9.3f}  {len(legacy):>10}  {len(lexed):>10}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TypeORM エンティティ解析のベンチマーク
+- 複数行の @Column({...}) / @ManyToOne(() => X, ..., {...}) を含む合成エンティティを生成
+- 逐次 (jobs=1)・並列 (jobs=N)・キャッシュ温まり後の 3 通りで parse_typeorm_entities を計測
+- 置き換え前の正規表現（@Column\\([^)]*\\) 型）で拾えたカラム数も並べて表示
+
+実行例:
+    python -m scripts.bench.bench_typeorm_entities --entities 500 --jobs 2 4
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from scripts.utils.fs_walk import walk_files
+from scripts.utils.scan_cache import ScanCache
+from scripts.utils.typeorm_entities import TYPEORM_PARSER_VERSION, parse_typeorm_entities
+
+_LEGACY_COLUMN = re.compile(r'@(Column|PrimaryGeneratedColumn|CreateDateColumn|UpdateDateColumn)\([^)]*\)\s+(\w+)[!?]?:\s*(\w+)')
+
+
+def build_tree(root: Path, entities: int, columns: int) -> None:
+    for i in range(entities):
+        p = root / "src" / f"module{i % 25}" / f"thing{i}.entity.ts"
+        p.parent.mkdir(parents=True, exist_ok=True)
+        body = [
+            'import { Column, Entity, ManyToOne, PrimaryGeneratedColumn } from "typeorm"',
+            "",
+            f'@Entity({{ name: "thing_{i}" }})',
+            f"export class Thing{i} {{",
+            '  @PrimaryGeneratedColumn("uuid")',
+            "  id!: string",
+        ]
+        for j in range(columns):
+            if j % 2 == 0:
+                body.append(f'  @Column({{\n    type: "varchar",\n    length: {j + 10},\n    default: () => "\'x\'",\n  }})')
+            else:
+                body.append('  @Column("int", { nullable: true, transformer: { to: (v) => v, from: (v) => v } })')
+            body.append(f"  field{j}: string")
+        if i > 0:
+            body.append(f'  @ManyToOne(() => Thing{i - 1}, (t) => t.children, {{ onDelete: "CASCADE" }})')
+            body.append(f"  parent: Thing{i - 1}")
+        body.append("}")
+        p.write_text("\n".join(body) + "\n", encoding="utf-8")
+
+
+def timed(paths: List[Path], jobs: int, cache=None):
+    t0 = time.perf_counter()
+    result = parse_typeorm_entities(paths, jobs=jobs, cache=cache)
+    return time.perf_counter() - t0, result
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description="TypeORM entity parsing benchmark (serial / parallel / warm cache)")
+    p.add_argument("--entities", type=int, default=500)
+    p.add_argument("--columns", type=int, default=12)
+    p.add_argument("--jobs", type=int, nargs="+", default=[2, 4])
+    args = p.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        build_tree(root, args.entities, args.columns)
+        paths = list(walk_files(root, suffixes=(".entity.ts",)))
+
+        legacy_columns = sum(len(_LEGACY_COLUMN.findall(path.read_text(encoding="utf-8"))) for path in paths)
+        serial_time, serial = timed(paths, 1)
+        columns = sum(len(e["columns"]) for e in serial)
+        print(f"{len(paths)} entities, columns found: legacy regex {legacy_columns}, parser {columns}")
+        print(f"{'mode':<12}  {'time (s)':>9}  {'files/s':>9}  identical")
+        print(f"{'jobs=1':<12}  {serial_time:>9.3f}  {len(paths) / serial_time:>9.0f}  -")
+        for jobs in args.jobs:
+            elapsed, parallel = timed(paths, jobs)
+            print(f"{f'jobs={jobs}':<12}  {elapsed:>9.3f}  {len(paths) / elapsed:>9.0f}  {parallel == serial}")
+
+        cache_path = root / "cache.json"
+        version = f"typeorm-{TYPEORM_PARSER_VERSION}"
+        cold = ScanCache.load(cache_path, version)
+        timed(paths, 1, cold)
+        cold.save()
+        t0 = time.perf_counter()
+        warm = ScanCache.load(cache_path, version)
+        elapsed, cached = timed(paths, 1, warm)
+        total = time.perf_counter() - t0
+        print(f"{'warm cache':<12}  {total:>9.3f}  {len(paths) / total:>9.0f}  {cached == serial}  "
+              f"(load {total - elapsed:.3f}s, hits {warm.stats.hits})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+テスト / ベンチマーク用のローカル OpenAI 互換サーバ
+- POST /v1/chat/completions（/chat/completions も可）に Chat Completions 形式で応答
+- HTTP/1.1 keep-alive。張られた TCP 接続数・リクエスト数・同時処理数の最大値を記録
+- 応答までの遅延、応答本文を作る関数、先頭から返すエラーステータス列（例: [429, 500]）を指定可能
+- "stream": true のリクエストには Server-Sent Events（chunked）で stream_chunk 文字ずつ返す
+- rate_limit=(N, 秒) で「直近 N 秒に N 件まで」のスライディングウィンドウを超えた分に
+  429 + Retry-After / retry-after-ms（枠が空くまでの秒数）を返す（API の requests/min 制限の再現）
+  precise_retry_after=False なら整数秒の Retry-After だけを返す
+
+実行例:
+    python -m scripts.bench.fake_openai --port 8787 --latency 0.05
+    python -m scripts.bench.fake_openai --port 8787 --rate-limit 60/60   # 60 件/分を超えたら 429
+    OPENAI_BASE_URL=http://127.0.0.1:8787/v1 OPENAI_API_KEY=dummy python scripts/agent_review_autogen.py
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import math
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+
+def echo_responder(request: Dict[str, Any]) -> str:
+    """最後の user メッセージの先頭を返す既定の応答"""
+    messages = request.get("messages") or []
+    last = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+    return f"[fake:{request.get('model', '')}] {str(last)[:200]}"
+
+
+def _usage(request: Dict[str, Any], content: str) -> Dict[str, int]:
+    """UTF-8 バイト数 / 4 で見積もった usage（tokens/min の精算用）"""
+    prompt = sum(len(str(m.get("content") or "").encode("utf-8")) // 4 for m in request.get("messages") or [])
+    completion = len(content.encode("utf-8")) // 4
+    return {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": prompt + completion}
+
+
+class FakeOpenAIServer:
+    """
+    使い方:
+        with FakeOpenAIServer(latency=0.05) as server:
+            client = LLMClient(base_url=server.base_url, api_key="test")
+            ...
+            server.stats["connections"]
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        responder: Callable[[Dict[str, Any]], str] = echo_responder,
+        errors: Iterable[int] = (),
+        retry_after: Optional[float] = None,
+        stream_chunk: int = 16,
+        stream_delay: float = 0.0,
+        rate_limit: Optional[Tuple[int, float]] = None,
+        precise_retry_after: bool = True,
+    ) -> None:
+        self.latency = latency
+        self.stream_chunk = max(1, stream_chunk)
+        self.stream_delay = stream_delay
+        self.responder = responder
+        self.retry_after = retry_after
+        self._errors: Deque[int] = deque(errors)
+        self.rate_limit = rate_limit
+        self.precise_retry_after = precise_retry_after
+        self._accepted: Deque[float] = deque()
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {
+            "connections": 0, "requests": 0, "in_flight": 0, "max_in_flight": 0, "rate_limited": 0,
+        }
+        self.requests: List[Dict[str, Any]] = []
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def push_errors(self, statuses: Iterable[int]) -> None:
+        with self._lock:
+            self._errors.extend(statuses)
+
+    def _next_error(self) -> Optional[int]:
+        with self._lock:
+            return self._errors.popleft() if self._errors else None
+
+    def _rate_limited(self) -> Optional[float]:
+        """ウィンドウの枠が無ければ空くまでの秒数、あれば枠を 1 つ使って None"""
+        if self.rate_limit is None:
+            return None
+        limit, window = self.rate_limit
+        now = time.monotonic()
+        with self._lock:
+            while self._accepted and now - self._accepted[0] >= window:
+                self._accepted.popleft()
+            if len(self._accepted) >= limit:
+                self.stats["rate_limited"] += 1
+                return window - (now - self._accepted[0])
+            self._accepted.append(now)
+        return None
+
+    def _enter(self, request: Dict[str, Any]) -> None:
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["in_flight"] += 1
+            self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+            self.requests.append(request)
+
+    def _leave(self) -> None:
+        with self._lock:
+            self.stats["in_flight"] -= 1
+
+    def _handler_class(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # ヘッダと本文を別々に書くので、Nagle と遅延 ACK で keep-alive 接続が 40ms 待たされないようにする
+            disable_nagle_algorithm = True
+
+            def setup(self) -> None:
+                super().setup()
+                with server._lock:
+                    server.stats["connections"] += 1
+
+            def log_message(self, format: str, *args: Any) -> None:  # noqa: A002 - 親クラスの引数名
+                pass
+
+            def _send(self, status: int, payload: Dict[str, Any], headers: Iterable[Tuple[str, str]] = ()) -> None:
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_stream(self, model: str, content: str) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+                def event(data: str) -> None:
+                    payload = f"data: {data}\n\n".encode("utf-8")
+                    self.wfile.write(f"{len(payload):x}\r\n".encode("ascii") + payload + b"\r\n")
+
+                try:
+                    for start in range(0, len(content), server.stream_chunk):
+                        if start and server.stream_delay:
+                            time.sleep(server.stream_delay)
+                        delta = {"choices": [{"index": 0, "delta": {"content": content[start:start + server.stream_chunk]}}],
+                                 "model": model, "object": "chat.completion.chunk"}
+                        event(json.dumps(delta, ensure_ascii=False))
+                    event("[DONE]")
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    # クライアントが途中で読むのをやめた
+                    self.close_connection = True
+
+            def do_POST(self) -> None:  # noqa: N802 - http.server の規約
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    request = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    self._send(400, {"error": {"message": "invalid JSON"}})
+                    return
+                if self.path.rstrip("/") not in ("/v1/chat/completions", "/chat/completions"):
+                    self._send(404, {"error": {"message": f"unknown path {self.path}"}})
+                    return
+                server._enter(request)
+                try:
+                    if server.latency:
+                        time.sleep(server.latency)
+                    wait_for = server._rate_limited()
+                    if wait_for is not None:
+                        headers = [("Retry-After", str(math.ceil(wait_for)))]
+                        if server.precise_retry_after:
+                            headers.append(("retry-after-ms", str(math.ceil(wait_for * 1000))))
+                        self._send(429, {"error": {"message": "rate limit exceeded", "type": "requests"}}, headers)
+                        return
+                    status = server._next_error()
+                    if status is not None:
+                        headers = [("Retry-After", str(server.retry_after))] if server.retry_after is not None else []
+                        self._send(status, {"error": {"message": f"injected {status}"}}, headers)
+                        return
+                    content = server.responder(request)
+                    if request.get("stream"):
+                        self._send_stream(request.get("model", ""), content)
+                        return
+                    self._send(200, {
+                        "id": f"chatcmpl-fake-{server.stats['requests']}",
+                        "object": "chat.completion",
+                        "model": request.get("model", ""),
+                        "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                                     "finish_reason": "stop"}],
+                        "usage": _usage(request, content),
+                    })
+                finally:
+                    server._leave()
+
+        return Handler
+
+    def start(self) -> "FakeOpenAIServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-openai", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def __enter__(self) -> "FakeOpenAIServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Local fake OpenAI Chat Completions server")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8787)
+    ap.add_argument("--latency", type=float, default=0.05, help="seconds to wait before each response")
+    ap.add_argument("--rate-limit", default="", help="answer 429 above N requests per S seconds, e.g. 60/60")
+    args = ap.parse_args()
+
+    rate_limit = None
+    if args.rate_limit:
+        count, _, window = args.rate_limit.partition("/")
+        rate_limit = (int(count), float(window or 60))
+    server = FakeOpenAIServer(host=args.host, port=args.port, latency=args.latency, rate_limit=rate_limit)
+    print(f"Fake OpenAI server listening on {server.base_url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+        print(f"stats: {server.stats}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+ファイル単位の解析を逐次 / プロセス並列で実行する共通ヘルパー（i18n 抽出・TypeORM 解析で共用）
+- jobs <= 0 は CPU 数、jobs == 1 またはファイルが 1 つ以下なら逐次
+- ワーカーあたり数バッチになるよう分割してプロセスプールに投げる（偏り対策・プロセス間通信の回数削減）
+- cache（ScanCache）を渡すと内容が変わっていないファイルは前回の結果を使い、残りだけを解析して put する
+- 結果は常に入力順。iter_batched は揃ったものから順に返す（全件を待たずに書き出せる）
+
+worker は pickle できるモジュール直下の関数（Path -> 結果）にすること。
+"""
+from __future__ import annotations
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .scan_cache import ScanCache
+
+MAX_BATCH_SIZE = 64
+
+
+def resolve_jobs(jobs: int) -> int:
+    """jobs <= 0 は CPU 数に読み替える"""
+    if jobs <= 0:
+        return os.cpu_count() or 1
+    return jobs
+
+
+def _timed(worker: Callable[[Path], Any], path: Path) -> Tuple[Any, float]:
+    t0 = time.perf_counter()
+    result = worker(path)
+    return result, time.perf_counter() - t0
+
+
+def _run_batch(worker: Callable[[Path], Any], paths: List[str]) -> List[Tuple[Any, float]]:
+    """ワーカープロセスで実行されるバッチ（入力と同じ順序で結果を返す）"""
+    return [_timed(worker, Path(p)) for p in paths]
+
+
+def iter_timed(paths: Sequence[Path], worker: Callable[[Path], Any], jobs: int = 1) -> Iterator[Tuple[Any, float]]:
+    """paths を逐次または並列で処理し、入力順に (結果, 所要秒) を終わったものから返す"""
+    jobs = resolve_jobs(jobs)
+    if jobs == 1 or len(paths) < 2:
+        for path in paths:
+            yield _timed(worker, Path(path))
+        return
+    batch_size = max(1, min(MAX_BATCH_SIZE, -(-len(paths) // (jobs * 4))))
+    names = [str(path) for path in paths]
+    batches = [names[i:i + batch_size] for i in range(0, len(names), batch_size)]
+    # map は投入順に結果を返す（先頭のバッチが終われば後続を待たずに返せる）
+    with ProcessPoolExecutor(max_workers=min(jobs, len(batches))) as executor:
+        for batch in executor.map(partial(_run_batch, worker), batches):
+            yield from batch
+
+
+def run_timed(paths: Sequence[Path], worker: Callable[[Path], Any], jobs: int = 1) -> List[Tuple[Any, float]]:
+    """paths を逐次または並列で処理し、入力順に (結果, 所要秒) を返す"""
+    return list(iter_timed(paths, worker, jobs))
+
+
+def iter_batched(
+    paths: Sequence[Path],
+    worker: Callable[[Path], Any],
+    jobs: int = 1,
+    cache: Optional[ScanCache] = None,
+    keys: Optional[Sequence[str]] = None,
+) -> Iterator[Any]:
+    """
+    キャッシュにあるファイルはそのまま使い、残りだけを worker で処理して入力順に結果を返す
+
+    結果は揃ったものから返す（キャッシュヒットはすぐ、それ以外は解析が終わり次第）。
+
+    Args:
+        jobs: 並列プロセス数 (1 = 逐次, 0 以下 = CPU 数)
+        cache: 指定時は keys（既定は str(path)）でヒットを確認し、新しい結果を put する（save は呼び出し側）
+    """
+    keys = list(keys) if keys is not None else [str(path) for path in paths]
+    hits: Dict[int, Any] = {}
+    pending = list(range(len(paths)))
+    if cache is not None:
+        pending = []
+        for i, (key, path) in enumerate(zip(keys, paths)):
+            cached = cache.get(key, path)
+            if cached is None:
+                pending.append(i)
+            else:
+                hits[i] = cached
+
+    fresh = iter_timed([paths[i] for i in pending], worker, jobs)
+    try:
+        for i in range(len(paths)):
+            if i in hits:
+                yield hits.pop(i)
+                continue
+            result, elapsed = next(fresh)
+            if cache is not None:
+                cache.put(keys[i], paths[i], result, elapsed)
+            yield result
+    finally:
+        # 途中でやめた場合もプロセスプールを閉じる
+        fresh.close()
+
+
+def run_batched(
+    paths: Sequence[Path],
+    worker: Callable[[Path], Any],
+    jobs: int = 1,
+    cache: Optional[ScanCache] = None,
+    keys: Optional[Sequence[str]] = None,
+) -> List[Any]:
+    """iter_batched の結果を入力順のリストで返す"""
+    return list(iter_batched(paths, worker, jobs, cache, keys))
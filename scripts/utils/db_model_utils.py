@@ -1,183 +1,181 @@
 # -*- coding: utf-8 -*-
 """
 データベースモデル解析ユーティリティ
-- Prisma schema.prisma の検出とパース
-- TypeORM エンティティファイルの検出とパース
+- Prisma schema.prisma の検出とパース (prisma_schema)
+- TypeORM エンティティファイルの検出とパース (typeorm_entities: 並列 + キャッシュ)
+- supabase/migrations/*.sql の再生によるスキーマ構築 (sql_migrations)
+- RLS ポリシー式の実行コスト（包まれていない関数・相関副問い合わせ・索引の無い述語）の解析 (rls_policies)
+- schemas/*.ts（zod）と SQL カラムの型 / null 可否のずれ検出（schema_drift: 変わった組だけ比較し直す）
+- モデル間リレーションのグラフ化と循環 / ファンアウト / 索引の無い外部キーの検出 (relation_graph)
 - フィールド/リレーション情報の抽出
 """
 from __future__ import annotations
 
-import glob
-import re
 from pathlib import Path
-from typing import List, Dict, Any, Tuple, Optional
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+
+from .fs_walk import walk_files
+from .index_coverage import analyze_index_coverage, find_query_patterns
+from .prisma_schema import parse_prisma_file, relation_info
+from .relation_graph import analyze_relation_graph, build_relation_graph
+from .rls_policies import analyze_rls_policies
+from .schema_drift import detect_schema_drift
+from .source_reader import DEFAULT_MAX_FILE_BYTES, SourcePolicy
+from .sql_migrations import MIGRATIONS_DIR, find_migration_files, replay_migrations
+# parse_typeorm_entity は従来どおりこのモジュールからも import できる
+from .typeorm_entities import iter_typeorm_entities, load_typeorm_cache, parse_typeorm_entities, parse_typeorm_entity
 
 
 def find_prisma_schemas(root: Path = Path(".")) -> List[Path]:
     """プロジェクト内の schema.prisma ファイルを検索"""
-    return [Path(p) for p in glob.glob(str(root / "**" / "schema.prisma"), recursive=True)]
+    return list(walk_files(root, names=("schema.prisma",)))
 
 
 def find_typeorm_entities(root: Path = Path(".")) -> List[Path]:
     """TypeORM エンティティファイルを検索 (*.entity.ts パターン)"""
-    return [Path(p) for p in glob.glob(str(root / "**" / "*.entity.ts"), recursive=True)]
+    return list(walk_files(root, suffixes=(".entity.ts",)))
 
 
 def parse_prisma_schema(schema_path: Path) -> Dict[str, Any]:
     """
-    Prisma schema.prisma を簡易パースして構造情報を抽出
+    Prisma schema.prisma をパースして構造情報を抽出（AST は prisma_schema.parse_prisma を参照）
     
     Returns:
         {
             "models": [
-                {"name": "User", "fields": [{"name": "id", "type": "Int", "attributes": "@id @default(autoincrement())"}], "relations": []},
+                {"name": "User",
+                 "fields": [{"name": "id", "type": "Int", "kind": "scalar", "attributes": "@id @default(autoincrement())"}],
+                 "relations": [{"name": "posts", "type": "Post", "is_array": True, "relation": {...} | None}],
+                 "block_attributes": ["@@index([email])", ...]},
                 ...
             ],
+            "views": [...], "types": [...],   # models と同じ形
+            "enums": [{"name": "Role", "values": ["USER", "ADMIN"]}],
             "datasource": {"provider": "postgresql", "url": "env(...)"},
-            "generator": {"provider": "prisma-client-js"}
+            "generator": {"provider": "prisma-client-js"},
+            "errors": [{"line": int, "message": str}, ...],
         }
     """
     if not schema_path.exists():
         return {"models": [], "datasource": None, "generator": None}
     
-    content = schema_path.read_text(encoding="utf-8")
-    
-    result: Dict[str, Any] = {
-        "models": [],
-        "datasource": None,
-        "generator": None,
-    }
-    
-    # datasource ブロック検出
-    datasource_match = re.search(r'datasource\s+\w+\s*\{([^}]+)\}', content, re.DOTALL)
-    if datasource_match:
-        ds_block = datasource_match.group(1)
-        provider_match = re.search(r'provider\s*=\s*"([^"]+)"', ds_block)
-        url_match = re.search(r'url\s*=\s*(.+)', ds_block)
-        result["datasource"] = {
-            "provider": provider_match.group(1) if provider_match else "unknown",
-            "url": url_match.group(1).strip() if url_match else "unknown",
-        }
+    ast = parse_prisma_file(schema_path)
     
-    # generator ブロック検出
-    generator_match = re.search(r'generator\s+\w+\s*\{([^}]+)\}', content, re.DOTALL)
-    if generator_match:
-        gen_block = generator_match.group(1)
-        provider_match = re.search(r'provider\s*=\s*"([^"]+)"', gen_block)
-        result["generator"] = {
-            "provider": provider_match.group(1) if provider_match else "unknown",
+    # datasource / generator は最初のブロックのみ採用
+    datasource = None
+    if ast["datasources"]:
+        ds = ast["datasources"][0]
+        provider = ds["properties"].get("provider")
+        datasource = {
+            "provider": provider if isinstance(provider, str) else "unknown",
+            "url": ds["raw"].get("url", "unknown"),
         }
+    generator = None
+    if ast["generators"]:
+        provider = ast["generators"][0]["properties"].get("provider")
+        generator = {"provider": provider if isinstance(provider, str) else "unknown"}
     
-    # model ブロック検出
-    model_blocks = re.finditer(r'model\s+(\w+)\s*\{([^}]+)\}', content, re.DOTALL)
-    for model_match in model_blocks:
-        model_name = model_match.group(1)
-        model_body = model_match.group(2)
-        
-        fields = []
-        relations = []
-        
-        # フィールド行をパース（例: id Int @id @default(autoincrement())）
-        field_lines = [line.strip() for line in model_body.split('\n') if line.strip() and not line.strip().startswith('//')]
-        for field_line in field_lines:
-            # リレーションフィールドは別扱い (型名が大文字で始まる)
-            field_match = re.match(r'(\w+)\s+(\w+)(\[\])?\s*(.*)', field_line)
-            if field_match:
-                field_name = field_match.group(1)
-                field_type = field_match.group(2)
-                is_array = field_match.group(3) == '[]'
-                attributes = field_match.group(4).strip()
-                
-                # リレーション判定: 型が大文字で始まる（モデル名）
-                if field_type[0].isupper():
-                    relations.append({
-                        "name": field_name,
-                        "type": field_type,
-                        "is_array": is_array,
-                        "attributes": attributes,
-                    })
-                else:
-                    fields.append({
-                        "name": field_name,
-                        "type": field_type,
-                        "is_optional": '?' in field_line,
-                        "attributes": attributes,
-                    })
-        
-        result["models"].append({
-            "name": model_name,
-            "fields": fields,
-            "relations": relations,
-        })
-    
-    return result
+    return {
+        "models": [_prisma_model_summary(m) for m in ast["models"]],
+        "views": [_prisma_model_summary(m) for m in ast["views"]],
+        "types": [_prisma_model_summary(m) for m in ast["types"]],
+        "enums": [{"name": e["name"], "values": [v["name"] for v in e["values"]]} for e in ast["enums"]],
+        "datasource": datasource,
+        "generator": generator,
+        "errors": ast["errors"],
+    }
 
 
-def parse_typeorm_entity(entity_path: Path) -> Dict[str, Any]:
-    """
-    TypeORM エンティティファイルを簡易パースして構造情報を抽出
+def _prisma_model_summary(block: Dict[str, Any]) -> Dict[str, Any]:
+    """AST の model / view / type ブロックをレポート用の fields / relations に分ける"""
+    fields = []
+    relations = []
+    for field in block["fields"]:
+        # 定義が見つからない型は、別ファイルのモデルへのリレーションとみなす（AST 側では errors に記録済み）
+        if field["kind"] in ("relation", "unknown"):
+            relations.append({
+                "name": field["name"],
+                "type": field["type"],
+                "is_array": field["is_array"],
+                "is_optional": field["is_optional"],
+                "attributes": field["raw_attributes"],
+                "relation": relation_info(field),
+            })
+        else:
+            fields.append({
+                "name": field["name"],
+                "type": field["type"],
+                "kind": field["kind"],
+                "is_array": field["is_array"],
+                "is_optional": field["is_optional"],
+                "attributes": field["raw_attributes"],
+            })
+    return {
+        "name": block["name"],
+        "fields": fields,
+        "relations": relations,
+        "block_attributes": [a["raw"] for a in block["attributes"]],
+    }
+
+
+def _schema_analyses(
+    parsed_prisma: List[Dict[str, Any]],
+    parsed_typeorm: List[Dict[str, Any]],
+    migration_files: List[Path],
+    policy: SourcePolicy,
+    use_cache: bool,
+    cache_path: Optional[Path],
+    schema_drift: bool,
+) -> Dict[str, Any]:
+    """SQL マイグレーションの再生と、それを元にした索引 / RLS / ずれ / リレーションの解析"""
+    # マイグレーションは 1 つでも欠けると後続の ALTER が再生できないため、上限超えも含めて全て読む
+    sql_migrations = None
+    if migration_files:
+        sql_migrations = replay_migrations(migration_files, cache_path=cache_path, use_cache=use_cache)
     
-    Returns:
-        {
-            "name": "User",
-            "table": "users",
-            "columns": [{"name": "id", "type": "int", "decorators": ["@PrimaryGeneratedColumn()"]}, ...],
-            "relations": [{"name": "posts", "type": "Post", "decorator": "@OneToMany(...)"}, ...]
-        }
-    """
-    if not entity_path.exists():
-        return {"name": "", "table": "", "columns": [], "relations": []}
+    # lib/ と app/api のクエリが使うカラムと、マイグレーションのインデックスを突き合わせる
+    index_coverage = None
+    rls_policies = None
+    if sql_migrations:
+        index_coverage = analyze_index_coverage(sql_migrations["schema"], find_query_patterns(policy=policy))
+        rls_policies = analyze_rls_policies(sql_migrations["schema"])
     
-    content = entity_path.read_text(encoding="utf-8")
+    drift = None
+    if schema_drift and sql_migrations:
+        drift = detect_schema_drift(sql_migrations["schema"], use_cache=use_cache)
     
-    result: Dict[str, Any] = {
-        "name": "",
-        "table": "",
-        "columns": [],
-        "relations": [],
-    }
+    graph = build_relation_graph(parsed_prisma, parsed_typeorm, sql_migrations["schema"] if sql_migrations else None)
+    relation_graph = analyze_relation_graph(graph) if graph.nodes else None
     
-    # @Entity デコレータから table 名取得
-    entity_match = re.search(r'@Entity\(\s*[\'"]([^\'"]+)[\'"]\s*\)', content)
-    if entity_match:
-        result["table"] = entity_match.group(1)
-    
-    # class 名取得
-    class_match = re.search(r'export\s+class\s+(\w+)', content)
-    if class_match:
-        result["name"] = class_match.group(1)
-    
-    # @Column, @PrimaryGeneratedColumn などのフィールド検出
-    column_pattern = r'@(Column|PrimaryGeneratedColumn|CreateDateColumn|UpdateDateColumn)\([^)]*\)\s+(\w+)[!?]?:\s*(\w+)'
-    for col_match in re.finditer(column_pattern, content):
-        decorator = col_match.group(1)
-        field_name = col_match.group(2)
-        field_type = col_match.group(3)
-        result["columns"].append({
-            "name": field_name,
-            "type": field_type,
-            "decorator": f"@{decorator}",
-        })
-    
-    # @OneToMany, @ManyToOne などのリレーション検出
-    relation_pattern = r'@(OneToMany|ManyToOne|OneToOne|ManyToMany)\([^)]*\)\s+(\w+)[!?]?:\s*(\w+)'
-    for rel_match in re.finditer(relation_pattern, content):
-        decorator = rel_match.group(1)
-        field_name = rel_match.group(2)
-        field_type = rel_match.group(3)
-        result["relations"].append({
-            "name": field_name,
-            "type": field_type,
-            "decorator": f"@{decorator}",
-        })
-    
-    return result
+    return {
+        "sql_migrations": sql_migrations,
+        "index_coverage": index_coverage,
+        "schema_drift": drift,
+        "rls_policies": rls_policies,
+        "relation_graph": relation_graph,
+    }
 
 
-def detect_database_infrastructure() -> Dict[str, Any]:
+def detect_database_infrastructure(
+    max_file_bytes: int = DEFAULT_MAX_FILE_BYTES,
+    use_cache: bool = True,
+    cache_path: Optional[Path] = None,
+    jobs: int = 1,
+    typeorm_cache_path: Optional[Path] = None,
+    schema_drift: bool = False,
+) -> Dict[str, Any]:
     """
     プロジェクト全体でデータベースインフラを検出
     
+    Args:
+        max_file_bytes: これより大きいファイルはパースせず skipped_files に記録 (0 = 無制限)
+        use_cache: 解析結果キャッシュを使うか（SQL マイグレーションは新しいファイルだけ再生、
+                   TypeORM エンティティは内容が変わったファイルだけ解析）
+        cache_path: SQL 再生結果キャッシュの場所 (既定: .cache/agents/sql-schema.json)
+        jobs: TypeORM エンティティ解析の並列プロセス数 (1 = 逐次, 0 以下 = CPU 数)
+        typeorm_cache_path: エンティティ解析キャッシュの場所 (既定: .cache/agents/typeorm-entities.json)
+        schema_drift: schemas/*.ts の zod スキーマと case_records のカラムを突き合わせるか
+    
     Returns:
         {
             "has_prisma": bool,
@@ -186,20 +184,37 @@ def detect_database_infrastructure() -> Dict[str, Any]:
             "typeorm_entities": [Path, ...],
             "parsed_prisma": [dict, ...],
             "parsed_typeorm": [dict, ...],
+            "typeorm_cache_stats": {"hits": int, "misses": int, ...} | None,
+            "skipped_files": [{"path": str, "size": int, "reason": str}, ...],
+            "has_sql_migrations": bool,
+            "migrations_dir": str,
+            "sql_migrations": {"schema": {...}, "applied": [...], "replayed": [...]} | None,
+            "index_coverage": {"queries": [...], "missing": [...], "redundant": [...], ...} | None,
+            "schema_drift": {"pairs": [...], "files": [...], "missing_tables": [...], "cache_stats": {...}} | None,
+            "rls_policies": {"policies": [...], "findings": [...], "unindexed": [...],
+                             "multiple_permissive": [...]} | None,
+            "relation_graph": {"graph": {...}, "cycles": [...], "high_fan_out": [...],
+                               "unindexed_foreign_keys": [...], ...} | None,
         }
     """
     prisma_schemas = find_prisma_schemas()
     typeorm_entities = find_typeorm_entities()
+    migration_files = find_migration_files()
+    policy = SourcePolicy(max_bytes=max_file_bytes)
     
-    parsed_prisma = []
-    for schema in prisma_schemas:
-        parsed = parse_prisma_schema(schema)
-        parsed_prisma.append({"path": str(schema), "data": parsed})
+    parsed_prisma = [
+        {"path": str(schema), "data": parse_prisma_schema(schema)}
+        for schema in prisma_schemas if policy.admit(schema)
+    ]
     
-    parsed_typeorm = []
-    for entity in typeorm_entities:
-        parsed = parse_typeorm_entity(entity)
-        parsed_typeorm.append({"path": str(entity), "data": parsed})
+    admitted_entities = [entity for entity in typeorm_entities if policy.admit(entity)]
+    typeorm_cache = load_typeorm_cache(typeorm_cache_path) if use_cache and admitted_entities else None
+    parsed_entities = parse_typeorm_entities(admitted_entities, jobs=jobs, cache=typeorm_cache)
+    if typeorm_cache is not None:
+        typeorm_cache.save()
+    parsed_typeorm = [
+        {"path": str(entity), "data": parsed} for entity, parsed in zip(admitted_entities, parsed_entities)
+    ]
     
     return {
         "has_prisma": len(prisma_schemas) > 0,
@@ -208,111 +223,696 @@ def detect_database_infrastructure() -> Dict[str, Any]:
         "typeorm_entities": [str(p) for p in typeorm_entities],
         "parsed_prisma": parsed_prisma,
         "parsed_typeorm": parsed_typeorm,
+        "typeorm_cache_stats": typeorm_cache.stats.as_dict() if typeorm_cache is not None else None,
+        "skipped_files": policy.skipped,
+        "has_sql_migrations": bool(migration_files),
+        "migrations_dir": str(MIGRATIONS_DIR),
+        **_schema_analyses(parsed_prisma, parsed_typeorm, migration_files, policy, use_cache, cache_path, schema_drift),
     }
 
 
-def generate_db_analysis_report(detection_result: Dict[str, Any]) -> str:
+def _prisma_records(schema_info: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    data = schema_info["data"]
+    yield {
+        "type": "prisma_schema",
+        "path": schema_info["path"],
+        "datasource": data.get("datasource"),
+        "generator": data.get("generator"),
+        "models": len(data.get("models") or []),
+        "enums": len(data.get("enums") or []),
+        "errors": data.get("errors") or [],
+    }
+    for model in data.get("models") or []:
+        yield {"type": "prisma_model", "path": schema_info["path"], **model}
+    for view in data.get("views") or []:
+        yield {"type": "prisma_view", "path": schema_info["path"], **view}
+    for composite in data.get("types") or []:
+        yield {"type": "prisma_type", "path": schema_info["path"], **composite}
+    for enum in data.get("enums") or []:
+        yield {"type": "prisma_enum", "path": schema_info["path"], **enum}
+
+
+def _db_tail_records(result: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Prisma / TypeORM より後のレコード（スキップ・SQL・各解析）と末尾の集計レコード"""
+    for skipped in result.get("skipped_files") or []:
+        yield {"type": "skipped_file", **skipped}
+    sql_migrations = result.get("sql_migrations")
+    if sql_migrations:
+        schema = sql_migrations["schema"]
+        for table in schema["tables"].values():
+            yield {"type": "sql_table", **table}
+        for index in schema["indexes"].values():
+            yield {"type": "sql_index", **index}
+        for warning in schema["warnings"]:
+            yield {"type": "sql_warning", **warning}
+    index_coverage = result.get("index_coverage")
+    if index_coverage:
+        for query in index_coverage["queries"]:
+            yield {"type": "index_query", **query}
+        for missing in index_coverage["missing"]:
+            yield {"type": "index_missing", **missing}
+        for redundant in index_coverage["redundant"]:
+            yield {"type": "index_redundant", **redundant}
+    rls_policies = result.get("rls_policies")
+    if rls_policies:
+        for finding in rls_policies["findings"]:
+            yield {"type": "rls_finding", **finding}
+        for item in rls_policies["unindexed"]:
+            yield {"type": "rls_unindexed", **item}
+        for item in rls_policies["multiple_permissive"]:
+            yield {"type": "rls_multiple_permissive", **item}
+    drift = result.get("schema_drift")
+    if drift:
+        for pair in drift["pairs"]:
+            yield {"type": "schema_drift", **pair}
+    relation_graph = result.get("relation_graph")
+    if relation_graph:
+        for node in relation_graph["graph"]["nodes"]:
+            yield {"type": "relation_node", **node}
+        for edge in relation_graph["graph"]["edges"]:
+            yield {"type": "relation_edge", **edge}
+        for cycle in relation_graph["cycles"]:
+            yield {"type": "relation_cycle", "models": cycle}
+        for item in relation_graph["self_references"]:
+            yield {"type": "relation_self_reference", **item}
+        for item in relation_graph["high_fan_out"]:
+            yield {"type": "relation_fan_out", **item}
+        for item in relation_graph["unindexed_foreign_keys"]:
+            yield {"type": "unindexed_foreign_key", **item}
+    # 各解析のうちレコードにならない集計（レポートの見出し行に使う）
+    yield {
+        "type": "db_summary",
+        "has_prisma": result["has_prisma"],
+        "has_typeorm": result["has_typeorm"],
+        "prisma_schemas": result["prisma_schemas"],
+        "typeorm_entities": result["typeorm_entities"],
+        "typeorm_cache_stats": result.get("typeorm_cache_stats"),
+        "has_sql_migrations": result.get("has_sql_migrations", False),
+        "migrations_dir": result.get("migrations_dir"),
+        "sql_migrations_applied": sql_migrations["applied"] if sql_migrations else [],
+        "sql_migrations_replayed": sql_migrations["replayed"] if sql_migrations else [],
+        "index_coverage": {"unknown_tables": index_coverage["unknown_tables"]} if index_coverage else None,
+        "rls_policies": {"policies": len(rls_policies["policies"])} if rls_policies else None,
+        "schema_drift": {
+            "files": drift["files"], "missing_tables": drift["missing_tables"], "cache_stats": drift.get("cache_stats"),
+        } if drift else None,
+        "relation_graph": {"fan_out_threshold": relation_graph["fan_out_threshold"]} if relation_graph else None,
+    }
+
+
+def iter_db_records(detection_result: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
     """
-    検出結果から Markdown レポートを生成
+    検出結果を 1 件 1 レコードの JSON 互換 dict として順に返す（JSONL 出力用）
+    
+    prisma_schema / prisma_model / prisma_view / prisma_type / prisma_enum / typeorm_entity / skipped_file /
+    sql_table / sql_index / sql_warning / index_query / index_missing / index_redundant /
+    rls_finding / rls_unindexed / rls_multiple_permissive / schema_drift /
+    relation_node / relation_edge / relation_cycle / relation_self_reference / relation_fan_out /
+    unindexed_foreign_key の順で、最後が集計レコード（iter_db_scan_records と同じ並び）。
     """
-    lines = [
-        "# Database Model Analysis Report",
-        "",
-        "## Infrastructure Detection",
-        "",
-    ]
+    for schema_info in detection_result["parsed_prisma"]:
+        yield from _prisma_records(schema_info)
+    for entity_info in detection_result["parsed_typeorm"]:
+        yield {"type": "typeorm_entity", "path": entity_info["path"], **entity_info["data"]}
+    yield from _db_tail_records(detection_result)
+
+
+def iter_db_scan_records(
+    max_file_bytes: int = DEFAULT_MAX_FILE_BYTES,
+    use_cache: bool = True,
+    cache_path: Optional[Path] = None,
+    jobs: int = 1,
+    typeorm_cache_path: Optional[Path] = None,
+    schema_drift: bool = False,
+) -> Iterator[Dict[str, Any]]:
+    """
+    detect_database_infrastructure と同じ解析を行い、結果を iter_db_records と同じレコードで逐次返す
     
-    if not detection_result["has_prisma"] and not detection_result["has_typeorm"]:
-        lines.extend([
-            "**Status:** No database schema infrastructure detected",
-            "",
-            "### Recommendations:",
-            "- Consider setting up Prisma or TypeORM for type-safe database access",
-            "- Create a `prisma/schema.prisma` file if using Prisma",
-            "- Create `*.entity.ts` files in a dedicated directory if using TypeORM",
-        ])
-        return "\n".join(lines)
+    Prisma スキーマ・TypeORM エンティティのレコードはファイルの解析が終わるたびに返す。
+    SQL マイグレーション以降はスキーマ全体が要る解析なので、最後にまとめて返す。
+    引数は detect_database_infrastructure と同じ。
+    """
+    prisma_schemas = find_prisma_schemas()
+    typeorm_entities = find_typeorm_entities()
+    migration_files = find_migration_files()
+    policy = SourcePolicy(max_bytes=max_file_bytes)
     
-    if detection_result["has_prisma"]:
-        lines.extend([
-            "✅ **Prisma detected**",
-            "",
-            f"- Found {len(detection_result['prisma_schemas'])} schema file(s):",
-        ])
-        for schema_path in detection_result["prisma_schemas"]:
-            lines.append(f"  - `{schema_path}`")
+    # リレーショングラフの構築に使うため、解析結果自体は手元に残す
+    parsed_prisma = []
+    for schema in prisma_schemas:
+        if not policy.admit(schema):
+            continue
+        schema_info = {"path": str(schema), "data": parse_prisma_schema(schema)}
+        parsed_prisma.append(schema_info)
+        yield from _prisma_records(schema_info)
+    
+    admitted_entities = [entity for entity in typeorm_entities if policy.admit(entity)]
+    typeorm_cache = load_typeorm_cache(typeorm_cache_path) if use_cache and admitted_entities else None
+    parsed_typeorm = []
+    for entity, parsed in zip(admitted_entities, iter_typeorm_entities(admitted_entities, jobs=jobs, cache=typeorm_cache)):
+        parsed_typeorm.append({"path": str(entity), "data": parsed})
+        yield {"type": "typeorm_entity", "path": str(entity), **parsed}
+    if typeorm_cache is not None:
+        typeorm_cache.save()
+    
+    yield from _db_tail_records({
+        "has_prisma": len(prisma_schemas) > 0,
+        "has_typeorm": len(typeorm_entities) > 0,
+        "prisma_schemas": [str(p) for p in prisma_schemas],
+        "typeorm_entities": [str(p) for p in typeorm_entities],
+        "typeorm_cache_stats": typeorm_cache.stats.as_dict() if typeorm_cache is not None else None,
+        "skipped_files": policy.skipped,
+        "has_sql_migrations": bool(migration_files),
+        "migrations_dir": str(MIGRATIONS_DIR),
+        **_schema_analyses(parsed_prisma, parsed_typeorm, migration_files, policy, use_cache, cache_path, schema_drift),
+    })
+
+
+class DbReportBuilder:
+    """
+    DB のレコード列（iter_db_records / iter_db_scan_records）から Markdown レポートを組み立てる
+    
+    レコードは届いた順にレポートの行へ変換し、元の解析結果は持たない。
+    見出し（スキーマ一覧・件数）は集計レコードと各種別の件数から最後に組み立てる。
+    """
+    
+    def __init__(self) -> None:
+        self.summary: Optional[Dict[str, Any]] = None
+        # レコード種別 -> 件数
+        self.counts: Dict[str, int] = {}
+        self.prisma_lines: List[str] = []
+        self._schema_errors: List[Dict[str, Any]] = []
+        self._enums_open = False
+        self.typeorm_lines: List[str] = []
+        # テーブル名 -> (見出し〜外部キーの行, ポリシーの行)。インデックスはテーブルより後に届くので別に持つ
+        self.tables: Dict[str, Tuple[List[str], List[str]]] = {}
+        self.table_indexes: Dict[str, List[str]] = {}
+        self.undeclared_tables = 0
+        self.sql_policies = 0
+        self.warning_lines: List[str] = []
+        self.skipped_lines: List[str] = []
+        self.coverage_statuses: Dict[str, int] = {}
+        self.missing_lines: List[str] = []
+        self.redundant_lines: List[str] = []
+        self.pattern_rows: List[str] = []
+        self.rls_kinds: Dict[str, int] = {}
+        self.rls_finding_lines: List[str] = []
+        self.rls_unindexed_lines: List[str] = []
+        self.rls_permissive_lines: List[str] = []
+        self.drift_severities: Dict[str, int] = {}
+        self.drift_lines: List[str] = []
+        self.relation_nodes: List[Dict[str, Any]] = []
+        self.relation_edges: List[Dict[str, Any]] = []
+        self.unindexed_fk_lines: List[str] = []
+        self.fan_out_lines: List[str] = []
+        self.cycle_lines: List[str] = []
+        self.self_reference_lines: List[str] = []
+    
+    def add(self, record: Dict[str, Any]) -> None:
+        kind = record["type"]
+        self.counts[kind] = self.counts.get(kind, 0) + 1
+        handler = getattr(self, f"_add_{kind}", None)
+        if handler is not None:
+            handler(record)
+    
+    def passthrough(self, records: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """records を add しながらそのまま返す（write_jsonl に渡す用）"""
+        for record in records:
+            self.add(record)
+            yield record
+    
+    def relation_graph_data(self) -> Dict[str, Any]:
+        """RelationGraph.from_dict に渡せる {"nodes", "edges"}（DOT / JSON の書き出し用）"""
+        nodes = [{k: v for k, v in node.items() if k != "type"} for node in self.relation_nodes]
+        edges = [{k: v for k, v in edge.items() if k != "type"} for edge in self.relation_edges]
+        return {"nodes": nodes, "edges": edges}
+    
+    def _add_db_summary(self, record: Dict[str, Any]) -> None:
+        self.summary = record
+    
+    # ---- Prisma / TypeORM ------------------------------------------------
+
+    def _close_schema(self) -> None:
+        """直前のスキーマの enum 一覧とパースエラーを閉じる"""
+        if self._enums_open:
+            self.prisma_lines.append("")
+        if self._schema_errors:
+            self.prisma_lines.append("**Parse errors:**")
+            for error in self._schema_errors:
+                self.prisma_lines.append(f"- line {error['line']}: {error['message']}")
+            self.prisma_lines.append("")
+        self._schema_errors = []
+        self._enums_open = False
+    
+    def _add_prisma_schema(self, record: Dict[str, Any]) -> None:
+        self._close_schema()
+        lines = self.prisma_lines
+        lines.append(f"### Schema: `{record['path']}`")
+        lines.append("")
+        if record.get("datasource"):
+            ds = record["datasource"]
+            lines.append(f"**Datasource:** `{ds['provider']}` (url: `{ds['url']}`)")
+            lines.append("")
+        if record["models"]:
+            lines.append(f"**Models:** {record['models']} defined")
+            lines.append("")
+        self._schema_errors = record.get("errors") or []
+    
+    def _add_prisma_block(self, label: str, model: Dict[str, Any]) -> None:
+        lines = self.prisma_lines
+        lines.append(f"#### {label}: `{model['name']}`")
+        lines.append("")
+        if model["fields"]:
+            lines.append("**Fields:**")
+            for field in model["fields"]:
+                array_suffix = "[]" if field.get("is_array") else ""
+                opt = " (optional)" if field.get("is_optional") else ""
+                lines.append(f"- `{field['name']}`: `{field['type']}{array_suffix}`{opt} {field.get('attributes', '')}".rstrip())
+            lines.append("")
+        if model["relations"]:
+            lines.append("**Relations:**")
+            for rel in model["relations"]:
+                array_suffix = "[]" if rel.get("is_array") else ""
+                lines.append(f"- `{rel['name']}`: `{rel['type']}{array_suffix}` {rel.get('attributes', '')}".rstrip())
+            lines.append("")
+        if model.get("block_attributes"):
+            lines.append("**Block attributes:**")
+            for attribute in model["block_attributes"]:
+                lines.append(f"- `{attribute}`")
+            lines.append("")
+    
+    def _add_prisma_model(self, record: Dict[str, Any]) -> None:
+        self._add_prisma_block("Model", record)
+    
+    def _add_prisma_view(self, record: Dict[str, Any]) -> None:
+        self._add_prisma_block("View", record)
+    
+    def _add_prisma_type(self, record: Dict[str, Any]) -> None:
+        self._add_prisma_block("Type", record)
+    
+    def _add_prisma_enum(self, record: Dict[str, Any]) -> None:
+        if not self._enums_open:
+            self.prisma_lines.append("**Enums:**")
+            self._enums_open = True
+        self.prisma_lines.append(f"- `{record['name']}`: {', '.join(record['values'])}")
+    
+    def _add_typeorm_entity(self, record: Dict[str, Any]) -> None:
+        lines = self.typeorm_lines
+        lines.append(f"### Entity: `{record['name']}` (table: `{record['table']}`)")
+        lines.append(f"**File:** `{record['path']}`")
         lines.append("")
         
-        # 各スキーマの詳細
-        for schema_info in detection_result["parsed_prisma"]:
-            path = schema_info["path"]
-            data = schema_info["data"]
-            lines.append(f"### Schema: `{path}`")
+        if record["columns"]:
+            lines.append("**Columns:**")
+            for col in record["columns"]:
+                flags = [f"`{col['column_type']}`"] if col.get("column_type") else []
+                if col.get("primary"):
+                    flags.append("PK")
+                if col.get("nullable"):
+                    flags.append("nullable")
+                lines.append(f"- `{col['name']}`: `{col['type']}` ({col['decorator']}) {' '.join(flags)}".rstrip())
             lines.append("")
-            
-            if data.get("datasource"):
-                ds = data["datasource"]
-                lines.append(f"**Datasource:** `{ds['provider']}` (url: `{ds['url']}`)")
-                lines.append("")
-            
-            if data.get("models"):
-                lines.append(f"**Models:** {len(data['models'])} defined")
+        
+        if record["relations"]:
+            lines.append("**Relations:**")
+            for rel in record["relations"]:
+                target = f" → `{rel['target']}`" if rel.get("target") else ""
+                on_delete = rel.get("options", {}).get("onDelete")
+                on_delete = f" ON DELETE {on_delete}" if on_delete else ""
+                lines.append(f"- `{rel['name']}`: `{rel['type']}` ({rel['decorator']}){target}{on_delete}")
+            lines.append("")
+        
+        if record.get("indices"):
+            lines.append("**Indices:**")
+            for index in record["indices"]:
+                lines.append(f"- `{index['raw']}`")
+            lines.append("")
+    
+    def _add_skipped_file(self, record: Dict[str, Any]) -> None:
+        self.skipped_lines.append(f"- `{record['path']}`: {record['reason']} ({record['size']:,} bytes)")
+    
+    # ---- SQL マイグレーション --------------------------------------------
+    
+    def _add_sql_table(self, table: Dict[str, Any]) -> None:
+        if not table["declared"]:
+            self.undeclared_tables += 1
+        self.sql_policies += len(table["policies"])
+        rls = "RLS enabled" if table["rls_enabled"] else "RLS disabled"
+        suffix = "" if table["declared"] else ", not created by any migration"
+        head = [f"### Table: `{table['name']}` ({rls}, {len(table['policies'])} policies{suffix})", ""]
+        if table["columns"]:
+            head.append("**Columns:**")
+            for name, col in table["columns"].items():
+                flags = []
+                if name in table["primary_key"]:
+                    flags.append("PK")
+                if not col["nullable"] and name not in table["primary_key"]:
+                    flags.append("NOT NULL")
+                if col["default"]:
+                    flags.append(f"default `{col['default']}`")
+                head.append(f"- `{name}`: `{col['type']}` {' '.join(flags)}".rstrip())
+            head.append("")
+        if table["foreign_keys"]:
+            head.append("**Foreign keys:**")
+            for fk in table["foreign_keys"]:
+                on_delete = f" ON DELETE {fk['on_delete']}" if fk["on_delete"] else ""
+                head.append(f"- `{', '.join(fk['columns'])}` → `{fk['ref_table']}({', '.join(fk['ref_columns'])})`{on_delete}")
+            head.append("")
+        policies = []
+        if table["policies"]:
+            policies.append("**Policies:**")
+            for policy in table["policies"].values():
+                policies.append(f"- `{policy['name']}`: FOR {policy['command']} TO {', '.join(policy['roles'])}")
+            policies.append("")
+        self.tables[table["name"]] = (head, policies)
+    
+    def _add_sql_index(self, index: Dict[str, Any]) -> None:
+        unique = " UNIQUE" if index["unique"] else ""
+        self.table_indexes.setdefault(index["table"], []).append(f"- `{index['name']}`{unique} {index['definition']}")
+    
+    def _add_sql_warning(self, warning: Dict[str, Any]) -> None:
+        self.warning_lines.append(f"- `{warning['source']}`: {warning['message']}")
+    
+    def _sql_schema_lines(self, summary: Dict[str, Any]) -> List[str]:
+        """SQL マイグレーションから再生したスキーマのレポート部分"""
+        applied = len(summary.get("sql_migrations_applied") or [])
+        replayed = len(summary.get("sql_migrations_replayed") or [])
+        undeclared = self.undeclared_tables
+        lines = [
+            "✅ **SQL migrations detected**",
+            "",
+            f"- `{summary.get('migrations_dir')}`: {applied} migration(s) "
+            f"({replayed} replayed, {applied - replayed} from cache)",
+            f"- Tables: {len(self.tables)}"
+            + (f" ({undeclared} referenced but never created)" if undeclared else "")
+            + f", Indexes: {self.counts.get('sql_index', 0)}"
+            + f", RLS policies: {self.sql_policies}",
+            "",
+        ]
+        for name, (head, policies) in self.tables.items():
+            lines.extend(head)
+            if self.table_indexes.get(name):
+                lines.append("**Indexes:**")
+                lines.extend(self.table_indexes[name])
                 lines.append("")
-                for model in data["models"]:
-                    lines.append(f"#### Model: `{model['name']}`")
-                    lines.append("")
-                    if model["fields"]:
-                        lines.append("**Fields:**")
-                        for field in model["fields"]:
-                            opt = " (optional)" if field.get("is_optional") else ""
-                            lines.append(f"- `{field['name']}`: `{field['type']}`{opt} {field.get('attributes', '')}")
-                        lines.append("")
-                    if model["relations"]:
-                        lines.append("**Relations:**")
-                        for rel in model["relations"]:
-                            array_suffix = "[]" if rel.get("is_array") else ""
-                            lines.append(f"- `{rel['name']}`: `{rel['type']}{array_suffix}` {rel.get('attributes', '')}")
-                        lines.append("")
-    
-    if detection_result["has_typeorm"]:
-        lines.extend([
-            "✅ **TypeORM detected**",
+            lines.extend(policies)
+        
+        if self.warning_lines:
+            lines.append("**Migration warnings:**")
+            lines.extend(self.warning_lines)
+            lines.append("")
+        return lines
+    
+    # ---- インデックス / RLS / ずれ ---------------------------------------
+    
+    def _add_index_query(self, query: Dict[str, Any]) -> None:
+        for result in query["coverage"]:
+            self.coverage_statuses[result["status"]] = self.coverage_statuses.get(result["status"], 0) + 1
+            if result["status"] == "unknown_table":
+                continue
+            optional = " (with optional filters)" if result["variant"] != "base" else ""
+            self.pattern_rows.append(
+                f"| `{query['file']}:{query['line']}`{optional} | `{query['table']}` "
+                f"| {', '.join(result['eq']) or '-'} | {', '.join(result['range']) or '-'} "
+                f"| {', '.join(result['order']) or '-'} | {result['status']} | {result['index'] or '-'} |"
+            )
+    
+    def _add_index_missing(self, item: Dict[str, Any]) -> None:
+        evidence = ", ".join(f"`{e}`" for e in item["evidence"])
+        replaces = ""
+        if item["replaces"]:
+            replaces = "; supersedes " + ", ".join(f"`{name}`" for name in item["replaces"])
+        self.missing_lines.append(f"- `{item['table']} ({', '.join(item['columns'])})` — used by {evidence}{replaces}")
+        self.missing_lines.append(f"  - `{item['statement']}`")
+    
+    def _add_index_redundant(self, item: Dict[str, Any]) -> None:
+        relation = "duplicates" if item["reason"] == "duplicate" else "is a left prefix of"
+        self.redundant_lines.append(
+            f"- `{item['index']}` on `{item['table']} ({', '.join(item['columns'])})` {relation} `{item['covered_by']}`"
+        )
+    
+    def _index_coverage_lines(self, coverage: Dict[str, Any]) -> List[str]:
+        """クエリパターンとインデックスの突き合わせ結果のレポート部分"""
+        statuses = self.coverage_statuses
+        lines = [
+            "## Index Coverage",
             "",
-            f"- Found {len(detection_result['typeorm_entities'])} entity file(s):",
-        ])
-        for entity_path in detection_result["typeorm_entities"]:
-            lines.append(f"  - `{entity_path}`")
+            f"- Queries analyzed: {self.counts.get('index_query', 0)}, filter combinations: {sum(statuses.values())} "
+            f"({', '.join(f'{n} {status}' for status, n in sorted(statuses.items()))})",
+        ]
+        if coverage["unknown_tables"]:
+            tables = ", ".join(f"`{t}`" for t in coverage["unknown_tables"])
+            lines.append(f"- Tables queried but not created by migrations (not checked): {tables}")
         lines.append("")
         
-        # 各エンティティの詳細
-        for entity_info in detection_result["parsed_typeorm"]:
-            path = entity_info["path"]
-            data = entity_info["data"]
-            lines.append(f"### Entity: `{data['name']}` (table: `{data['table']}`)")
-            lines.append(f"**File:** `{path}`")
+        if self.missing_lines:
+            lines.extend(["### Missing indexes", "", *self.missing_lines, ""])
+        
+        if self.redundant_lines:
+            lines.extend(["### Redundant indexes", "", *self.redundant_lines, ""])
+        
+        if self.pattern_rows:
+            lines.append("### Query patterns")
             lines.append("")
-            
-            if data["columns"]:
-                lines.append("**Columns:**")
-                for col in data["columns"]:
-                    lines.append(f"- `{col['name']}`: `{col['type']}` ({col['decorator']})")
-                lines.append("")
-            
-            if data["relations"]:
-                lines.append("**Relations:**")
-                for rel in data["relations"]:
-                    lines.append(f"- `{rel['name']}`: `{rel['type']}` ({rel['decorator']})")
-                lines.append("")
+            lines.append("| Location | Table | Equality | Range | Order | Status | Index |")
+            lines.append("|----------|-------|----------|-------|-------|--------|-------|")
+            lines.extend(self.pattern_rows)
+            lines.append("")
+        return lines
+    
+    def _add_rls_finding(self, finding: Dict[str, Any]) -> None:
+        self.rls_kinds[finding["kind"]] = self.rls_kinds.get(finding["kind"], 0) + 1
+        clause = "USING" if finding["clause"] == "using" else "WITH CHECK"
+        self.rls_finding_lines.append(f"- `{finding['table']}` / `{finding['policy']}` ({clause}): {finding['detail']}")
+        self.rls_finding_lines.append(f"  - {finding['suggestion']}")
+    
+    def _add_rls_unindexed(self, item: Dict[str, Any]) -> None:
+        policies = ", ".join(f"`{name}`" for name in item["policies"])
+        self.rls_unindexed_lines.append(f"- `{item['table']} ({', '.join(item['columns'])})` — filtered by {policies}")
+    
+    def _add_rls_multiple_permissive(self, item: Dict[str, Any]) -> None:
+        policies = ", ".join(f"`{name}`" for name in item["policies"])
+        self.rls_permissive_lines.append(f"- `{item['table']}` {item['command']} TO {item['role']}: {policies}")
+    
+    def _rls_policies_lines(self, rls: Dict[str, Any]) -> List[str]:
+        """RLS ポリシー式のコスト解析結果のレポート部分"""
+        kinds = self.rls_kinds
+        lines = [
+            "## RLS Policy Cost",
+            "",
+            f"- Policies analyzed: {rls['policies']}, findings: {self.counts.get('rls_finding', 0)}"
+            + (f" ({', '.join(f'{n} {kind}' for kind, n in sorted(kinds.items()))})" if kinds else ""),
+            "",
+        ]
+        if self.rls_finding_lines:
+            lines.extend(["### Per-row evaluation", "", *self.rls_finding_lines, ""])
+        if self.rls_unindexed_lines:
+            lines.extend(["### Unindexed policy predicates", "", *self.rls_unindexed_lines, ""])
+        if self.rls_permissive_lines:
+            lines.extend(["### Multiple permissive policies", "", *self.rls_permissive_lines, ""])
+        return lines
+    
+    def _add_schema_drift(self, pair: Dict[str, Any]) -> None:
+        for item in pair["drift"]:
+            self.drift_severities[item["severity"]] = self.drift_severities.get(item["severity"], 0) + 1
+        lines = self.drift_lines
+        lines.append(f"### `{pair['schema']}` → `{pair['table']}` ({pair['file']}:{pair['line']})")
+        lines.append("")
+        matched = ", ".join(f"`{m['field']}`→`{m['column']}`" for m in pair["matched"]) or "-"
+        lines.append(f"- Columns: {matched}")
+        if pair["json_fields"]:
+            lines.append(f"- Stored in JSON: {', '.join(f'`{f}`' for f in pair['json_fields'])}")
+        for item in pair["drift"]:
+            target = f"`{item['field']}` / `{item['column']}`" if item["field"] else f"`{item['column']}`"
+            lines.append(f"- **{item['severity']}** {item['kind']} {target}: {item['detail']}")
+        lines.append("")
+    
+    def _schema_drift_lines(self, drift: Dict[str, Any]) -> List[str]:
+        """zod スキーマと SQL カラムのずれのレポート部分"""
+        severities = self.drift_severities
+        lines = [
+            "## Schema Drift",
+            "",
+            f"- Schema files: {len(drift['files'])}, schema/table pairs: {self.counts.get('schema_drift', 0)}"
+            + (f" ({', '.join(f'{n} {sev}' for sev, n in sorted(severities.items()))})" if severities else ", no drift"),
+        ]
+        if drift["missing_tables"]:
+            lines.append(f"- Target tables not created by migrations: {', '.join(f'`{t}`' for t in drift['missing_tables'])}")
+        lines.append("")
+        lines.extend(self.drift_lines)
+        return lines
+    
+    # ---- リレーショングラフ ----------------------------------------------
+    
+    def _add_relation_node(self, record: Dict[str, Any]) -> None:
+        self.relation_nodes.append(record)
+    
+    def _add_relation_edge(self, record: Dict[str, Any]) -> None:
+        self.relation_edges.append(record)
+    
+    def _add_relation_cycle(self, record: Dict[str, Any]) -> None:
+        self.cycle_lines.append(f"- {' ↔ '.join(f'`{name}`' for name in record['models'])}")
+    
+    def _add_relation_self_reference(self, item: Dict[str, Any]) -> None:
+        self.self_reference_lines.append(f"- `{item['model']} ({', '.join(item['columns'])})`")
     
-    lines.extend([
-        "---",
-        "",
-        "## Suggestions",
-        "",
-        "- Ensure all models have proper indexes for frequently queried fields",
-        "- Consider adding soft delete columns (deletedAt) for audit trails",
-        "- Review relation configurations for proper cascade behavior",
-        "- Add database migration version control (prisma migrate / typeorm migration)",
-    ])
-    
-    return "\n".join(lines)
+    def _add_relation_fan_out(self, item: Dict[str, Any]) -> None:
+        children = ", ".join(f"`{c}`" for c in item["children"])
+        self.fan_out_lines.append(f"- `{item['model']}`: {item['fan_out']} — {children}")
+    
+    def _add_unindexed_foreign_key(self, item: Dict[str, Any]) -> None:
+        on_delete = f" (ON DELETE {item['on_delete']})" if item["on_delete"] else ""
+        self.unindexed_fk_lines.append(
+            f"- `{item['model']} ({', '.join(item['columns'])})` → `{item['references']}`{on_delete} [{item['source']}]"
+        )
+    
+    def _relation_graph_lines(self, relation_graph: Dict[str, Any]) -> List[str]:
+        """リレーショングラフの解析結果のレポート部分"""
+        lines = [
+            "## Relation Graph",
+            "",
+            f"- Models: {len(self.relation_nodes)}, relations: {len(self.relation_edges)}",
+            "",
+        ]
+        if self.unindexed_fk_lines:
+            lines.extend(["### Foreign keys without a backing index", "", *self.unindexed_fk_lines, ""])
+        if self.fan_out_lines:
+            lines.append(f"### High fan-out models (≥ {relation_graph['fan_out_threshold']} child relations, N+1 risk)")
+            lines.append("")
+            lines.extend(self.fan_out_lines)
+            lines.append("")
+        if self.cycle_lines:
+            lines.extend(["### Relation cycles", "", *self.cycle_lines, ""])
+        if self.self_reference_lines:
+            lines.extend(["### Self references", "", *self.self_reference_lines, ""])
+        adjacency: Dict[str, set] = {}
+        for edge in self.relation_edges:
+            adjacency.setdefault(edge["from"], set()).add(edge["to"])
+        lines.append("### Adjacency")
+        lines.append("")
+        for name in sorted(adjacency):
+            lines.append(f"- `{name}` → {', '.join(f'`{t}`' for t in sorted(adjacency[name]))}")
+        lines.append("")
+        return lines
+    
+    # ---- 組み立て --------------------------------------------------------
+    
+    def render(self) -> str:
+        """Markdown レポートを返す（集計レコードを受け取った後に呼ぶ）"""
+        self._close_schema()
+        summary = self.summary or {}
+        lines = [
+            "# Database Model Analysis Report",
+            "",
+            "## Infrastructure Detection",
+            "",
+        ]
+        
+        has_sql = bool(summary.get("has_sql_migrations"))
+        if not summary.get("has_prisma") and not summary.get("has_typeorm") and not has_sql:
+            lines.extend([
+                "**Status:** No database schema infrastructure detected",
+                "",
+                "### Recommendations:",
+                "- Consider setting up Prisma or TypeORM for type-safe database access",
+                "- Create a `prisma/schema.prisma` file if using Prisma",
+                "- Create `*.entity.ts` files in a dedicated directory if using TypeORM",
+            ])
+            return "\n".join(lines)
+        
+        if summary["has_prisma"]:
+            lines.extend([
+                "✅ **Prisma detected**",
+                "",
+                f"- Found {len(summary['prisma_schemas'])} schema file(s):",
+            ])
+            for schema_path in summary["prisma_schemas"]:
+                lines.append(f"  - `{schema_path}`")
+            lines.append("")
+            lines.extend(self.prisma_lines)
+        
+        if summary["has_typeorm"]:
+            lines.extend([
+                "✅ **TypeORM detected**",
+                "",
+                f"- Found {len(summary['typeorm_entities'])} entity file(s):",
+            ])
+            for entity_path in summary["typeorm_entities"]:
+                lines.append(f"  - `{entity_path}`")
+            lines.append("")
+            lines.extend(self.typeorm_lines)
+        
+        if has_sql:
+            lines.extend(self._sql_schema_lines(summary))
+        
+        if self.skipped_lines:
+            lines.append("**Skipped files:**")
+            lines.extend(self.skipped_lines)
+            lines.append("")
+        
+        index_coverage = summary.get("index_coverage")
+        if index_coverage:
+            lines.extend(self._index_coverage_lines(index_coverage))
+            # インデックスについては上の突き合わせ結果を根拠に提案する
+            index_suggestions = []
+            missing = self.counts.get("index_missing", 0)
+            redundant = self.counts.get("index_redundant", 0)
+            if missing:
+                index_suggestions.append(f"- Add the {missing} missing index(es) listed under Index Coverage")
+            if redundant:
+                index_suggestions.append(
+                    f"- Drop the {redundant} redundant index(es) to reduce write amplification"
+                )
+        else:
+            index_suggestions = ["- Ensure all models have proper indexes for frequently queried fields"]
+        
+        drift = summary.get("schema_drift")
+        if drift:
+            lines.extend(self._schema_drift_lines(drift))
+        
+        rls_policies = summary.get("rls_policies")
+        if rls_policies:
+            lines.extend(self._rls_policies_lines(rls_policies))
+            findings = self.counts.get("rls_finding", 0)
+            unindexed = self.counts.get("rls_unindexed", 0)
+            if findings:
+                index_suggestions.append(
+                    f"- Wrap auth/helper calls in RLS policies with (select ...) and remove correlated subqueries "
+                    f"({findings} finding(s) under RLS Policy Cost)"
+                )
+            if unindexed:
+                index_suggestions.append(
+                    f"- Index the {unindexed} column set(s) filtered by RLS policies"
+                )
+        
+        relation_graph = summary.get("relation_graph")
+        if relation_graph:
+            lines.extend(self._relation_graph_lines(relation_graph))
+            unindexed_fks = self.counts.get("unindexed_foreign_key", 0)
+            if unindexed_fks:
+                index_suggestions.append(
+                    f"- Index the {unindexed_fks} foreign key(s) listed under Relation Graph"
+                )
+        
+        lines.extend([
+            "---",
+            "",
+            "## Suggestions",
+            "",
+            *index_suggestions,
+            "- Consider adding soft delete columns (deletedAt) for audit trails",
+            "- Review relation configurations for proper cascade behavior",
+            "- Add database migration version control (prisma migrate / typeorm migration)",
+        ])
+        
+        return "\n".join(lines)
+
+
+def generate_db_analysis_report(detection_result: Dict[str, Any]) -> str:
+    """
+    検出結果から Markdown レポートを生成（iter_db_records のレコードを DbReportBuilder に通す）
+    """
+    builder = DbReportBuilder()
+    for record in iter_db_records(detection_result):
+        builder.add(record)
+    return builder.render()
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+unified diff から変更範囲を取り出すユーティリティ
+- ファイルごとに「新しい側で追加/変更された行番号」の集合を返す
+- 差分の取得自体は agent_review_autogen.get_unified_diff を使う（ここではパースのみ）
+"""
+from __future__ import annotations
+
+import re
+from typing import Dict, Set
+
+_HUNK_HEADER = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@")
+
+
+def parse_changed_lines(diff: str) -> Dict[str, Set[int]]:
+    """
+    unified diff（--unified=0 推奨）を解析して変更行を抽出
+
+    Returns:
+        {"app/page.tsx": {12, 13, 40}, ...}
+        削除のみのファイル（+++ /dev/null）は含めない。
+        行の削除だけのハンクは新しい側に行が無いため空集合になる。
+    """
+    changed: Dict[str, Set[int]] = {}
+    current = None
+    for line in diff.splitlines():
+        if line.startswith("diff --git"):
+            current = None
+            continue
+        if line.startswith("+++ "):
+            target = line[4:].strip()
+            if target == "/dev/null":
+                current = None
+            else:
+                current = target[2:] if target.startswith("b/") else target
+                changed.setdefault(current, set())
+            continue
+        if current is None:
+            continue
+        m = _HUNK_HEADER.match(line)
+        if m:
+            start = int(m.group(1))
+            count = int(m.group(2)) if m.group(2) is not None else 1
+            changed[current].update(range(start, start + count))
+    return changed
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+ファイル走査ユーティリティ
+- プロジェクトツリーを 1 回だけ走査する共通ウォーカー
+- 除外ディレクトリ（node_modules など）は降りる前に枝刈り
+- 複数の拡張子/ファイル名を 1 パスで照合
+"""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Iterable, Iterator
+
+# 走査対象から外すディレクトリ名（パスのどの階層に現れても除外）
+DEFAULT_EXCLUDE_DIRS = frozenset({"node_modules", ".git", ".next", "dist", "build", "coverage"})
+
+
+def walk_files(
+    root: Path = Path("."),
+    suffixes: Iterable[str] = (),
+    names: Iterable[str] = (),
+    exclude_dirs: Iterable[str] = DEFAULT_EXCLUDE_DIRS,
+) -> Iterator[Path]:
+    """
+    root 配下のファイルを 1 回の走査で列挙する
+
+    Args:
+        root: 走査の起点
+        suffixes: 末尾一致で拾うサフィックス (例: (".ts", ".tsx") や (".entity.ts",))
+        names: 完全一致で拾うファイル名 (例: ("schema.prisma",))
+        exclude_dirs: 中に降りないディレクトリ名
+
+    suffixes と names がどちらも空なら全ファイルを返す。
+    出力順はディレクトリ内で名前順、サブディレクトリは深さ優先（実行ごとに安定）。
+    シンボリックリンクのディレクトリには降りない（循環防止）。
+    """
+    suffix_tuple = tuple(suffixes)
+    name_set = frozenset(names)
+    match_all = not suffix_tuple and not name_set
+    excluded = frozenset(exclude_dirs)
+
+    stack = [os.fspath(root)]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            # 権限不足や走査中の削除は黙ってスキップ
+            continue
+
+        subdirs = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in excluded:
+                        subdirs.append(entry.path)
+                    continue
+                if not entry.is_file():
+                    continue
+            except OSError:
+                continue
+            if match_all or entry.name in name_set or entry.name.endswith(suffix_tuple):
+                yield Path(entry.path)
+
+        # 名前順に処理されるよう逆順で積む
+        stack.extend(reversed(subdirs))
@@ -8,10 +8,39 @@
 from __future__ import annotations
 
 import glob
+import hashlib
 import json
 import re
+from collections import Counter
 from pathlib import Path
-from typing import List, Dict, Any, Set, Tuple
+from typing import List, Dict, Any, Iterable, Iterator, Pattern, Set, Tuple
+
+from .batch_runner import iter_batched
+from .fs_walk import DEFAULT_EXCLUDE_DIRS, walk_files
+from .locale_catalog import LocaleCatalog, find_key_references
+from .scan_cache import DEFAULT_CACHE_DIR, ScanCache
+from .source_reader import CJK_BYTES_PATTERN, DEFAULT_MAX_FILE_BYTES, SourcePolicy, iter_source_lines
+from .ts_lexer import JSX_TEXT, LEXER_VERSION, tokenize_lines
+
+# 日本語 (ひらがな、カタカナ、漢字) の判定
+# モジュール読み込み時に 1 度だけコンパイル（並列実行時はワーカーごとに 1 度）
+_JAPANESE_PATTERN = re.compile(r'[ぁ-んァ-ヶ一-龥]+')
+
+# 抽出ロジックを変更したら上げる（パターン文字列・字句解析器の版は自動で検知される）
+I18N_EXTRACTOR_VERSION = 3
+I18N_CACHE_PATH = DEFAULT_CACHE_DIR / "i18n-scan.json"
+
+
+def i18n_cache_version() -> str:
+    """抽出器のバージョンとパターンの指紋からキャッシュ version を作る"""
+    fingerprint = f"{_JAPANESE_PATTERN.pattern}\nlexer-{LEXER_VERSION}"
+    digest = hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()[:12]
+    return f"i18n-{I18N_EXTRACTOR_VERSION}:{digest}"
+
+
+def load_i18n_scan_cache(path: Optional[Path] = None) -> ScanCache:
+    """i18n スキャン用の永続キャッシュを読み込む"""
+    return ScanCache.load(path or I18N_CACHE_PATH, i18n_cache_version())
 
 
 def find_locales_directory(root: Path = Path(".")) -> Optional[Path]:
@@ -55,165 +84,374 @@ def extract_hardcoded_japanese_texts(file_path: Path) -> List[Dict[str, Any]]:
     """
     TypeScript/TSX ファイルからハードコードされた日本語テキストを抽出
     
+    ts_lexer で文字列リテラル・テンプレートの各チャンク・JSX テキストを 1 パスで取り出す。
+    コメント内は対象外、複数行にまたがるリテラルは開始行で報告し、閉じた行を end_line に持つ。
+    ファイルは行単位でストリーム読みし、UTF-8 として不正なバイトは置換文字として扱う。
+    
     Returns:
         [
-            {"line": 42, "text": "氏名を入力してください", "context": "alert(...)"},
+            {"line": 42, "end_line": 42, "text": "氏名を入力してください", "context": "alert(...)"},
             ...
         ]
     """
     if not file_path.exists() or file_path.suffix not in [".ts", ".tsx", ".js", ".jsx"]:
         return []
     
-    content = file_path.read_text(encoding="utf-8")
-    lines = content.split("\n")
-    
-    # 日本語を含む文字列リテラルを検出 (ひらがな、カタカナ、漢字)
-    japanese_pattern = re.compile(r'[ぁ-んァ-ヶ一-龥]+')
-    string_patterns = [
-        # "..." or '...'
-        re.compile(r'["\']([^"\']*[ぁ-んァ-ヶ一-龥][^"\']*)["\']'),
-        # `...` (template literal)
-        re.compile(r'`([^`]*[ぁ-んァ-ヶ一-龥][^`]*)`'),
-    ]
+    # 日本語らしいバイト列を 1 つも含まないファイルは何も読まずに終わる（大きいファイルは mmap 上で検索）
+    lines = iter_source_lines(file_path, prefilter=CJK_BYTES_PATTERN)
     
     results = []
-    for line_num, line in enumerate(lines, start=1):
-        # コメント行をスキップ
-        if line.strip().startswith("//") or line.strip().startswith("/*"):
+    # .ts では `<` を JSX とみなさない（型アサーション/ジェネリクス）
+    jsx = file_path.suffix != ".ts"
+    for token in tokenize_lines(lines, jsx=jsx):
+        if not _JAPANESE_PATTERN.search(token.value):
             continue
+        if token.kind == JSX_TEXT:
+            # JSX テキストは改行・連続空白が 1 つの空白として描画される
+            text = " ".join(token.value.split())
+        else:
+            text = token.value.strip()
         
-        for pattern in string_patterns:
-            for match in pattern.finditer(line):
-                text = match.group(1).strip()
-                if japanese_pattern.search(text):
-                    # 文脈を抽出 (前後20文字)
-                    start = max(0, match.start() - 20)
-                    end = min(len(line), match.end() + 20)
-                    context = line[start:end].strip()
-                    
-                    results.append({
-                        "line": line_num,
-                        "text": text,
-                        "context": context,
-                    })
+        # 文脈を抽出 (開始行の前後20文字)
+        line = token.line_text
+        end = token.end_col if token.end_col is not None else len(line)
+        context = line[max(0, token.col - 20):min(len(line), end + 20)].strip()
+        
+        results.append({
+            "line": token.line,
+            "end_line": token.end_line,
+            "text": text,
+            "context": context,
+        })
     
     return results
 
 
-def scan_project_for_japanese_texts(root: Path = Path("."), extensions: List[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+def _relative_key(path: Path, root: Path) -> str:
+    # ルートからの相対パスをキーに
+    try:
+        return str(path.relative_to(root))
+    except ValueError:
+        return str(path)
+
+
+def iter_project_japanese_texts(
+    root: Path = Path("."),
+    extensions: List[str] = None,
+    jobs: int = 1,
+    cache: Optional[ScanCache] = None,
+    policy: Optional[SourcePolicy] = None,
+) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+    """
+    プロジェクト全体をスキャンし、ファイルごとに (キー, 検出結果) を抽出が終わり次第返す
+    
+    順序は scan_project_for_japanese_texts と同じ（検出 0 件のファイルも返す）。
+    cache の走査で消えたファイルのエントリは、最後まで読み切ったときに削除する。
+    """
+    if extensions is None:
+        extensions = [".ts", ".tsx", ".js", ".jsx"]
+    
+    if policy is None:
+        policy = SourcePolicy()
+    
+    # node_modules, .git などは降りる前に枝刈りし、全拡張子を 1 回の走査で照合
+    paths = [
+        path for path in walk_files(root, suffixes=extensions, exclude_dirs=DEFAULT_EXCLUDE_DIRS)
+        if policy.admit(path, _relative_key(path, root))
+    ]
+    keys = [_relative_key(path, root) for path in paths]
+    
+    yield from zip(keys, iter_batched(paths, extract_hardcoded_japanese_texts, jobs, cache, keys))
+    
+    if cache is not None:
+        cache.prune(keys)
+
+
+def scan_project_for_japanese_texts(
+    root: Path = Path("."),
+    extensions: List[str] = None,
+    jobs: int = 1,
+    cache: Optional[ScanCache] = None,
+    policy: Optional[SourcePolicy] = None,
+) -> Dict[str, List[Dict[str, Any]]]:
     """
     プロジェクト全体をスキャンして日本語テキストを検出
     
+    Args:
+        jobs: 並列プロセス数 (1 = 逐次, 0 以下 = CPU 数)。
+              結果の内容・キー順序は逐次実行と同一。
+        cache: 指定時は未変更ファイルの抽出を省略し、走査で消えたファイルのエントリを削除する
+               (保存は呼び出し側で cache.save())
+        policy: ファイルサイズ上限。超えたファイルは抽出せず policy.skipped に記録
+                (既定: DEFAULT_MAX_FILE_BYTES)
+    
     Returns:
         {
-            "app/page.tsx": [{"line": 42, "text": "...", "context": "..."}, ...],
+            "app/page.tsx": [{"line": 42, "end_line": 42, "text": "...", "context": "..."}, ...],
             ...
         }
     """
+    return {
+        key: texts
+        for key, texts in iter_project_japanese_texts(root, extensions, jobs, cache, policy)
+        if texts
+    }
+
+
+def iter_changed_japanese_texts(
+    changed_lines: Dict[str, Set[int]],
+    root: Path = Path("."),
+    extensions: List[str] = None,
+    jobs: int = 1,
+    cache: Optional[ScanCache] = None,
+    policy: Optional[SourcePolicy] = None,
+) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+    """
+    diff で変更されたファイルを順にスキャンし、(キー, 変更行に掛かる検出結果) を抽出が終わり次第返す
+    
+    順序は scan_changed_files_for_japanese_texts と同じ（該当 0 件のファイルも返す）。
+    """
     if extensions is None:
         extensions = [".ts", ".tsx", ".js", ".jsx"]
+    suffixes = tuple(extensions)
+    if policy is None:
+        policy = SourcePolicy()
     
-    results: Dict[str, List[Dict[str, Any]]] = {}
+    # diff のパスは常に "/" 区切り
+    targets = [
+        rel for rel in sorted(changed_lines)
+        if changed_lines[rel]
+        and rel.endswith(suffixes)
+        and not any(part in DEFAULT_EXCLUDE_DIRS for part in rel.split("/"))
+        and (root / rel).is_file()
+        and policy.admit(root / rel, rel)
+    ]
+    paths = [root / rel for rel in targets]
+    keys = [_relative_key(path, root) for path in paths]
     
-    # node_modules, .git などを除外
-    exclude_dirs = {"node_modules", ".git", ".next", "dist", "build", "coverage"}
+    extracted = iter_batched(paths, extract_hardcoded_japanese_texts, jobs, cache, keys)
+    for rel, key, texts in zip(targets, keys, extracted):
+        lines = changed_lines[rel]
+        # 複数行のリテラルは途中の行だけが変わっても対象にする
+        yield key, [
+            item for item in texts
+            if any(n in lines for n in range(item["line"], item.get("end_line", item["line"]) + 1))
+        ]
+
+
+def scan_changed_files_for_japanese_texts(
+    changed_lines: Dict[str, Set[int]],
+    root: Path = Path("."),
+    extensions: List[str] = None,
+    jobs: int = 1,
+    cache: Optional[ScanCache] = None,
+    policy: Optional[SourcePolicy] = None,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    diff で変更されたファイル・行だけを対象に日本語テキストを検出（PR チェック用）
     
-    for ext in extensions:
-        for file_path in glob.glob(str(root / "**" / f"*{ext}"), recursive=True):
-            path = Path(file_path)
-            # 除外ディレクトリチェック
-            if any(excluded in path.parts for excluded in exclude_dirs):
-                continue
-            
-            texts = extract_hardcoded_japanese_texts(path)
-            if texts:
-                # ルートからの相対パスをキーに
-                try:
-                    relative_path = path.relative_to(root)
-                    results[str(relative_path)] = texts
-                except ValueError:
-                    results[str(path)] = texts
+    Args:
+        changed_lines: diff_scope.parse_changed_lines の結果 {"app/page.tsx": {12, 13}, ...}
+        policy: scan_project_for_japanese_texts と同じ
     
-    return results
+    Returns:
+        scan_project_for_japanese_texts と同じ形式。line..end_line のどこかが変更行に含まれる検出結果のみ。
+    """
+    return {
+        key: in_scope
+        for key, in_scope in iter_changed_japanese_texts(changed_lines, root, extensions, jobs, cache, policy)
+        if in_scope
+    }
+
+
+# キー接頭辞の判定（上から順に最初に一致したもの、どれにも一致しなければ common.）
+_KEY_CATEGORIES: List[Tuple[str, Pattern[str]]] = [
+    # 1. アラート/エラーメッセージ
+    ("errors.", re.compile(r"ください|エラー|失敗")),
+    # 2. ボタン/アクション
+    ("actions.", re.compile(r"追加|削除|保存|編集|キャンセル")),
+    # 3. ラベル
+    ("labels.", re.compile(r"氏名|年齢|日付|時間")),
+]
+
+# キー末尾のハッシュ桁数（16 進）。短いキーが衝突したテキストだけ全桁（_KEY_DIGEST_MAX_CHARS）を使う
+_KEY_DIGEST_CHARS = 12
+_KEY_DIGEST_MAX_CHARS = 32
+
 
+def _key_prefix(text: str) -> str:
+    for prefix, pattern in _KEY_CATEGORIES:
+        if pattern.search(text):
+            return prefix
+    return "common."
 
-def suggest_translation_keys(japanese_texts: Dict[str, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+
+def _text_digest(text: str) -> str:
+    """実行ごとに変わらない内容ハッシュ（hash() はプロセスごとにランダム化されるため使わない）"""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=_KEY_DIGEST_MAX_CHARS // 2).hexdigest()
+
+
+def suggest_translation_keys(
+    japanese_texts: Dict[str, List[Dict[str, Any]]],
+    catalog: Optional[LocaleCatalog] = None,
+) -> List[Dict[str, Any]]:
     """
     ハードコードされたテキストから翻訳キーを提案
     
+    キーは「接頭辞 + text + 内容ハッシュ 12 桁」で、同じテキストには実行をまたいで同じキーが付く。
+    異なるテキストの 12 桁が衝突した場合は、衝突したテキストすべてに全桁のハッシュを使う
+    （入力の順序に関係なく同じキーになる）。
+    catalog 指定時、同じ文言が既にカタログにあればそのキーを使い "existing": True を付ける
+    （新しく作るキーはカタログのキーとも衝突させない）。
+    
     Returns:
         [
             {
-                "key": "errors.nameRequired",
+                "key": "errors.text3fa91c0d52e8",
                 "japanese": "氏名を入力してください",
                 "file": "app/page.tsx",
-                "line": 42
+                "line": 42,
+                "existing": False
             },
             ...
         ]
     """
-    suggestions = []
-    
-    # テキストを収集して重複除去
-    seen_texts: Set[str] = set()
-    
+    # 1 パス目: テキストごとの初出（重複除去）と、カタログに既にあるキー
+    first_seen: Dict[str, Tuple[str, int]] = {}
+    existing_key: Dict[str, str] = {}
     for file_path, texts in japanese_texts.items():
         for item in texts:
             text = item["text"]
-            if text in seen_texts or len(text) > 100:  # 長すぎるテキストはスキップ
+            if text in first_seen or len(text) > 100:  # 長すぎるテキストはスキップ
                 continue
-            seen_texts.add(text)
-            
-            # キー名の生成 (簡易的なルール)
-            # 1. アラート/エラーメッセージ
-            if "ください" in text or "エラー" in text or "失敗" in text:
-                key_prefix = "errors."
-            # 2. ボタン/アクション
-            elif any(word in text for word in ["追加", "削除", "保存", "編集", "キャンセル"]):
-                key_prefix = "actions."
-            # 3. ラベル
-            elif any(word in text for word in ["氏名", "年齢", "日付", "時間"]):
-                key_prefix = "labels."
-            # 4. その他
-            else:
-                key_prefix = "common."
-            
-            # キー名: 最初の数単語をキャメルケースに変換
-            key_suffix = text[:20].replace(" ", "").replace("。", "")
-            # 日本語をローマ字化する代わりに、簡易的にハッシュ値を使用
-            key_suffix = f"text{abs(hash(text)) % 10000}"
-            
-            suggestions.append({
-                "key": f"{key_prefix}{key_suffix}",
-                "japanese": text,
-                "file": file_path,
-                "line": item["line"],
-            })
+            first_seen[text] = (file_path, item["line"])
+            existing = catalog.keys_for_value(text) if catalog is not None else []
+            if existing:
+                existing_key[text] = existing[0]
+    
+    # 2 パス目: 新規テキストの短いキーを数え、衝突したものは全桁にする
+    reserved = set(catalog.all_keys) if catalog is not None else set()
+    new_texts = sorted(text for text in first_seen if text not in existing_key)
+    short_key = {
+        text: f"{_key_prefix(text)}text{_text_digest(text)[:_KEY_DIGEST_CHARS]}" for text in new_texts
+    }
+    short_count = Counter(short_key.values())
+    key_by_text: Dict[str, str] = dict(existing_key)
+    taken = set(reserved)
+    # ソート順に割り当てるので、全桁まで衝突した場合の連番も入力の順序に依存しない
+    for text in new_texts:
+        key = short_key[text]
+        if short_count[key] > 1 or key in reserved:
+            key = f"{_key_prefix(text)}text{_text_digest(text)}"
+        if key in taken:
+            # 128 bit 全体での衝突（実質起こらない）は連番で逃がす
+            n = 2
+            while f"{key}_{n}" in taken:
+                n += 1
+            key = f"{key}_{n}"
+        key_by_text[text] = key
+        taken.add(key)
     
-    return suggestions
+    return [
+        {
+            "key": key_by_text[text],
+            "japanese": text,
+            "file": file_path,
+            "line": line,
+            "existing": text in existing_key,
+        }
+        for text, (file_path, line) in first_seen.items()
+    ]
+
+
+def _load_locales() -> Tuple[Optional[Path], Dict[str, List[Path]], Optional[LocaleCatalog]]:
+    locales_dir = find_locales_directory()
+    locale_files = find_locale_files(locales_dir) if locales_dir else {}
+    catalog = LocaleCatalog.load(locales_dir, locale_files) if locales_dir else None
+    return locales_dir, locale_files, catalog
 
 
-def detect_i18n_infrastructure() -> Dict[str, Any]:
+def _iter_scan(
+    changed_lines: Optional[Dict[str, Set[int]]],
+    jobs: int,
+    cache: Optional[ScanCache],
+    policy: SourcePolicy,
+) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+    """全体スキャンか、diff 指定時は変更行のみのスキャン"""
+    if changed_lines is None:
+        return iter_project_japanese_texts(jobs=jobs, cache=cache, policy=policy)
+    return iter_changed_japanese_texts(changed_lines, jobs=jobs, cache=cache, policy=policy)
+
+
+def _scan_scope(changed_lines: Optional[Dict[str, Set[int]]]) -> Dict[str, Any]:
+    if changed_lines is None:
+        return {"mode": "full"}
+    return {
+        "mode": "diff",
+        "changed_files": len(changed_lines),
+        "changed_lines": sum(len(lines) for lines in changed_lines.values()),
+    }
+
+
+def _catalog_summary(
+    catalog: Optional[LocaleCatalog],
+    changed_lines: Optional[Dict[str, Set[int]]],
+    max_file_bytes: int,
+) -> Optional[Dict[str, Any]]:
+    if catalog is None:
+        return None
+    catalog_summary = catalog.summary()
+    catalog_summary["unused_keys"] = None
+    if changed_lines is None:
+        sources = walk_files(Path("."), suffixes=(".ts", ".tsx", ".js", ".jsx"), exclude_dirs=DEFAULT_EXCLUDE_DIRS)
+        used = find_key_references(sources, catalog.all_keys, max_bytes=max_file_bytes)
+        catalog_summary["unused_keys"] = catalog.unused_keys(used)
+    return catalog_summary
+
+
+def detect_i18n_infrastructure(
+    jobs: int = 1,
+    use_cache: bool = True,
+    cache_path: Optional[Path] = None,
+    changed_lines: Optional[Dict[str, Set[int]]] = None,
+    max_file_bytes: int = DEFAULT_MAX_FILE_BYTES,
+) -> Dict[str, Any]:
     """
     プロジェクト全体で i18n インフラを検出
     
+    Args:
+        jobs: 日本語テキスト抽出の並列プロセス数 (scan_project_for_japanese_texts 参照)
+        use_cache: 未変更ファイルの再抽出を省く永続キャッシュを使うか
+        cache_path: キャッシュファイルの場所 (既定: .cache/agents/i18n-scan.json)
+        changed_lines: 指定時は diff の変更行だけをスキャン (diff_scope.parse_changed_lines の結果)
+        max_file_bytes: これより大きいファイルはスキャンせず skipped_files に記録 (0 = 無制限)
+    
     Returns:
         {
             "has_locales": bool,
             "locales_dir": str | None,
             "locale_files": {"ja": [...], "en": [...]},
             "hardcoded_texts": {"app/page.tsx": [...]},
-            "translation_suggestions": [...]
+            "translation_suggestions": [...],
+            "cache_stats": {"hits": int, "misses": int, ...} | None,
+            "scope": {"mode": "full"} | {"mode": "diff", "changed_files": int, "changed_lines": int},
+            "skipped_files": [{"path": str, "size": int, "reason": str}, ...],
+            "catalog": {"languages": {"ja": 13, ...}, "total_keys": int, "missing_keys": {...},
+                        "errors": [...], "unused_keys": [...] | None} | None
         }
+        unused_keys は全体スキャン時のみ（diff スキャンでは参照の有無を判定できないため None）。
     """
-    locales_dir = find_locales_directory()
-    locale_files = find_locale_files(locales_dir) if locales_dir else {}
+    locales_dir, locale_files, catalog = _load_locales()
     
-    # プロジェクトルートから日本語テキストをスキャン
-    hardcoded_texts = scan_project_for_japanese_texts()
+    # プロジェクトルートから日本語テキストをスキャン（diff 指定時は変更行のみ）
+    cache = load_i18n_scan_cache(cache_path) if use_cache else None
+    policy = SourcePolicy(max_bytes=max_file_bytes)
+    hardcoded_texts = {key: texts for key, texts in _iter_scan(changed_lines, jobs, cache, policy) if texts}
+    if cache is not None:
+        cache.save()
     
-    # 翻訳キーの提案
-    suggestions = suggest_translation_keys(hardcoded_texts)
+    # 翻訳キーの提案（カタログに同じ文言があれば既存キーを使う）
+    suggestions = suggest_translation_keys(hardcoded_texts, catalog=catalog)
     
     return {
         "has_locales": locales_dir is not None,
@@ -221,143 +459,378 @@ def detect_i18n_infrastructure() -> Dict[str, Any]:
         "locale_files": {lang: [str(p) for p in paths] for lang, paths in locale_files.items()},
         "hardcoded_texts": hardcoded_texts,
         "translation_suggestions": suggestions,
+        "cache_stats": cache.stats.as_dict() if cache is not None else None,
+        "scope": _scan_scope(changed_lines),
+        "skipped_files": policy.skipped,
+        "catalog": _catalog_summary(catalog, changed_lines, max_file_bytes),
     }
 
 
-def generate_i18n_analysis_report(detection_result: Dict[str, Any]) -> str:
+def _i18n_tail_records(result: Dict[str, Any], files: int, strings: int) -> Iterator[Dict[str, Any]]:
+    """hardcoded_text より後のレコード（提案・スキップ・カタログ）と末尾の集計レコード"""
+    catalog = result.get("catalog")
+    for suggestion in result["translation_suggestions"]:
+        yield {"type": "translation_suggestion", **suggestion}
+    for skipped in result.get("skipped_files") or []:
+        yield {"type": "skipped_file", **skipped}
+    if catalog:
+        for lang, keys in catalog["missing_keys"].items():
+            for key in keys:
+                yield {"type": "missing_key", "lang": lang, "key": key}
+        for key in catalog.get("unused_keys") or []:
+            yield {"type": "unused_key", "key": key}
+        for error in catalog["errors"]:
+            yield {"type": "catalog_error", **error}
+    yield {
+        "type": "i18n_summary",
+        "has_locales": result["has_locales"],
+        "locales_dir": result["locales_dir"],
+        "locale_files": result["locale_files"],
+        "scope": result.get("scope") or {"mode": "full"},
+        "cache_stats": result.get("cache_stats"),
+        "files_with_hardcoded_text": files,
+        "hardcoded_strings": strings,
+        "translation_suggestions": len(result["translation_suggestions"]),
+        "catalog_keys": catalog["languages"] if catalog else None,
+        "catalog_total_keys": catalog["total_keys"] if catalog else None,
+    }
+
+
+def iter_i18n_records(detection_result: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
     """
-    検出結果から Markdown レポートを生成
+    検出結果を 1 件 1 レコードの JSON 互換 dict として順に返す（JSONL 出力用）
+    
+    Markdown レポートと違い件数で切り詰めない。hardcoded_text / translation_suggestion / skipped_file /
+    missing_key / unused_key / catalog_error の順で、最後が集計レコード（iter_i18n_scan_records と同じ並び）。
     """
-    lines = [
-        "# Internationalization (i18n) Analysis Report",
-        "",
-        "## Infrastructure Detection",
-        "",
-    ]
+    hardcoded_texts = detection_result["hardcoded_texts"]
+    for file_path, texts in hardcoded_texts.items():
+        for item in texts:
+            yield {"type": "hardcoded_text", "file": file_path, **item}
+    yield from _i18n_tail_records(
+        detection_result, len(hardcoded_texts), sum(len(texts) for texts in hardcoded_texts.values())
+    )
+
+
+def iter_i18n_scan_records(
+    jobs: int = 1,
+    use_cache: bool = True,
+    cache_path: Optional[Path] = None,
+    changed_lines: Optional[Dict[str, Set[int]]] = None,
+    max_file_bytes: int = DEFAULT_MAX_FILE_BYTES,
+) -> Iterator[Dict[str, Any]]:
+    """
+    detect_i18n_infrastructure と同じスキャンを行い、結果を iter_i18n_records と同じレコードで逐次返す
     
-    if not detection_result["has_locales"]:
-        lines.extend([
-            "⚠️ **No locales directory detected**",
+    hardcoded_text はファイルの抽出が終わるたびに返し、全件を dict に溜めない。
+    翻訳キーの提案には各テキストの初出だけを残し、提案・カタログ・集計のレコードは最後にまとめて返す。
+    引数は detect_i18n_infrastructure と同じ。
+    """
+    locales_dir, locale_files, catalog = _load_locales()
+    cache = load_i18n_scan_cache(cache_path) if use_cache else None
+    policy = SourcePolicy(max_bytes=max_file_bytes)
+    
+    first_seen: Dict[str, List[Dict[str, Any]]] = {}
+    seen_texts: Set[str] = set()
+    files = strings = 0
+    for key, texts in _iter_scan(changed_lines, jobs, cache, policy):
+        if not texts:
+            continue
+        files += 1
+        strings += len(texts)
+        for item in texts:
+            yield {"type": "hardcoded_text", "file": key, **item}
+            if item["text"] not in seen_texts:
+                seen_texts.add(item["text"])
+                first_seen.setdefault(key, []).append(item)
+    if cache is not None:
+        cache.save()
+    
+    yield from _i18n_tail_records({
+        "has_locales": locales_dir is not None,
+        "locales_dir": str(locales_dir) if locales_dir else None,
+        "locale_files": {lang: [str(p) for p in paths] for lang, paths in locale_files.items()},
+        # 提案は初出だけから作っても全件から作った場合と同じになる
+        "translation_suggestions": suggest_translation_keys(first_seen, catalog=catalog),
+        "cache_stats": cache.stats.as_dict() if cache is not None else None,
+        "scope": _scan_scope(changed_lines),
+        "skipped_files": policy.skipped,
+        "catalog": _catalog_summary(catalog, changed_lines, max_file_bytes),
+    }, files, strings)
+
+
+class I18nReportBuilder:
+    """
+    i18n のレコード列（iter_i18n_records / iter_i18n_scan_records）から Markdown レポートを組み立てる
+    
+    保持するのはファイルごとの件数と、レポートに載せる先頭の数件だけ。
+    JSONL に書き出しながら passthrough に通せば、同じ 1 回の走査から両方を作れる。
+    """
+    
+    def __init__(self) -> None:
+        self.summary: Optional[Dict[str, Any]] = None
+        self.file_counts: Dict[str, int] = {}
+        self.suggestions: List[Dict[str, Any]] = []
+        self.suggestion_count = 0
+        self.existing: List[Dict[str, Any]] = []
+        self.existing_count = 0
+        self.skipped: List[Dict[str, Any]] = []
+        self.skipped_count = 0
+        self.missing: Dict[str, List[str]] = {}
+        self.missing_counts: Dict[str, int] = {}
+        self.unused: List[str] = []
+        self.unused_count = 0
+        self.catalog_errors: List[Dict[str, Any]] = []
+    
+    def add(self, record: Dict[str, Any]) -> None:
+        kind = record["type"]
+        if kind == "hardcoded_text":
+            self.file_counts[record["file"]] = self.file_counts.get(record["file"], 0) + 1
+        elif kind == "translation_suggestion":
+            self.suggestion_count += 1
+            if len(self.suggestions) < 30:
+                self.suggestions.append(record)
+            if record.get("existing"):
+                self.existing_count += 1
+                if len(self.existing) < 10:
+                    self.existing.append(record)
+        elif kind == "skipped_file":
+            self.skipped_count += 1
+            if len(self.skipped) < 20:
+                self.skipped.append(record)
+        elif kind == "missing_key":
+            self.missing_counts[record["lang"]] = self.missing_counts.get(record["lang"], 0) + 1
+            keys = self.missing.setdefault(record["lang"], [])
+            if len(keys) < 10:
+                keys.append(record["key"])
+        elif kind == "unused_key":
+            self.unused_count += 1
+            if len(self.unused) < 10:
+                self.unused.append(record["key"])
+        elif kind == "catalog_error":
+            self.catalog_errors.append(record)
+        elif kind == "i18n_summary":
+            self.summary = record
+    
+    def passthrough(self, records: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """records を add しながらそのまま返す（write_jsonl に渡す用）"""
+        for record in records:
+            self.add(record)
+            yield record
+    
+    def _catalog_lines(self) -> List[str]:
+        """翻訳カタログ（キー数・欠落・未使用・既存キーのあるハードコード）のレポート部分"""
+        summary = self.summary or {}
+        languages = ", ".join(f"`{lang}` {count}" for lang, count in (summary.get("catalog_keys") or {}).items())
+        lines = [
+            "### Translation Catalog",
             "",
-            "### Current State:",
-            f"- Found {len(detection_result['hardcoded_texts'])} files with hardcoded Japanese text",
-            f"- Total {sum(len(texts) for texts in detection_result['hardcoded_texts'].values())} hardcoded strings detected",
+            f"**Keys:** {summary.get('catalog_total_keys')} ({languages})",
             "",
-            "### Recommendations:",
-            "- Set up i18n library (next-i18next, react-i18next, etc.)",
-            "- Create `locales/` directory structure:",
-            "  ```",
-            "  locales/",
-            "    ja/",
-            "      common.json",
-            "      errors.json",
-            "    en/",
-            "      common.json",
-            "      errors.json",
-            "  ```",
-            "- Replace hardcoded texts with translation function calls: `t('key')`",
+        ]
+        if self.existing_count:
+            lines.append(f"**Hardcoded strings that already have a key:** {self.existing_count}")
+            for suggestion in self.existing:
+                lines.append(f"- \"{suggestion['japanese']}\" → `t('{suggestion['key']}')` (`{suggestion['file']}` line {suggestion['line']})")
+            lines.append("")
+        for lang, keys in self.missing.items():
+            count = self.missing_counts[lang]
+            lines.append(f"**Missing in `{lang}`:** {count} key(s)")
+            for key in keys:
+                lines.append(f"- `{key}`")
+            if count > 10:
+                lines.append(f"- ... and {count - 10} more")
+            lines.append("")
+        if self.unused_count:
+            lines.append(f"**Unused keys (not referenced from source):** {self.unused_count}")
+            for key in self.unused:
+                lines.append(f"- `{key}`")
+            if self.unused_count > 10:
+                lines.append(f"- ... and {self.unused_count - 10} more")
+            lines.append("")
+        for error in self.catalog_errors:
+            lines.extend([f"⚠️ Could not load `{error['path']}`: {error['error']}", ""])
+        return lines
+    
+    def render(self) -> str:
+        """Markdown レポートを返す（集計レコードを受け取った後に呼ぶ）"""
+        summary = self.summary or {}
+        lines = [
+            "# Internationalization (i18n) Analysis Report",
             "",
-        ])
-    else:
+        ]
+        
+        scope = summary.get("scope") or {"mode": "full"}
+        if scope["mode"] == "diff":
+            lines.extend([
+                f"**Scope:** diff only ({scope['changed_files']} changed files, {scope['changed_lines']} changed lines)",
+                "",
+            ])
+        
         lines.extend([
-            "✅ **Locales directory detected**",
-            "",
-            f"**Location:** `{detection_result['locales_dir']}`",
+            "## Infrastructure Detection",
             "",
         ])
         
-        locale_files = detection_result["locale_files"]
-        if locale_files:
-            lines.append("**Available locales:**")
-            for lang, files in locale_files.items():
-                lines.append(f"- `{lang}`: {len(files)} file(s)")
-                for file in files[:5]:  # 最初の5ファイルのみ表示
-                    lines.append(f"  - `{file}`")
+        if not summary.get("has_locales"):
+            lines.extend([
+                "⚠️ **No locales directory detected**",
+                "",
+                "### Current State:",
+                f"- Found {len(self.file_counts)} files with hardcoded Japanese text",
+                f"- Total {sum(self.file_counts.values())} hardcoded strings detected",
+                "",
+                "### Recommendations:",
+                "- Set up i18n library (next-i18next, react-i18next, etc.)",
+                "- Create `locales/` directory structure:",
+                "  ```",
+                "  locales/",
+                "    ja/",
+                "      common.json",
+                "      errors.json",
+                "    en/",
+                "      common.json",
+                "      errors.json",
+                "  ```",
+                "- Replace hardcoded texts with translation function calls: `t('key')`",
+                "",
+            ])
+        else:
+            lines.extend([
+                "✅ **Locales directory detected**",
+                "",
+                f"**Location:** `{summary['locales_dir']}`",
+                "",
+            ])
+            
+            locale_files = summary.get("locale_files") or {}
+            if locale_files:
+                lines.append("**Available locales:**")
+                for lang, files in locale_files.items():
+                    lines.append(f"- `{lang}`: {len(files)} file(s)")
+                    for file in files[:5]:  # 最初の5ファイルのみ表示
+                        lines.append(f"  - `{file}`")
+                lines.append("")
+            
+            if summary.get("catalog_total_keys") is not None:
+                lines.extend(self._catalog_lines())
+        
+        # キャッシュが効くのは変更の無いクリーンな実行なので、検出 0 件でも出す
+        cache_stats = summary.get("cache_stats")
+        if cache_stats:
+            lines.extend([
+                f"**Scan cache:** {cache_stats['hits']} hits / {cache_stats['misses']} misses, "
+                f"~{cache_stats['saved_seconds']:.2f}s saved",
+                "",
+            ])
+        
+        # ハードコードされたテキストの統計
+        if self.file_counts:
+            lines.extend([
+                "## Hardcoded Japanese Text Analysis",
+                "",
+                f"**Files with hardcoded text:** {len(self.file_counts)}",
+                f"**Total hardcoded strings:** {sum(self.file_counts.values())}",
+            ])
+            lines.extend([
+                "",
+                "### Top 10 Files:",
+                "",
+            ])
+            
+            # ファイルごとの件数でソート
+            sorted_files = sorted(self.file_counts.items(), key=lambda x: x[1], reverse=True)
+            for file_path, count in sorted_files[:10]:
+                lines.append(f"- `{file_path}`: {count} strings")
+            lines.append("")
+        
+        if self.skipped_count:
+            lines.extend([
+                "## Skipped Files",
+                "",
+                f"**{self.skipped_count} file(s) were not scanned:**",
+            ])
+            for skipped in self.skipped:
+                lines.append(f"- `{skipped['path']}`: {skipped['reason']} ({skipped['size']:,} bytes)")
+            if self.skipped_count > 20:
+                lines.append(f"- ... and {self.skipped_count - 20} more")
+            lines.append("")
+        
+        # 翻訳キーの提案
+        suggestions = self.suggestions
+        total = self.suggestion_count
+        if total:
+            lines.extend([
+                "## Translation Key Suggestions",
+                "",
+                f"**Total suggestions:** {total}",
+                "",
+                "### Sample Translations (first 20):",
+                "",
+                "```json",
+                "{",
+            ])
+            
+            for i, suggestion in enumerate(suggestions[:20]):
+                comma = "," if i < min(19, total - 1) else ""
+                lines.append(f'  "{suggestion["key"]}": "{suggestion["japanese"]}"{comma}')
+            
+            lines.extend([
+                "}",
+                "```",
+                "",
+                "### Full Suggestion List:",
+                "",
+            ])
+            
+            for suggestion in suggestions:  # 最初の30件
+                lines.append(f"- **`{suggestion['key']}`**: \"{suggestion['japanese']}\"")
+                lines.append(f"  - File: `{suggestion['file']}` (line {suggestion['line']})")
+            
+            if total > 30:
+                lines.append(f"- ... and {total - 30} more")
+            
             lines.append("")
-    
-    # ハードコードされたテキストの統計
-    hardcoded_texts = detection_result["hardcoded_texts"]
-    if hardcoded_texts:
-        lines.extend([
-            "## Hardcoded Japanese Text Analysis",
-            "",
-            f"**Files with hardcoded text:** {len(hardcoded_texts)}",
-            f"**Total hardcoded strings:** {sum(len(texts) for texts in hardcoded_texts.values())}",
-            "",
-            "### Top 10 Files:",
-            "",
-        ])
         
-        # ファイルごとの件数でソート
-        sorted_files = sorted(hardcoded_texts.items(), key=lambda x: len(x[1]), reverse=True)
-        for file_path, texts in sorted_files[:10]:
-            lines.append(f"- `{file_path}`: {len(texts)} strings")
-        lines.append("")
-    
-    # 翻訳キーの提案
-    suggestions = detection_result["translation_suggestions"]
-    if suggestions:
         lines.extend([
-            "## Translation Key Suggestions",
+            "---",
             "",
-            f"**Total suggestions:** {len(suggestions)}",
+            "## Action Items",
             "",
-            "### Sample Translations (first 20):",
+            "1. **Setup i18n library** if not already configured",
+            "2. **Create translation files** in `locales/<lang>/` directory",
+            "3. **Replace hardcoded strings** with `t('key')` function calls",
+            "4. **Add English translations** for all keys",
+            "5. **Configure language switcher** in the UI",
+            "6. **Test all translations** before deployment",
             "",
-            "```json",
-            "{",
-        ])
-        
-        for i, suggestion in enumerate(suggestions[:20]):
-            comma = "," if i < min(19, len(suggestions) - 1) else ""
-            lines.append(f'  "{suggestion["key"]}": "{suggestion["japanese"]}"{comma}')
-        
-        lines.extend([
-            "}",
+            "### Example Migration:",
+            "",
+            "**Before:**",
+            "```tsx",
+            'alert("氏名を入力してください")',
             "```",
             "",
-            "### Full Suggestion List:",
+            "**After:**",
+            "```tsx",
+            'import { useTranslation } from "next-i18next"',
             "",
+            "const { t } = useTranslation()",
+            'alert(t("errors.nameRequired"))',
+            "```",
         ])
         
-        for suggestion in suggestions[:30]:  # 最初の30件
-            lines.append(f"- **`{suggestion['key']}`**: \"{suggestion['japanese']}\"")
-            lines.append(f"  - File: `{suggestion['file']}` (line {suggestion['line']})")
-        
-        if len(suggestions) > 30:
-            lines.append(f"- ... and {len(suggestions) - 30} more")
-        
-        lines.append("")
-    
-    lines.extend([
-        "---",
-        "",
-        "## Action Items",
-        "",
-        "1. **Setup i18n library** if not already configured",
-        "2. **Create translation files** in `locales/<lang>/` directory",
-        "3. **Replace hardcoded strings** with `t('key')` function calls",
-        "4. **Add English translations** for all keys",
-        "5. **Configure language switcher** in the UI",
-        "6. **Test all translations** before deployment",
-        "",
-        "### Example Migration:",
-        "",
-        "**Before:**",
-        "```tsx",
-        'alert("氏名を入力してください")',
-        "```",
-        "",
-        "**After:**",
-        "```tsx",
-        'import { useTranslation } from "next-i18next"',
-        "",
-        "const { t } = useTranslation()",
-        'alert(t("errors.nameRequired"))',
-        "```",
-    ])
-    
-    return "\n".join(lines)
+        return "\n".join(lines)
+
+
+def generate_i18n_analysis_report(detection_result: Dict[str, Any]) -> str:
+    """
+    検出結果から Markdown レポートを生成（iter_i18n_records のレコードを I18nReportBuilder に通す）
+    """
+    builder = I18nReportBuilder()
+    for record in iter_i18n_records(detection_result):
+        builder.add(record)
+    return builder.render()
 
 
 # Optional import fix
@@ -0,0 +1,424 @@
+# -*- coding: utf-8 -*-
+"""
+インデックス被覆の解析ユーティリティ
+- lib/ と app/api の Supabase クエリチェーン（.from("t").eq(...).order(...)）から
+  テーブルごとの等値条件 / 範囲条件 / 並び替えカラムを抽出
+- `let query = ...` に後から足される条件（if 内の query = query.gte(...) など）も追跡し、条件付きとして区別
+- マイグレーション再生結果のインデックス（PK / UNIQUE 制約の暗黙インデックスを含む）と突き合わせ、
+  左端一致の規則で「被覆済み / 一部のみ / 未被覆」を判定
+- 不足している複合インデックス（等値 → 並び替え → 範囲の順）と、重複・前方一致で冗長なインデックスを報告
+"""
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .fs_walk import walk_files
+from .source_reader import SourcePolicy, read_source_text
+from .ts_lexer import find_closing, mask_source
+
+# クエリを探すディレクトリ（サーバ側で Supabase を呼ぶ場所）
+QUERY_ROOTS = (Path("lib"), Path("app") / "api")
+QUERY_SUFFIXES = (".ts", ".tsx")
+
+# PostgREST のフィルタメソッドの分類
+_EQ_METHODS = frozenset({"eq", "in", "is"})
+_RANGE_METHODS = frozenset({"gt", "gte", "lt", "lte"})
+_OPERATIONS = frozenset({"select", "insert", "update", "upsert", "delete"})
+# .filter(col, op, value) の op
+_FILTER_OPS = {"eq": "eq", "in": "eq", "is": "eq", "gt": "range", "gte": "range", "lt": "range", "lte": "range"}
+
+_FROM_CALL = re.compile(r"\.\s*from\s*\(")
+_TABLE_ARG = re.compile(r"\s*(['\"`])([\w.]+)\1\s*\)")
+_METHOD_CALL = re.compile(r"\.\s*([A-Za-z_$][\w$]*)\s*\(")
+_ASSIGNED_VAR = re.compile(r"\b(?:let|var|const)\s+([A-Za-z_$][\w$]*)\s*(?::[^=]*)?=[^=]")
+_STRING_ARG = re.compile(r"\s*(['\"`])([\w.]+)\1")
+_MATCH_KEYS = re.compile(r"([A-Za-z_$][\w$]*|'[^']*'|\"[^\"]*\")\s*:")
+_ASCENDING_FALSE = re.compile(r"\bascending\s*:\s*false\b")
+
+
+# ---------------------------------------------------------------------------
+# クエリチェーンの抽出
+# ---------------------------------------------------------------------------
+
+def _chain_calls(masked: str, start: int) -> Tuple[List[Tuple[str, int, int]], int]:
+    """
+    start 位置から続くメソッドチェーン .a(...).b(...) を読む
+
+    Returns:
+        ([(メソッド名, 引数開始, 引数終了), ...], チェーン終端の位置)
+    """
+    calls: List[Tuple[str, int, int]] = []
+    pos = start
+    while True:
+        m = _METHOD_CALL.match(masked, pos)
+        if not m:
+            # `x!` や改行を挟んで続くチェーンも許す
+            probe = pos
+            while probe < len(masked) and masked[probe] in " \t\r\n!":
+                probe += 1
+            if probe != pos and _METHOD_CALL.match(masked, probe):
+                pos = probe
+                continue
+            return calls, pos
+        close = find_closing(masked, m.end() - 1)
+        calls.append((m.group(1), m.end(), close))
+        pos = close + 1
+
+
+def _brace_depths(masked: str) -> List[int]:
+    """各位置の { } の入れ子の深さ（条件付きの判定とスコープの終端検出に使う）"""
+    depths = [0] * (len(masked) + 1)
+    depth = 0
+    for i, c in enumerate(masked):
+        if c == "{":
+            depth += 1
+        elif c == "}":
+            depth -= 1
+        depths[i + 1] = depth
+    return depths
+
+
+def _first_string_arg(text: str) -> Optional[str]:
+    m = _STRING_ARG.match(text)
+    return m.group(2) if m else None
+
+
+def _apply_call(query: Dict[str, Any], name: str, args: str, conditional: bool) -> None:
+    bucket = query["optional_filters"] if conditional else query["filters"]
+    if name in _OPERATIONS:
+        if query["operation"] in (None, "select"):
+            query["operation"] = name
+        return
+    if name == "order":
+        column = _first_string_arg(args)
+        if column:
+            bucket["order"].append({"column": column, "ascending": not _ASCENDING_FALSE.search(args)})
+        return
+    if name == "match":
+        for key in _MATCH_KEYS.findall(args):
+            bucket["eq"].append(key.strip("'\""))
+        return
+    if name == "filter":
+        column = _first_string_arg(args)
+        op_match = _STRING_ARG.match(args[args.find(",") + 1:]) if column and "," in args else None
+        kind = _FILTER_OPS.get(op_match.group(2)) if op_match else None
+        if kind:
+            bucket[kind].append(column)
+        return
+    kind = "eq" if name in _EQ_METHODS else "range" if name in _RANGE_METHODS else None
+    if kind:
+        column = _first_string_arg(args)
+        if column:
+            bucket[kind].append(column)
+
+
+def _empty_filters() -> Dict[str, List[Any]]:
+    return {"eq": [], "range": [], "order": []}
+
+
+def extract_queries(text: str, file: str = "") -> List[Dict[str, Any]]:
+    """
+    TypeScript ソースから Supabase クエリチェーンを抽出
+
+    Returns:
+        [{
+            "table": str, "file": str, "line": int, "operation": "select" | "update" | ...,
+            "filters": {"eq": [col, ...], "range": [col, ...], "order": [{"column", "ascending"}, ...]},
+            "optional_filters": {...},   # if 内などで条件付きで足されるもの
+        }, ...]
+
+    カラム名が文字列リテラルでない呼び出し（動的な列指定）は無視する。
+    """
+    masked = mask_source(text)
+    depths = _brace_depths(masked)
+    # マスク後は文字列の中身が消えるため、テーブル名は元のテキストから読む
+    froms = []
+    for m in _FROM_CALL.finditer(masked):
+        table_match = _TABLE_ARG.match(text, m.end())
+        if table_match:
+            froms.append((m, table_match))
+    queries: List[Dict[str, Any]] = []
+    for n, (m, table_match) in enumerate(froms):
+        query: Dict[str, Any] = {
+            "table": table_match.group(2).split(".")[-1],
+            "file": file,
+            "line": text.count("\n", 0, m.start()) + 1,
+            "operation": None,
+            "filters": _empty_filters(),
+            "optional_filters": _empty_filters(),
+        }
+        calls, chain_end = _chain_calls(masked, table_match.end())
+        for name, a, b in calls:
+            _apply_call(query, name, text[a:b], conditional=False)
+
+        # `let query = supabase.from(...)` なら、同じブロック内で query に足される条件も追う
+        stmt_start = max(masked.rfind(c, 0, m.start()) for c in ";{}")
+        var = _ASSIGNED_VAR.search(masked, stmt_start + 1, m.start())
+        if var:
+            base_depth = depths[m.start()]
+            limit = froms[n + 1][0].start() if n + 1 < len(froms) else len(masked)
+            usage = re.compile(rf"(?<![\w$.]){re.escape(var.group(1))}\s*(?=[.!])")
+            pos = chain_end
+            while True:
+                u = usage.search(masked, pos, limit)
+                if not u:
+                    break
+                if any(d < base_depth for d in depths[pos:u.start() + 1]):
+                    # 宣言したブロックを抜けた（同名の別変数）
+                    break
+                more, end = _chain_calls(masked, u.end())
+                conditional = depths[u.start()] > base_depth
+                for name, a, b in more:
+                    _apply_call(query, name, text[a:b], conditional=conditional)
+                pos = max(end, u.end())
+
+        query["operation"] = query["operation"] or "select"
+        queries.append(query)
+    return queries
+
+
+def find_query_patterns(
+    roots: Iterable[Path] = QUERY_ROOTS,
+    policy: Optional[SourcePolicy] = None,
+) -> List[Dict[str, Any]]:
+    """QUERY_ROOTS 配下の .ts/.tsx からクエリを集める（上限超えのファイルは policy に記録して読まない）"""
+    queries: List[Dict[str, Any]] = []
+    for root in roots:
+        if not root.is_dir():
+            continue
+        for path in walk_files(root, suffixes=QUERY_SUFFIXES):
+            if policy is not None and not policy.admit(path):
+                continue
+            text = read_source_text(path)
+            if ".from(" not in text.replace(" ", ""):
+                continue
+            queries.extend(extract_queries(text, path.as_posix()))
+    return queries
+
+
+# ---------------------------------------------------------------------------
+# インデックスとの突き合わせ
+# ---------------------------------------------------------------------------
+
+def table_access_paths(schema: Dict[str, Any], table: str) -> List[Dict[str, Any]]:
+    """
+    テーブルで使える B-tree インデックスの一覧（PK / UNIQUE 制約の暗黙インデックスを含む）
+
+    部分インデックス（WHERE 付き）と btree 以外（GIN など）は左端一致の判定に使えないため除く。
+    """
+    info = schema["tables"].get(table)
+    paths: List[Dict[str, Any]] = []
+    if info is None:
+        return paths
+    if info["primary_key"]:
+        paths.append({"name": f"{table}_pkey", "columns": list(info["primary_key"]), "kind": "primary_key", "unique": True})
+    for constraint in info["unique"]:
+        paths.append({"name": constraint["name"], "columns": list(constraint["columns"]), "kind": "unique", "unique": True})
+    for index in schema["indexes"].values():
+        if index["table"] != table or index["where"] or (index["method"] or "btree").lower() != "btree":
+            continue
+        paths.append({"name": index["name"], "columns": list(index["columns"]), "kind": "index", "unique": index["unique"]})
+    return paths
+
+
+def _dedupe(columns: Iterable[str]) -> List[str]:
+    seen: List[str] = []
+    for c in columns:
+        if c not in seen:
+            seen.append(c)
+    return seen
+
+
+def _variants(query: Dict[str, Any]) -> List[Tuple[str, List[str], List[str], List[str]]]:
+    """判定対象の条件の組: 常に付く条件だけ / 条件付きのものも全部付けた場合"""
+    base, optional = query["filters"], query["optional_filters"]
+    variants = []
+    for label, parts in (("base", (base,)), ("with_optional", (base, optional))):
+        eq = _dedupe(c for p in parts for c in p["eq"])
+        rng = [c for c in _dedupe(c for p in parts for c in p["range"]) if c not in eq]
+        order = [c for c in _dedupe(o["column"] for p in parts for o in p["order"]) if c not in eq]
+        if eq or rng or order:
+            variants.append((label, eq, rng, order))
+        if not any(optional.values()):
+            break
+    return variants
+
+
+def _score(columns: Sequence[str], eq: List[str], rng: List[str], order: List[str]) -> Tuple[int, bool, bool, int]:
+    """
+    (左端から連続して使える等値カラム数, 並び替えを満たすか, 範囲条件に使えるか,
+     並び替えカラムのうち先頭から一致する数)
+    """
+    prefix = 0
+    while prefix < len(columns) and columns[prefix] in eq:
+        prefix += 1
+    rest = list(columns[prefix:])
+    order_lead = 0
+    while order_lead < min(len(rest), len(order)) and rest[order_lead] == order[order_lead]:
+        order_lead += 1
+    order_ok = bool(order) and order_lead == len(order)
+    range_ok = bool(rng) and bool(rest) and rest[0] in rng
+    return prefix, order_ok, range_ok, order_lead
+
+
+def recommend_columns(eq: List[str], rng: List[str], order: List[str], leading: Sequence[str] = ()) -> List[str]:
+    """
+    等値 → 並び替え → 範囲（ESR）の順の複合インデックス
+
+    leading: 既存インデックスで使える等値カラムの並び。先頭に置くと既存インデックスを拡張する形の提案になる
+    """
+    columns = list(leading) + [c for c in eq if c not in leading] + list(order)
+    if rng and rng[0] not in columns:
+        columns.append(rng[0])
+    return columns
+
+
+def evaluate_query(schema: Dict[str, Any], query: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    1 クエリの各条件パターンについて、最も効くインデックスと判定を返す
+
+    status:
+        covered  等値カラムが全て左端に並び、並び替えか範囲条件も索引で処理できる
+        partial  一部のカラムにしか効かない（残りは行ごとのフィルタ / ソート）
+        missing  使えるインデックスが無い（シーケンシャルスキャン）
+        unknown_table  マイグレーションで作られていないテーブル
+    """
+    info = schema["tables"].get(query["table"])
+    results = []
+    for label, eq, rng, order in _variants(query):
+        result: Dict[str, Any] = {
+            "variant": label, "eq": eq, "range": rng, "order": order,
+            "index": None, "status": "unknown_table", "recommended": None, "unknown_columns": [],
+        }
+        results.append(result)
+        if info is None or not info["declared"]:
+            continue
+        result["unknown_columns"] = [c for c in _dedupe(eq + rng + order) if c not in info["columns"]]
+
+        paths = table_access_paths(schema, query["table"])
+        # 一意キーの全カラムが等値条件にあれば高々 1 行なので、残りの条件は問題にならない
+        unique_hit = next((p for p in paths if p["unique"] and set(p["columns"]) <= set(eq)), None)
+        if unique_hit:
+            result["status"], result["index"] = "covered", unique_hit["name"]
+            continue
+
+        best: Optional[Dict[str, Any]] = None
+        best_score = (0, False, False, 0)
+        best_key: Tuple[Any, ...] = ()
+        for path in paths:
+            score = _score(path["columns"], eq, rng, order)
+            prefix, order_ok, range_ok, order_lead = score
+            # 等値カラム数 → 並び替え/範囲の可否 → 並び替えの一致数 → 短いインデックス の順で優先
+            key = (prefix, order_ok or range_ok, order_ok, order_lead, -len(path["columns"]))
+            if best is None or key > best_key:
+                best, best_score, best_key = path, score, key
+        prefix, order_ok, range_ok, _ = best_score
+        usable = prefix > 0 or order_ok or range_ok
+        complete = prefix == len(eq) and (not (rng or order) or order_ok or range_ok)
+        if usable and complete:
+            result["status"] = "covered"
+        else:
+            result["status"] = "partial" if usable else "missing"
+            leading = best["columns"][:prefix] if best else []
+            result["recommended"] = recommend_columns(eq, rng, order, leading)
+        result["index"] = best["name"] if usable and best else None
+    return results
+
+
+def find_redundant_indexes(schema: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    他のインデックス（または PK / UNIQUE 制約）と同じカラム列、またはその左端部分でしかない非 UNIQUE インデックス
+
+    Returns:
+        [{"table", "index", "columns", "covered_by", "reason": "duplicate" | "prefix"}, ...]
+    """
+    redundant = []
+    for table in schema["tables"]:
+        paths = table_access_paths(schema, table)
+        for path in paths:
+            if path["kind"] != "index" or path["unique"]:
+                continue
+            for other in paths:
+                if other is path or len(other["columns"]) < len(path["columns"]):
+                    continue
+                if other["columns"][:len(path["columns"])] != path["columns"]:
+                    continue
+                duplicate = len(other["columns"]) == len(path["columns"])
+                # 完全な重複同士は片方（後に作られた方）だけを冗長とする
+                if duplicate and other["kind"] == "index" and not other["unique"] and paths.index(other) > paths.index(path):
+                    continue
+                redundant.append({
+                    "table": table,
+                    "index": path["name"],
+                    "columns": path["columns"],
+                    "covered_by": other["name"],
+                    "reason": "duplicate" if duplicate else "prefix",
+                })
+                break
+    return redundant
+
+
+def analyze_index_coverage(schema: Dict[str, Any], queries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    クエリパターンとマイグレーションのインデックスを突き合わせる
+
+    Returns:
+        {
+            "queries": [{"table", "file", "line", "operation", "filters", "optional_filters",
+                         "coverage": [evaluate_query の結果, ...]}, ...],
+            "missing": [{"table", "columns", "evidence": ["file:line", ...], "replaces": [index, ...],
+                         "statement": str}, ...],
+            "redundant": find_redundant_indexes の結果,
+            "unknown_tables": [str, ...],
+        }
+    """
+    analyzed = []
+    wanted: Dict[Tuple[str, Tuple[str, ...]], List[str]] = {}
+    unknown_tables: List[str] = []
+    for query in queries:
+        coverage = evaluate_query(schema, query)
+        if not coverage:
+            continue
+        analyzed.append({**query, "coverage": coverage})
+        for result in coverage:
+            if result["status"] == "unknown_table" and query["table"] not in unknown_tables:
+                unknown_tables.append(query["table"])
+            # 条件付きの絞り込みは呼び出しごとに組み合わせが変わるため、
+            # 使えるインデックスが全く無い場合だけ提案の根拠にする
+            if result["recommended"] and (result["variant"] == "base" or result["status"] == "missing"):
+                evidence = wanted.setdefault((query["table"], tuple(result["recommended"])), [])
+                location = f"{query['file']}:{query['line']}"
+                if location not in evidence:
+                    evidence.append(location)
+
+    # 別の提案の左端部分でしかない提案は、長い方にまとめる
+    missing = []
+    for (table, columns), evidence in wanted.items():
+        longer = [
+            other for (t, other) in wanted
+            if t == table and len(other) > len(columns) and other[:len(columns)] == columns
+        ]
+        if longer:
+            target = wanted[(table, max(longer, key=len))]
+            target.extend(e for e in evidence if e not in target)
+            continue
+        missing.append({"table": table, "columns": list(columns), "evidence": evidence})
+    for item in missing:
+        # 提案の左端部分と同じカラム列の既存インデックスは、提案で置き換えられる
+        item["replaces"] = [
+            p["name"] for p in table_access_paths(schema, item["table"])
+            if p["kind"] == "index" and not p["unique"] and item["columns"][:len(p["columns"])] == p["columns"]
+        ]
+        item["statement"] = (
+            f"CREATE INDEX IF NOT EXISTS idx_{item['table']}_{'_'.join(item['columns'])} "
+            f"ON public.{item['table']} ({', '.join(item['columns'])});"
+        )
+
+    return {
+        "queries": analyzed,
+        "missing": missing,
+        "redundant": find_redundant_indexes(schema),
+        "unknown_tables": sorted(unknown_tables),
+    }
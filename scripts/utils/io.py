@@ -2,13 +2,15 @@
 """
 入出力ユーティリティ
 - ディレクトリ作成、テキスト保存、glob 取得、レポート出力先生成
+- JSON Lines のストリーム書き出し
 """
 from __future__ import annotations
 
 import glob
+import json
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import Any, Dict, Iterable, List, Tuple, Optional
 
 
 def ensure_dir(p: Path) -> None:
@@ -20,6 +22,23 @@ def write_text(p: Path, content: str) -> None:
     p.write_text(content, encoding="utf-8")
 
 
+def write_jsonl(p: Path, records: Iterable[Dict[str, Any]]) -> int:
+    """
+    レコードを 1 行 1 JSON で書き出す（全体を文字列に組み立てず、生成された順に書く）
+    
+    Returns:
+        書き出したレコード数
+    """
+    ensure_dir(p.parent)
+    count = 0
+    with p.open("w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write("\n")
+            count += 1
+    return count
+
+
 def read_files_by_glob(pattern: str, limit: int = 50) -> List[Tuple[str, str]]:
     matches: List[Tuple[str, str]] = []
     for fp in glob.glob(pattern, recursive=True)[:limit]:
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+LLM 出力（ストリーミング途中を含む）から JSON オブジェクトを逐次取り出すスキャナ
+- 受け取った断片だけを 1 回走査する（全文に正規表現をかけ直さない）
+- 最上位の {...} が閉じた時点でその dict を返す（前後の説明文や ```json フェンスは無視）
+- 最上位オブジェクト直下の配列要素（"findings": [{...}, ...] など）も閉じた順にコールバックで渡す
+- 閉じたが JSON として読めない候補は捨てて、その次の { から探し直す
+
+使い方:
+    scanner = JsonStreamScanner(on_item=lambda key, item: print(key, item))
+    for delta in stream:
+        obj = scanner.feed(delta)
+        if obj is not None:
+            break
+"""
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+# 文字列の外で意味を持つ文字と、文字列の中で意味を持つ文字（" と \）
+_SPECIAL = re.compile(r'[{}\[\]":\\]')
+
+
+class JsonStreamScanner:
+    def __init__(self, on_item: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> None:
+        self.on_item = on_item
+        self.text = ""
+        self.result: Optional[Dict[str, Any]] = None
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape_at = -1
+        self._object_start = -1
+        self._string_start = -1
+        self._last_string = ""
+        self._key = ""
+        self._array_key = ""
+        self._item_start = -1
+
+    @property
+    def done(self) -> bool:
+        return self.result is not None
+
+    def _reset(self) -> None:
+        self._stack = []
+        self._in_string = False
+        self._object_start = self._item_start = -1
+        self._key = self._array_key = self._last_string = ""
+
+    def feed(self, chunk: str) -> Optional[Dict[str, Any]]:
+        """断片を追加して走査する。最上位オブジェクトが完成したらその dict を返す（以後は同じ値を返す）"""
+        if self.result is not None:
+            return self.result
+        offset = len(self.text)
+        self.text += chunk
+        for m in _SPECIAL.finditer(chunk):
+            pos = offset + m.start()
+            if pos == self._escape_at:
+                continue
+            self._step(m.group(), pos)
+            if self.result is not None:
+                break
+        return self.result
+
+    def _step(self, ch: str, pos: int) -> None:
+        stack = self._stack
+        if not stack:
+            # 最上位の外側（説明文など）では { だけを見る
+            if ch == "{":
+                stack.append("{")
+                self._object_start = pos
+            return
+        if self._in_string:
+            if ch == "\\":
+                self._escape_at = pos + 1
+            elif ch == '"':
+                self._in_string = False
+                if len(stack) == 1:
+                    self._last_string = self.text[self._string_start + 1:pos]
+            return
+        if ch == '"':
+            self._in_string = True
+            self._string_start = pos
+        elif ch == ":":
+            if len(stack) == 1:
+                self._key = self._last_string
+        elif ch in "{[":
+            if ch == "[" and len(stack) == 1:
+                self._array_key = self._key
+            if ch == "{" and stack == ["{", "["]:
+                self._item_start = pos
+            stack.append(ch)
+        elif ch in "}]":
+            stack.pop()
+            if ch == "}" and stack == ["{", "["] and self._item_start >= 0:
+                self._emit_item(self.text[self._item_start:pos + 1])
+                self._item_start = -1
+            if not stack:
+                self._close(pos)
+
+    def _emit_item(self, raw: str) -> None:
+        if self.on_item is None:
+            return
+        try:
+            item = json.loads(raw)
+        except ValueError:
+            return
+        if isinstance(item, dict):
+            self.on_item(self._array_key, item)
+
+    def _close(self, pos: int) -> None:
+        try:
+            value = json.loads(self.text[self._object_start:pos + 1])
+        except ValueError:
+            value = None
+        if isinstance(value, dict):
+            self.result = value
+        else:
+            self._reset()
+
+
+def extract_json(text: str) -> Dict[str, Any]:
+    """テキスト中の最初に完成している JSON オブジェクト（無ければ空 dict）"""
+    if not text:
+        return {}
+    return JsonStreamScanner().feed(text) or {}
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+LLM 応答の永続キャッシュ（内容アドレス）
+- キーは (model, temperature, seed, system プロンプト, user プロンプトのダイジェスト, その他の生成オプション) の SHA-256
+- 件数上限つきの LRU（最後に使った順）で追い出し、TTL を過ぎたエントリは読まない
+- 同じコミットでの ai-review 再実行や CI の再試行で、同じ呼び出しに再び課金しない
+- LLMClient.chat から使うので、oai_chat / call_openai / llm_call のどれから呼んでも共有される
+
+環境変数:
+    LLM_CACHE=0                 無効化
+    LLM_CACHE_PATH              既定は .cache/agents/llm-responses.json
+    LLM_CACHE_TTL               秒（既定 7 日、0 以下で無期限）
+    LLM_CACHE_MAX_ENTRIES       既定 500
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .scan_cache import DEFAULT_CACHE_DIR, CacheStats
+
+LLM_CACHE_VERSION = 1
+LLM_CACHE_PATH = DEFAULT_CACHE_DIR / "llm-responses.json"
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 500
+
+
+@dataclass
+class ResponseCacheStats(CacheStats):
+    # TTL 切れで捨てたエントリ数 / 件数上限で追い出したエントリ数
+    expired: int = 0
+    evicted: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {**super().as_dict(), "expired": self.expired, "evicted": self.evicted}
+
+
+def response_key(payload: Dict[str, Any]) -> str:
+    """
+    Chat Completions のリクエストからキャッシュキーを作る
+
+    system / user 以外のメッセージ（assistant の履歴など）もそのまま含める。
+    user プロンプトは長いのでダイジェストにしてから全体をハッシュする。
+    """
+    messages = []
+    for m in payload.get("messages") or []:
+        content = str(m.get("content", ""))
+        if m.get("role") == "user":
+            content = "sha256:" + hashlib.sha256(content.encode("utf-8")).hexdigest()
+        messages.append([m.get("role"), content])
+    material = {k: v for k, v in payload.items() if k not in ("messages", "stream")}
+    material["messages"] = messages
+    blob = json.dumps(material, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    使い方:
+        cache = ResponseCache.load(LLM_CACHE_PATH)
+        text = cache.get(key)
+        if text is None:
+            text = call_llm()
+            cache.put(key, text, elapsed)
+        cache.save()
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        ttl: float = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        entries: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        # 最後に使ったものほど末尾
+        self.entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict(
+            sorted((entries or {}).items(), key=lambda kv: kv[1].get("used", 0))
+        )
+        self.stats = ResponseCacheStats()
+        self._lock = threading.Lock()
+        self._dirty = False
+
+    @classmethod
+    def load(cls, path: Path = LLM_CACHE_PATH, **kwargs: Any) -> "ResponseCache":
+        """キャッシュを読み込む。壊れている/version 不一致なら空で開始"""
+        entries: Dict[str, Dict[str, Any]] = {}
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            if isinstance(data, dict) and data.get("version") == LLM_CACHE_VERSION:
+                entries = data.get("entries") or {}
+        except (OSError, ValueError):
+            pass
+        return cls(path, entries=entries, **kwargs)
+
+    @classmethod
+    def from_env(cls) -> Optional["ResponseCache"]:
+        """環境変数から設定して読み込む（LLM_CACHE=0 なら None）"""
+        if (os.getenv("LLM_CACHE") or "1").strip().lower() in ("0", "false", "no", "off"):
+            return None
+
+        def number(name: str, default: float) -> float:
+            try:
+                return float((os.getenv(name) or "").strip() or default)
+            except ValueError:
+                return default
+
+        path = Path(os.getenv("LLM_CACHE_PATH") or LLM_CACHE_PATH)
+        return cls.load(
+            path,
+            ttl=number("LLM_CACHE_TTL", DEFAULT_TTL_SECONDS),
+            max_entries=int(number("LLM_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+        )
+
+    def _expired(self, entry: Dict[str, Any], now: float) -> bool:
+        return self.ttl > 0 and now - float(entry.get("created", 0)) > self.ttl
+
+    def get(self, key: str) -> Optional[str]:
+        """有効なエントリがあれば応答本文を返し、なければ None（統計も更新）"""
+        now = time.time()
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and self._expired(entry, now):
+                del self.entries[key]
+                self.stats.expired += 1
+                self._dirty = True
+                entry = None
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            entry["used"] = now
+            self.entries.move_to_end(key)
+            self.stats.hits += 1
+            self.stats.saved_seconds += float(entry.get("elapsed", 0.0))
+            self._dirty = True
+            return entry["value"]
+
+    def put(self, key: str, value: str, elapsed: float = 0.0, model: str = "") -> None:
+        now = time.time()
+        with self._lock:
+            self.entries[key] = {"created": now, "used": now, "elapsed": elapsed, "model": model, "value": value}
+            self.entries.move_to_end(key)
+            self.stats.spent_seconds += elapsed
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.stats.evicted += 1
+            self._dirty = True
+
+    def save(self) -> None:
+        """変更があれば TTL 切れを落として一時ファイル経由でアトミックに書き出す"""
+        with self._lock:
+            if not self._dirty:
+                return
+            now = time.time()
+            entries = {k: v for k, v in self.entries.items() if not self._expired(v, now)}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            tmp.write_text(
+                json.dumps({"version": LLM_CACHE_VERSION, "entries": entries}, ensure_ascii=False),
+                encoding="utf-8",
+            )
+            os.replace(tmp, self.path)
+            self._dirty = False
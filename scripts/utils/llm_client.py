@@ -0,0 +1,531 @@
+# -*- coding: utf-8 -*-
+"""
+レビュー / エージェント用の共有 LLM クライアント（OpenAI 互換 Chat Completions）
+- プロセスで 1 つの非同期クライアントを使い回し、keep-alive の接続プールで接続確立を 1 回にまとめる
+- 同時リクエスト数はセマフォで上限を設ける（LLM_MAX_CONCURRENCY）
+- httpx があれば httpx.AsyncClient、無ければ http.client の keep-alive 接続プールで同じことをする
+- 同期コードからはバックグラウンドのイベントループに投げて使う（chat_sync / gather_sync）
+- stream_chat で Server-Sent Events のストリーミング応答を差分ごとに受け取れる
+- cache（llm_cache.ResponseCache）を渡すと同じリクエストの応答を再利用する（共有クライアントは既定で有効）
+- rate_limits（rate_limit.RateLimiterRegistry）を渡すと送信前にモデルごとの requests/min・tokens/min で待つ
+  （共有クライアントは .ai/agents_config.yaml の rate_limits を使う）。429 の再試行は Retry-After を下限にジッタ付きで待つ
+
+使い方:
+    client = get_shared_client()
+    text = client.chat_sync([{"role": "user", "content": "..."}], model="gpt-4o-mini")
+    texts = client.gather_sync([client.chat(messages_a), client.chat(messages_b)])
+"""
+from __future__ import annotations
+
+import asyncio
+import atexit
+import contextlib
+import http.client
+import json
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+try:
+    import httpx  # type: ignore
+except ImportError:  # pragma: no cover - 環境依存
+    httpx = None
+
+from .config import load_agents_config
+from .llm_cache import ResponseCache, response_key
+from .rate_limit import RateLimiterRegistry, backoff_delay
+from .token_budget import count_tokens
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+DEFAULT_MODEL = "gpt-4o-mini"
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_TIMEOUT = 60.0
+# 5xx / 429 / 接続エラー時の再試行回数（初回を除く）
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF_CAP = 30.0
+# max_tokens 指定が無いときに tokens/min の見積もりへ足す応答トークン数
+DEFAULT_COMPLETION_ESTIMATE = 1024
+AGENTS_CONFIG_PATH = Path(".ai/agents_config.yaml")
+
+
+def _env_number(name: str, default: float) -> float:
+    raw = (os.getenv(name) or "").strip()
+    try:
+        return float(raw) if raw else default
+    except ValueError:
+        return default
+
+
+class LLMError(Exception):
+    """LLM API の呼び出し失敗（status は HTTP ステータス、接続エラーなどは None）"""
+
+    def __init__(self, message: str, status: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class RateLimitError(LLMError):
+    """HTTP 429（retry_after は Retry-After ヘッダの秒数）"""
+
+
+def _retry_after(headers: Any) -> Optional[float]:
+    """retry-after-ms（OpenAI）か Retry-After（秒）の待ち秒数"""
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(name)
+        try:
+            if value:
+                return max(0.0, float(value) * scale)
+        except ValueError:
+            continue
+    return None
+
+
+def _error_for(status: int, body: bytes, headers: Any) -> LLMError:
+    message = f"HTTP {status}: {body[:300].decode('utf-8', 'replace')}"
+    cls = RateLimitError if status == 429 else LLMError
+    return cls(message, status=status, retry_after=_retry_after(headers))
+
+
+# ---------------------------------------------------------------------------
+# トランスポート（POST して (status, headers, body) を返す）
+# ---------------------------------------------------------------------------
+
+class _HttpxTransport:
+    def __init__(self, base_url: str, headers: Dict[str, str], pool_size: int, timeout: float) -> None:
+        self._client = httpx.AsyncClient(
+            base_url=base_url.rstrip("/") + "/",
+            headers=headers,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+
+    async def post(self, path: str, payload: bytes) -> Tuple[int, Dict[str, str], bytes]:
+        try:
+            resp = await self._client.post(path.lstrip("/"), content=payload)
+        except httpx.HTTPError as e:
+            raise LLMError(f"{type(e).__name__}: {e}") from e
+        return resp.status_code, dict(resp.headers), resp.content
+
+    async def stream_lines(self, path: str, payload: bytes) -> AsyncIterator[str]:
+        try:
+            async with self._client.stream("POST", path.lstrip("/"), content=payload) as resp:
+                if resp.status_code >= 400:
+                    raise _error_for(resp.status_code, await resp.aread(), resp.headers)
+                async for line in resp.aiter_lines():
+                    yield line
+        except httpx.HTTPError as e:
+            raise LLMError(f"{type(e).__name__}: {e}") from e
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+class _StdlibTransport:
+    """
+    http.client の接続を keep-alive のまま使い回すプール（httpx が無い環境向け）
+
+    ブロッキング I/O はスレッドに逃がし、イベントループは止めない。
+    """
+
+    def __init__(self, base_url: str, headers: Dict[str, str], pool_size: int, timeout: float) -> None:
+        parts = urlsplit(base_url)
+        self._https = parts.scheme == "https"
+        self._host = parts.hostname or "localhost"
+        self._port = parts.port
+        self._prefix = parts.path.rstrip("/")
+        self._headers = dict(headers)
+        self._timeout = timeout
+        self._idle: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue(maxsize=pool_size)
+
+    def _connect(self) -> http.client.HTTPConnection:
+        cls = http.client.HTTPSConnection if self._https else http.client.HTTPConnection
+        return cls(self._host, self._port, timeout=self._timeout)
+
+    def _open(self, path: str, payload: bytes) -> Tuple[http.client.HTTPConnection, http.client.HTTPResponse]:
+        try:
+            conn = self._idle.get_nowait()
+            reused = True
+        except queue.Empty:
+            conn, reused = self._connect(), False
+        url = f"{self._prefix}/{path.lstrip('/')}"
+        headers = {**self._headers, "Content-Length": str(len(payload))}
+        try:
+            try:
+                conn.request("POST", url, body=payload, headers=headers)
+                return conn, conn.getresponse()
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                if not reused:
+                    raise
+                # サーバ側で閉じられていた keep-alive 接続は 1 度だけ張り直す
+                conn.close()
+                conn = self._connect()
+                conn.request("POST", url, body=payload, headers=headers)
+                return conn, conn.getresponse()
+        except (OSError, http.client.HTTPException) as e:
+            conn.close()
+            raise LLMError(f"{type(e).__name__}: {e}") from e
+
+    def _release(self, conn: http.client.HTTPConnection, resp: http.client.HTTPResponse) -> None:
+        """読み切った応答の接続をプールに戻す（戻せなければ閉じる）"""
+        if resp.will_close or not resp.isclosed():
+            conn.close()
+            return
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def _post_blocking(self, path: str, payload: bytes) -> Tuple[int, Dict[str, str], bytes]:
+        conn, resp = self._open(path, payload)
+        try:
+            body = resp.read()
+        except (OSError, http.client.HTTPException) as e:
+            conn.close()
+            raise LLMError(f"{type(e).__name__}: {e}") from e
+        self._release(conn, resp)
+        return resp.status, {k.lower(): v for k, v in resp.getheaders()}, body
+
+    async def post(self, path: str, payload: bytes) -> Tuple[int, Dict[str, str], bytes]:
+        return await asyncio.get_running_loop().run_in_executor(None, self._post_blocking, path, payload)
+
+    async def stream_lines(self, path: str, payload: bytes) -> AsyncIterator[str]:
+        loop = asyncio.get_running_loop()
+        conn, resp = await loop.run_in_executor(None, self._open, path, payload)
+        if resp.status >= 400:
+            body = await loop.run_in_executor(None, resp.read)
+            self._release(conn, resp)
+            raise _error_for(resp.status, body, {k.lower(): v for k, v in resp.getheaders()})
+        finished = False
+        try:
+            while True:
+                try:
+                    line = await loop.run_in_executor(None, resp.readline)
+                except (OSError, http.client.HTTPException) as e:
+                    raise LLMError(f"{type(e).__name__}: {e}") from e
+                if not line:
+                    finished = True
+                    return
+                yield line.decode("utf-8", "replace").rstrip("\r\n")
+        finally:
+            # 途中でやめた場合は残りを読まずに接続ごと捨てる
+            if finished:
+                self._release(conn, resp)
+            else:
+                conn.close()
+
+    async def aclose(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+# ---------------------------------------------------------------------------
+# クライアント
+# ---------------------------------------------------------------------------
+
+class LLMClient:
+    """
+    OpenAI 互換 API の非同期クライアント
+
+    Args:
+        api_key: 既定は OPENAI_API_KEY
+        base_url: 既定は OPENAI_BASE_URL か https://api.openai.com/v1
+        max_concurrency: 同時に投げるリクエスト数の上限（既定は LLM_MAX_CONCURRENCY か 4）
+        timeout: 1 リクエストのタイムアウト秒（既定は LLM_TIMEOUT か 60）
+        retries: 429 / 5xx / 接続エラー時の再試行回数
+        backoff, backoff_cap: 再試行の待ち（[0, min(cap, backoff * 2**n)] のフルジッタ。Retry-After があればそれを優先）
+        transport: "httpx" | "stdlib" | None（None なら httpx があれば httpx）
+        cache: 応答キャッシュ（None なら毎回 API を呼ぶ）
+        rate_limits: モデルごとのレート制限（None なら制限しない）
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        retries: int = DEFAULT_RETRIES,
+        backoff: float = 1.0,
+        transport: Optional[str] = None,
+        cache: Optional[ResponseCache] = None,
+        rate_limits: Optional[RateLimiterRegistry] = None,
+        backoff_cap: float = DEFAULT_BACKOFF_CAP,
+    ) -> None:
+        self.api_key = api_key if api_key is not None else os.getenv("OPENAI_API_KEY", "")
+        self.base_url = base_url or os.getenv("OPENAI_BASE_URL") or DEFAULT_BASE_URL
+        self.max_concurrency = max(1, int(max_concurrency or _env_number("LLM_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)))
+        self.timeout = timeout or _env_number("LLM_TIMEOUT", DEFAULT_TIMEOUT)
+        self.retries = retries
+        self.backoff = backoff
+        self.backoff_cap = backoff_cap
+        self.rate_limits = rate_limits
+        if transport is None:
+            transport = "httpx" if httpx is not None else "stdlib"
+        if transport == "httpx" and httpx is None:
+            raise RuntimeError("httpx is not installed")
+        self.transport_name = transport
+        self.cache = cache
+        self._transport: Any = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "retries": 0, "errors": 0, "rate_limited": 0}
+
+    # -- 非同期 API ----------------------------------------------------------
+
+    def _ensure_transport(self) -> None:
+        # セマフォと httpx の接続プールは最初に使ったイベントループに結び付く
+        if self._transport is None:
+            headers = {"Content-Type": "application/json", "Connection": "keep-alive"}
+            if self.api_key:
+                headers["Authorization"] = f"Bearer {self.api_key}"
+            cls = _HttpxTransport if self.transport_name == "httpx" else _StdlibTransport
+            self._transport = cls(self.base_url, headers, self.max_concurrency, self.timeout)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    @staticmethod
+    def _estimate_tokens(payload: Dict[str, Any]) -> int:
+        """tokens/min の見積もり（プロンプト + max_tokens）"""
+        model = payload.get("model")
+        prompt = sum(count_tokens(str(m.get("content") or ""), model) for m in payload.get("messages") or [])
+        return prompt + int(payload.get("max_tokens") or DEFAULT_COMPLETION_ESTIMATE)
+
+    async def _throttle(self, payload: Dict[str, Any]) -> Tuple[Any, int]:
+        """レート制限があれば枠が空くまで待つ。(limiter, 見積もりトークン数) を返す"""
+        if self.rate_limits is None:
+            return None, 0
+        limiter = self.rate_limits.limiter_for(str(payload.get("model") or ""))
+        estimate = self._estimate_tokens(payload)
+        await limiter.acquire(estimate)
+        return limiter, estimate
+
+    async def _before_retry(self, error: LLMError, attempt: int, limiter: Any) -> None:
+        """再試行前の待ち。429 なら同じモデルの他の呼び出しも Retry-After の間止める"""
+        delay = backoff_delay(attempt, self.backoff, self.backoff_cap, error.retry_after)
+        if error.status == 429:
+            self.stats["rate_limited"] += 1
+            if limiter is not None:
+                limiter.pause(delay)
+        # 待つ間はセマフォを手放す（他のリクエストを止めない）
+        await asyncio.sleep(delay)
+        self.stats["retries"] += 1
+
+    async def post_json(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """JSON を POST して JSON を返す（セマフォで同時数を制限し、429 / 5xx はジッタ付きバックオフで再試行）"""
+        self._ensure_transport()
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        attempt = 0
+        while True:
+            # レート制限の待ちはセマフォの外で行う（待っている間に枠を塞がない）
+            limiter, estimate = await self._throttle(payload)
+            async with self._semaphore:  # type: ignore[union-attr]
+                self.stats["requests"] += 1
+                try:
+                    status, headers, data = await self._transport.post(path, body)
+                    error = None if status < 400 else _error_for(status, data, headers)
+                except LLMError as e:
+                    error = e
+            if error is None:
+                try:
+                    result = json.loads(data)
+                except ValueError as e:
+                    raise LLMError(f"invalid JSON response: {data[:200]!r}", status=status) from e
+                if limiter is not None:
+                    usage = result.get("usage") if isinstance(result, dict) else None
+                    limiter.settle(estimate, (usage or {}).get("total_tokens") if isinstance(usage, dict) else None)
+                return result
+            if limiter is not None:
+                limiter.refund(estimate)
+            retryable = error.status is None or error.status == 429 or error.status >= 500
+            if not retryable or attempt >= self.retries:
+                self.stats["errors"] += 1
+                raise error
+            await self._before_retry(error, attempt, limiter)
+            attempt += 1
+
+    @staticmethod
+    def _chat_payload(
+        messages: Sequence[Dict[str, str]], model: Optional[str], temperature: Optional[float], options: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {"model": model or os.getenv("OPENAI_MODEL", DEFAULT_MODEL), "messages": list(messages)}
+        if temperature is not None:
+            payload["temperature"] = temperature
+        payload.update({k: v for k, v in options.items() if v is not None})
+        return payload
+
+    async def chat(
+        self,
+        messages: Sequence[Dict[str, str]],
+        model: Optional[str] = None,
+        temperature: Optional[float] = None,
+        **options: Any,
+    ) -> str:
+        """Chat Completions を呼び、最初の選択肢の本文を返す"""
+        payload = self._chat_payload(messages, model, temperature, options)
+        key = response_key(payload) if self.cache is not None else ""
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        started = time.perf_counter()
+        data = await self.post_json("chat/completions", payload)
+        try:
+            content = (data["choices"][0]["message"]["content"] or "").strip()
+        except (KeyError, IndexError, TypeError) as e:
+            raise LLMError(f"unexpected response shape: {str(data)[:200]}") from e
+        if self.cache is not None:
+            self.cache.put(key, content, time.perf_counter() - started, model=payload["model"])
+        return content
+
+    async def stream_chat(
+        self,
+        messages: Sequence[Dict[str, str]],
+        model: Optional[str] = None,
+        temperature: Optional[float] = None,
+        **options: Any,
+    ) -> AsyncIterator[str]:
+        """
+        stream=true で Chat Completions を呼び、本文の差分を届いた順に返す
+
+        - 再試行は最初の差分を受け取る前（接続エラー / 429 / 5xx）に限る
+        - キャッシュにあれば全文を 1 つの差分として返す。最後まで読み切った応答だけをキャッシュする
+        """
+        payload = self._chat_payload(messages, model, temperature, options)
+        key = response_key(payload) if self.cache is not None else ""
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+        payload["stream"] = True
+        self._ensure_transport()
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        started = time.perf_counter()
+        parts: List[str] = []
+        attempt = 0
+        while True:
+            limiter, estimate = await self._throttle(payload)
+            try:
+                async with self._semaphore:  # type: ignore[union-attr]
+                    self.stats["requests"] += 1
+                    # 呼び出し側が途中でやめても、接続をその場で片付ける
+                    async with contextlib.aclosing(self._transport.stream_lines("chat/completions", body)) as lines:
+                        async for line in lines:
+                            data = line[5:].strip() if line.startswith("data:") else ""
+                            if not data or data == "[DONE]":
+                                # [DONE] の後も本文の終端まで読み、keep-alive 接続をプールに戻す
+                                continue
+                            try:
+                                delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+                            except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+                                continue
+                            if delta:
+                                parts.append(delta)
+                                yield delta
+                break
+            except LLMError as error:
+                if limiter is not None and not parts:
+                    limiter.refund(estimate)
+                retryable = error.status is None or error.status == 429 or error.status >= 500
+                if parts or not retryable or attempt >= self.retries:
+                    self.stats["errors"] += 1
+                    raise
+                await self._before_retry(error, attempt, limiter)
+                attempt += 1
+        if self.cache is not None:
+            self.cache.put(key, "".join(parts).strip(), time.perf_counter() - started, model=payload["model"])
+
+    async def aclose(self) -> None:
+        if self._transport is not None:
+            await self._transport.aclose()
+            self._transport = None
+
+    # -- 同期 API（バックグラウンドのイベントループで実行） ---------------------
+
+    def _background_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="llm-client", daemon=True)
+                thread.start()
+                self._loop, self._thread = loop, thread
+            return self._loop
+
+    def run_sync(self, coro: Awaitable[Any]) -> Any:
+        """コルーチンをクライアント専用ループで実行して結果を待つ"""
+        return asyncio.run_coroutine_threadsafe(coro, self._background_loop()).result()  # type: ignore[arg-type]
+
+    def chat_sync(self, messages: Sequence[Dict[str, str]], **kwargs: Any) -> str:
+        return self.run_sync(self.chat(messages, **kwargs))
+
+    def gather_sync(self, coros: Sequence[Awaitable[Any]], return_exceptions: bool = False) -> List[Any]:
+        """複数の呼び出しを並行に実行し、入力順で結果を返す"""
+
+        async def _gather() -> List[Any]:
+            return list(await asyncio.gather(*coros, return_exceptions=return_exceptions))
+
+        return self.run_sync(_gather())
+
+    def close(self) -> None:
+        """接続プールとバックグラウンドループを閉じ、応答キャッシュを書き出す"""
+        if self.cache is not None:
+            self.cache.save()
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.aclose(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join(timeout=5)
+        loop.close()
+
+
+# ---------------------------------------------------------------------------
+# プロセス共有のインスタンス
+# ---------------------------------------------------------------------------
+
+_shared: Optional[LLMClient] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_client(**kwargs: Any) -> LLMClient:
+    """
+    プロセスで 1 つの LLMClient（初回呼び出し時の引数で作り、終了時に閉じる）
+
+    cache を指定しなければ環境変数（LLM_CACHE など）に従って応答キャッシュを付ける。
+    rate_limits を指定しなければ .ai/agents_config.yaml の rate_limits を使う（LLM_RATE_LIMIT=0 で無効）。
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            if "cache" not in kwargs:
+                kwargs["cache"] = ResponseCache.from_env()
+            if "rate_limits" not in kwargs:
+                enabled = (os.getenv("LLM_RATE_LIMIT") or "1").strip().lower() not in {"0", "false", "off", "no"}
+                kwargs["rate_limits"] = RateLimiterRegistry.from_config(load_agents_config(AGENTS_CONFIG_PATH)) if enabled else None
+            _shared = LLMClient(**kwargs)
+            atexit.register(_close_shared)
+        return _shared
+
+
+def _close_shared() -> None:
+    global _shared
+    with _shared_lock:
+        client, _shared = _shared, None
+    if client is not None:
+        client.close()
+
+
+def chat_messages(system: str, user: str) -> List[Dict[str, str]]:
+    return [{"role": "system", "content": system}, {"role": "user", "content": user}]
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+翻訳カタログ（public/locales/<lang>/*.json）のインメモリ索引
+- 言語ごとに「平坦化したキー → 文言」を保持（ネストした JSON は "a.b.c" に展開）
+- 逆引き索引「文言 → キー」で、ハードコード文字列に既存キーがあるかを O(1) で判定
+- 言語間のキー欠落、ソースから参照されていない未使用キーを検出
+"""
+from __future__ import annotations
+
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from .source_reader import DEFAULT_MAX_FILE_BYTES
+
+# i18next の既定名前空間。これ以外のファイルのキーは "<ns>:<key>" で表す
+DEFAULT_NAMESPACE = "common"
+
+# ソース中のキーらしい文字列リテラル（'app.title' / "forms:name.label" など区切りを 1 つ以上含むもの）
+_KEY_LITERAL = re.compile(rb"""(['"`])([A-Za-z_][\w-]*(?:[.:][\w-]+)+)\1""")
+
+
+def _flatten(data: Any, prefix: str, out: Dict[str, str]) -> None:
+    if isinstance(data, dict):
+        for k, v in data.items():
+            _flatten(v, f"{prefix}.{k}" if prefix else str(k), out)
+    elif isinstance(data, str):
+        out[prefix] = data
+    elif data is not None and prefix:
+        out[prefix] = json.dumps(data, ensure_ascii=False)
+
+
+class LocaleCatalog:
+    """
+    全言語の翻訳カタログ
+
+    使い方:
+        catalog = LocaleCatalog.load(locales_dir, find_locale_files(locales_dir))
+        catalog.keys_for_value("保存")      # ["actions.save"]
+        catalog.missing_keys()              # {"en": ["nav.home"], ...}
+        catalog.unused_keys(used_keys)      # ["common.time", ...]
+    """
+
+    def __init__(self, messages: Dict[str, Dict[str, str]], errors: Optional[List[Dict[str, str]]] = None):
+        self.messages = messages
+        self.errors: List[Dict[str, str]] = errors or []
+        self._all_keys: Set[str] = set()
+        self._keys_by_value: Dict[str, List[str]] = {}
+        for lang in sorted(messages):
+            for key, value in messages[lang].items():
+                self._all_keys.add(key)
+                keys = self._keys_by_value.setdefault(value, [])
+                if key not in keys:
+                    keys.append(key)
+
+    @classmethod
+    def load(cls, locales_dir: Path, locale_files: Dict[str, List[Path]]) -> "LocaleCatalog":
+        """find_locale_files の結果を読み込む。壊れた JSON は errors に記録して読み飛ばす"""
+        messages: Dict[str, Dict[str, str]] = {}
+        errors: List[Dict[str, str]] = []
+        for lang in sorted(locale_files):
+            flat = messages.setdefault(lang, {})
+            for path in sorted(locale_files[lang]):
+                try:
+                    data = json.loads(path.read_text(encoding="utf-8"))
+                except (OSError, ValueError) as e:
+                    errors.append({"path": str(path), "error": f"{type(e).__name__}: {e}"})
+                    continue
+                # locales/<lang>/<ns>.json → 名前空間 <ns>（サブディレクトリは "/" 区切り）
+                rel = path.relative_to(locales_dir / lang) if lang != "unknown" else Path(path.name)
+                namespace = rel.with_suffix("").as_posix()
+                entries: Dict[str, str] = {}
+                _flatten(data, "", entries)
+                if namespace == DEFAULT_NAMESPACE:
+                    flat.update(entries)
+                else:
+                    flat.update({f"{namespace}:{k}": v for k, v in entries.items()})
+        return cls(messages, errors)
+
+    @property
+    def languages(self) -> List[str]:
+        return sorted(self.messages)
+
+    @property
+    def all_keys(self) -> Set[str]:
+        """いずれかの言語に存在するキーの集合"""
+        return self._all_keys
+
+    def has_key(self, key: str) -> bool:
+        return key in self._all_keys
+
+    def keys_for_value(self, value: str) -> List[str]:
+        """文言に一致する既存キー（どの言語の文言でもよい）"""
+        return self._keys_by_value.get(value, [])
+
+    def missing_keys(self) -> Dict[str, List[str]]:
+        """他の言語には存在するが、その言語には無いキー"""
+        return {
+            lang: sorted(self._all_keys - flat.keys())
+            for lang, flat in sorted(self.messages.items())
+            if len(flat) < len(self._all_keys)
+        }
+
+    def unused_keys(self, used_keys: Iterable[str]) -> List[str]:
+        return sorted(self._all_keys - set(used_keys))
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "languages": {lang: len(flat) for lang, flat in sorted(self.messages.items())},
+            "total_keys": len(self._all_keys),
+            "missing_keys": self.missing_keys(),
+            "errors": self.errors,
+        }
+
+
+def find_key_references(
+    paths: Iterable[Path],
+    known_keys: Set[str],
+    max_bytes: int = DEFAULT_MAX_FILE_BYTES,
+) -> Set[str]:
+    """
+    ソースファイル中で参照されているカタログキーを収集
+
+    t('app.title') のような呼び出しに限らず、キーと完全一致する文字列リテラルを参照とみなす
+    （キーを定数やオブジェクトに入れてから t() に渡すパターンも拾うため）。
+    字句解析はせずバイト列への正規表現 1 回で済ませる。
+    """
+    used: Set[str] = set()
+    if not known_keys:
+        return used
+    for path in paths:
+        try:
+            # 上限超えのファイル（生成物など）は参照元として扱わない。スキップの報告はスキャン側で行う
+            if max_bytes > 0 and path.stat().st_size > max_bytes:
+                continue
+            data = path.read_bytes()
+        except OSError:
+            continue
+        for m in _KEY_LITERAL.finditer(data):
+            key = m.group(2).decode("ascii", "replace")
+            if key in known_keys:
+                used.add(key)
+    return used
@@ -0,0 +1,497 @@
+# -*- coding: utf-8 -*-
+"""
+Prisma スキーマ（schema.prisma）の字句解析器と構文解析器
+- 1 回の線形走査でトークン化し、そのまま再帰下降で AST を組み立てる
+- datasource / generator / model / view / type（複合型）/ enum の全ブロックを扱う
+- フィールド属性（@id / @default(dbgenerated("{}")) / @relation(fields: [...], ...)）と
+  ブロック属性（@@index([...]) / @@unique / @@map など）の引数を値として保持
+- 型がモデル / ビューならリレーション、enum なら列挙型、それ以外はスカラーとして分類
+  （旧実装の「型名が大文字ならリレーション」では Int / String などもリレーション扱いになっていた）
+- 構文エラーは例外にせず errors に記録し、次の行から解析を続ける
+
+文字列は 1 行で閉じる（Prisma の仕様）ため、行単位のストリーム入力のままトークン化できる。
+"""
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .source_reader import iter_source_lines
+
+# トークン種別
+IDENT = "ident"
+STRING = "string"
+NUMBER = "number"
+PUNCT = "punct"
+DOC = "doc"
+NEWLINE = "newline"
+EOF = "eof"
+
+PRISMA_SCALAR_TYPES = frozenset({
+    "String", "Boolean", "Int", "BigInt", "Float", "Decimal", "DateTime", "Json", "Bytes", "Unsupported",
+})
+# フィールドを持つブロック（model / view / 複合型 type）
+_MODEL_KINDS = ("model", "view", "type")
+_CONFIG_KINDS = ("datasource", "generator")
+
+# 先頭の空白はトークンと一緒に読み飛ばす（空白だけのマッチを作らない）
+_TOKEN = re.compile(
+    r'[ \t\r\f\v\ufeff]*(?:'
+    r'(?P<doc>///[^\n]*)'
+    r'|(?P<comment>//[^\n]*)'
+    r'|(?P<string>"(?:[^"\\\n]|\\.)*")'
+    r'|(?P<number>-?\d+(?:\.\d+)?)'
+    r'|(?P<ident>[A-Za-z_]\w*)'
+    r'|(?P<punct>@@|[{}()\[\],:=?.@!])'
+    r'|(?P<error>[^\n])'
+    r')'
+)
+_ESCAPE = re.compile(r"\\(.)")
+
+
+class PrismaToken(NamedTuple):
+    kind: str
+    value: str
+    # line は 1 始まり、col / end は行内の位置
+    line: int
+    col: int
+    end: int
+    # トークンを含む行のテキスト（属性の元テキスト復元用。行ごとに共有される）
+    line_text: str
+
+
+class PrismaSyntaxError(ValueError):
+    def __init__(self, message: str, line: int):
+        super().__init__(f"line {line}: {message}")
+        self.message = message
+        self.line = line
+
+
+def tokenize_prisma(lines: Iterable[str]) -> Iterator[PrismaToken]:
+    """
+    行のストリームをトークン列に変換（空白と通常コメントは捨て、/// ドキュメントコメントと改行は残す）
+
+    閉じない文字列などは 1 文字ずつ PUNCT として返し、判断は構文解析器に任せる。
+    """
+    # NamedTuple のコンストラクタ（Python 側の関数）を経由せずに作る。トークン数が多いので効く
+    make = tuple.__new__
+    line_no = 0
+    for line_no, line in enumerate(lines, start=1):
+        text = line.rstrip("\n")
+        for m in _TOKEN.finditer(text):
+            kind = m.lastgroup
+            if kind is None or kind == "comment":
+                # 行末の空白だけのマッチ / 通常コメント
+                continue
+            if kind == "error":
+                kind = PUNCT
+            start, end = m.span(kind)
+            yield make(PrismaToken, (kind, text[start:end], line_no, start, end, text))
+        yield PrismaToken(NEWLINE, "\n", line_no, len(text), len(text), text)
+    yield PrismaToken(EOF, "", line_no + 1, 0, 0, "")
+
+
+def _source_between(first: PrismaToken, last: PrismaToken, between: List[PrismaToken]) -> str:
+    """first〜last のトークンが元のソースで占めていたテキスト"""
+    if first.line == last.line:
+        return first.line_text[first.col:last.end]
+    parts = [first.line_text[first.col:]]
+    seen = {first.line}
+    for tok in between:
+        if tok.line not in seen and tok.line != last.line:
+            seen.add(tok.line)
+            parts.append(tok.line_text.strip())
+    parts.append(last.line_text[:last.end].strip())
+    return " ".join(p for p in parts if p)
+
+
+class _Parser:
+    """トークン列を 1 つずつ先読みしながら AST を組み立てる再帰下降パーサ"""
+
+    def __init__(self, tokens: Iterator[PrismaToken]):
+        self._tokens = tokens
+        self.tok = next(tokens)
+        self._doc: List[str] = []
+        # 属性などの元テキストを復元するため、記録中は読んだトークンを貯める
+        self._recording: Optional[List[PrismaToken]] = None
+        self.errors: List[Dict[str, Any]] = []
+
+    # -- トークン操作 ---------------------------------------------------------
+
+    def advance(self) -> PrismaToken:
+        tok = self.tok
+        if self._recording is not None:
+            self._recording.append(tok)
+        self.tok = next(self._tokens, tok) if tok.kind != EOF else tok
+        return tok
+
+    def at(self, value: str) -> bool:
+        return self.tok.kind == PUNCT and self.tok.value == value
+
+    def expect(self, value: str) -> PrismaToken:
+        if not self.at(value):
+            raise PrismaSyntaxError(f"expected '{value}' but found '{self.tok.value or self.tok.kind}'", self.tok.line)
+        return self.advance()
+
+    def expect_ident(self) -> str:
+        if self.tok.kind != IDENT:
+            raise PrismaSyntaxError(f"expected identifier but found '{self.tok.value or self.tok.kind}'", self.tok.line)
+        return self.advance().value
+
+    def skip_newlines(self, keep_docs: bool = True) -> None:
+        while self.tok.kind in (NEWLINE, DOC):
+            if self.tok.kind == DOC and keep_docs:
+                self._doc.append(self.tok.value[3:].strip())
+            elif self.tok.kind == NEWLINE and self.tok.line_text.strip() == "":
+                # 空行を挟んだドキュメントコメントは次の要素に付けない
+                self._doc = []
+            self.advance()
+
+    def take_doc(self) -> Optional[str]:
+        doc = "\n".join(self._doc) if self._doc else None
+        self._doc = []
+        return doc
+
+    def recover_line(self) -> None:
+        """エラー後、行末まで読み飛ばす（括弧の途中なら閉じるまで）"""
+        depth = 0
+        while self.tok.kind != EOF:
+            if self.tok.kind == PUNCT and self.tok.value in "([{":
+                depth += 1
+            elif self.tok.kind == PUNCT and self.tok.value in ")]}":
+                if depth == 0 and self.tok.value == "}":
+                    return
+                depth = max(depth - 1, 0)
+            elif self.tok.kind == NEWLINE and depth == 0:
+                return
+            self.advance()
+
+    def record(self, parse) -> Tuple[Any, str]:
+        """parse() を実行し、その結果と読んだ範囲の元テキストを返す"""
+        self._recording = []
+        try:
+            first = self.tok
+            value = parse()
+            return value, _source_between(first, self._recording[-1], self._recording)
+        finally:
+            self._recording = None
+
+    def error(self, e: PrismaSyntaxError) -> None:
+        self.errors.append({"line": e.line, "message": e.message})
+
+    # -- 値と属性 -------------------------------------------------------------
+
+    def skip_value_newlines(self) -> None:
+        """括弧・配列の中の改行は無視する"""
+        while self.tok.kind in (NEWLINE, DOC):
+            self.advance()
+
+    def parse_value(self) -> Any:
+        """
+        値: 文字列 / 数値 / true・false / 識別子 {"ref": name} / 関数呼び出し {"function": name, "args": [...]} / 配列
+        """
+        tok = self.tok
+        if tok.kind == STRING:
+            self.advance()
+            return _ESCAPE.sub(r"\1", tok.value[1:-1])
+        if tok.kind == NUMBER:
+            self.advance()
+            return float(tok.value) if "." in tok.value else int(tok.value)
+        if self.at("["):
+            self.advance()
+            items = []
+            self.skip_value_newlines()
+            while not self.at("]"):
+                items.append(self.parse_value())
+                self.skip_value_newlines()
+                if self.at(","):
+                    self.advance()
+                    self.skip_value_newlines()
+                elif not self.at("]"):
+                    raise PrismaSyntaxError(f"expected ',' or ']' but found '{self.tok.value or self.tok.kind}'", self.tok.line)
+            self.advance()
+            return items
+        if tok.kind == IDENT:
+            name = self.dotted_name()
+            if self.at("("):
+                return {"function": name, "args": self.parse_args()}
+            if name in ("true", "false"):
+                return name == "true"
+            # インデックスのカラム指定 [title(sort: Desc)] などは関数呼び出しとして扱われる
+            return {"ref": name}
+        raise PrismaSyntaxError(f"unexpected '{tok.value or tok.kind}'", tok.line)
+
+    def dotted_name(self) -> str:
+        name = self.expect_ident()
+        while self.at("."):
+            self.advance()
+            name += "." + self.expect_ident()
+        return name
+
+    def parse_args(self) -> List[Dict[str, Any]]:
+        """( [name:] value, ... ) を読む"""
+        self.expect("(")
+        args: List[Dict[str, Any]] = []
+        self.skip_value_newlines()
+        while not self.at(")"):
+            name = None
+            if self.tok.kind == IDENT:
+                # 先読み 1 トークンで名前付き引数かを判定できないため、値として読んでから ":" を見る
+                value = self.parse_value()
+                if self.at(":") and isinstance(value, dict) and "ref" in value:
+                    self.advance()
+                    self.skip_value_newlines()
+                    name = value["ref"]
+                    value = self.parse_value()
+            else:
+                value = self.parse_value()
+            args.append({"name": name, "value": value})
+            self.skip_value_newlines()
+            if self.at(","):
+                self.advance()
+                self.skip_value_newlines()
+            elif not self.at(")"):
+                raise PrismaSyntaxError(f"expected ',' or ')' but found '{self.tok.value or self.tok.kind}'", self.tok.line)
+        self.advance()
+        return args
+
+    def parse_attribute(self) -> Dict[str, Any]:
+        """@name / @name(args) / @@name(args)（@db.VarChar(255) のような名前空間付きも含む）"""
+        line = self.tok.line
+        self.advance()
+        name = self.dotted_name()
+        args = self.parse_args() if self.at("(") else []
+        return {"name": name, "args": args, "line": line}
+
+    # -- ブロック -------------------------------------------------------------
+
+    def parse_schema(self) -> Dict[str, Any]:
+        ast: Dict[str, Any] = {
+            "datasources": [], "generators": [], "models": [], "views": [], "types": [], "enums": [],
+            "errors": self.errors,
+        }
+        while True:
+            self.skip_newlines()
+            if self.tok.kind == EOF:
+                return ast
+            try:
+                self.parse_block(ast)
+            except PrismaSyntaxError as e:
+                self.error(e)
+                self.skip_block()
+
+    def skip_block(self) -> None:
+        """解析できないトップレベル要素を読み飛ばす（{ があれば対応する } まで）"""
+        depth = 0
+        while self.tok.kind != EOF:
+            if self.at("{"):
+                depth += 1
+            elif self.at("}"):
+                depth -= 1
+                if depth <= 0:
+                    self.advance()
+                    return
+            elif self.tok.kind == NEWLINE and depth == 0:
+                return
+            self.advance()
+
+    def parse_block(self, ast: Dict[str, Any]) -> None:
+        doc = self.take_doc()
+        line = self.tok.line
+        keyword = self.expect_ident()
+        if keyword not in _MODEL_KINDS and keyword not in _CONFIG_KINDS and keyword != "enum":
+            raise PrismaSyntaxError(f"unknown block type '{keyword}'", line)
+        name = self.expect_ident()
+        if keyword == "type" and self.at("="):
+            # 旧い型エイリアス構文 `type Name = String @db.Text` は読み飛ばす
+            self.recover_line()
+            return
+        self.expect("{")
+        block = {"name": name, "line": line, "documentation": doc}
+        if keyword in _CONFIG_KINDS:
+            block["properties"] = {}
+            block["raw"] = {}
+            self.parse_block_body(lambda: self.parse_property(block))
+            ast[keyword + "s"].append(block)
+        elif keyword == "enum":
+            block.update({"values": [], "attributes": []})
+            self.parse_block_body(lambda: self.parse_enum_member(block))
+            ast["enums"].append(block)
+        else:
+            block.update({"kind": keyword, "fields": [], "attributes": []})
+            self.parse_block_body(lambda: self.parse_field(block))
+            ast[keyword + "s"].append(block)
+
+    def parse_block_body(self, parse_member) -> None:
+        while True:
+            self.skip_newlines()
+            if self.at("}"):
+                self.advance()
+                self._doc = []
+                return
+            if self.tok.kind == EOF:
+                self.error(PrismaSyntaxError("unterminated block", self.tok.line))
+                return
+            try:
+                parse_member()
+                if self.tok.kind == DOC:
+                    # 行末の /// は次の要素の説明にしない
+                    self.advance()
+                if self.tok.kind not in (NEWLINE, EOF) and not self.at("}"):
+                    raise PrismaSyntaxError(f"unexpected '{self.tok.value}'", self.tok.line)
+            except PrismaSyntaxError as e:
+                self.error(e)
+                self.recover_line()
+
+    def parse_property(self, block: Dict[str, Any]) -> None:
+        key = self.expect_ident()
+        self.expect("=")
+        block["properties"][key], block["raw"][key] = self.record(self.parse_value)
+
+    def parse_block_attribute(self, block: Dict[str, Any]) -> None:
+        attribute, raw = self.record(self.parse_attribute)
+        attribute["raw"] = raw
+        block["attributes"].append(attribute)
+
+    def parse_enum_member(self, block: Dict[str, Any]) -> None:
+        if self.at("@@"):
+            self.parse_block_attribute(block)
+            return
+        doc = self.take_doc()
+        value: Dict[str, Any] = {"name": self.expect_ident(), "attributes": [], "documentation": doc}
+        while self.at("@"):
+            value["attributes"].append(self.parse_attribute())
+        block["values"].append(value)
+
+    def parse_field(self, block: Dict[str, Any]) -> None:
+        if self.at("@@"):
+            self.parse_block_attribute(block)
+            return
+        doc = self.take_doc()
+        line = self.tok.line
+        name = self.expect_ident()
+        field: Dict[str, Any] = {"name": name, "line": line, "documentation": doc}
+        type_name = self.expect_ident()
+        field["type"] = type_name
+        if self.at("("):
+            # Unsupported("tsvector") など
+            field["type_args"] = self.parse_args()
+        field["is_array"] = False
+        field["is_optional"] = False
+        if self.at("["):
+            self.advance()
+            self.expect("]")
+            field["is_array"] = True
+        if self.at("?"):
+            self.advance()
+            field["is_optional"] = True
+        elif self.at("!"):
+            self.advance()
+        field["attributes"] = []
+        field["raw_attributes"] = ""
+        if self.at("@"):
+            field["attributes"], field["raw_attributes"] = self.record(self.parse_field_attributes)
+        block["fields"].append(field)
+
+    def parse_field_attributes(self) -> List[Dict[str, Any]]:
+        attributes = []
+        while self.at("@"):
+            attributes.append(self.parse_attribute())
+        return attributes
+
+
+def _classify_fields(ast: Dict[str, Any]) -> None:
+    """全ブロックを読んだ後に、フィールドの型がモデル / enum / 複合型 / スカラーのどれかを決める"""
+    models = {m["name"] for m in ast["models"]} | {v["name"] for v in ast["views"]}
+    enums = {e["name"] for e in ast["enums"]}
+    composites = {t["name"] for t in ast["types"]}
+    for block in ast["models"] + ast["views"] + ast["types"]:
+        for field in block["fields"]:
+            t = field["type"]
+            if t in models:
+                field["kind"] = "relation"
+            elif t in enums:
+                field["kind"] = "enum"
+            elif t in composites:
+                field["kind"] = "composite"
+            elif t in PRISMA_SCALAR_TYPES:
+                field["kind"] = "scalar"
+            else:
+                field["kind"] = "unknown"
+                ast["errors"].append({"line": field["line"], "message": f"unknown type '{t}' for field '{block['name']}.{field['name']}'"})
+
+
+def parse_prisma(lines: Iterable[str]) -> Dict[str, Any]:
+    """
+    Prisma スキーマを AST に変換
+
+    Returns:
+        {
+            "datasources": [{"name", "line", "documentation", "properties": {key: value}, "raw": {key: str}}, ...],
+            "generators": [...],
+            "models" / "views" / "types": [{
+                "name", "kind", "line", "documentation",
+                "fields": [{"name", "type", "kind": "scalar" | "relation" | "enum" | "composite" | "unknown",
+                            "is_array", "is_optional", "attributes": [{"name", "args", "line"}], "raw_attributes", ...}],
+                "attributes": [{"name": "index", "args": [...], "line", "raw"}, ...],   # @@ 属性
+            }, ...],
+            "enums": [{"name", "values": [{"name", "attributes"}], "attributes"}, ...],
+            "errors": [{"line", "message"}, ...],
+        }
+    """
+    parser = _Parser(tokenize_prisma(lines))
+    ast = parser.parse_schema()
+    _classify_fields(ast)
+    return ast
+
+
+def parse_prisma_text(text: str) -> Dict[str, Any]:
+    return parse_prisma(text.splitlines())
+
+
+def parse_prisma_file(path: Path) -> Dict[str, Any]:
+    return parse_prisma(iter_source_lines(path))
+
+
+# ---------------------------------------------------------------------------
+# AST の参照ヘルパ
+# ---------------------------------------------------------------------------
+
+def attribute_arg(attribute: Dict[str, Any], name: str, position: Optional[int] = None) -> Any:
+    """属性の引数を名前で取り出す。名前付きで無ければ position 番目の位置引数（@@index([a, b]) の [a, b] など）"""
+    for arg in attribute["args"]:
+        if arg["name"] == name:
+            return arg["value"]
+    if position is None:
+        return None
+    positional = [arg["value"] for arg in attribute["args"] if arg["name"] is None]
+    return positional[position] if position < len(positional) else None
+
+
+def value_names(value: Any) -> List[str]:
+    """[a, b(sort: Desc)] のようなカラム指定からカラム名だけを取り出す"""
+    if isinstance(value, list):
+        return [n for item in value for n in value_names(item)]
+    if isinstance(value, dict):
+        return [value.get("ref") or value.get("function")]
+    return []
+
+
+def relation_info(field: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """@relation 属性の引数を {"name", "fields", "references", "on_delete", "on_update"} にまとめる"""
+    for attribute in field["attributes"]:
+        if attribute["name"] != "relation":
+            continue
+        # @relation("PostAuthor", fields: [...]) の先頭の文字列はリレーション名
+        name = attribute_arg(attribute, "name", position=0)
+        on_delete = attribute_arg(attribute, "onDelete")
+        on_update = attribute_arg(attribute, "onUpdate")
+        return {
+            "name": name if isinstance(name, str) else None,
+            "fields": value_names(attribute_arg(attribute, "fields")),
+            "references": value_names(attribute_arg(attribute, "references")),
+            "on_delete": on_delete.get("ref") if isinstance(on_delete, dict) else None,
+            "on_update": on_update.get("ref") if isinstance(on_update, dict) else None,
+        }
+    return None
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+LLM API 呼び出しのクライアント側レート制限
+- モデルごとに requests/min と tokens/min のトークンバケットを持ち、送信前に両方から差し引く
+- 429 を受けたら Retry-After の間そのモデルのバケットを止め、並行中の他の呼び出しも待たせる
+- 再試行の待ち時間は Retry-After があればそれ（+ 小さなジッタ）、無ければ上限付き指数バックオフのフルジッタ
+- 上限は .ai/agents_config.yaml の rate_limits（モデル名の前方一致、default は全モデル共通の既定）
+- バケットの容量は burst_seconds 秒分（API 側も 1 分の枠を秒単位で区切って適用することがあるため、1 分ぶんを一度に投げない）
+  容量を超える大きな呼び出しは満タンになるまで待ってから通し、残量は負（借り）になる → 長い目で見た速度は上限どおり
+
+設定例:
+    rate_limits:
+      default: {requests_per_minute: 500, tokens_per_minute: 200000}
+      gpt-4o: {requests_per_minute: 500, tokens_per_minute: 30000, burst_seconds: 2}
+
+バケットは LLMClient のイベントループ 1 本の上でだけ使う（await を挟まずに残量確認と差し引きを行うのでロック不要）。
+"""
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from typing import Any, Dict, Optional
+
+DEFAULT_BACKOFF_CAP = 30.0
+DEFAULT_BURST_SECONDS = 1.0
+
+
+def backoff_delay(
+    attempt: int,
+    base: float = 1.0,
+    cap: float = DEFAULT_BACKOFF_CAP,
+    retry_after: Optional[float] = None,
+    rng: Optional[random.Random] = None,
+) -> float:
+    """
+    attempt 回目（0 始まり）の再試行までの待ち秒数
+
+    - retry_after があればそれに 0〜10%（最大 1 秒）のジッタを足す（同時に解除されて再び集中しないように）
+    - 無ければ [0, min(cap, base * 2**attempt)] の一様乱数（フルジッタ）
+    """
+    rand = (rng or random).random()
+    if retry_after is not None:
+        return retry_after + min(1.0, retry_after * 0.1) * rand
+    return min(cap, base * (2 ** attempt)) * rand
+
+
+class TokenBucket:
+    """capacity まで貯まり、毎秒 rate ずつ回復するバケット（払い出しで負になってもよい）"""
+
+    def __init__(self, capacity: float, rate: float, clock: Any = time.monotonic) -> None:
+        self.capacity = float(capacity)
+        self.rate = float(rate)
+        self.tokens = float(capacity)
+        self._clock = clock
+        self._updated = clock()
+        self._paused_until = 0.0
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def pause(self, seconds: float) -> None:
+        """seconds 秒間は残量に関係なく払い出さない（429 の Retry-After 用）"""
+        self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+    def wait_time(self, amount: float) -> float:
+        """amount を払い出せるまでの秒数（0 なら今すぐ）"""
+        self._refill()
+        # 容量を超える量は満タンになれば通す（でないと永遠に待つ）
+        amount = min(amount, self.capacity)
+        paused = max(0.0, self._paused_until - self._clock())
+        deficit = max(0.0, amount - self.tokens)
+        return max(paused, deficit / self.rate if self.rate > 0 else 0.0)
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.tokens -= amount
+
+    def give_back(self, amount: float) -> None:
+        """見積もりより実使用量が少なかった分を戻す（負なら追加で差し引く）"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class ModelRateLimiter:
+    """1 モデル分の requests/min と tokens/min（None の軸は制限しない）"""
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        burst_seconds: float = DEFAULT_BURST_SECONDS,
+        clock: Any = time.monotonic,
+    ) -> None:
+        self.requests = self._bucket(requests_per_minute, burst_seconds, clock, minimum=1.0)
+        self.tokens = self._bucket(tokens_per_minute, burst_seconds, clock, minimum=0.0)
+        self.waited_seconds = 0.0
+
+    @staticmethod
+    def _bucket(per_minute: Optional[float], burst_seconds: float, clock: Any, minimum: float) -> Optional[TokenBucket]:
+        if not per_minute:
+            return None
+        rate = float(per_minute) / 60.0
+        return TokenBucket(max(minimum, rate * burst_seconds), rate, clock)
+
+    async def acquire(self, tokens: int = 0) -> float:
+        """両方のバケットに余裕ができるまで待って差し引く。待った秒数を返す"""
+        waited = 0.0
+        while True:
+            delay = 0.0
+            if self.requests is not None:
+                delay = max(delay, self.requests.wait_time(1))
+            if self.tokens is not None:
+                delay = max(delay, self.tokens.wait_time(tokens))
+            if delay <= 0:
+                break
+            await asyncio.sleep(delay)
+            waited += delay
+        if self.requests is not None:
+            self.requests.take(1)
+        if self.tokens is not None:
+            self.tokens.take(tokens)
+        self.waited_seconds += waited
+        return waited
+
+    def settle(self, estimated: int, actual: Optional[int]) -> None:
+        """応答の usage.total_tokens で見積もりとの差を精算する"""
+        if self.tokens is not None and actual is not None:
+            self.tokens.give_back(estimated - actual)
+
+    def refund(self, estimated: int) -> None:
+        """エラーで使われなかった見積もりを戻す（再試行で二重に差し引かない）"""
+        if self.tokens is not None:
+            self.tokens.give_back(estimated)
+
+    def pause(self, seconds: float) -> None:
+        for bucket in (self.requests, self.tokens):
+            if bucket is not None:
+                bucket.pause(seconds)
+
+
+class RateLimiterRegistry:
+    """モデル名 → ModelRateLimiter（設定はモデル名の前方一致で最長のもの、無ければ default）"""
+
+    def __init__(self, limits: Optional[Dict[str, Dict[str, Any]]] = None, clock: Any = time.monotonic) -> None:
+        self.limits = {str(k): dict(v or {}) for k, v in (limits or {}).items()}
+        self._clock = clock
+        self._limiters: Dict[str, ModelRateLimiter] = {}
+
+    @classmethod
+    def from_config(cls, cfg: Dict[str, Any]) -> Optional["RateLimiterRegistry"]:
+        limits = cfg.get("rate_limits")
+        return cls(limits) if isinstance(limits, dict) and limits else None
+
+    def _limits_for(self, model: str) -> Dict[str, Any]:
+        matches = [k for k in self.limits if k != "default" and model.startswith(k)]
+        if matches:
+            return self.limits[max(matches, key=len)]
+        return self.limits.get("default", {})
+
+    def limiter_for(self, model: str) -> ModelRateLimiter:
+        limiter = self._limiters.get(model)
+        if limiter is None:
+            conf = self._limits_for(model)
+            limiter = ModelRateLimiter(
+                conf.get("requests_per_minute"),
+                conf.get("tokens_per_minute"),
+                float(conf.get("burst_seconds") or DEFAULT_BURST_SECONDS),
+                self._clock,
+            )
+            self._limiters[model] = limiter
+        return limiter
+
+    def stats(self) -> Dict[str, float]:
+        return {model: round(limiter.waited_seconds, 3) for model, limiter in self._limiters.items()}
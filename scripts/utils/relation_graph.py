@@ -0,0 +1,430 @@
+# -*- coding: utf-8 -*-
+"""
+エンティティ間リレーションのグラフ化と解析ユーティリティ
+- Prisma モデル / TypeORM エンティティ / SQL マイグレーションのテーブルをノード、
+  外部キー（子 → 親）をエッジとし、モデル名をキーにした隣接リストで保持
+- 循環参照（強連結成分）、自己参照、子テーブルの多い（N+1 を招きやすい）モデル、
+  先頭カラムがインデックスで裏付けられていない外部キーを検出
+- アーキテクチャ資料向けに DOT / JSON で書き出し
+"""
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from .index_coverage import table_access_paths
+
+# これ以上の子リレーション（has-many）を持つモデルを N+1 の注意対象にする
+FAN_OUT_THRESHOLD = 5
+
+_PRISMA_FIELD_KEY = re.compile(r"@(?:id|unique)\b")
+_PRISMA_KEY_ATTR = re.compile(r"@@(id|unique|index)\s*\(\s*(?:fields\s*:\s*)?\[([^\]]*)\]")
+_LIST_ITEM = re.compile(r"\s*([A-Za-z_$][\w$]*)")
+_QUOTED_NAME = re.compile(r"['\"]([A-Za-z_$][\w$.]*)['\"]")
+
+
+class RelationGraph:
+    """
+    モデル名をキーにしたリレーショングラフ
+
+    エッジは外部キーを持つ側（子）から参照先（親）へ向ける:
+        {"source", "from", "to", "name", "kind", "columns", "ref_columns", "on_delete", "indexed", "index"}
+    kind は many_to_one / one_to_one / many_to_many。indexed は子側の外部キーカラムを
+    先頭に持つインデックスがあるか（不明なら None）。
+    """
+
+    def __init__(self) -> None:
+        self.nodes: Dict[str, Dict[str, Any]] = {}
+        self.edges: List[Dict[str, Any]] = []
+        # ノード名 -> エッジ番号（出る方向 / 入る方向）
+        self.outgoing: Dict[str, List[int]] = {}
+        self.incoming: Dict[str, List[int]] = {}
+
+    def add_node(self, name: str, source: str, table: str = "", path: str = "") -> Dict[str, Any]:
+        node = self.nodes.get(name)
+        if node is None:
+            node = {"name": name, "sources": [], "table": table or name, "path": path}
+            self.nodes[name] = node
+            self.outgoing[name] = []
+            self.incoming[name] = []
+        if source not in node["sources"]:
+            node["sources"].append(source)
+        return node
+
+    def add_edge(self, edge: Dict[str, Any]) -> None:
+        for name in (edge["from"], edge["to"]):
+            if name not in self.nodes:
+                # 解析対象外（auth.users など）の参照先も端点としてノードにする
+                self.add_node(name, "external")
+        self.outgoing[edge["from"]].append(len(self.edges))
+        self.incoming[edge["to"]].append(len(self.edges))
+        self.edges.append(edge)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RelationGraph":
+        """to_dict() の結果（JSON から読み戻したものを含む）から組み立て直す"""
+        graph = cls()
+        for node in data["nodes"]:
+            graph.nodes[node["name"]] = dict(node)
+            graph.outgoing[node["name"]] = []
+            graph.incoming[node["name"]] = []
+        for edge in data["edges"]:
+            graph.add_edge(dict(edge))
+        return graph
+
+    def successors(self, name: str) -> List[str]:
+        return [self.edges[i]["to"] for i in self.outgoing.get(name, [])]
+
+    def predecessors(self, name: str) -> List[str]:
+        return [self.edges[i]["from"] for i in self.incoming.get(name, [])]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "nodes": sorted(self.nodes.values(), key=lambda n: n["name"]),
+            "edges": list(self.edges),
+            "adjacency": {name: sorted(set(self.successors(name))) for name in sorted(self.nodes)},
+        }
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=indent)
+
+    def to_dot(self, name: str = "relations") -> str:
+        """Graphviz DOT 形式。インデックスの無い外部キーは赤の破線で描く"""
+        lines = [f"digraph {_dot_id(name)} {{", "  rankdir=LR;", "  node [shape=box, fontname=\"Helvetica\"];"]
+        for node in sorted(self.nodes.values(), key=lambda n: n["name"]):
+            style = ", style=dashed" if node["sources"] == ["external"] else ""
+            lines.append(f"  {_dot_id(node['name'])} [label={_dot_id(node['name'])}{style}];")
+        for edge in self.edges:
+            label = ", ".join(edge["columns"]) or edge["name"]
+            attrs = [f"label={_dot_id(label)}"]
+            if edge["kind"] == "many_to_many":
+                attrs.append("dir=both")
+            elif edge["kind"] == "one_to_one":
+                attrs.append("arrowhead=tee")
+            if edge["indexed"] is False:
+                attrs.append("color=red, style=dashed")
+            lines.append(f"  {_dot_id(edge['from'])} -> {_dot_id(edge['to'])} [{', '.join(attrs)}];")
+        lines.append("}")
+        return "\n".join(lines) + "\n"
+
+
+def _dot_id(text: str) -> str:
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _covered(columns: Sequence[str], index_columns: Iterable[Sequence[str]]) -> Optional[List[str]]:
+    """外部キーのカラムがインデックスの先頭（順不同）に揃っていれば、そのインデックスのカラムを返す"""
+    wanted = set(columns)
+    for candidate in index_columns:
+        if wanted and set(candidate[:len(wanted)]) == wanted:
+            return list(candidate)
+    return None
+
+
+# ---------------------------------------------------------------------------
+# 各ソースからの構築
+# ---------------------------------------------------------------------------
+
+def _add_sql(graph: RelationGraph, schema: Dict[str, Any]) -> None:
+    for table in schema["tables"].values():
+        graph.add_node(table["name"], "sql")
+    for table in schema["tables"].values():
+        paths = table_access_paths(schema, table["name"])
+        unique_sets = [set(p["columns"]) for p in paths if p["unique"]]
+        for fk in table["foreign_keys"]:
+            if not fk["ref_table"]:
+                continue
+            match = next(
+                (p for p in paths if _covered(fk["columns"], [p["columns"]]) is not None), None
+            )
+            graph.add_edge({
+                "source": "sql",
+                "from": table["name"],
+                "to": fk["ref_table"],
+                "name": fk["name"],
+                "kind": "one_to_one" if set(fk["columns"]) in unique_sets else "many_to_one",
+                "columns": list(fk["columns"]),
+                "ref_columns": list(fk["ref_columns"]),
+                "on_delete": fk["on_delete"],
+                "indexed": match is not None,
+                "index": match["name"] if match else None,
+            })
+
+
+def _prisma_unique_fields(model: Dict[str, Any]) -> List[str]:
+    return [f["name"] for f in model["fields"] if _PRISMA_FIELD_KEY.search(f.get("attributes") or "")]
+
+
+def _prisma_key_columns(model: Dict[str, Any]) -> List[List[str]]:
+    """@id / @unique / @@id / @@unique / @@index のカラム列"""
+    keys = [[name] for name in _prisma_unique_fields(model)]
+    for raw in model.get("block_attributes") or []:
+        m = _PRISMA_KEY_ATTR.match(raw)
+        if m:
+            keys.append([item.group(1) for item in map(_LIST_ITEM.match, m.group(2).split(",")) if item])
+    return keys
+
+
+def _prisma_table(model: Dict[str, Any]) -> str:
+    for raw in model.get("block_attributes") or []:
+        m = _QUOTED_NAME.search(raw) if raw.startswith("@@map") else None
+        if m:
+            return m.group(1)
+    return model["name"]
+
+
+def _add_prisma(graph: RelationGraph, parsed_prisma: Sequence[Dict[str, Any]]) -> None:
+    models = [
+        (info["path"], model) for info in parsed_prisma for model in info["data"].get("models") or []
+    ]
+    for path, model in models:
+        graph.add_node(model["name"], "prisma", table=_prisma_table(model), path=path)
+    implicit_m2m = set()
+    for path, model in models:
+        keys = _prisma_key_columns(model)
+        for rel in model["relations"]:
+            info = rel.get("relation") or {}
+            if info.get("fields"):
+                columns = info["fields"]
+                covering = _covered(columns, keys)
+                single_unique = len(columns) == 1 and columns[0] in _prisma_unique_fields(model)
+                graph.add_edge({
+                    "source": "prisma",
+                    "from": model["name"],
+                    "to": rel["type"],
+                    "name": f"{model['name']}.{rel['name']}",
+                    "kind": "one_to_one" if single_unique else "many_to_one",
+                    "columns": list(columns),
+                    "ref_columns": list(info.get("references") or []),
+                    "on_delete": info.get("on_delete"),
+                    "indexed": covering is not None,
+                    "index": covering and f"({', '.join(covering)})",
+                })
+            elif rel["is_array"]:
+                # 相手側も配列で fields を持たない場合は暗黙の多対多（中間テーブルは Prisma が索引付きで作る）
+                other = next((m for _, m in models if m["name"] == rel["type"]), None)
+                back = [
+                    r for r in (other["relations"] if other else [])
+                    if r["type"] == model["name"] and r["is_array"] and not (r.get("relation") or {}).get("fields")
+                ]
+                pair = tuple(sorted((model["name"], rel["type"])))
+                if back and pair not in implicit_m2m:
+                    implicit_m2m.add(pair)
+                    graph.add_edge({
+                        "source": "prisma",
+                        "from": model["name"],
+                        "to": rel["type"],
+                        "name": f"{model['name']}.{rel['name']}",
+                        "kind": "many_to_many",
+                        "columns": [],
+                        "ref_columns": [],
+                        "on_delete": None,
+                        "indexed": True,
+                        "index": "implicit join table",
+                    })
+
+
+def _typeorm_key_columns(entity: Dict[str, Any]) -> List[List[str]]:
+    """主キー / unique カラム / プロパティやクラスの @Index・@Unique のカラム列（プロパティ名）"""
+    keys: List[List[str]] = []
+    primary = [c["name"] for c in entity["columns"] if c.get("primary")]
+    if primary:
+        keys.append(primary)
+    for member in entity["columns"] + entity["relations"] + entity.get("other_members", []):
+        decorators = member.get("decorators") or []
+        if (member.get("options") or {}).get("unique") is True or any(
+            d.startswith(("@Index", "@Unique")) for d in decorators
+        ):
+            keys.append([member["name"]])
+    for index in entity.get("indices") or []:
+        arrays = [arg for arg in index["args"] if arg.lstrip().startswith("[")]
+        if arrays:
+            keys.append(_QUOTED_NAME.findall(arrays[-1]))
+    return keys
+
+
+def _add_typeorm(graph: RelationGraph, parsed_typeorm: Sequence[Dict[str, Any]]) -> None:
+    entities = [(info["path"], info["data"]) for info in parsed_typeorm if info["data"].get("name")]
+    for path, entity in entities:
+        graph.add_node(entity["name"], "typeorm", table=entity.get("table") or "", path=path)
+    for path, entity in entities:
+        keys = _typeorm_key_columns(entity)
+        for rel in entity["relations"]:
+            decorator = rel["decorator"].lstrip("@")
+            join = rel.get("join")
+            if not rel.get("target"):
+                continue
+            if decorator == "ManyToMany":
+                if not join:
+                    continue
+                kind, columns = "many_to_many", []
+            elif decorator == "ManyToOne" or (decorator == "OneToOne" and join):
+                kind = "many_to_one" if decorator == "ManyToOne" else "one_to_one"
+                join_name = (join or {}).get("options", {}).get("name")
+                columns = [join_name if isinstance(join_name, str) else f"{rel['name']}Id"]
+            else:
+                # OneToMany と JoinColumn の無い OneToOne は逆側（外部キーは相手が持つ）
+                continue
+            # @Index(["user"]) のようにリレーションのプロパティ名で書くこともできる
+            covering = None
+            if kind != "many_to_many":
+                covering = _covered(columns, keys) or _covered([rel["name"]], keys)
+                if kind == "one_to_one" and covering is None:
+                    # OneToOne の JoinColumn には TypeORM が UNIQUE 制約を付ける
+                    covering = columns
+            graph.add_edge({
+                "source": "typeorm",
+                "from": entity["name"],
+                "to": rel["target"],
+                "name": f"{entity['name']}.{rel['name']}",
+                "kind": kind,
+                "columns": columns,
+                "ref_columns": [],
+                "on_delete": (rel.get("options") or {}).get("onDelete"),
+                "indexed": True if kind == "many_to_many" else covering is not None,
+                "index": "join table" if kind == "many_to_many" else (covering and f"({', '.join(covering)})"),
+            })
+
+
+def build_relation_graph(
+    parsed_prisma: Sequence[Dict[str, Any]] = (),
+    parsed_typeorm: Sequence[Dict[str, Any]] = (),
+    sql_schema: Optional[Dict[str, Any]] = None,
+) -> RelationGraph:
+    """
+    db_model_utils の解析結果（parsed_prisma / parsed_typeorm / 再生済み SQL スキーマ）からグラフを組み立てる
+    """
+    graph = RelationGraph()
+    if sql_schema is not None:
+        _add_sql(graph, sql_schema)
+    _add_prisma(graph, parsed_prisma)
+    _add_typeorm(graph, parsed_typeorm)
+    return graph
+
+
+# ---------------------------------------------------------------------------
+# 解析
+# ---------------------------------------------------------------------------
+
+def find_cycles(graph: RelationGraph) -> List[List[str]]:
+    """
+    自己参照を除く循環（2 ノード以上の強連結成分）を Tarjan 法で求める
+
+    深い再帰を避けるため明示的なスタックで辿る。各成分は名前順、成分の並びも先頭名の順。
+    """
+    index_of: Dict[str, int] = {}
+    lowlink: Dict[str, int] = {}
+    on_stack = set()
+    stack: List[str] = []
+    components: List[List[str]] = []
+    counter = 0
+    adjacency = {name: sorted(set(graph.successors(name))) for name in graph.nodes}
+
+    for root in sorted(graph.nodes):
+        if root in index_of:
+            continue
+        work = [(root, 0)]
+        while work:
+            node, child_at = work[-1]
+            if child_at == 0:
+                index_of[node] = lowlink[node] = counter
+                counter += 1
+                stack.append(node)
+                on_stack.add(node)
+            children = adjacency[node]
+            if child_at < len(children):
+                work[-1] = (node, child_at + 1)
+                child = children[child_at]
+                if child not in index_of:
+                    work.append((child, 0))
+                elif child in on_stack:
+                    lowlink[node] = min(lowlink[node], index_of[child])
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+            if lowlink[node] == index_of[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                if len(component) > 1:
+                    components.append(sorted(component))
+    return sorted(components)
+
+
+def find_self_references(graph: RelationGraph) -> List[Dict[str, Any]]:
+    """parent_id のような自己参照（木構造。再帰読み込みで N+1 になりやすい）"""
+    return [
+        {"model": edge["from"], "edge": edge["name"], "columns": edge["columns"]}
+        for edge in graph.edges if edge["from"] == edge["to"]
+    ]
+
+
+def find_high_fan_out(graph: RelationGraph, threshold: int = FAN_OUT_THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    子リレーション（自分を参照する外部キー + 多対多）の数が threshold 以上のモデル
+
+    一覧の各行で子を 1 つずつ読み込むと、子リレーションの数だけクエリが増える。
+    """
+    results = []
+    for name in graph.nodes:
+        children = []
+        for i in graph.incoming[name]:
+            edge = graph.edges[i]
+            if edge["kind"] != "one_to_one":
+                children.append(f"{edge['from']}.{', '.join(edge['columns'])}" if edge["columns"] else edge["from"])
+        for i in graph.outgoing[name]:
+            edge = graph.edges[i]
+            if edge["kind"] == "many_to_many":
+                children.append(edge["to"])
+        if len(children) >= threshold:
+            results.append({"model": name, "fan_out": len(children), "children": sorted(children)})
+    return sorted(results, key=lambda r: (-r["fan_out"], r["model"]))
+
+
+def find_unindexed_foreign_keys(graph: RelationGraph) -> List[Dict[str, Any]]:
+    """
+    子側のカラムを先頭に持つインデックスが無い外部キー
+
+    PostgreSQL は外部キーにインデックスを自動では作らないため、親の削除・更新や
+    親から子への JOIN が子テーブルの全件走査になる。
+    """
+    return [
+        {
+            "source": edge["source"],
+            "model": edge["from"],
+            "references": edge["to"],
+            "edge": edge["name"],
+            "columns": edge["columns"],
+            "on_delete": edge["on_delete"],
+        }
+        for edge in graph.edges if edge["indexed"] is False
+    ]
+
+
+def analyze_relation_graph(graph: RelationGraph, fan_out_threshold: int = FAN_OUT_THRESHOLD) -> Dict[str, Any]:
+    """
+    Returns:
+        {
+            "graph": {"nodes": [...], "edges": [...], "adjacency": {name: [name, ...]}},
+            "cycles": [[name, ...], ...],
+            "self_references": [{"model", "edge", "columns"}, ...],
+            "high_fan_out": [{"model", "fan_out", "children"}, ...],
+            "unindexed_foreign_keys": [{"source", "model", "references", "edge", "columns", "on_delete"}, ...],
+            "fan_out_threshold": int,
+        }
+    """
+    return {
+        "graph": graph.to_dict(),
+        "cycles": find_cycles(graph),
+        "self_references": find_self_references(graph),
+        "high_fan_out": find_high_fan_out(graph, fan_out_threshold),
+        "unindexed_foreign_keys": find_unindexed_foreign_keys(graph),
+        "fan_out_threshold": fan_out_threshold,
+    }
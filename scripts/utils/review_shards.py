@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+大きな PR のレビューを分割して並行実行するためのユーティリティ
+- unified diff をファイル単位に分け、トークン予算内に収まるようにシャードへ詰める
+- 予算を超える 1 ファイルはハンク単位のグループに分ける（各グループにファイルヘッダを付け直す）
+- シャードごとの Reviewer 出力（JSON）を 1 つにまとめる（指摘の重複排除と overall_severity の集約）
+- 1 回のプロンプトに収める場合は pack_diff で各ファイルの先頭ハンクを優先して予算内に詰める
+
+トークン数は既定で UTF-8 バイト数 / 4 の概算。正確に数える場合は token_budget.make_counter(model) を渡す。
+"""
+from __future__ import annotations
+
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .token_budget import estimate_tokens, pack_items
+
+SEVERITIES = ("nit", "minor", "major", "blocker")
+_SEVERITY_RANK = {name: i for i, name in enumerate(SEVERITIES)}
+DEFAULT_SHARD_TOKENS = 6000
+
+_FILE_HEADER = re.compile(r"^diff --git a/(.+?) b/(.+)$")
+
+
+def split_file_diffs(diff: str) -> List[Dict[str, Any]]:
+    """
+    unified diff をファイルごとに分解
+
+    Returns:
+        [{"path": "app/page.tsx", "header": "diff --git ...\\n+++ b/app/page.tsx\\n", "hunks": ["@@ ...\\n...", ...]}]
+        先頭の "diff --git" より前の行は捨てる。
+    """
+    files: List[Dict[str, Any]] = []
+    current: Optional[Dict[str, Any]] = None
+    for line in diff.splitlines(keepends=True):
+        m = _FILE_HEADER.match(line.rstrip("\n"))
+        if m:
+            current = {"path": m.group(2), "header": line, "hunks": []}
+            files.append(current)
+            continue
+        if current is None:
+            continue
+        if line.startswith("@@"):
+            current["hunks"].append(line)
+        elif current["hunks"]:
+            current["hunks"][-1] += line
+        else:
+            # index / --- / +++ / rename from ... などのヘッダ行
+            current["header"] += line
+            if line.startswith("+++ ") and line[4:].strip() != "/dev/null":
+                target = line[4:].strip()
+                current["path"] = target[2:] if target.startswith("b/") else target
+    return files
+
+
+def _truncate(text: str, budget: int, count_tokens: Callable[[str], int]) -> str:
+    """1 ハンクだけで予算を超える場合は末尾を落として印を付ける"""
+    if count_tokens(text) <= budget:
+        return text
+    lines = text.splitlines(keepends=True)
+    lo, hi = 1, len(lines)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if count_tokens("".join(lines[:mid])) <= budget:
+            lo = mid
+        else:
+            hi = mid - 1
+    return "".join(lines[:lo]) + "... (hunk truncated)\n"
+
+
+def _file_pieces(
+    entry: Dict[str, Any], budget: int, count_tokens: Callable[[str], int]
+) -> List[Tuple[str, bool]]:
+    """1 ファイルを予算内の断片（ヘッダ + ハンク群）に分ける。(text, truncated) のリスト"""
+    header = entry["header"]
+    whole = header + "".join(entry["hunks"])
+    if count_tokens(whole) <= budget or not entry["hunks"]:
+        return [(whole, False)]
+    pieces: List[Tuple[str, bool]] = []
+    room = max(1, budget - count_tokens(header))
+    # ハンクごとに 1 回だけ数え、グループは合計で見る（group + hunk を毎回数え直すと二乗になる）
+    group, group_tokens = "", 0
+    for hunk in entry["hunks"]:
+        hunk_tokens = count_tokens(hunk)
+        if group and group_tokens + hunk_tokens > room:
+            pieces.append((header + group, False))
+            group, group_tokens = "", 0
+        if not group and hunk_tokens > room:
+            pieces.append((header + _truncate(hunk, room, count_tokens), True))
+            continue
+        group += hunk
+        group_tokens += hunk_tokens
+    if group:
+        pieces.append((header + group, False))
+    return pieces
+
+
+def shard_diff(
+    diff: str,
+    max_tokens: int = DEFAULT_SHARD_TOKENS,
+    count_tokens: Callable[[str], int] = estimate_tokens,
+) -> List[Dict[str, Any]]:
+    """
+    diff を max_tokens 以下のシャードに分ける（ファイル順を保ったまま先頭から詰める）
+
+    Returns:
+        [{"index": 0, "files": ["a.ts", "b.ts"], "diff": "...", "tokens": 1234, "truncated": False}]
+        同じファイルが複数シャードにまたがる場合は、それぞれのシャードの files に現れる。
+    """
+    shards: List[Dict[str, Any]] = []
+    current: Dict[str, Any] = {"files": [], "diff": "", "tokens": 0, "truncated": False}
+
+    def flush() -> None:
+        nonlocal current
+        if current["diff"]:
+            current["index"] = len(shards)
+            shards.append(current)
+        current = {"files": [], "diff": "", "tokens": 0, "truncated": False}
+
+    for entry in split_file_diffs(diff):
+        for text, truncated in _file_pieces(entry, max_tokens, count_tokens):
+            tokens = count_tokens(text)
+            if current["diff"] and current["tokens"] + tokens > max_tokens:
+                flush()
+            current["diff"] += text
+            current["tokens"] += tokens
+            current["truncated"] = current["truncated"] or truncated
+            if entry["path"] not in current["files"]:
+                current["files"].append(entry["path"])
+    flush()
+    return [
+        {"index": s["index"], "files": s["files"], "diff": s["diff"], "tokens": s["tokens"], "truncated": s["truncated"]}
+        for s in shards
+    ]
+
+
+def pack_diff(diff: str, max_tokens: int, model: Optional[str] = None) -> str:
+    """
+    diff を max_tokens 以内の 1 つの diff に詰める（分割レビューしない場合の切り詰め）
+
+    各ファイルのヘッダと 1 つ目のハンクを最優先にし、2 つ目以降のハンクは出現の浅い順に入れる。
+    中央を丸ごと落とす単純な切り詰めと違い、なるべく全ファイルが少しずつ残る。
+    """
+    items: List[Dict[str, Any]] = []
+    for entry in split_file_diffs(diff):
+        hunks = entry["hunks"] or [""]
+        for depth, hunk in enumerate(hunks):
+            item: Dict[str, Any] = {"text": entry["header"] + hunk if depth == 0 else hunk, "priority": -depth}
+            if depth:
+                # 手前のハンク（とファイルヘッダ）が入らなかったファイルの後続ハンクは入れない
+                item["after"] = len(items) - 1
+            items.append(item)
+    if not items:
+        return pack_items([{"text": diff}], max_tokens, model)["text"]
+    return pack_items(items, max_tokens, model, separator="")["text"]
+
+
+# ---------------------------------------------------------------------------
+# Reviewer 出力のマージ
+# ---------------------------------------------------------------------------
+
+def normalize_severity(value: Any, default: Optional[str] = None) -> Optional[str]:
+    text = str(value or "").strip().lower()
+    return text if text in _SEVERITY_RANK else default
+
+
+def max_severity(values: Iterable[Any], default: str = "nit") -> str:
+    """最も重い severity を返す（不明な値は無視）"""
+    ranks = [_SEVERITY_RANK[s] for s in (normalize_severity(v) for v in values) if s is not None]
+    return SEVERITIES[max(ranks)] if ranks else default
+
+
+def _finding_key(finding: Dict[str, Any]) -> Tuple[str, str, str]:
+    title = re.sub(r"\s+", " ", str(finding.get("title", ""))).strip().lower()
+    return str(finding.get("file", "")).strip(), str(finding.get("lines", "")).strip(), title
+
+
+def merge_reviews(reviews: List[Dict[str, Any]], shards: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    シャードごとの Reviewer JSON をまとめる
+
+    - findings は (file, lines, 正規化した title) で重複排除し、重い severity の方を残す
+    - file が空の指摘は、そのシャードが 1 ファイルだけならそのファイルで補う
+    - overall_severity は各シャードの overall_severity と全指摘の severity の最大
+    - 並びは severity の重い順、同じ重さは出現順
+
+    Returns:
+        {"summary": str, "overall_severity": str, "findings": [...]}
+    """
+    merged: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+    summaries: List[str] = []
+    severities: List[Any] = []
+    for i, review in enumerate(reviews):
+        if not isinstance(review, dict):
+            continue
+        files = (shards[i].get("files") or []) if shards and i < len(shards) else []
+        severities.append(review.get("overall_severity"))
+        summary = str(review.get("summary") or "").strip()
+        if summary and summary not in summaries:
+            summaries.append(summary)
+        for finding in review.get("findings") or []:
+            if not isinstance(finding, dict):
+                continue
+            finding = dict(finding)
+            if not finding.get("file") and len(files) == 1:
+                finding["file"] = files[0]
+            severity = normalize_severity(finding.get("severity"), "minor")
+            finding["severity"] = severity
+            severities.append(severity)
+            key = _finding_key(finding)
+            kept = merged.get(key)
+            if kept is None or _SEVERITY_RANK[severity] > _SEVERITY_RANK[kept["severity"]]:
+                merged[key] = finding if kept is None else {**kept, **finding}
+    findings = sorted(merged.values(), key=lambda f: -_SEVERITY_RANK[f["severity"]])
+    if len(summaries) > 1:
+        summary = "\n".join(f"- {s}" for s in summaries)
+    else:
+        summary = summaries[0] if summaries else ""
+    return {
+        "summary": summary,
+        "overall_severity": max_severity(severities, default="minor"),
+        "findings": findings,
+    }
@@ -0,0 +1,395 @@
+# -*- coding: utf-8 -*-
+"""
+RLS ポリシーの実行コスト解析ユーティリティ
+- マイグレーション再生結果の各ポリシーの USING / WITH CHECK 式を字句解析し、括弧の入れ子（副問い合わせ）ごとに分解
+- (select auth.uid()) のように包まれていない関数呼び出しを検出（包めば InitPlan として 1 回だけ評価される）
+- 行ごとに評価される関数呼び出し（引数に行のカラムを含む）と、外側の行を参照する相関副問い合わせを検出
+- 述語で絞り込むカラムのうち、どの B-tree インデックスの先頭にも無いものを報告
+- 同じロール / コマンドに複数の PERMISSIVE ポリシーがある（全て OR で評価される）テーブルを報告
+"""
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from .index_coverage import table_access_paths
+
+# 行に依存せず安価な組み込み関数（包まなくてよい）
+_CHEAP_FUNCTIONS = frozenset({
+    "coalesce", "nullif", "greatest", "least", "lower", "upper", "trim", "length", "cast",
+    "now", "array", "row", "array_length", "cardinality",
+})
+# 関数呼び出しと紛らわしいキーワード（直後に括弧が来ても関数ではない）
+_KEYWORDS = frozenset({
+    "select", "from", "where", "join", "inner", "left", "right", "full", "outer", "cross", "on", "as",
+    "and", "or", "not", "in", "is", "exists", "any", "all", "some", "values", "case", "when", "then",
+    "else", "end", "null", "true", "false", "like", "ilike", "between", "distinct", "using", "limit",
+    "group", "by", "order", "having", "lateral",
+})
+_COMPARE_OPS = frozenset({"=", "<", ">", "<=", ">=", "<>", "!=", "in", "is", "like", "ilike", "between", "@>", "<@", "&&"})
+_ALL_COMMANDS = ("SELECT", "INSERT", "UPDATE", "DELETE")
+# Supabase でクライアントが使うロール（public は全ロールに効く）
+_CLIENT_ROLES = ("anon", "authenticated")
+
+_TOKEN = re.compile(
+    r"\s*(?:"
+    r"(?P<string>'(?:[^']|'')*')"
+    r"|(?P<quoted>\"[^\"]+\")"
+    r"|(?P<number>\d+(?:\.\d+)?)"
+    r"|(?P<ident>[A-Za-z_][\w$]*)"
+    r"|(?P<op><=|>=|<>|!=|::|@>|<@|&&|\|\||[=<>(),.*+\-/%\[\]])"
+    r")"
+)
+
+
+# ---------------------------------------------------------------------------
+# 式の字句解析と入れ子の構築
+# ---------------------------------------------------------------------------
+
+def _tokenize(expression: str) -> List[Tuple[str, str]]:
+    """(種類, 値) の列。識別子はドットでつないだ 1 つの名前にまとめる（auth.uid / sp.facility_id）"""
+    tokens: List[Tuple[str, str]] = []
+    pos = 0
+    while pos < len(expression):
+        m = _TOKEN.match(expression, pos)
+        if not m or m.end() == pos:
+            if expression[pos:].strip():
+                pos += 1
+                continue
+            break
+        pos = m.end()
+        kind = m.lastgroup or ""
+        value = m.group(kind)
+        if kind == "quoted":
+            kind, value = "ident", value[1:-1]
+        if kind == "ident" and len(tokens) >= 2 and tokens[-1] == ("op", ".") and tokens[-2][0] == "name":
+            tokens.pop()
+            tokens[-1] = ("name", f"{tokens[-1][1]}.{value}")
+            continue
+        if kind == "ident":
+            kind = "keyword" if value.lower() in _KEYWORDS else "name"
+            value = value.lower() if kind == "keyword" else value
+        tokens.append((kind, value))
+    return tokens
+
+
+class _Group:
+    """括弧 1 組分の中身。items はトークンか入れ子の _Group"""
+
+    def __init__(self, items: List[Any]) -> None:
+        self.items = items
+
+    @property
+    def is_subquery(self) -> bool:
+        return bool(self.items) and self.items[0] == ("keyword", "select")
+
+    @property
+    def has_from(self) -> bool:
+        return ("keyword", "from") in self.items
+
+
+def _build_groups(tokens: Sequence[Tuple[str, str]]) -> _Group:
+    stack: List[List[Any]] = [[]]
+    for token in tokens:
+        if token == ("op", "("):
+            stack.append([])
+        elif token == ("op", ")") and len(stack) > 1:
+            group = _Group(stack.pop())
+            stack[-1].append(group)
+        else:
+            stack[-1].append(token)
+    while len(stack) > 1:
+        group = _Group(stack.pop())
+        stack[-1].append(group)
+    return _Group(stack[0])
+
+
+def _short(name: str) -> str:
+    return name.rsplit(".", 1)[-1]
+
+
+def _render(item: Any) -> str:
+    if isinstance(item, _Group):
+        return "(" + " ".join(_render(i) for i in item.items) + ")"
+    return item[1] if item[0] != "keyword" else item[1].upper()
+
+
+# ---------------------------------------------------------------------------
+# スコープ（FROM 句の別名）と参照の解決
+# ---------------------------------------------------------------------------
+
+def _from_tables(group: _Group) -> Dict[str, str]:
+    """副問い合わせの FROM / JOIN に現れるテーブル: {別名または短い名前: テーブル名}"""
+    aliases: Dict[str, str] = {}
+    items = group.items
+    for i, item in enumerate(items):
+        if item not in (("keyword", "from"), ("keyword", "join")):
+            continue
+        j = i + 1
+        while j < len(items):
+            if not (isinstance(items[j], tuple) and items[j][0] == "name"):
+                break
+            table = _short(items[j][1])
+            alias = table
+            k = j + 1
+            if k < len(items) and items[k] == ("keyword", "as"):
+                k += 1
+            if k < len(items) and isinstance(items[k], tuple) and items[k][0] == "name":
+                alias = items[k][1]
+                k += 1
+            aliases[alias] = table
+            aliases.setdefault(table, table)
+            # FROM a, b のカンマ区切り
+            if k < len(items) and items[k] == ("op", ","):
+                j = k + 1
+                continue
+            break
+    return aliases
+
+
+class _Scope:
+    def __init__(self, tables: Dict[str, str], parent: Optional["_Scope"], depth: int) -> None:
+        self.tables = tables
+        self.parent = parent
+        self.depth = depth
+
+    def resolve(self, ref: str, schema: Dict[str, Any]) -> Optional[Tuple[str, str, int]]:
+        """カラム参照を (テーブル, カラム, 解決したスコープの深さ) にする。解決できなければ None"""
+        if "." in ref:
+            qualifier, column = ref.rsplit(".", 1)
+            qualifier = _short(qualifier)
+            scope: Optional[_Scope] = self
+            while scope is not None:
+                if qualifier in scope.tables:
+                    return scope.tables[qualifier], column, scope.depth
+                scope = scope.parent
+            return None
+        # SQL と同じく内側のスコープから探す。カラムが分からないテーブル（マイグレーション外）は持っているとみなす
+        scope = self
+        while scope is not None:
+            for table in dict.fromkeys(scope.tables.values()):
+                info = schema["tables"].get(table)
+                if info is None or not info["columns"] or ref in info["columns"]:
+                    return table, ref, scope.depth
+            scope = scope.parent
+        return None
+
+
+# ---------------------------------------------------------------------------
+# 1 つの式の解析
+# ---------------------------------------------------------------------------
+
+def _is_name(item: Any) -> bool:
+    return isinstance(item, tuple) and item[0] == "name"
+
+
+def _is_table_position(items: List[Any], i: int) -> bool:
+    """FROM / JOIN / AS の直後や型キャストの後ろなど、カラムではない名前の位置か"""
+    if i == 0:
+        return False
+    prev = items[i - 1]
+    if prev in (("keyword", "from"), ("keyword", "join"), ("keyword", "as"), ("op", "::")):
+        return True
+    # FROM t alias の alias
+    if _is_name(prev) and i >= 2 and items[i - 2] in (("keyword", "from"), ("keyword", "join")):
+        return True
+    return False
+
+
+def _column_refs(group: _Group) -> List[str]:
+    """入れ子を含めた式中のカラム参照（関数名・テーブル名・別名を除く）"""
+    refs: List[str] = []
+    items = group.items
+    for i, item in enumerate(items):
+        if isinstance(item, _Group):
+            refs.extend(_column_refs(item))
+        elif _is_name(item) and not _is_table_position(items, i):
+            if i + 1 < len(items) and isinstance(items[i + 1], _Group):
+                continue
+            refs.append(item[1])
+    return refs
+
+
+def _comparison_refs(items: List[Any]) -> List[str]:
+    """比較演算子の左右に直接現れるカラム参照"""
+    refs: List[str] = []
+    for i, item in enumerate(items):
+        if not _is_name(item) or _is_table_position(items, i):
+            continue
+        if i + 1 < len(items) and isinstance(items[i + 1], _Group):
+            # 関数呼び出し
+            continue
+        before = items[i - 1] if i > 0 else None
+        after = items[i + 1] if i + 1 < len(items) else None
+        if (isinstance(after, tuple) and after[1] in _COMPARE_OPS) or (isinstance(before, tuple) and before[1] in _COMPARE_OPS):
+            refs.append(item[1])
+    return refs
+
+
+def _analyze_expression(
+    expression: str,
+    table: str,
+    schema: Dict[str, Any],
+    scan_filters: bool = True,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Set[str]]]:
+    """
+    scan_filters=False（WITH CHECK）のときは、対象テーブル自身のカラムを絞り込みとして数えない
+    （新しい 1 行を検査するだけで、テーブルを走査しないため）
+
+    Returns:
+        (所見のリスト, {テーブル: 絞り込みに使うカラムの集合})
+    """
+    findings: List[Dict[str, Any]] = []
+    filters: Dict[str, Set[str]] = {}
+    root = _build_groups(_tokenize(expression))
+
+    def visit(group: _Group, scope: _Scope, wrapped: bool) -> None:
+        items = group.items
+        for ref in _comparison_refs(items):
+            resolved = scope.resolve(ref, schema)
+            # 外側の行の値は副問い合わせにとってはパラメータなので、そのスコープのカラムだけを数える
+            if resolved is not None and resolved[2] == scope.depth and (scan_filters or scope.depth > 0):
+                filters.setdefault(resolved[0], set()).add(resolved[1])
+        for i, item in enumerate(items):
+            if not isinstance(item, _Group):
+                continue
+            prev = items[i - 1] if i > 0 else None
+            if _is_name(prev) and not _is_table_position(items, i - 1):
+                _check_call(prev[1], item, scope, wrapped)
+                visit(item, scope, wrapped=False)
+            elif item.is_subquery:
+                _check_subquery(item, scope)
+                visit(item, _Scope(_from_tables(item), scope, scope.depth + 1), wrapped=not item.has_from)
+            else:
+                visit(item, scope, wrapped=False)
+
+    def _check_call(name: str, args: _Group, scope: _Scope, wrapped: bool) -> None:
+        if name.lower() in _CHEAP_FUNCTIONS:
+            return
+        row_refs = [ref for ref in _column_refs(args) if scope.resolve(ref, schema) is not None]
+        if row_refs:
+            findings.append({
+                "kind": "per_row_function",
+                "detail": f"{name}({_render(args)[1:-1]}) is evaluated for every row ({', '.join(row_refs)})",
+                "suggestion": "Move the row-independent part into (select ...) and compare the column against it",
+            })
+        elif not wrapped:
+            findings.append({
+                "kind": "unwrapped_function",
+                "detail": f"{name}() is not wrapped in (select ...) and may run once per row",
+                "suggestion": f"Use (select {name}({_render(args)[1:-1]})) so the planner caches it as an InitPlan",
+            })
+
+    def _check_subquery(group: _Group, scope: _Scope) -> None:
+        if not group.has_from:
+            return
+        inner = _Scope(_from_tables(group), scope, scope.depth + 1)
+        outer_refs = sorted({
+            f"{resolved[0]}.{resolved[1]}"
+            for resolved in (inner.resolve(ref, schema) for ref in _column_refs(group))
+            if resolved is not None and resolved[2] < inner.depth
+        })
+        if outer_refs:
+            tables = ", ".join(sorted(set(inner.tables.values())))
+            findings.append({
+                "kind": "correlated_subquery",
+                "detail": f"subquery on {tables} references the outer row ({', '.join(outer_refs)}) and runs per row",
+                "suggestion": "Rewrite as column IN (SELECT ... WHERE ... = (select auth.uid())) so it is evaluated once",
+            })
+
+    visit(root, _Scope({table: table, _short(table): table}, None, 0), wrapped=False)
+    return findings, filters
+
+
+# ---------------------------------------------------------------------------
+# スキーマ全体の解析
+# ---------------------------------------------------------------------------
+
+def _leading_columns(schema: Dict[str, Any], table: str) -> Set[str]:
+    return {path["columns"][0] for path in table_access_paths(schema, table) if path["columns"]}
+
+
+def _constant(expression: Optional[str]) -> bool:
+    return expression is None or expression.strip().lower() in ("true", "false")
+
+
+def _permissive_overlaps(table: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """同じロール × コマンドに効く PERMISSIVE ポリシーが 2 つ以上ある組"""
+    applies: Dict[Tuple[str, str], List[str]] = {}
+    for policy in table["policies"].values():
+        if not policy["permissive"]:
+            continue
+        clause = policy["with_check"] if policy["command"] == "INSERT" else policy["using"]
+        if clause is not None and clause.strip().lower() == "false":
+            continue
+        roles = set(policy["roles"])
+        if "public" in roles:
+            roles = (roles - {"public"}) | set(_CLIENT_ROLES)
+        commands = _ALL_COMMANDS if policy["command"] == "ALL" else (policy["command"],)
+        for role in roles:
+            for command in commands:
+                applies.setdefault((role, command), []).append(policy["name"])
+    return [
+        {"role": role, "command": command, "policies": names}
+        for (role, command), names in sorted(applies.items()) if len(names) > 1
+    ]
+
+
+def analyze_rls_policies(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    再生済みスキーマの全ポリシーを解析する
+
+    Returns:
+        {
+            "policies": [{"table", "name", "command", "roles", "clauses": {"using": [...], "with_check": [...]}}, ...],
+            "findings": [{"table", "policy", "clause", "kind", "detail", "suggestion"}, ...],
+            "unindexed": [{"table", "columns", "policies"}, ...],
+            "multiple_permissive": [{"table", "role", "command", "policies"}, ...],
+        }
+        kind は unwrapped_function / per_row_function / correlated_subquery。
+    """
+    policies: List[Dict[str, Any]] = []
+    findings: List[Dict[str, Any]] = []
+    unindexed: Dict[Tuple[str, Tuple[str, ...]], List[str]] = {}
+    multiple_permissive: List[Dict[str, Any]] = []
+
+    for table in schema["tables"].values():
+        for policy in table["policies"].values():
+            clauses: Dict[str, List[Dict[str, Any]]] = {}
+            for clause in ("using", "with_check"):
+                expression = policy[clause]
+                if _constant(expression):
+                    continue
+                clause_findings, filters = _analyze_expression(
+                    expression, table["name"], schema, scan_filters=clause == "using"
+                )
+                clauses[clause] = clause_findings
+                for finding in clause_findings:
+                    findings.append({"table": table["name"], "policy": policy["name"], "clause": clause, **finding})
+                for filter_table, columns in filters.items():
+                    if filter_table not in schema["tables"]:
+                        continue
+                    if not columns & _leading_columns(schema, filter_table):
+                        key = (filter_table, tuple(sorted(columns)))
+                        label = f"{table['name']}.{policy['name']}"
+                        if label not in unindexed.setdefault(key, []):
+                            unindexed[key].append(label)
+            policies.append({
+                "table": table["name"],
+                "name": policy["name"],
+                "command": policy["command"],
+                "roles": policy["roles"],
+                "clauses": clauses,
+            })
+        for overlap in _permissive_overlaps(table):
+            multiple_permissive.append({"table": table["name"], **overlap})
+
+    return {
+        "policies": policies,
+        "findings": findings,
+        "unindexed": [
+            {"table": t, "columns": list(columns), "policies": names}
+            for (t, columns), names in sorted(unindexed.items())
+        ],
+        "multiple_permissive": multiple_permissive,
+    }
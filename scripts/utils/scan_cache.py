@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+ファイル単位の解析結果キャッシュ
+- パス + mtime/サイズ + 内容ハッシュをキーに、解析結果を JSON で永続化
+- mtime/サイズが一致すればファイルを読まずにヒット（高速パス）
+- mtime だけ変わった場合（CI の checkout 直後など）は内容ハッシュで再確認
+- version が変わると既存エントリはすべて無効化
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+# キャッシュファイルの既定の置き場所（.gitignore 済み）
+DEFAULT_CACHE_DIR = Path(".cache") / "agents"
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    # ヒットしたエントリを作成したときの解析時間の合計（= 今回節約できた推定時間）
+    saved_seconds: float = 0.0
+    # ミスしたファイルの解析に実際にかかった時間
+    spent_seconds: float = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "saved_seconds": round(self.saved_seconds, 4),
+            "spent_seconds": round(self.spent_seconds, 4),
+        }
+
+
+def file_digest(path: Path) -> str:
+    """ファイル内容の SHA-256（チャンク読みでメモリを一定に保つ）"""
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ScanCache:
+    """
+    解析結果の永続キャッシュ
+
+    使い方:
+        cache = ScanCache.load(path, version="i18n-3:abcd")
+        value = cache.get(key, file_path)
+        if value is None:
+            value = parse(file_path)
+            cache.put(key, file_path, value, elapsed)
+        cache.save()
+    """
+
+    def __init__(self, path: Path, version: str, entries: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.path = path
+        self.version = version
+        self.entries: Dict[str, Dict[str, Any]] = entries or {}
+        self.stats = CacheStats()
+        self._dirty = False
+
+    @classmethod
+    def load(cls, path: Path, version: str) -> "ScanCache":
+        """キャッシュを読み込む。壊れている/version 不一致なら空で開始"""
+        entries: Dict[str, Dict[str, Any]] = {}
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            if isinstance(data, dict) and data.get("version") == version:
+                entries = data.get("entries") or {}
+        except (OSError, ValueError):
+            pass
+        cache = cls(path, version, entries)
+        # version 不一致で捨てた場合も次回 save で書き直す
+        cache._dirty = not entries and path.exists()
+        return cache
+
+    def get(self, key: str, file_path: Path) -> Optional[Any]:
+        """有効なエントリがあれば値を返し、なければ None（統計も更新）"""
+        entry = self.entries.get(key)
+        if entry is not None:
+            try:
+                st = file_path.stat()
+            except OSError:
+                st = None
+            if st is not None and entry.get("size") == st.st_size:
+                fresh = entry.get("mtime_ns") == st.st_mtime_ns
+                if not fresh and entry.get("sha256") == file_digest(file_path):
+                    # 内容は同じで mtime だけ変わった → mtime を更新してヒット扱い
+                    entry["mtime_ns"] = st.st_mtime_ns
+                    self._dirty = True
+                    fresh = True
+                if fresh:
+                    self.stats.hits += 1
+                    self.stats.saved_seconds += float(entry.get("elapsed", 0.0))
+                    return entry["value"]
+        self.stats.misses += 1
+        return None
+
+    def put(self, key: str, file_path: Path, value: Any, elapsed: float = 0.0) -> None:
+        try:
+            st = file_path.stat()
+            digest = file_digest(file_path)
+        except OSError:
+            return
+        self.entries[key] = {
+            "mtime_ns": st.st_mtime_ns,
+            "size": st.st_size,
+            "sha256": digest,
+            "elapsed": elapsed,
+            "value": value,
+        }
+        self.stats.spent_seconds += elapsed
+        self._dirty = True
+
+    def prune(self, keep: Iterable[str]) -> None:
+        """今回の走査で見つからなかったファイルのエントリを削除"""
+        keep_set = set(keep)
+        stale = [k for k in self.entries if k not in keep_set]
+        for k in stale:
+            del self.entries[k]
+        if stale:
+            self._dirty = True
+
+    def save(self) -> None:
+        """変更があれば一時ファイル経由でアトミックに書き出す"""
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(
+            json.dumps({"version": self.version, "entries": self.entries}, ensure_ascii=False),
+            encoding="utf-8",
+        )
+        os.replace(tmp, self.path)
+        self._dirty = False
@@ -0,0 +1,402 @@
+# -*- coding: utf-8 -*-
+"""
+TypeScript の zod スキーマ（schemas/*.ts）と SQL テーブル定義のずれ検出ユーティリティ
+- `const X = z.object({...})` を読み、フィールドごとに型 / 形式 / 必須・null 可否 / 最大長へ正規化
+  （同じファイル内の別スキーマ参照や .optional() / .default() などの修飾子も解決）
+- マイグレーション再生結果のカラムも同じ形に正規化し、camelCase → snake_case と別名で突き合わせ
+- 対応するカラムが無いフィールドは JSON カラム（case_records.record_data）に入るものとして区別
+- 比較結果は (スキーマファイル, テーブル定義のハッシュ) 単位でキャッシュし、どちらかが変わった組だけ比較し直す
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .scan_cache import DEFAULT_CACHE_DIR, ScanCache
+from .source_reader import read_source_text
+from .ts_lexer import find_closing, mask_source
+
+# 正規化や判定の規則を変えたら上げる（キャッシュ済みの比較結果を破棄させる）
+SCHEMA_DRIFT_VERSION = 1
+SCHEMA_DRIFT_CACHE_PATH = DEFAULT_CACHE_DIR / "schema-drift.json"
+SCHEMAS_DIR = Path("schemas")
+
+# スキーマの書き込み先テーブルと、カラムに無いフィールドを受ける JSON カラム・フィールド名の別名
+DRIFT_TARGETS: Dict[str, Dict[str, Any]] = {
+    "case_records": {
+        "json_column": "record_data",
+        "aliases": {"date": "record_date", "time": "record_time"},
+    },
+}
+
+_DECLARATION = re.compile(r"(?:^|\n)[ \t]*(?:export\s+)?const\s+([A-Za-z_$][\w$]*)\s*(?::[^=\n]+)?=\s*", re.M)
+_ZOD_CALL = re.compile(r"\s*z\s*\.\s*([A-Za-z_$][\w$]*)\s*\(")
+_REFERENCE = re.compile(r"\s*([A-Za-z_$][\w$]*)")
+_METHOD_CALL = re.compile(r"\s*\.\s*([A-Za-z_$][\w$]*)\s*\(")
+_OBJECT_KEY = re.compile(r"\s*(?:([A-Za-z_$][\w$]*)|(['\"])(.*?)\2)\s*:\s*", re.S)
+_NUMBER = re.compile(r"\s*(\d+)\s*")
+
+_STRING_FORMATS = frozenset({"uuid", "cuid", "cuid2", "ulid", "email", "url", "datetime", "date", "time", "ip"})
+_SQL_TYPES: Tuple[Tuple[str, str, Optional[str]], ...] = (
+    (r"uuid", "string", "uuid"),
+    (r"(?:character varying|varchar|char(?:acter)?|text|citext|bpchar)\b.*", "string", None),
+    (r"(?:smallint|integer|int[248]?|bigint|smallserial|serial[48]?|bigserial)\b.*", "integer", None),
+    (r"(?:numeric|decimal|real|double precision|float[48]?|money)\b.*", "number", None),
+    (r"bool(?:ean)?", "boolean", None),
+    (r"date", "string", "date"),
+    (r"timestamp.*|timestamptz", "string", "datetime"),
+    (r"time.*|timetz", "string", "time"),
+    (r"jsonb?", "json", None),
+)
+
+
+# ---------------------------------------------------------------------------
+# zod スキーマの読み取り
+# ---------------------------------------------------------------------------
+
+def _expression_end(masked: str, start: int) -> int:
+    """宣言の右辺の終端（トップレベルの ; か、次の行が . で続かない改行）"""
+    depth = 0
+    i = start
+    while i < len(masked):
+        c = masked[i]
+        if c in "([{":
+            depth += 1
+        elif c in ")]}":
+            depth -= 1
+        elif depth == 0 and c == ";":
+            return i
+        elif depth == 0 and c == "\n":
+            rest = masked[i:].lstrip()
+            if not rest.startswith("."):
+                return i
+        i += 1
+    return i
+
+
+def _split_entries(masked: str, text: str, start: int, end: int) -> List[Tuple[str, str]]:
+    """{ ... } の中身をトップレベルのカンマで分け、(マスク済み, 元テキスト) の組で返す"""
+    parts: List[Tuple[str, str]] = []
+    depth = 0
+    begin = start
+    for i in range(start, end):
+        c = masked[i]
+        if c in "([{":
+            depth += 1
+        elif c in ")]}":
+            depth -= 1
+        elif c == "," and depth == 0:
+            parts.append((masked[begin:i], text[begin:i]))
+            begin = i + 1
+    if text[begin:end].strip():
+        parts.append((masked[begin:end], text[begin:end]))
+    return parts
+
+
+def _new_field(kind: str) -> Dict[str, Any]:
+    return {"type": kind, "format": None, "optional": False, "nullable": False, "has_default": False,
+            "max_length": None, "integer": False, "items": None, "fields": None, "values": None, "ref": None}
+
+
+def _parse_zod(masked: str, text: str, declarations: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """zod の式 1 つを正規化したフィールド定義にする（未知の形は type="unknown"）"""
+    m = _ZOD_CALL.match(masked)
+    if m:
+        kind = m.group(1)
+        close = find_closing(masked, m.end() - 1)
+        args_masked, args_text = masked[m.end():close], text[m.end():close]
+        if kind == "object":
+            field = _new_field("object")
+            field["fields"] = _parse_object(args_masked, args_text, declarations)
+        elif kind == "array":
+            field = _new_field("array")
+            field["items"] = _parse_zod(args_masked, args_text, declarations)
+        elif kind == "enum":
+            field = _new_field("enum")
+            field["values"] = re.findall(r"['\"]([^'\"]*)['\"]", args_text.split("]")[0])
+        elif kind in ("string", "number", "boolean", "date", "bigint"):
+            field = _new_field({"date": "string", "bigint": "integer"}.get(kind, kind))
+            if kind == "date":
+                field["format"] = "datetime"
+        else:
+            field = _new_field("unknown")
+        pos = close + 1
+    else:
+        ref = _REFERENCE.match(masked)
+        if not ref:
+            return _new_field("unknown")
+        target = declarations.get(ref.group(1))
+        field = _new_field("unknown")
+        if target is not None:
+            field.update({k: v for k, v in target.items() if k not in ("line", "root")})
+        field["ref"] = ref.group(1)
+        pos = ref.end()
+    # 修飾子のチェーン
+    while True:
+        call = _METHOD_CALL.match(masked, pos)
+        if not call:
+            break
+        close = find_closing(masked, call.end() - 1)
+        method, args = call.group(1), text[call.end():close]
+        if method == "optional":
+            field["optional"] = True
+        elif method == "nullable":
+            field["nullable"] = True
+        elif method == "nullish":
+            field["optional"] = field["nullable"] = True
+        elif method == "default":
+            field["has_default"] = True
+        elif method == "int":
+            field["integer"] = True
+        elif method in _STRING_FORMATS:
+            field["format"] = method
+        elif method in ("max", "length") and field["type"] == "string":
+            number = _NUMBER.match(args)
+            if number:
+                field["max_length"] = int(number.group(1))
+        pos = close + 1
+    return field
+
+
+def _parse_object(masked: str, text: str, declarations: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    open_index = masked.find("{")
+    if open_index < 0:
+        return {}
+    close = find_closing(masked, open_index)
+    fields: Dict[str, Dict[str, Any]] = {}
+    for entry_masked, entry_text in _split_entries(masked, text, open_index + 1, close):
+        # 前の行末のコメントが混ざるので、位置はマスク済みの側で取り、名前は元テキストから読む
+        key = _OBJECT_KEY.match(entry_masked)
+        if not key:
+            continue
+        name = key.group(1) if key.group(1) is not None else entry_text[key.start(3):key.end(3)]
+        fields[name] = _parse_zod(entry_masked[key.end():], entry_text[key.end():], declarations)
+    return fields
+
+
+def parse_zod_schemas(text: str) -> Dict[str, Dict[str, Any]]:
+    """
+    ファイル内の `const X = z....` を宣言順に読む
+
+    Returns:
+        {名前: {"line", "root", "type", "fields", ...}}。root は同じファイルの他のスキーマから参照されていないもの
+    """
+    masked = mask_source(text)
+    declarations: Dict[str, Dict[str, Any]] = {}
+    for m in _DECLARATION.finditer(masked):
+        end = _expression_end(masked, m.end())
+        expr_masked = masked[m.end():end]
+        if not _ZOD_CALL.match(expr_masked) and not _REFERENCE.match(expr_masked):
+            continue
+        field = _parse_zod(expr_masked, text[m.end():end], declarations)
+        if field["type"] == "unknown":
+            continue
+        field["line"] = text.count("\n", 0, m.start(1)) + 1
+        declarations[m.group(1)] = field
+    referenced = set()
+
+    def collect(field: Optional[Dict[str, Any]]) -> None:
+        if not field:
+            return
+        if field.get("ref"):
+            referenced.add(field["ref"])
+        collect(field.get("items"))
+        for child in (field.get("fields") or {}).values():
+            collect(child)
+
+    for field in declarations.values():
+        for child in (field.get("fields") or {}).values():
+            collect(child)
+        collect(field.get("items"))
+    for name, field in declarations.items():
+        field["root"] = name not in referenced
+    return declarations
+
+
+# ---------------------------------------------------------------------------
+# SQL 側の正規化と比較
+# ---------------------------------------------------------------------------
+
+def normalize_sql_column(column: Dict[str, Any]) -> Dict[str, Any]:
+    """再生済みスキーマのカラムを {type, format, nullable, has_default, max_length, array} にする"""
+    raw = column["type"].strip().lower()
+    array = raw.endswith("[]")
+    raw = raw[:-2].strip() if array else raw
+    kind, fmt = "unknown", None
+    for pattern, mapped, mapped_format in _SQL_TYPES:
+        if re.fullmatch(pattern, raw):
+            kind, fmt = mapped, mapped_format
+            break
+    length = re.search(r"(?:varchar|character varying|char(?:acter)?)\s*\(\s*(\d+)\s*\)", raw)
+    return {
+        "type": "array" if array else kind,
+        "items": kind if array else None,
+        "format": fmt,
+        "nullable": bool(column["nullable"]),
+        "has_default": bool(column.get("default")),
+        "max_length": int(length.group(1)) if length else None,
+    }
+
+
+def _snake(name: str) -> str:
+    return re.sub(r"(?<=[a-z0-9])([A-Z])", r"_\1", name).lower()
+
+
+def _drift(kind: str, severity: str, field: str, column: Optional[str], detail: str) -> Dict[str, Any]:
+    return {"kind": kind, "severity": severity, "field": field, "column": column, "detail": detail}
+
+
+def _compare_field(name: str, field: Dict[str, Any], column_name: str, column: Dict[str, Any]) -> List[Dict[str, Any]]:
+    drifts: List[Dict[str, Any]] = []
+    ztype = "string" if field["type"] == "enum" else field["type"]
+    ctype = column["type"]
+    compatible = (
+        ztype == ctype
+        or (ztype == "number" and ctype == "integer")
+        or (ctype == "json" and ztype in ("object", "array", "string", "number", "boolean", "enum"))
+        or ztype == "unknown" or ctype == "unknown"
+    )
+    if not compatible:
+        drifts.append(_drift("type", "error", name, column_name, f"schema `{ztype}` vs column `{ctype}`"))
+    elif ztype == "number" and ctype == "integer" and not field["integer"]:
+        drifts.append(_drift("type", "warning", name, column_name,
+                             "schema allows fractional numbers but the column is an integer (add .int())"))
+    if ztype == "string" and column["format"] == "uuid" and field["format"] != "uuid":
+        severity = "error" if field["format"] else "warning"
+        shown = f".{field['format']}()" if field["format"] else "any string"
+        drifts.append(_drift("format", severity, name, column_name, f"schema accepts {shown} but the column is uuid"))
+    if column["max_length"] is not None and (field["max_length"] is None or field["max_length"] > column["max_length"]):
+        shown = field["max_length"] if field["max_length"] is not None else "unbounded"
+        drifts.append(_drift("length", "warning", name, column_name,
+                             f"schema max length {shown} exceeds the column limit {column['max_length']}"))
+    may_be_missing = field["optional"] or field["nullable"]
+    if may_be_missing and not field["has_default"] and not column["nullable"] and not column["has_default"]:
+        drifts.append(_drift("nullability", "error", name, column_name,
+                             "schema allows the field to be missing/null but the column is NOT NULL without a default"))
+    elif column["nullable"] and not may_be_missing:
+        drifts.append(_drift("nullability", "warning", name, column_name,
+                             "column is nullable but the schema requires a value (reads may fail validation)"))
+    return drifts
+
+
+def table_signature(table: Dict[str, Any], target: Dict[str, Any]) -> str:
+    """比較に使うテーブル側の入力（正規化済みカラムと対応付けの設定）のハッシュ"""
+    payload = {
+        "columns": {name: normalize_sql_column(col) for name, col in table["columns"].items()},
+        "target": target,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def diff_schema_table(
+    name: str,
+    schema: Dict[str, Any],
+    table: Dict[str, Any],
+    target: Dict[str, Any],
+) -> Dict[str, Any]:
+    """
+    1 つの zod オブジェクトスキーマとテーブルを比べる
+
+    Returns:
+        {"schema", "table", "line", "matched": [{"field", "column"}], "json_fields": [...], "drift": [...]}
+    """
+    columns = {col_name: normalize_sql_column(col) for col_name, col in table["columns"].items()}
+    json_column = target.get("json_column")
+    aliases = target.get("aliases") or {}
+    matched: List[Dict[str, str]] = []
+    json_fields: List[str] = []
+    drift: List[Dict[str, Any]] = []
+    used = set()
+    for field_name, field in (schema.get("fields") or {}).items():
+        column_name = next(
+            (c for c in (aliases.get(field_name), field_name, _snake(field_name)) if c and c in columns and c != json_column),
+            None,
+        )
+        if column_name is None:
+            if json_column and json_column in columns:
+                json_fields.append(field_name)
+            else:
+                drift.append(_drift("missing_column", "error", field_name, None,
+                                    f"no column `{_snake(field_name)}` on {table['name']}"))
+            continue
+        used.add(column_name)
+        matched.append({"field": field_name, "column": column_name})
+        drift.extend(_compare_field(field_name, field, column_name, columns[column_name]))
+    for column_name, column in columns.items():
+        if column_name in used or column_name == json_column:
+            continue
+        if not column["nullable"] and not column["has_default"]:
+            drift.append(_drift("unset_column", "info", "", column_name,
+                             "NOT NULL column without a default is not part of the schema (must be set by the API)"))
+    return {
+        "schema": name,
+        "table": table["name"],
+        "line": schema.get("line"),
+        "matched": matched,
+        "json_fields": json_fields,
+        "drift": drift,
+    }
+
+
+def _diff_file(path: Path, tables: Dict[str, Dict[str, Any]], targets: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    text = read_source_text(path)
+    results = []
+    for name, schema in parse_zod_schemas(text).items():
+        if not schema["root"] or schema["type"] != "object":
+            continue
+        for table_name, target in targets.items():
+            if table_name in tables:
+                results.append({"file": str(path), **diff_schema_table(name, schema, tables[table_name], target)})
+    return results
+
+
+def detect_schema_drift(
+    sql_schema: Dict[str, Any],
+    schema_dir: Path = SCHEMAS_DIR,
+    targets: Optional[Dict[str, Dict[str, Any]]] = None,
+    use_cache: bool = True,
+    cache_path: Optional[Path] = None,
+) -> Dict[str, Any]:
+    """
+    schemas/*.ts のルートスキーマと対象テーブルのずれを求める
+
+    Returns:
+        {
+            "pairs": [{"file", "schema", "table", "line", "matched", "json_fields", "drift"}, ...],
+            "files": [str, ...],
+            "missing_tables": [str, ...],
+            "cache_stats": {"hits", "misses", ...} | None,
+        }
+    """
+    targets = DRIFT_TARGETS if targets is None else targets
+    tables = {name: sql_schema["tables"][name] for name in targets if name in sql_schema["tables"]}
+    files = sorted(schema_dir.glob("*.ts")) if schema_dir.is_dir() else []
+    signature = ",".join(f"{name}:{table_signature(tables[name], targets[name])}" for name in sorted(tables))
+    cache = ScanCache.load(cache_path or SCHEMA_DRIFT_CACHE_PATH, f"drift-{SCHEMA_DRIFT_VERSION}") if use_cache else None
+
+    pairs: List[Dict[str, Any]] = []
+    keys = []
+    for path in files:
+        # テーブル定義が変わればキーが変わり、ファイルが変われば ScanCache が内容ハッシュで検出する
+        key = f"{path}@{signature}"
+        keys.append(key)
+        results = cache.get(key, path) if cache is not None else None
+        if results is None:
+            start = time.perf_counter()
+            results = _diff_file(path, tables, targets)
+            if cache is not None:
+                cache.put(key, path, results, time.perf_counter() - start)
+        pairs.extend(results)
+    if cache is not None:
+        cache.prune(keys)
+        cache.save()
+    return {
+        "pairs": pairs,
+        "files": [str(p) for p in files],
+        "missing_tables": sorted(name for name in targets if name not in tables),
+        "cache_stats": cache.stats.as_dict() if cache is not None else None,
+    }
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+ソースファイル読み込みユーティリティ
+- 行単位のストリーミング読み込み（ファイル全体 + split 結果の二重保持をしない）
+- 大きいファイルは mmap 上で事前検索し、該当しなければ Python 側へ読み込まない
+- UTF-8 として不正なバイトは置換文字にして読み進める（例外で止めない）
+- サイズ上限を超えるファイル（生成物・ソースマップなど）はスキップして記録
+"""
+from __future__ import annotations
+
+import mmap
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Pattern
+
+from .ts_lexer import iter_lines
+
+# これ以上のファイルはスキャンせずスキップとして報告
+DEFAULT_MAX_FILE_BYTES = 2 * 1024 * 1024
+# これ以上のファイルは一括読み込みせず mmap で事前検索 + ストリーム読み
+MMAP_THRESHOLD = 256 * 1024
+
+
+@dataclass
+class SourcePolicy:
+    """
+    読み込み対象の判定と、スキップしたファイルの記録
+
+    使い方:
+        policy = SourcePolicy(max_bytes=1_000_000)
+        targets = [p for p in paths if policy.admit(p)]
+        policy.skipped  # [{"path": "...", "size": 52428800, "reason": "too_large"}, ...]
+    """
+    max_bytes: int = DEFAULT_MAX_FILE_BYTES
+    skipped: List[Dict[str, Any]] = field(default_factory=list)
+
+    def admit(self, path: Path, display: Optional[str] = None) -> bool:
+        try:
+            size = path.stat().st_size
+        except OSError as e:
+            self.skipped.append({"path": display or str(path), "size": 0, "reason": f"unreadable: {e.strerror}"})
+            return False
+        if self.max_bytes > 0 and size > self.max_bytes:
+            self.skipped.append({"path": display or str(path), "size": size, "reason": "too_large"})
+            return False
+        return True
+
+
+def iter_source_lines(
+    path: Path,
+    prefilter: Optional[Pattern[bytes]] = None,
+    encoding: str = "utf-8",
+    errors: str = "replace",
+) -> Iterator[str]:
+    """
+    ファイルを改行付きの行単位で返す（行番号は read_text().split("\\n") と同じ）
+
+    Args:
+        prefilter: 指定時、ファイル中にこのバイト列パターンが無ければ何も返さない
+                   （大きいファイルは mmap 上で検索するため読み込みコストがかからない）
+    """
+    size = path.stat().st_size
+    if size == 0:
+        return
+    if size < MMAP_THRESHOLD:
+        data = path.read_bytes()
+        if prefilter is not None and not prefilter.search(data):
+            return
+        # テキストモードの universal newlines と同じ扱いにそろえる
+        text = data.decode(encoding, errors).replace("\r\n", "\n").replace("\r", "\n")
+        del data
+        yield from iter_lines(text)
+        return
+
+    if prefilter is not None:
+        with path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if not prefilter.search(mm):
+                return
+    # TextIOWrapper は固定サイズのバッファで読むため、メモリは行の長さ分だけで済む
+    with path.open("r", encoding=encoding, errors=errors) as f:
+        yield from f
+
+
+def read_source_text(path: Path, encoding: str = "utf-8", errors: str = "replace") -> str:
+    """不正なバイトで止まらない read_text（小さいファイル向け）"""
+    return path.read_text(encoding=encoding, errors=errors)
+
+
+# UTF-8 で U+3000〜U+9FFF（かな・CJK 統合漢字を含む）の 3 バイト列。日本語検出の粗い事前フィルタ
+CJK_BYTES_PATTERN = re.compile(rb"[\xe3-\xe9][\x80-\xbf][\x80-\xbf]")
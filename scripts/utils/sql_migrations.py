@@ -0,0 +1,698 @@
+# -*- coding: utf-8 -*-
+"""
+SQL マイグレーション（supabase/migrations/*.sql）の解析ユーティリティ
+- 文字列・$$ 引用・コメントを考慮して SQL を文単位に分割
+- DDL をファイル名（タイムスタンプ）順に再生し、メモリ上のスキーマを組み立てる
+  テーブル / カラム / 制約 / インデックス / RLS ポリシー / RENAME / DO $$ ブロック内の DDL
+- 再生済みマイグレーションの名前とハッシュを記録し、次回は新しいファイルだけを再生
+- INSERT / UPDATE / 関数・トリガー定義などスキーマ構造に関係しない文は読み飛ばす
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .scan_cache import DEFAULT_CACHE_DIR, file_digest
+from .source_reader import read_source_text
+
+# パーサの挙動を変えたら上げる（キャッシュ済みのスキーマを破棄して全再生させる）
+MIGRATION_PARSER_VERSION = 1
+SQL_SCHEMA_CACHE_PATH = DEFAULT_CACHE_DIR / "sql-schema.json"
+MIGRATIONS_DIR = Path("supabase") / "migrations"
+
+# 文の区切りに影響する要素: コメント / 文字列 / 引用識別子 / $tag$ / 文末
+_SQL_SPECIAL = re.compile(r"--[^\n]*|/\*.*?\*/|'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|\$(?:[A-Za-z_]\w*)?\$|;", re.S)
+# 括弧・引用の中身を伏せるときの対象
+_QUOTED = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"")
+
+_IDENT = r'(?:"[^"]+"|[\w$]+)(?:\.(?:"[^"]+"|[\w$]+))?'
+
+_CREATE_TABLE = re.compile(
+    rf"CREATE\s+(?:(?:GLOBAL|LOCAL)\s+)?(?:(?:TEMP|TEMPORARY|UNLOGGED)\s+)?TABLE\s+(IF\s+NOT\s+EXISTS\s+)?({_IDENT})\s*\(",
+    re.I,
+)
+_ALTER_TABLE = re.compile(rf"ALTER\s+TABLE\s+(IF\s+EXISTS\s+)?(?:ONLY\s+)?({_IDENT})\s+(.*)$", re.I | re.S)
+_DROP_TABLE = re.compile(r"DROP\s+TABLE\s+(IF\s+EXISTS\s+)?(.+?)(?:\s+(?:CASCADE|RESTRICT))?$", re.I | re.S)
+_CREATE_INDEX = re.compile(
+    rf"CREATE\s+(UNIQUE\s+)?INDEX\s+(?:CONCURRENTLY\s+)?(IF\s+NOT\s+EXISTS\s+)?({_IDENT})?\s*ON\s+(?:ONLY\s+)?({_IDENT})"
+    r"\s*(?:USING\s+(\w+)\s*)?\(",
+    re.I,
+)
+_DROP_INDEX = re.compile(r"DROP\s+INDEX\s+(?:CONCURRENTLY\s+)?(IF\s+EXISTS\s+)?(.+?)(?:\s+(?:CASCADE|RESTRICT))?$", re.I | re.S)
+_ALTER_INDEX = re.compile(rf"ALTER\s+INDEX\s+(IF\s+EXISTS\s+)?({_IDENT})\s+RENAME\s+TO\s+({_IDENT})$", re.I)
+_CREATE_POLICY = re.compile(rf"CREATE\s+POLICY\s+({_IDENT})\s+ON\s+({_IDENT})(.*)$", re.I | re.S)
+_DROP_POLICY = re.compile(rf"DROP\s+POLICY\s+(IF\s+EXISTS\s+)?({_IDENT})\s+ON\s+({_IDENT})", re.I)
+_ALTER_POLICY = re.compile(rf"ALTER\s+POLICY\s+({_IDENT})\s+ON\s+({_IDENT})\s+RENAME\s+TO\s+({_IDENT})$", re.I)
+_COMMENT_ON = re.compile(rf"COMMENT\s+ON\s+(TABLE|COLUMN)\s+({_IDENT}(?:\.(?:\"[^\"]+\"|[\w$]+))?)\s+IS\s+(.*)$", re.I | re.S)
+_DO_BLOCK = re.compile(r"DO\s+(?:LANGUAGE\s+\w+\s+)?(\$(?:[A-Za-z_]\w*)?\$)(.*)\1", re.I | re.S)
+# DO ブロック内の文から DDL の開始位置を探す（IF ... THEN の後ろに続くものなど）
+_DDL_START = re.compile(
+    r"\b(?:ALTER\s+TABLE|CREATE\s+(?:UNIQUE\s+)?INDEX|CREATE\s+TABLE|DROP\s+(?:TABLE|INDEX|POLICY)|CREATE\s+POLICY|COMMENT\s+ON)\b",
+    re.I,
+)
+
+# カラム定義の型の後ろに現れる制約キーワード
+_COLUMN_KEYWORDS = re.compile(
+    r"\s(?:CONSTRAINT|NOT\s+NULL|NULL|DEFAULT|PRIMARY\s+KEY|UNIQUE|REFERENCES|CHECK|GENERATED|COLLATE)\b", re.I
+)
+_DEFAULT_EXPR = re.compile(
+    r"\bDEFAULT\s+(.+?)(?=\s+(?:CONSTRAINT|NOT\s+NULL|NULL|PRIMARY\s+KEY|UNIQUE|REFERENCES|CHECK|GENERATED)\b|$)", re.I | re.S
+)
+_REFERENCES = re.compile(
+    rf"REFERENCES\s+({_IDENT})\s*(?:\(([^)]*)\))?(?:\s+ON\s+DELETE\s+(CASCADE|SET\s+NULL|SET\s+DEFAULT|RESTRICT|NO\s+ACTION))?",
+    re.I,
+)
+
+
+# ---------------------------------------------------------------------------
+# 字句レベルの補助
+# ---------------------------------------------------------------------------
+
+def split_sql_statements(sql: str) -> List[str]:
+    """
+    SQL を文単位に分割（コメントは除去、文字列・$$ 本文内の ; では区切らない）
+
+    Returns:
+        前後の空白を除いた文のリスト（末尾の ; は含まない）
+    """
+    statements: List[str] = []
+    parts: List[str] = []
+    seg_start = pos = 0
+    while True:
+        m = _SQL_SPECIAL.search(sql, pos)
+        if m is None:
+            parts.append(sql[seg_start:])
+            break
+        token = m.group(0)
+        if token.startswith("--") or token.startswith("/*"):
+            parts.append(sql[seg_start:m.start()])
+            parts.append(" ")
+            seg_start = pos = m.end()
+        elif token == ";":
+            parts.append(sql[seg_start:m.start()])
+            statements.append("".join(parts).strip())
+            parts = []
+            seg_start = pos = m.end()
+        elif token.startswith("$"):
+            # $tag$ ... $tag$ は本文ごと読み飛ばす（閉じが無ければ末尾まで）
+            end = sql.find(token, m.end())
+            pos = len(sql) if end < 0 else end + len(token)
+        else:
+            pos = m.end()
+    statements.append("".join(parts).strip())
+    return [s for s in statements if s]
+
+
+def _mask(text: str) -> str:
+    """引用と括弧の中身を空白に置き換えた同じ長さの文字列（トップレベルのキーワード検索用）"""
+    masked = _QUOTED.sub(lambda m: " " * len(m.group(0)), text)
+    out = list(masked)
+    depth = 0
+    for i, c in enumerate(masked):
+        if c == "(":
+            depth += 1
+            if depth > 1:
+                out[i] = " "
+        elif c == ")":
+            depth -= 1
+            if depth > 0:
+                out[i] = " "
+        elif depth > 0:
+            out[i] = " "
+    return "".join(out)
+
+
+def _split_top_level(text: str) -> List[str]:
+    """括弧・引用の外にあるカンマで分割"""
+    masked = _mask(text)
+    items: List[str] = []
+    start = 0
+    depth = 0
+    for i, c in enumerate(masked):
+        if c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+        elif c == "," and depth == 0:
+            items.append(text[start:i].strip())
+            start = i + 1
+    items.append(text[start:].strip())
+    return [item for item in items if item]
+
+
+def _paren_body(text: str, open_index: int) -> Tuple[str, int]:
+    """text[open_index] の "(" に対応する括弧の中身と、閉じ括弧の次の位置"""
+    masked = _QUOTED.sub(lambda m: " " * len(m.group(0)), text)
+    depth = 0
+    for i in range(open_index, len(masked)):
+        if masked[i] == "(":
+            depth += 1
+        elif masked[i] == ")":
+            depth -= 1
+            if depth == 0:
+                return text[open_index + 1:i], i + 1
+    return text[open_index + 1:], len(text)
+
+
+def _ident(name: str) -> str:
+    """識別子の正規化（引用無しは小文字化、public スキーマは省略）"""
+    parts = re.findall(r'"([^"]+)"|([^.]+)', name.strip())
+    names = [quoted if quoted else plain.strip().lower() for quoted, plain in parts]
+    if len(names) > 1 and names[0] == "public":
+        names = names[1:]
+    return ".".join(names)
+
+
+def _ident_list(text: str) -> List[str]:
+    return [_ident(item) for item in _split_top_level(text)]
+
+
+def _squash(text: str) -> str:
+    return " ".join(text.split())
+
+
+# ---------------------------------------------------------------------------
+# スキーマモデル（JSON にそのまま保存できる dict）
+# ---------------------------------------------------------------------------
+
+def empty_schema() -> Dict[str, Any]:
+    """
+    Returns:
+        {
+            "tables": {"case_records": {...table...}, ...},
+            "indexes": {"idx_case_records_user_date": {"table": ..., "columns": [...], ...}, ...},
+            "renamed_tables": {"services": "facilities"},
+            "warnings": [{"source": "2026..._x.sql", "message": "..."}]
+        }
+    """
+    return {"tables": {}, "indexes": {}, "renamed_tables": {}, "warnings": []}
+
+
+def _new_table(name: str, source: str, declared: bool = True) -> Dict[str, Any]:
+    return {
+        "name": name,
+        "columns": {},
+        "primary_key": [],
+        "unique": [],
+        "foreign_keys": [],
+        "checks": [],
+        "rls_enabled": False,
+        "policies": {},
+        "comment": None,
+        # declared=False: CREATE TABLE が見つからないまま ALTER/CREATE INDEX/POLICY された
+        "declared": declared,
+        "source": source,
+    }
+
+
+def _warn(schema: Dict[str, Any], source: str, message: str) -> None:
+    schema["warnings"].append({"source": source, "message": message})
+
+
+def _get_table(schema: Dict[str, Any], name: str, source: str, if_exists: bool = False) -> Optional[Dict[str, Any]]:
+    """テーブルを返す。無ければ警告付きで未宣言テーブルを作る（if_exists なら None）"""
+    table = schema["tables"].get(name)
+    if table is not None or if_exists:
+        return table
+    renamed = schema["renamed_tables"].get(name)
+    hint = f" (renamed to {renamed})" if renamed else ""
+    _warn(schema, source, f"table {name} is not created by any earlier migration{hint}")
+    table = _new_table(name, source, declared=False)
+    schema["tables"][name] = table
+    return table
+
+
+def _parse_column(text: str) -> Tuple[str, Dict[str, Any], Optional[Dict[str, Any]], Optional[str]]:
+    """
+    カラム定義 1 つを解析
+
+    Returns:
+        (カラム名, カラム情報, インライン REFERENCES の外部キー or None, インライン CHECK 式 or None)
+    """
+    m = re.match(r'("[^"]+"|[\w$]+)\s*(.*)$', text, re.S)
+    name = _ident(m.group(1)) if m else _ident(text)
+    rest = m.group(2) if m else ""
+    masked = _mask(" " + rest)
+    kw = _COLUMN_KEYWORDS.search(masked)
+    type_end = kw.start() if kw else len(rest)
+    col_type = _squash(rest[:type_end])
+    constraints = rest[type_end:]
+    masked_constraints = masked[type_end + 1:] if kw else ""
+
+    default_match = _DEFAULT_EXPR.search(constraints)
+    primary = bool(re.search(r"\bPRIMARY\s+KEY\b", masked_constraints, re.I))
+    column = {
+        "type": col_type,
+        "nullable": not primary and not re.search(r"\bNOT\s+NULL\b", masked_constraints, re.I),
+        "default": _squash(default_match.group(1)) if default_match else None,
+        "primary_key": primary,
+        "unique": bool(re.search(r"\bUNIQUE\b", masked_constraints, re.I)),
+        "comment": None,
+    }
+    foreign_key = None
+    ref = _REFERENCES.search(constraints)
+    if ref:
+        foreign_key = {
+            "name": None,
+            "columns": [name],
+            "ref_table": _ident(ref.group(1)),
+            "ref_columns": _ident_list(ref.group(2)) if ref.group(2) else [],
+            "on_delete": _squash(ref.group(3)).upper() if ref.group(3) else None,
+        }
+    check = None
+    check_at = re.search(r"\bCHECK\s*\(", masked_constraints, re.I)
+    if check_at:
+        body, _ = _paren_body(constraints, check_at.end() - 1)
+        check = _squash(body)
+    return name, column, foreign_key, check
+
+
+def _add_column(table: Dict[str, Any], text: str, if_not_exists: bool = False) -> None:
+    name, column, foreign_key, check = _parse_column(text)
+    if name in table["columns"] and if_not_exists:
+        return
+    table["columns"][name] = column
+    if column["primary_key"]:
+        table["primary_key"] = [name]
+    if column["unique"]:
+        table["unique"].append({"name": f"{table['name']}_{name}_key", "columns": [name]})
+    if foreign_key is not None:
+        foreign_key["name"] = f"{table['name']}_{name}_fkey"
+        table["foreign_keys"].append(foreign_key)
+    if check is not None:
+        table["checks"].append({"name": f"{table['name']}_{name}_check", "expression": check})
+
+
+def _add_table_constraint(table: Dict[str, Any], text: str) -> None:
+    """PRIMARY KEY / UNIQUE / FOREIGN KEY / CHECK（CONSTRAINT 名付きも可）"""
+    name = None
+    m = re.match(r'CONSTRAINT\s+("[^"]+"|[\w$]+)\s+(.*)$', text, re.I | re.S)
+    if m:
+        name = _ident(m.group(1))
+        text = m.group(2)
+    kind = re.match(r"(PRIMARY\s+KEY|UNIQUE|FOREIGN\s+KEY|CHECK|EXCLUDE)\s*(?:NULLS\s+(?:NOT\s+)?DISTINCT\s*)?", text, re.I)
+    if not kind:
+        return
+    keyword = _squash(kind.group(1)).upper()
+    open_index = text.find("(", kind.start(1))
+    body, after = _paren_body(text, open_index) if open_index >= 0 else ("", len(text))
+    table_name = table["name"]
+    if keyword == "PRIMARY KEY":
+        table["primary_key"] = _ident_list(body)
+        for col in table["primary_key"]:
+            if col in table["columns"]:
+                table["columns"][col]["nullable"] = False
+    elif keyword == "UNIQUE":
+        columns = _ident_list(body)
+        table["unique"].append({"name": name or f"{table_name}_{'_'.join(columns)}_key", "columns": columns})
+    elif keyword == "FOREIGN KEY":
+        columns = _ident_list(body)
+        ref = _REFERENCES.search(text, after)
+        table["foreign_keys"].append({
+            "name": name or f"{table_name}_{'_'.join(columns)}_fkey",
+            "columns": columns,
+            "ref_table": _ident(ref.group(1)) if ref else "",
+            "ref_columns": _ident_list(ref.group(2)) if ref and ref.group(2) else [],
+            "on_delete": _squash(ref.group(3)).upper() if ref and ref.group(3) else None,
+        })
+    elif keyword == "CHECK":
+        table["checks"].append({"name": name or f"{table_name}_check", "expression": _squash(body)})
+
+
+def _drop_constraint(table: Dict[str, Any], name: str) -> bool:
+    for key in ("unique", "foreign_keys", "checks"):
+        kept = [c for c in table[key] if c["name"] != name]
+        if len(kept) != len(table[key]):
+            table[key] = kept
+            return True
+    if name == f"{table['name']}_pkey" and table["primary_key"]:
+        table["primary_key"] = []
+        return True
+    return False
+
+
+def _rename_column(schema: Dict[str, Any], table: Dict[str, Any], old: str, new: str) -> None:
+    table["columns"] = {(new if k == old else k): v for k, v in table["columns"].items()}
+
+    def rename(cols: List[str]) -> List[str]:
+        return [new if c == old else c for c in cols]
+
+    table["primary_key"] = rename(table["primary_key"])
+    for constraint in table["unique"] + table["foreign_keys"]:
+        constraint["columns"] = rename(constraint["columns"])
+    for index in schema["indexes"].values():
+        if index["table"] == table["name"]:
+            index["columns"] = rename(index["columns"])
+    for other in schema["tables"].values():
+        for fk in other["foreign_keys"]:
+            if fk["ref_table"] == table["name"]:
+                fk["ref_columns"] = rename(fk["ref_columns"])
+
+
+def _rename_table(schema: Dict[str, Any], old: str, new: str) -> None:
+    table = schema["tables"].pop(old)
+    table["name"] = new
+    schema["tables"][new] = table
+    schema["renamed_tables"][old] = new
+    schema["renamed_tables"].pop(new, None)
+    for index in schema["indexes"].values():
+        if index["table"] == old:
+            index["table"] = new
+    for other in schema["tables"].values():
+        for fk in other["foreign_keys"]:
+            if fk["ref_table"] == old:
+                fk["ref_table"] = new
+
+
+# ---------------------------------------------------------------------------
+# 文ごとの適用
+# ---------------------------------------------------------------------------
+
+def _apply_create_table(schema: Dict[str, Any], m: "re.Match[str]", stmt: str, source: str) -> None:
+    name = _ident(m.group(2))
+    existing = schema["tables"].get(name)
+    if existing is not None and existing["declared"] and m.group(1):
+        return  # IF NOT EXISTS で既存 → 何もしない
+    table = _new_table(name, source)
+    if existing is not None and not existing["declared"]:
+        # 先に参照だけされていたテーブル: ポリシーや RLS 設定は引き継ぐ
+        table["policies"] = existing["policies"]
+        table["rls_enabled"] = existing["rls_enabled"]
+    schema["tables"][name] = table
+    schema["renamed_tables"].pop(name, None)
+    body, _ = _paren_body(stmt, m.end() - 1)
+    for element in _split_top_level(body):
+        if re.match(r"(?:CONSTRAINT|PRIMARY\s+KEY|UNIQUE|FOREIGN\s+KEY|CHECK|EXCLUDE)\b", element, re.I):
+            _add_table_constraint(table, element)
+        elif not re.match(r"LIKE\b", element, re.I):
+            _add_column(table, element)
+
+
+def _apply_alter_action(schema: Dict[str, Any], table: Dict[str, Any], action: str, source: str) -> None:
+    a = _squash(action)
+    table_name = table["name"]
+
+    m = re.match(rf"RENAME\s+TO\s+({_IDENT})$", a, re.I)
+    if m:
+        _rename_table(schema, table_name, _ident(m.group(1)))
+        return
+    m = re.match(rf"RENAME\s+CONSTRAINT\s+({_IDENT})\s+TO\s+({_IDENT})$", a, re.I)
+    if m:
+        old, new = _ident(m.group(1)), _ident(m.group(2))
+        for constraint in table["unique"] + table["foreign_keys"] + table["checks"]:
+            if constraint["name"] == old:
+                constraint["name"] = new
+        return
+    m = re.match(rf"RENAME\s+(?:COLUMN\s+)?({_IDENT})\s+TO\s+({_IDENT})$", a, re.I)
+    if m:
+        old, new = _ident(m.group(1)), _ident(m.group(2))
+        if old in table["columns"]:
+            _rename_column(schema, table, old, new)
+        elif new not in table["columns"]:
+            _warn(schema, source, f"cannot rename unknown column {table_name}.{old}")
+        return
+    m = re.match(r"(ENABLE|DISABLE)\s+ROW\s+LEVEL\s+SECURITY$", a, re.I)
+    if m:
+        table["rls_enabled"] = m.group(1).upper() == "ENABLE"
+        return
+    m = re.match(r"ADD\s+(?:COLUMN\s+)?(?!CONSTRAINT\b|PRIMARY\b|UNIQUE\b|FOREIGN\b|CHECK\b|EXCLUDE\b)(IF\s+NOT\s+EXISTS\s+)?(.+)$", a, re.I | re.S)
+    if m:
+        _add_column(table, m.group(2), if_not_exists=bool(m.group(1)))
+        return
+    m = re.match(r"ADD\s+(.+)$", a, re.I | re.S)
+    if m:
+        _add_table_constraint(table, m.group(1))
+        return
+    m = re.match(rf"DROP\s+CONSTRAINT\s+(IF\s+EXISTS\s+)?({_IDENT})", a, re.I)
+    if m:
+        if not _drop_constraint(table, _ident(m.group(2))) and not m.group(1):
+            _warn(schema, source, f"cannot drop unknown constraint {table_name}.{_ident(m.group(2))}")
+        return
+    m = re.match(rf"DROP\s+(?:COLUMN\s+)?(IF\s+EXISTS\s+)?({_IDENT})", a, re.I)
+    if m:
+        col = _ident(m.group(2))
+        if table["columns"].pop(col, None) is None and not m.group(1):
+            _warn(schema, source, f"cannot drop unknown column {table_name}.{col}")
+        table["primary_key"] = [c for c in table["primary_key"] if c != col]
+        table["unique"] = [u for u in table["unique"] if col not in u["columns"]]
+        table["foreign_keys"] = [fk for fk in table["foreign_keys"] if col not in fk["columns"]]
+        for index_name in [n for n, idx in schema["indexes"].items() if idx["table"] == table_name and col in idx["columns"]]:
+            del schema["indexes"][index_name]
+        return
+    m = re.match(rf"ALTER\s+(?:COLUMN\s+)?({_IDENT})\s+(.*)$", a, re.I | re.S)
+    if m:
+        col = _ident(m.group(1))
+        column = table["columns"].get(col)
+        if column is None:
+            _warn(schema, source, f"cannot alter unknown column {table_name}.{col}")
+            return
+        change = m.group(2)
+        t = re.match(r"(?:SET\s+DATA\s+)?TYPE\s+(.+?)(?:\s+USING\s+.*)?$", change, re.I | re.S)
+        if t:
+            column["type"] = _squash(t.group(1))
+        elif re.match(r"SET\s+DEFAULT\s+", change, re.I):
+            column["default"] = _squash(change[change.upper().index("DEFAULT") + len("DEFAULT"):])
+        elif re.match(r"DROP\s+DEFAULT$", change, re.I):
+            column["default"] = None
+        elif re.match(r"SET\s+NOT\s+NULL$", change, re.I):
+            column["nullable"] = False
+        elif re.match(r"DROP\s+NOT\s+NULL$", change, re.I):
+            column["nullable"] = True
+        return
+    # OWNER TO / FORCE ROW LEVEL SECURITY / SET (...) などはスキーマ構造に影響しないので無視
+
+
+def _apply_alter_table(schema: Dict[str, Any], m: "re.Match[str]", source: str) -> None:
+    table = _get_table(schema, _ident(m.group(2)), source, if_exists=bool(m.group(1)))
+    if table is None:
+        return
+    for action in _split_top_level(m.group(3)):
+        # RENAME でテーブル名が変わることがあるので毎回引き直す
+        current = schema["tables"].get(table["name"])
+        if current is None:
+            return
+        _apply_alter_action(schema, current, action, source)
+
+
+def _apply_create_index(schema: Dict[str, Any], m: "re.Match[str]", stmt: str, source: str) -> None:
+    table_name = _ident(m.group(4))
+    name = _ident(m.group(3)) if m.group(3) else None
+    if name is not None and name in schema["indexes"] and m.group(2):
+        return
+    body, after = _paren_body(stmt, m.end() - 1)
+    columns: List[str] = []
+    for element in _split_top_level(body):
+        simple = re.match(r'("[^"]+"|[\w$]+)(?:\s+(?:ASC|DESC|NULLS\s+(?:FIRST|LAST)|\w+_ops))*$', element.strip(), re.I)
+        columns.append(_ident(simple.group(1)) if simple else _squash(element))
+    where = re.search(r"\bWHERE\s+(.*)$", stmt[after:], re.I | re.S)
+    table = _get_table(schema, table_name, source)
+    if table["declared"]:
+        for col in columns:
+            if re.fullmatch(r"[\w$]+", col) and col not in table["columns"]:
+                _warn(schema, source, f"index {name or '(unnamed)'} references unknown column {table_name}.{col}")
+    if name is None:
+        simple_columns = [c for c in columns if re.fullmatch(r"[\w$]+", c)]
+        name = f"{table_name}_{'_'.join(simple_columns)}_idx"
+    schema["indexes"][name] = {
+        "name": name,
+        "table": table_name,
+        "columns": columns,
+        "definition": f"({_squash(body)})",
+        "unique": bool(m.group(1)),
+        "method": (m.group(5) or "btree").lower(),
+        "where": _squash(where.group(1)) if where else None,
+        "source": source,
+    }
+
+
+def _apply_create_policy(schema: Dict[str, Any], m: "re.Match[str]", source: str) -> None:
+    name = _ident(m.group(1))
+    table = _get_table(schema, _ident(m.group(2)), source)
+    rest = m.group(3)
+    masked = _mask(rest)
+    permissive = not re.search(r"\bAS\s+RESTRICTIVE\b", masked, re.I)
+    command = re.search(r"\bFOR\s+(ALL|SELECT|INSERT|UPDATE|DELETE)\b", masked, re.I)
+    roles_match = re.search(r"\bTO\s+(.+?)(?=\s+(?:USING|WITH\s+CHECK)\b|\s*$)", masked, re.I | re.S)
+    using = re.search(r"\bUSING\s*\(", masked, re.I)
+    check = re.search(r"\bWITH\s+CHECK\s*\(", masked, re.I)
+    if name in table["policies"]:
+        _warn(schema, source, f"policy {name} on {table['name']} already exists")
+    table["policies"][name] = {
+        "name": name,
+        "command": command.group(1).upper() if command else "ALL",
+        "roles": [r.strip().lower() for r in rest[roles_match.start(1):roles_match.end(1)].split(",")] if roles_match else ["public"],
+        "permissive": permissive,
+        "using": _squash(_paren_body(rest, using.end() - 1)[0]) if using else None,
+        "with_check": _squash(_paren_body(rest, check.end() - 1)[0]) if check else None,
+        "source": source,
+    }
+
+
+def _apply_comment(schema: Dict[str, Any], m: "re.Match[str]", source: str) -> None:
+    literal = re.match(r"'((?:[^']|'')*)'", m.group(3).strip())
+    text = literal.group(1).replace("''", "'") if literal else None
+    target = _ident(m.group(2))
+    if m.group(1).upper() == "TABLE":
+        table = schema["tables"].get(target)
+        if table is not None:
+            table["comment"] = text
+        return
+    table_name, _, col = target.rpartition(".")
+    table = schema["tables"].get(table_name)
+    if table is not None and col in table["columns"]:
+        table["columns"][col]["comment"] = text
+
+
+def apply_statement(schema: Dict[str, Any], stmt: str, source: str) -> None:
+    """1 文をスキーマへ適用（対象外の文は何もしない）"""
+    head = stmt[:40].upper()
+    m = _DO_BLOCK.match(stmt)
+    if m:
+        # DO $$ ... $$ 内の DDL は条件分岐を無視して順に適用する（IF EXISTS ... THEN ALTER ... など）
+        for inner in split_sql_statements(m.group(2)):
+            ddl = _DDL_START.search(inner)
+            if ddl:
+                apply_statement(schema, inner[ddl.start():], source)
+        return
+    if head.startswith("CREATE"):
+        for pattern, handler in (
+            (_CREATE_TABLE, lambda mm: _apply_create_table(schema, mm, stmt, source)),
+            (_CREATE_INDEX, lambda mm: _apply_create_index(schema, mm, stmt, source)),
+            (_CREATE_POLICY, lambda mm: _apply_create_policy(schema, mm, source)),
+        ):
+            mm = pattern.match(stmt)
+            if mm:
+                handler(mm)
+                return
+        return
+    if head.startswith("ALTER"):
+        m = _ALTER_INDEX.match(_squash(stmt))
+        if m:
+            old, new = _ident(m.group(2)), _ident(m.group(3))
+            if old in schema["indexes"]:
+                schema["indexes"][new] = dict(schema["indexes"].pop(old), name=new)
+            return
+        m = _ALTER_POLICY.match(_squash(stmt))
+        if m:
+            table = schema["tables"].get(_ident(m.group(2)))
+            old, new = _ident(m.group(1)), _ident(m.group(3))
+            if table is not None and old in table["policies"]:
+                table["policies"][new] = dict(table["policies"].pop(old), name=new)
+            return
+        m = _ALTER_TABLE.match(stmt)
+        if m:
+            _apply_alter_table(schema, m, source)
+        return
+    if head.startswith("DROP"):
+        m = _DROP_POLICY.match(stmt)
+        if m:
+            table = schema["tables"].get(_ident(m.group(3)))
+            name = _ident(m.group(2))
+            if table is not None and name in table["policies"]:
+                del table["policies"][name]
+            elif not m.group(1):
+                _warn(schema, source, f"cannot drop unknown policy {name}")
+            return
+        m = _DROP_INDEX.match(stmt)
+        if m:
+            for name in _ident_list(m.group(2)):
+                schema["indexes"].pop(name, None)
+            return
+        m = _DROP_TABLE.match(stmt)
+        if m:
+            for name in _ident_list(m.group(2)):
+                if schema["tables"].pop(name, None) is not None:
+                    for index_name in [n for n, idx in schema["indexes"].items() if idx["table"] == name]:
+                        del schema["indexes"][index_name]
+        return
+    if head.startswith("COMMENT"):
+        m = _COMMENT_ON.match(stmt)
+        if m:
+            _apply_comment(schema, m, source)
+
+
+def apply_migration(schema: Dict[str, Any], sql: str, source: str) -> None:
+    """マイグレーション 1 ファイル分の SQL をスキーマへ適用"""
+    for stmt in split_sql_statements(sql):
+        apply_statement(schema, stmt, source)
+
+
+# ---------------------------------------------------------------------------
+# マイグレーションの検出と増分再生
+# ---------------------------------------------------------------------------
+
+def find_migration_files(root: Path = Path(".")) -> List[Path]:
+    """supabase/migrations/*.sql をファイル名（= タイムスタンプ）順で返す"""
+    directory = root / MIGRATIONS_DIR
+    if not directory.is_dir():
+        return []
+    return sorted((p for p in directory.glob("*.sql") if p.is_file()), key=lambda p: p.name)
+
+
+def _load_state(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("version") != MIGRATION_PARSER_VERSION:
+        return None
+    return data
+
+
+def _save_state(path: Path, applied: List[Dict[str, str]], schema: Dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(
+        json.dumps({"version": MIGRATION_PARSER_VERSION, "applied": applied, "schema": schema}, ensure_ascii=False),
+        encoding="utf-8",
+    )
+    os.replace(tmp, path)
+
+
+def replay_migrations(
+    paths: List[Path],
+    cache_path: Optional[Path] = None,
+    use_cache: bool = True,
+) -> Dict[str, Any]:
+    """
+    マイグレーションを順に再生してスキーマを組み立てる
+
+    キャッシュに記録された再生済みファイル（名前 + 内容ハッシュ）が今回の先頭と一致すれば、
+    保存済みスキーマから続きのファイルだけを再生する。途中のファイルが変更・削除・挿入された
+    場合は最初から再生し直す。
+
+    Returns:
+        {
+            "schema": empty_schema() と同じ形,
+            "applied": ["20260108_create_case_records.sql", ...],
+            "replayed": [今回実際に再生したファイル名],
+        }
+    """
+    cache_path = cache_path or SQL_SCHEMA_CACHE_PATH
+    current = [{"name": p.name, "sha256": file_digest(p)} for p in paths]
+
+    schema = empty_schema()
+    start = 0
+    state = _load_state(cache_path) if use_cache else None
+    if state is not None:
+        applied = state.get("applied") or []
+        if applied == current[:len(applied)]:
+            schema = state["schema"]
+            start = len(applied)
+
+    replayed: List[str] = []
+    for path in paths[start:]:
+        apply_migration(schema, read_source_text(path), path.name)
+        replayed.append(path.name)
+
+    if use_cache and (replayed or state is None or start != len(state.get("applied") or [])):
+        _save_state(cache_path, current, schema)
+
+    return {
+        "schema": schema,
+        "applied": [entry["name"] for entry in current],
+        "replayed": replayed,
+    }
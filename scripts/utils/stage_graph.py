@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+エージェントパイプラインの依存グラフとスケジューラ
+- .ai/agents_config.yaml の workflow.sequence（実行するステージ）と workflow.depends_on（依存関係）からグラフを作る
+- depends_on に無いステージは既知の既定依存、それも無ければ sequence 上の直前のステージに依存
+- 依存が揃ったステージからスレッドプールで並行実行し、ステージごとの所要時間を記録
+- ステージ出力は「ステージ固有のキー（プロンプト・モデル等）+ 上流出力」のダイジェストでメモ化
+  → 1 ステージのプロンプトを変えて再実行すると、そのステージと下流だけが再実行される
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+from .llm_cache import ResponseCache
+from .scan_cache import DEFAULT_CACHE_DIR
+
+PIPELINE_MEMO_PATH = DEFAULT_CACHE_DIR / "pipeline-stages.json"
+
+DEFAULT_SEQUENCE = ["implementation_agent", "review_agent", "test_agent", "doc_agent"]
+# Doc は Implementation と Test の出力だけを使う（Review は Test 経由で間接的に効く）
+DEFAULT_DEPENDENCIES: Dict[str, List[str]] = {
+    "implementation_agent": [],
+    "review_agent": ["implementation_agent"],
+    "test_agent": ["review_agent"],
+    "doc_agent": ["implementation_agent", "test_agent"],
+}
+
+
+def load_stage_graph(cfg: Dict[str, Any]) -> Dict[str, List[str]]:
+    """
+    設定からステージ → 依存ステージのグラフを作る（キーの順序は sequence の順）
+
+    sequence に無いステージへの依存は無視する。循環があれば ValueError。
+    """
+    workflow = cfg.get("workflow") or {}
+    sequence = [s for s in (workflow.get("sequence") or DEFAULT_SEQUENCE) if isinstance(s, str)]
+    declared = workflow.get("depends_on") or {}
+    graph: Dict[str, List[str]] = {}
+    for i, name in enumerate(sequence):
+        if name in declared:
+            deps = [d for d in (declared.get(name) or []) if isinstance(d, str)]
+        elif name in DEFAULT_DEPENDENCIES:
+            deps = DEFAULT_DEPENDENCIES[name]
+        else:
+            deps = [sequence[i - 1]] if i else []
+        graph[name] = [d for d in deps if d in sequence and d != name]
+    topological_order(graph)
+    return graph
+
+
+def topological_order(graph: Dict[str, List[str]]) -> List[str]:
+    """依存順に並べる（同じ段では graph の順序を保つ）。循環があれば ValueError"""
+    remaining = {name: set(deps) for name, deps in graph.items()}
+    order: List[str] = []
+    while remaining:
+        ready = [name for name in graph if name in remaining and not remaining[name]]
+        if not ready:
+            raise ValueError(f"workflow has a dependency cycle: {sorted(remaining)}")
+        for name in ready:
+            del remaining[name]
+            for deps in remaining.values():
+                deps.discard(name)
+        order.extend(ready)
+    return order
+
+
+def stage_digest(name: str, stage_key: str, inputs: Dict[str, str]) -> str:
+    material = json.dumps({"stage": name, "key": stage_key, "inputs": inputs}, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def run_stage_graph(
+    graph: Dict[str, List[str]],
+    run_stage: Callable[[str, Dict[str, str]], str],
+    stage_keys: Optional[Dict[str, str]] = None,
+    jobs: int = 1,
+    memo: Optional[ResponseCache] = None,
+) -> Dict[str, Any]:
+    """
+    依存が揃ったステージから並行に実行する
+
+    Args:
+        run_stage: (ステージ名, {依存ステージ名: 出力}) -> 出力
+        stage_keys: ステージ固有のキー（プロンプトのテンプレートやモデル名のダイジェストなど）。メモ化のキーに含める
+        jobs: 同時に実行するステージ数（0 以下は CPU 数）
+        memo: ステージ出力のメモ（None ならメモ化しない）
+
+    Returns:
+        {"outputs": {name: str}, "order": [完了順の name],
+         "stages": [{"name", "deps", "status": "ok"|"cached"|"error"|"skipped", "seconds", "error"?}],
+         "wall_seconds": float}
+        失敗したステージの下流は実行せず skipped にする。
+    """
+    stage_keys = stage_keys or {}
+    workers = max(1, jobs if jobs > 0 else (os.cpu_count() or 1))
+    outputs: Dict[str, str] = {}
+    records: Dict[str, Dict[str, Any]] = {
+        name: {"name": name, "deps": list(deps), "status": "pending", "seconds": 0.0} for name, deps in graph.items()
+    }
+    order: List[str] = []
+    started = time.perf_counter()
+
+    def execute(name: str, inputs: Dict[str, str]) -> str:
+        digest = stage_digest(name, stage_keys.get(name, ""), inputs)
+        t0 = time.perf_counter()
+        cached = memo.get(digest) if memo is not None else None
+        if cached is not None:
+            records[name]["status"] = "cached"
+            return cached
+        try:
+            output = run_stage(name, inputs)
+        finally:
+            elapsed = time.perf_counter() - t0
+            records[name]["seconds"] = round(elapsed, 4)
+        # 失敗（例外）はメモに残さない。次の実行で改めて呼ぶ
+        if memo is not None:
+            memo.put(digest, output, elapsed, model=name)
+        return output
+
+    pending = {name: set(deps) for name, deps in graph.items()}
+    running: Dict[Future, str] = {}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="stage") as pool:
+        while pending or running:
+            for name in [n for n in graph if n in pending and not pending[n]]:
+                del pending[name]
+                inputs = {dep: outputs[dep] for dep in graph[name]}
+                running[pool.submit(execute, name, inputs)] = name
+            if not running:
+                # 残りは失敗したステージの下流
+                for name in pending:
+                    records[name]["status"] = "skipped"
+                break
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                order.append(name)
+                try:
+                    outputs[name] = future.result()
+                    if records[name]["status"] == "pending":
+                        records[name]["status"] = "ok"
+                except Exception as e:
+                    records[name]["status"] = "error"
+                    records[name]["error"] = f"{type(e).__name__}: {e}"
+                    continue
+                for deps in pending.values():
+                    deps.discard(name)
+    return {
+        "outputs": outputs,
+        "order": order,
+        "stages": [records[name] for name in graph],
+        "wall_seconds": round(time.perf_counter() - started, 4),
+    }
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+プロンプトのトークン予算管理
+- tiktoken でモデルごとのエンコーダを使って正確に数える（エンコーダはプロセス内でキャッシュ）
+- tiktoken が無い / BPE ファイルを取得できない環境では UTF-8 バイト数からの概算に落とす
+- 優先度付きの断片（diff のハンク、ファイル抜粋など）を予算内に詰める pack_items
+- モデルのコンテキスト長から出力分を引いた入力予算 prompt_budget
+
+使い方:
+    count = make_counter("gpt-4o-mini")
+    count("こんにちは")                      # -> トークン数
+    truncate_to_tokens(text, 500, "gpt-4o")  # -> 500 トークン以内に切った文字列
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+try:
+    import tiktoken  # type: ignore
+except ImportError:  # pragma: no cover - 環境依存
+    tiktoken = None
+
+DEFAULT_ENCODING = "o200k_base"
+DEFAULT_CONTEXT_TOKENS = 128000
+
+# コンテキスト長（前方一致。長い名前を先に並べる）
+MODEL_CONTEXT_TOKENS = (
+    ("gpt-4.1", 1047576),
+    ("gpt-4o", 128000),
+    ("gpt-4-turbo", 128000),
+    ("gpt-4", 8192),
+    ("gpt-3.5-turbo", 16385),
+    ("o1", 200000),
+    ("o3", 200000),
+    ("o4", 200000),
+)
+
+TRUNCATED_MARK = "\n... (truncated)\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """トークン数の概算（英数字は約 4 バイト、日本語は 1 文字 3 バイトでおおよそ 1 トークン）"""
+    return max(1, len(text.encode("utf-8")) // 4) if text else 0
+
+
+@lru_cache(maxsize=None)
+def _encoding(name: str) -> Any:
+    try:
+        return tiktoken.get_encoding(name)
+    except Exception:
+        # オフラインで BPE ファイルを取得できない場合など
+        return None
+
+
+@lru_cache(maxsize=None)
+def get_encoder(model: Optional[str] = None) -> Any:
+    """
+    モデルに対応する tiktoken エンコーダ（使えなければ None）
+
+    同じエンコーディングを使うモデル同士は 1 つのエンコーダを共有する。
+    """
+    if tiktoken is None:
+        return None
+    name = DEFAULT_ENCODING
+    if model:
+        try:
+            name = tiktoken.encoding_name_for_model(model)
+        except (KeyError, AttributeError):
+            name = DEFAULT_ENCODING
+    return _encoding(name)
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    if not text:
+        return 0
+    encoder = get_encoder(model)
+    if encoder is None:
+        return estimate_tokens(text)
+    return len(encoder.encode(text, disallowed_special=()))
+
+
+def make_counter(model: Optional[str] = None) -> Callable[[str], int]:
+    """model 固定の count_tokens（review_shards.shard_diff などに渡す）"""
+    return lambda text: count_tokens(text, model)
+
+
+def context_tokens(model: Optional[str]) -> int:
+    name = (model or "").lower()
+    for prefix, tokens in MODEL_CONTEXT_TOKENS:
+        if name.startswith(prefix):
+            return tokens
+    return DEFAULT_CONTEXT_TOKENS
+
+
+def prompt_budget(model: Optional[str], requested: int, reserve: int = 0) -> int:
+    """requested を上限に、コンテキスト長 - 出力予約 (reserve) に収まる入力トークン数"""
+    return max(0, min(requested, context_tokens(model) - reserve))
+
+
+def truncate_to_tokens(text: str, budget: int, model: Optional[str] = None, mark: str = "") -> str:
+    """
+    text を budget トークン以内に切る（mark を付ける場合は mark 込みで収める）
+
+    tiktoken があればトークン境界で切り、無ければ概算で二分探索して文字数を決める。
+    """
+    if count_tokens(text, model) <= budget:
+        return text
+    room = budget - count_tokens(mark, model)
+    if room <= 0:
+        return ""
+    encoder = get_encoder(model)
+    if encoder is not None:
+        tokens = encoder.encode(text, disallowed_special=())
+        head = encoder.decode(tokens[:room])
+        # マルチバイト文字の途中で切れた場合の置換文字を落とす
+        return head.rstrip("�") + mark
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if estimate_tokens(text[:mid] + mark) <= budget:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo] + mark
+
+
+def pack_items(
+    items: Sequence[Dict[str, Any]],
+    budget: int,
+    model: Optional[str] = None,
+    separator: str = "\n",
+    min_partial_tokens: int = 64,
+) -> Dict[str, Any]:
+    """
+    優先度の高い順に断片を予算へ詰め、元の並び順で連結する
+
+    Args:
+        items: [{"text": str, "priority": 数値（大きいほど優先。既定 0）, "after": int（任意）}, ...]
+            同じ優先度は先に並んでいるものを優先する。
+            after を指定した断片は、その index の断片が丸ごと入った場合だけ入れる（ヘッダと本文など）。
+        min_partial_tokens: 丸ごと入らない断片も、残りがこれ以上あれば末尾を切って入れる
+
+    Returns:
+        {"text": str, "tokens": int, "budget": int,
+         "items": [{"index": 0, "tokens": 120, "status": "full" | "truncated" | "dropped"}, ...]}
+    """
+    sep_tokens = count_tokens(separator, model)
+    order = sorted(range(len(items)), key=lambda i: (-float(items[i].get("priority", 0)), i))
+    chosen: Dict[int, str] = {}
+    status: List[Dict[str, Any]] = [
+        {"index": i, "tokens": count_tokens(item.get("text", ""), model), "status": "dropped"}
+        for i, item in enumerate(items)
+    ]
+    remaining = budget
+    for i in order:
+        after = items[i].get("after")
+        if after is not None and status[after]["status"] != "full":
+            continue
+        cost = status[i]["tokens"] + (sep_tokens if chosen else 0)
+        if cost <= remaining:
+            chosen[i] = items[i].get("text", "")
+            status[i]["status"] = "full"
+            remaining -= cost
+            continue
+        room = remaining - (sep_tokens if chosen else 0)
+        if room >= min_partial_tokens:
+            text = truncate_to_tokens(items[i].get("text", ""), room, model, mark=TRUNCATED_MARK)
+            if text:
+                chosen[i] = text
+                status[i]["status"] = "truncated"
+                remaining -= count_tokens(text, model) + (sep_tokens if len(chosen) > 1 else 0)
+    text = separator.join(chosen[i] for i in sorted(chosen))
+    # 境界で BPE の結合が変わり数トークンずれることがあるので、最後に全体で予算を保証する
+    text = truncate_to_tokens(text, budget, model)
+    return {"text": text, "tokens": count_tokens(text, model), "budget": budget, "items": status}
@@ -0,0 +1,437 @@
+# -*- coding: utf-8 -*-
+"""
+TypeScript/TSX 向けの軽量字句解析器
+- 文字列リテラル / テンプレートリテラルの各チャンク / JSX テキストを位置付きで列挙
+- コメント・正規表現リテラル・`${...}` の入れ子・JSX 属性/子要素の `{...}` を追跡
+- 1 行ずつ feed できる状態機械（行をまたぐトークンも扱える）
+- 各モードの読み飛ばしは文字クラスの連続だけを使うため、最小化された巨大な 1 行でも線形時間
+
+完全な構文解析器ではないため、JSX と比較演算子/ジェネリクスの判別などはヒューリスティック。
+"""
+from __future__ import annotations
+
+import re
+from typing import Iterable, Iterator, List, NamedTuple, Optional
+
+# トークン種別
+STRING = "string"
+TEMPLATE = "template"
+JSX_TEXT = "jsx_text"
+
+# 字句規則を変えたら上げる（解析結果キャッシュの無効化に使う）
+LEXER_VERSION = 1
+
+
+class Token(NamedTuple):
+    kind: str
+    # 区切り文字を除いた生のテキスト（エスケープは解釈しない）
+    value: str
+    # 開始位置（line は 1 始まり、col は 0 始まり）
+    line: int
+    col: int
+    # 閉じた行（1 始まり。行をまたがなければ line と同じ）
+    end_line: int
+    # 同じ行で閉じた場合の終了位置（閉じ区切り文字の直後）。行をまたいだ場合は None
+    end_col: Optional[int]
+    # 開始行のテキスト（前後の文脈表示用）
+    line_text: str
+
+
+_WS = re.compile(r"[ \t\r\n\f\v\u00a0\ufeff]+")
+# コード中で状態遷移に関係しない文字の連続（識別子・演算子・括弧・空白）を一度に読み飛ばす
+_CODE_RUN = re.compile(r"[^'\"`/{}<]+")
+_DQ_BODY = re.compile(r'(?:[^"\\\n]|\\.)*')
+_SQ_BODY = re.compile(r"(?:[^'\\\n]|\\.)*")
+_TPL_BODY = re.compile(r"(?:[^`\\$]|\\[\s\S]|\$(?!\{))*")
+_REGEX_BODY = re.compile(r"(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\]?)*")
+_REGEX_FLAGS = re.compile(r"[a-z]*")
+# 開始タグ内のタグ名・属性名・空白・= の連続
+_JSX_TAG_RUN = re.compile(r"[\w$.:\-=\s\u0080-\uffff]+")
+_EXTENDS = re.compile(r"\bextends\b")
+_JSX_TEXT = re.compile(r"[^<{]+")
+
+# 直後に式（正規表現/JSX）が来うるキーワード
+_EXPR_KEYWORDS = frozenset({
+    "return", "typeof", "instanceof", "in", "of", "new", "delete", "void",
+    "throw", "case", "do", "else", "yield", "await",
+})
+
+# スタックフレーム種別
+_CODE = "code"
+_TPL = "template"
+_JSX = "jsx"
+
+
+class _Frame:
+    __slots__ = ("kind", "braces", "closer", "mode", "depth", "quote")
+
+    def __init__(self, kind: str, closer: Optional[str] = None):
+        self.kind = kind
+        # code: 入れ子の { の数 / closer: 対応する } でどこへ戻るか (_TPL / _JSX / None)
+        self.braces = 0
+        self.closer = closer
+        # jsx: "tag" | "children" | "close" / depth: 開いている要素数
+        self.mode = "tag"
+        self.depth = 0
+        # jsx: 属性文字列の引用符（行をまたぐ場合）
+        self.quote = ""
+
+
+class TsLexer:
+    """
+    行単位で feed する字句解析器
+
+    使い方:
+        lexer = TsLexer(jsx=True)
+        for line in f:               # 改行付きの行
+            for tok in lexer.feed(line):
+                ...
+        tokens_at_eof = lexer.close()
+    """
+
+    def __init__(self, jsx: bool = True):
+        self.jsx = jsx
+        self.stack: List[_Frame] = [_Frame(_CODE)]
+        self.lineno = 0
+        self.expr_allowed = True
+        # 行をまたいで継続中のトークン（文字列/テンプレート/JSX テキスト）
+        self._buf: List[str] = []
+        self._buf_kind = ""
+        self._buf_line = 0
+        self._buf_col = 0
+        self._buf_text = ""
+        self._string_quote = ""
+        self._in_block_comment = False
+
+    # ---- トークン組み立て ------------------------------------------------
+
+    def _open(self, kind: str, col: int, line_text: str) -> None:
+        self._buf = []
+        self._buf_kind = kind
+        self._buf_line = self.lineno
+        self._buf_col = col
+        self._buf_text = line_text
+
+    def _emit(self, out: List[Token], end_col: Optional[int]) -> None:
+        value = "".join(self._buf)
+        if self._buf_line != self.lineno:
+            end_col = None
+        if value:
+            out.append(Token(self._buf_kind, value, self._buf_line, self._buf_col, self.lineno, end_col, self._buf_text))
+        self._buf = []
+        self._buf_kind = ""
+
+    # ---- 公開 API ---------------------------------------------------------
+
+    def feed(self, line: str) -> List[Token]:
+        """1 行（改行込み）を処理し、この行で確定したトークンを返す"""
+        self.lineno += 1
+        out: List[Token] = []
+        i = 0
+        n = len(line)
+        while i < n:
+            if self._in_block_comment:
+                end = line.find("*/", i)
+                if end < 0:
+                    break
+                self._in_block_comment = False
+                i = end + 2
+                continue
+            if self._buf_kind == STRING and self._string_quote:
+                i = self._scan_string(line, i, out)
+                continue
+            frame = self.stack[-1]
+            if frame.kind == _TPL:
+                i = self._scan_template(line, i, out)
+            elif frame.kind == _JSX:
+                i = self._scan_jsx(frame, line, i, out)
+            else:
+                i = self._scan_code(frame, line, i, out)
+        return out
+
+    def close(self) -> List[Token]:
+        """EOF で未終端のトークンを確定させる"""
+        out: List[Token] = []
+        if self._buf_kind:
+            self._emit(out, None)
+        return out
+
+    # ---- モード別の走査 ---------------------------------------------------
+
+    def _scan_code(self, frame: _Frame, line: str, i: int, out: List[Token]) -> int:
+        m = _CODE_RUN.match(line, i)
+        if m:
+            self._after_run(line, i, m.end())
+            return m.end()
+        c = line[i]
+        if c == "/":
+            nxt = line[i + 1:i + 2]
+            if nxt == "/":
+                return len(line)
+            if nxt == "*":
+                end = line.find("*/", i + 2)
+                if end < 0:
+                    self._in_block_comment = True
+                    return len(line)
+                return end + 2
+            if self.expr_allowed:
+                # 正規表現リテラル（行内で閉じなければ行末まで）
+                j = _REGEX_BODY.match(line, i + 1).end()
+                if j < len(line) and line[j] == "/":
+                    j = _REGEX_FLAGS.match(line, j + 1).end()
+                self.expr_allowed = False
+                return j
+            self.expr_allowed = True
+            return i + 1
+        if c == '"' or c == "'":
+            self._open(STRING, i, line)
+            self._string_quote = c
+            return self._scan_string(line, i + 1, out)
+        if c == "`":
+            self.stack.append(_Frame(_TPL))
+            self._open(TEMPLATE, i, line)
+            return i + 1
+        if c == "{":
+            frame.braces += 1
+            self.expr_allowed = True
+            return i + 1
+        if c == "}":
+            if frame.braces == 0 and frame.closer is not None:
+                self.stack.pop()
+                if frame.closer == _TPL:
+                    self._open(TEMPLATE, i, line)
+                return i + 1
+            frame.braces = max(0, frame.braces - 1)
+            self.expr_allowed = True
+            return i + 1
+        # c == "<"
+        if self.jsx and self.expr_allowed and self._jsx_starts(line, i + 1):
+            self.stack.append(_Frame(_JSX))
+            return i + 1
+        self.expr_allowed = True
+        return i + 1
+
+    def _after_run(self, line: str, start: int, end: int) -> None:
+        """読み飛ばした区間の最後の字句から、次に式（正規表現/JSX）が来うるかを判定"""
+        k = end
+        while k > start and line[k - 1].isspace():
+            k -= 1
+        if k == start:
+            return
+        c = line[k - 1]
+        if c.isalnum() or c == "_" or c == "$":
+            w = k - 1
+            while w > start and (line[w - 1].isalnum() or line[w - 1] in "_$"):
+                w -= 1
+            self.expr_allowed = line[w:k] in _EXPR_KEYWORDS
+        else:
+            self.expr_allowed = c not in ")]"
+
+    @staticmethod
+    def _jsx_starts(line: str, j: int) -> bool:
+        # `<div` `<Foo.Bar` `<>` のみ JSX とみなす（`< 3` などは除外）
+        if j >= len(line):
+            return False
+        c = line[j]
+        return c == ">" or c.isalpha() or c == "_"
+
+    def _scan_string(self, line: str, i: int, out: List[Token]) -> int:
+        quote = self._string_quote
+        body = _DQ_BODY if quote == '"' else _SQ_BODY
+        j = body.match(line, i).end()
+        if j < len(line) and line[j] == quote:
+            self._buf.append(line[i:j])
+            self._string_quote = ""
+            self._emit(out, j + 1)
+            self.expr_allowed = False
+            return j + 1
+        if line.endswith("\\\n", i) or line.endswith("\\\r\n", i):
+            # 行継続（\ + 改行）は次の行へ持ち越す
+            self._buf.append(line[i:j].rstrip("\r\n\\"))
+            return len(line)
+        # 未終端の文字列は行末で打ち切る（構文エラーでも走査を続ける）
+        self._buf.append(line[i:j].rstrip("\r\n"))
+        self._string_quote = ""
+        self._emit(out, None)
+        self.expr_allowed = False
+        return len(line)
+
+    def _scan_template(self, line: str, i: int, out: List[Token]) -> int:
+        # チャンクは ` または } の直後から始まる（_open 済み）
+        j = _TPL_BODY.match(line, i).end()
+        if j > i:
+            self._buf.append(line[i:j])
+        if j >= len(line):
+            return j
+        c = line[j]
+        if c == "`":
+            self.stack.pop()
+            self._emit(out, j + 1)
+            self.expr_allowed = False
+            return j + 1
+        if c == "$":
+            # ${ ... } の式部分へ
+            self._emit(out, j)
+            self.stack.append(_Frame(_CODE, closer=_TPL))
+            self.expr_allowed = True
+            return j + 2
+        # 行末の孤立したバックスラッシュ
+        self._buf.append(c)
+        return j + 1
+
+    def _scan_jsx(self, frame: _Frame, line: str, i: int, out: List[Token]) -> int:
+        if frame.mode == "children":
+            return self._scan_jsx_children(frame, line, i, out)
+        if frame.mode == "close":
+            end = line.find(">", i)
+            if end < 0:
+                return len(line)
+            frame.depth -= 1
+            self._leave_element(frame)
+            return end + 1
+
+        # 開始タグ内（タグ名・属性）
+        if frame.quote:
+            return self._scan_jsx_attr_string(frame, line, i, out)
+        m = _JSX_TAG_RUN.match(line, i)
+        if m:
+            if frame.depth == 0 and _EXTENDS.search(m.group()):
+                # `<T extends X>(...) =>` はジェネリクス
+                self.stack.pop()
+                self.expr_allowed = True
+            return m.end()
+        c = line[i]
+        if c == '"' or c == "'":
+            frame.quote = c
+            self._open(STRING, i, line)
+            return self._scan_jsx_attr_string(frame, line, i + 1, out)
+        if c == "{":
+            self.stack.append(_Frame(_CODE, closer=_JSX))
+            self.expr_allowed = True
+            return i + 1
+        if c == "/" and line[i + 1:i + 2] == ">":
+            self._leave_element(frame)
+            return i + 2
+        if c == ">":
+            frame.depth += 1
+            frame.mode = "children"
+            return i + 1
+        if frame.depth > 0:
+            # 入れ子の要素内では読み飛ばす
+            return i + 1
+        # JSX としては不正な文字（ジェネリクス `<T,>` など）→ コードに戻す
+        self.stack.pop()
+        self.expr_allowed = True
+        return i
+
+    def _scan_jsx_attr_string(self, frame: _Frame, line: str, i: int, out: List[Token]) -> int:
+        # JSX 属性値はエスケープ無しで、行をまたげる
+        end = line.find(frame.quote, i)
+        if end < 0:
+            self._buf.append(line[i:])
+            return len(line)
+        self._buf.append(line[i:end])
+        frame.quote = ""
+        self._emit(out, end + 1)
+        return end + 1
+
+    def _scan_jsx_children(self, frame: _Frame, line: str, i: int, out: List[Token]) -> int:
+        if not self._buf_kind:
+            m = _WS.match(line, i)
+            if m:
+                return m.end()
+        c = line[i]
+        if c == "{":
+            self._flush_jsx_text(out, i)
+            self.stack.append(_Frame(_CODE, closer=_JSX))
+            self.expr_allowed = True
+            return i + 1
+        if c == "<":
+            self._flush_jsx_text(out, i)
+            if line[i + 1:i + 2] == "/":
+                frame.mode = "close"
+                return i + 2
+            frame.mode = "tag"
+            return i + 1
+        j = _JSX_TEXT.match(line, i).end()
+        if not self._buf_kind:
+            self._open(JSX_TEXT, i, line)
+        self._buf.append(line[i:j])
+        return j
+
+    def _flush_jsx_text(self, out: List[Token], end_col: int) -> None:
+        if self._buf_kind == JSX_TEXT:
+            self._buf = ["".join(self._buf).rstrip()]
+            self._emit(out, end_col)
+
+    def _leave_element(self, frame: _Frame) -> None:
+        """要素を 1 つ閉じた後の遷移（最外の要素ならコードへ戻る）"""
+        if frame.depth == 0:
+            self.stack.pop()
+            self.expr_allowed = False
+        else:
+            frame.mode = "children"
+
+
+def iter_lines(source: str) -> Iterator[str]:
+    """改行を残したまま "\\n" で分割（ファイルを行単位で読むのと同じ行番号になる）"""
+    start = 0
+    while True:
+        end = source.find("\n", start)
+        if end < 0:
+            if start < len(source):
+                yield source[start:]
+            return
+        yield source[start:end + 1]
+        start = end + 1
+
+
+def tokenize_lines(lines: Iterable[str], jsx: bool = True) -> Iterator[Token]:
+    """行のイテラブルをトークン列に変換（ファイルを丸ごと読まずに済む）"""
+    lexer = TsLexer(jsx=jsx)
+    for line in lines:
+        yield from lexer.feed(line)
+    yield from lexer.close()
+
+
+def tokenize(source: str, jsx: bool = True) -> Iterator[Token]:
+    """ソース文字列全体をトークン列に変換"""
+    return tokenize_lines(iter_lines(source), jsx=jsx)
+
+
+# コメント / 文字列 / テンプレートリテラル（mask_source 用。正規表現リテラルは考慮しない）
+_MASK_TARGETS = re.compile(
+    r"//[^\n]*|/\*.*?\*/|'(?:[^'\\\n]|\\.)*'|\"(?:[^\"\\\n]|\\.)*\"|`(?:[^`\\]|\\.)*`",
+    re.S,
+)
+_NOT_NEWLINE = re.compile(r"[^\n]")
+
+
+def _mask_match(m: "re.Match[str]") -> str:
+    s = m.group(0)
+    if s[0] == "/":
+        return _NOT_NEWLINE.sub(" ", s)
+    return s[0] + _NOT_NEWLINE.sub(" ", s[1:-1]) + s[-1]
+
+
+def mask_source(source: str) -> str:
+    """
+    コメントを空白に、文字列・テンプレートの中身を空白に置き換えた同じ長さのテキスト
+
+    括弧の対応付けや構文の検索をマスク後のテキストで行い、値は同じ位置の元テキストから読むために使う。
+    """
+    return _MASK_TARGETS.sub(_mask_match, source)
+
+
+def find_closing(masked: str, open_index: int) -> int:
+    """masked[open_index] の開き括弧に対応する閉じ括弧の位置（見つからなければ末尾）"""
+    depth = 0
+    for i in range(open_index, len(masked)):
+        c = masked[i]
+        if c in "([{":
+            depth += 1
+        elif c in ")]}":
+            depth -= 1
+            if depth == 0:
+                return i
+    return len(masked) - 1
@@ -0,0 +1,325 @@
+# -*- coding: utf-8 -*-
+"""
+TypeORM エンティティ（*.entity.ts）の解析ユーティリティ
+- デコレータを括弧の対応で切り出す（複数行の @Column({ ... }) や入れ子の括弧・オブジェクト引数に対応）
+- オブジェクト引数はトップレベルの key: value に分解し、単純なリテラルは値に変換
+- クラス本体の範囲内のプロパティだけをカラム / リレーションとして扱う
+- ファイル単位の解析結果を内容ハッシュ付きでキャッシュし（ScanCache）、未変更ファイルは読み直さない
+- キャッシュに無いファイルはプロセスプールで並列に解析
+"""
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .batch_runner import iter_batched
+from .scan_cache import DEFAULT_CACHE_DIR, ScanCache
+from .source_reader import read_source_text
+from .ts_lexer import find_closing, mask_source
+
+# 解析結果の形や規則を変えたら上げる（キャッシュ済みの結果を破棄させる）
+TYPEORM_PARSER_VERSION = 1
+TYPEORM_CACHE_PATH = DEFAULT_CACHE_DIR / "typeorm-entities.json"
+
+COLUMN_DECORATORS = frozenset({
+    "Column", "PrimaryColumn", "PrimaryGeneratedColumn", "CreateDateColumn", "UpdateDateColumn",
+    "DeleteDateColumn", "VersionColumn", "ObjectIdColumn", "ViewColumn",
+})
+RELATION_DECORATORS = frozenset({"OneToMany", "ManyToOne", "OneToOne", "ManyToMany"})
+
+_DECORATOR = re.compile(r"@([A-Za-z_$][\w$]*(?:\.[A-Za-z_$][\w$]*)*)\s*")
+_NEXT_DECORATOR = re.compile(r"\s*@")
+_CLASS = re.compile(r"\s*(?:export\s+)?(?:default\s+)?(?:abstract\s+)?class\s+([A-Za-z_$][\w$]*)[^{]*\{")
+_PROPERTY = re.compile(
+    r"\s*(?:(?:public|private|protected|readonly|declare|static|override)\s+)*([A-Za-z_$][\w$]*)\s*([!?])?\s*:\s*"
+)
+_OBJECT_KEY = re.compile(r"\s*(?:([A-Za-z_$][\w$]*)|(['\"])(.*?)\2)\s*(?::\s*)?", re.S)
+_ARROW_TARGET = re.compile(r"=>\s*\(?\s*([A-Za-z_$][\w$]*)")
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?$")
+
+
+# ---------------------------------------------------------------------------
+# デコレータと引数
+# ---------------------------------------------------------------------------
+
+def _split_top_level(masked: str, text: str, start: int, end: int) -> List[str]:
+    """masked[start:end] をトップレベルのカンマで分割し、対応する元テキストを返す"""
+    parts: List[str] = []
+    depth = 0
+    begin = start
+    for i in range(start, end):
+        c = masked[i]
+        if c in "([{":
+            depth += 1
+        elif c in ")]}":
+            depth -= 1
+        elif c == "," and depth == 0:
+            parts.append(text[begin:i].strip())
+            begin = i + 1
+    tail = text[begin:end].strip()
+    if tail:
+        parts.append(tail)
+    return parts
+
+
+def literal_value(raw: str) -> Any:
+    """'varchar' / true / 255 のような単純なリテラルは値に、それ以外（式）は元テキストのまま返す"""
+    raw = raw.strip()
+    if len(raw) >= 2 and raw[0] == raw[-1] and raw[0] in "'\"`" and "${" not in raw:
+        return raw[1:-1]
+    if raw in ("true", "false"):
+        return raw == "true"
+    if raw == "null":
+        return None
+    if _NUMBER.match(raw):
+        return float(raw) if "." in raw else int(raw)
+    return raw
+
+
+def parse_object_literal(raw: str) -> Dict[str, Any]:
+    """{ key: value, ... } をトップレベルのキーで分解（値は literal_value、入れ子のオブジェクトも再帰的に）"""
+    masked = mask_source(raw)
+    open_index = masked.find("{")
+    if open_index < 0:
+        return {}
+    close = find_closing(masked, open_index)
+    result: Dict[str, Any] = {}
+    for part in _split_top_level(masked, raw, open_index + 1, close):
+        m = _OBJECT_KEY.match(part)
+        if not m or (m.group(1) is None and m.group(3) is None):
+            continue
+        key = m.group(1) if m.group(1) is not None else m.group(3)
+        value = part[m.end():].strip()
+        if not value:
+            # { nullable } のような省略記法
+            result[key] = key
+        elif value.startswith("{"):
+            result[key] = parse_object_literal(value)
+        else:
+            result[key] = literal_value(value)
+    return result
+
+
+def _decorator(masked: str, text: str, m: "re.Match[str]") -> Tuple[Dict[str, Any], int]:
+    """@Name / @Name(args) を読み、(デコレータ, 終端位置) を返す"""
+    name = m.group(1)
+    end = m.end()
+    args: List[str] = []
+    if end < len(masked) and masked[end] == "(":
+        close = find_closing(masked, end)
+        args = _split_top_level(masked, text, end + 1, close)
+        raw = text[m.start():close + 1]
+        end = close + 1
+    else:
+        raw = text[m.start():m.end()].rstrip()
+    options: Dict[str, Any] = {}
+    for arg in args:
+        if arg.startswith("{"):
+            options.update(parse_object_literal(arg))
+    return {"name": name, "args": args, "options": options, "raw": raw}, end
+
+
+def _property_type(masked: str, text: str, start: int) -> Tuple[str, int]:
+    """プロパティの型注釈（; / = / 改行まで。<> や括弧の中は読み進める）"""
+    depth = 0
+    i = start
+    while i < len(masked):
+        c = masked[i]
+        if c in "([{<":
+            depth += 1
+        elif c in ")]}>":
+            if depth == 0:
+                break
+            depth -= 1
+        elif depth == 0 and (c in ";=" or c == "\n"):
+            break
+        i += 1
+    return text[start:i].strip(), i
+
+
+# ---------------------------------------------------------------------------
+# エンティティ
+# ---------------------------------------------------------------------------
+
+def _member_from(
+    decorators: List[Dict[str, Any]],
+    name: str,
+    ts_type: str,
+    optional: bool,
+) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """プロパティに付いたデコレータから ("column" | "relation" | "other" | "", 情報) を作る"""
+    names = [d["name"] for d in decorators]
+    extra = [d["raw"] for d in decorators]
+    for decorator in decorators:
+        if decorator["name"] in COLUMN_DECORATORS:
+            options = decorator["options"]
+            first = literal_value(decorator["args"][0]) if decorator["args"] else None
+            column_type = first if isinstance(first, str) and not decorator["args"][0].startswith("{") else options.get("type")
+            return "column", {
+                "name": name,
+                "type": ts_type,
+                "decorator": f"@{decorator['name']}",
+                "column_type": column_type if isinstance(column_type, str) else None,
+                "primary": decorator["name"].startswith("Primary") or options.get("primary") is True,
+                "nullable": options.get("nullable") is True or optional,
+                "options": options,
+                "decorators": extra,
+            }
+        if decorator["name"] in RELATION_DECORATORS:
+            args = decorator["args"]
+            target = _ARROW_TARGET.search(args[0]) if args else None
+            inverse = args[1] if len(args) > 1 and not args[1].startswith("{") else None
+            join = next((d for d in decorators if d["name"] in ("JoinColumn", "JoinTable")), None)
+            return "relation", {
+                "name": name,
+                "type": ts_type,
+                "decorator": f"@{decorator['name']}",
+                "target": target.group(1) if target else None,
+                "inverse_side": inverse,
+                "options": decorator["options"],
+                "join": {"decorator": f"@{join['name']}", "options": join["options"]} if join else None,
+                "decorators": extra,
+            }
+    if "Index" in names or "RelationId" in names:
+        return "other", {"name": name, "type": ts_type, "decorators": extra}
+    return "", None
+
+
+def _parse_class_body(masked: str, text: str, start: int, end: int, entity: Dict[str, Any]) -> None:
+    pending: List[Dict[str, Any]] = []
+    pos = start
+    while pos < end:
+        m = _DECORATOR.search(masked, pos, end)
+        if not m:
+            return
+        # 前のデコレータとの間にメンバが挟まっていたら、そのデコレータ群は捨てる（メソッドなど）
+        if pending and masked[pos:m.start()].strip():
+            pending = []
+        decorator, pos = _decorator(masked, text, m)
+        pending.append(decorator)
+        if _NEXT_DECORATOR.match(masked, pos):
+            continue
+        prop = _PROPERTY.match(masked, pos)
+        if not prop:
+            pending = []
+            continue
+        ts_type, pos = _property_type(masked, text, prop.end())
+        kind, member = _member_from(pending, prop.group(1), ts_type, prop.group(2) == "?")
+        pending = []
+        if kind == "column":
+            entity["columns"].append(member)
+        elif kind == "relation":
+            entity["relations"].append(member)
+        elif kind == "other":
+            entity["other_members"].append(member)
+
+
+def parse_typeorm_source(text: str) -> List[Dict[str, Any]]:
+    """
+    ソース中のデコレータ付きクラスを全て解析
+
+    Returns:
+        [{
+            "name": "User", "table": "users",
+            "columns": [{"name", "type", "decorator", "column_type", "primary", "nullable", "options", "decorators"}, ...],
+            "relations": [{"name", "type", "decorator", "target", "inverse_side", "options", "join", "decorators"}, ...],
+            "indices": [{"raw", "args", "options"}, ...],   # クラスに付いた @Index / @Unique
+            "other_members": [...],                          # @Index / @RelationId だけのプロパティ
+            "is_entity": bool,
+        }, ...]
+    """
+    masked = mask_source(text)
+    entities: List[Dict[str, Any]] = []
+    pending: List[Dict[str, Any]] = []
+    pos = 0
+    while True:
+        m = _DECORATOR.search(masked, pos)
+        if m is None:
+            return entities
+        if pending and masked[pos:m.start()].strip():
+            pending = []
+        decorator, pos = _decorator(masked, text, m)
+        pending.append(decorator)
+        if _NEXT_DECORATOR.match(masked, pos):
+            continue
+        class_match = _CLASS.match(masked, pos)
+        if class_match is None:
+            # クラスに付かないデコレータ（デコレータの無いクラスのプロパティなど）は読み捨てる
+            pending = []
+            continue
+        body_open = class_match.end() - 1
+        body_close = find_closing(masked, body_open)
+        entity_decorator = next((d for d in pending if d["name"] in ("Entity", "ViewEntity", "ChildEntity")), None)
+        table = ""
+        if entity_decorator:
+            first = literal_value(entity_decorator["args"][0]) if entity_decorator["args"] else None
+            table = first if isinstance(first, str) and not entity_decorator["args"][0].startswith("{") else ""
+            table = table or entity_decorator["options"].get("name") or ""
+        entity: Dict[str, Any] = {
+            "name": class_match.group(1),
+            "table": table if isinstance(table, str) else "",
+            "columns": [],
+            "relations": [],
+            "indices": [
+                {"raw": d["raw"], "args": d["args"], "options": d["options"]}
+                for d in pending if d["name"] in ("Index", "Unique")
+            ],
+            "other_members": [],
+            "is_entity": entity_decorator is not None,
+        }
+        _parse_class_body(masked, text, body_open + 1, body_close, entity)
+        entities.append(entity)
+        pending = []
+        pos = body_close + 1
+
+
+def parse_typeorm_entity(entity_path: Path) -> Dict[str, Any]:
+    """
+    TypeORM エンティティファイルを解析（@Entity の付いた最初のクラス。無ければ最初のデコレータ付きクラス）
+
+    Returns:
+        parse_typeorm_source の 1 要素（該当クラスが無ければ name / table が空の結果）
+    """
+    empty = {"name": "", "table": "", "columns": [], "relations": [], "indices": [], "other_members": [], "is_entity": False}
+    if not entity_path.exists():
+        return empty
+    # エンティティは 1 クラス分の小さいファイルなので一括で読む（デコレータが複数行にまたがるため）
+    entities = parse_typeorm_source(read_source_text(entity_path))
+    return next((e for e in entities if e["is_entity"]), entities[0] if entities else empty)
+
+
+# ---------------------------------------------------------------------------
+# 並列化とキャッシュ
+# ---------------------------------------------------------------------------
+
+def load_typeorm_cache(path: Optional[Path] = None) -> ScanCache:
+    """エンティティ解析結果の永続キャッシュを読み込む"""
+    return ScanCache.load(path or TYPEORM_CACHE_PATH, f"typeorm-{TYPEORM_PARSER_VERSION}")
+
+
+def iter_typeorm_entities(
+    paths: List[Path],
+    jobs: int = 1,
+    cache: Optional[ScanCache] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    複数のエンティティファイルを解析し、入力順に parse_typeorm_entity の結果を解析が終わり次第返す
+
+    Args:
+        jobs: 並列プロセス数 (1 = 逐次, 0 以下 = CPU 数)
+        cache: 指定時、内容が変わっていないファイルは前回の結果を使う（呼び出し側で save する）
+    """
+    keys = [str(path) for path in paths]
+    if cache is not None:
+        cache.prune(keys)
+    return iter_batched(paths, parse_typeorm_entity, jobs, cache, keys)
+
+
+def parse_typeorm_entities(
+    paths: List[Path],
+    jobs: int = 1,
+    cache: Optional[ScanCache] = None,
+) -> List[Dict[str, Any]]:
+    """iter_typeorm_entities の結果を入力順のリストで返す"""
+    return list(iter_typeorm_entities(paths, jobs, cache))